@@ -1,22 +1,68 @@
 import os as _os
-import imp as _imp
+import sys as _sys
+import importlib as _importlib
 
 _HOME = _os.environ.get('HOME')
 
+def _load_source(name, path):
+    """
+    Import (or re-import) a module from the file `path`.
+    """
+    try:
+        from importlib.util import spec_from_file_location, module_from_spec
+    except ImportError:
+        import imp as _imp
+        return _imp.load_source(name, path)
+
+    spec = spec_from_file_location(name, path)
+    mod = module_from_spec(spec)
+    _sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+
+    return mod
+
 # Load custom defaults    
 if _os.path.exists('{!s}/.ares/defaults.py'.format(_HOME)):
-    (_f, _filename, _data) =\
-        _imp.find_module('defaults', ['{!s}/.ares/'.format(_HOME)])
-    rcParams = _imp.load_module('defaults.py', _f, _filename, _data).pf
+    rcParams = _load_source('defaults.py', 
+        '{!s}/.ares/defaults.py'.format(_HOME)).pf
 else:
     rcParams = {}
 
-import ares.physics
-import ares.util
-import ares.analysis
-import ares.sources
-import ares.populations
-import ares.static
-import ares.solvers
-import ares.simulations
-import ares.inference
+# Sub-packages are imported the first time they're accessed, e.g., 
+# `ares.physics`, so that `import ares` is cheap for short-lived workers,
+# and plotting stuff stays out of the way unless it's actually used.
+_subpackages = ['physics', 'util', 'analysis', 'sources', 'populations', 
+    'phenom', 'static', 'solvers', 'simulations', 'inference']
+
+def _import_submodule(package, name):
+    """
+    Import `package.name` if it exists, otherwise raise AttributeError.
+    
+    Used by sub-packages so that, e.g., `ares.util.Stats` works even though
+    nothing has imported it yet.
+    """
+    from importlib.util import find_spec
+    
+    if not name.startswith('_'):
+        full = '{}.{}'.format(package, name)
+        if full in _sys.modules:
+            return _sys.modules[full]
+        elif find_spec(full) is not None:
+            return _importlib.import_module(full)
+    
+    raise AttributeError("module {!r} has no attribute {!r}".format(package,
+        name))
+
+def __getattr__(name):
+    if name in _subpackages:
+        return _importlib.import_module('{}.{}'.format(__name__, name))
+
+    return _import_submodule(__name__, name)
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(_subpackages))
+
+# Module-level __getattr__ requires Python 3.7+.
+if _sys.version_info < (3, 7):
+    for _name in _subpackages:
+        _importlib.import_module('{}.{}'.format(__name__, _name))
@@ -12,12 +12,15 @@ Description:
 
 import os
 import re
+import sys
 import glob
+import pickle
 import numpy as np
 from inspect import ismethod
 from types import FunctionType
 from scipy.interpolate import RectBivariateSpline, interp1d
 from ..util.Pickling import read_pickle_file, write_pickle_file
+from ..util.Timer import get_timing
 try:
     # this runs with no issues in python 2 but raises error in python 3
     basestring
@@ -116,6 +119,10 @@ class BlobFactory(object):
         blob_ivars
         blob_funcs
         
+    Optionally, ``blob_vectorized`` flags the blob functions that accept 
+    arrays for all of their independent variables at once, in which case
+    each such blob is computed with a single call (see _generate_blobs).
+        
     """
     
     #def __del__(self):
@@ -381,6 +388,40 @@ class BlobFactory(object):
         if not hasattr(self, '_blob_kwargs'):
             self._parse_blobs()
         return self._blob_kwargs    
+        
+    @property
+    def blob_vectorized(self):
+        """
+        For each blob group, a list of booleans (one per blob) indicating 
+        whether the blob function can be evaluated on arrays of all 
+        independent variables at once.
+        
+        Set via the ``blob_vectorized`` parameter, which has one element per
+        blob group: either None (not vectorized), a single boolean for the 
+        whole group, or a list of booleans, one per blob.
+        """
+        if not hasattr(self, '_blob_vectorized'):
+            try:
+                raw = self.pf['blob_vectorized']
+            except (KeyError, TypeError):
+                raw = None
+            
+            self._blob_vectorized = []
+            for i, element in enumerate(self.blob_names):
+                if (raw is None) or (raw[i] is None):
+                    flags = [False] * len(element)
+                elif type(raw[i]) in [list, tuple]:
+                    assert len(raw[i]) == len(element), \
+                        "blob_names must have same length as blob_vectorized!"
+                    flags = [bool(flag) for flag in raw[i]]
+                else:
+                    flags = [bool(raw[i])] * len(element)
+                
+                self._blob_vectorized.append(flags)
+                
+            self._blob_vectorized = tuple(self._blob_vectorized)
+            
+        return self._blob_vectorized
     
     @property
     def blobs(self):
@@ -595,8 +636,15 @@ class BlobFactory(object):
                                     _kw = kw.copy()
                                     _kw.update({xn:xx})
                                     return func(**_kw)
+                                
+                                if self.blob_vectorized[i][j]:
+                                    blob = self._call_vectorized(func, kw,
+                                        {xn: x}, x.shape)
+                                else:
+                                    blob = None
                                     
-                                blob = np.array([func_kw(xx) for xx in x])
+                                if blob is None:    
+                                    blob = np.array([func_kw(xx) for xx in x])
                                                                 
                             except TypeError:
                                 blob = np.array(list(map(func, x)))
@@ -622,6 +670,21 @@ class BlobFactory(object):
                         raise TypeError('Sorry: don\'t understand blob {!s}'.format(key))
                                       
                     xn, yn = self.blob_ivarn[i]
+                    
+                    # Evaluate on the full (x, y) grid in one go if possible
+                    if self.blob_vectorized[i][j]:
+                        if self.blob_kwargs[i] is not None:
+                            kw = self.blob_kwargs[i][j]
+                        else:
+                            kw = {}
+                        
+                        blob = self._call_vectorized(func, kw, 
+                            {xn: xarr[:,None], yn: yarr[None,:]}, 
+                            (xarr.size, yarr.size))
+                            
+                        if blob is not None:
+                            this_group.append(blob)
+                            continue
                                                             
                     blob = []
                     # We're assuming that the functions are vectorized.
@@ -650,6 +713,61 @@ class BlobFactory(object):
                                 
             self._blobs.append(np.array(this_group))
             
+    def _call_vectorized(self, func, kw, ivars, shape):
+        """
+        Evaluate a blob function for all values of its independent variables
+        with a single call.
+        
+        Parameters
+        ----------
+        func : callable
+            Blob function.
+        kw : dict
+            Additional keyword arguments for `func` (can be None).
+        ivars : dict
+            Independent variable names and (broadcastable) arrays of values.
+        shape : tuple
+            Expected shape of the result.
+            
+        Returns
+        -------
+        Array with shape `shape`, or None if `func` doesn't handle arrays, in
+        which case the caller should fall back to evaluating element-wise.
+        
+        """
+        
+        _kw = {} if kw is None else kw.copy()
+        _kw.update(ivars)
+        
+        try:
+            result = np.asarray(func(**_kw))
+        except (TypeError, ValueError):
+            return None
+            
+        # Constants (i.e., blobs that aren't actually functions of the ivars)
+        # come back as scalars, but so do functions that reduce over their
+        # inputs (e.g., a sum or max). Only broadcast the result if `func`
+        # returns the same value for scalar ivars at either end of the grid.
+        if result.ndim == 0:
+            for k in [0, -1]:
+                for name, val in ivars.items():
+                    _kw[name] = np.asarray(val).flat[k]
+                    
+                try:
+                    check = np.asarray(func(**_kw))
+                except (TypeError, ValueError):
+                    return None
+                    
+                if not np.array_equal(check, result):
+                    return None
+                    
+            return result * np.ones(shape)
+            
+        if result.shape != tuple(shape):
+            return None
+            
+        return result
+            
     @property 
     def blob_data(self):
         if not hasattr(self, '_blob_data'):
@@ -660,6 +778,27 @@ class BlobFactory(object):
     def blob_data(self, value):
         self._blob_data.update(value)    
     
+    def get_timing(self, stage=None):
+        """
+        Wall-clock time spent in some stage of the most recent run.
+        
+        Parameters
+        ----------
+        stage : str
+            Name of a timer scope, e.g., 'hmf', 'rte', 'chemistry'. If None,
+            return total run time.
+        
+        See `ares.util.Timer` for more information. Can be used as a blob, 
+        e.g., blob_funcs=["get_timing('rte')"].
+        
+        """
+        
+        # Avoid hasattr, which might trigger __getattr__ in analysis classes
+        if 'timing' not in self.__dict__:
+            return 0.0
+        
+        return get_timing(self.__dict__['timing'], stage)
+    
     def get_blob_from_disk(self, name):
         return self.__getitem__(name)
     
@@ -705,55 +844,96 @@ class BlobFactory(object):
             i = self.blob_names.index(name)
             return None, None, self.blob_nd[i], self.blob_dims[i]
     
-    def _get_item(self, name):
+    def _blob_files(self, name):
+        """
+        Return list of files containing blob `name`, in order.
+        """
         
         i, j, nd, dims = self.blob_info(name)
     
         fn = "{0!s}.blob_{1}d.{2!s}.pkl".format(self.prefix, nd, name)
+        
+        if os.path.exists(fn):
+            return [fn]
                                 
         # Might have data split up among processors or checkpoints
-        by_proc = False
-        by_dd = False
-        if not os.path.exists(fn):
             
-            # First, look for processor-by-processor outputs
-            fn = "{0!s}.000.blob_{1}d.{2!s}.pkl".format(self.prefix, nd, name)
-            if os.path.exists(fn):
-                by_proc = True        
-                by_dd = False
-            # Then, those where each checkpoint has its own file    
-            else:
-                by_proc = False
-                by_dd = True
-                
-                search_for = "{0!s}.dd????.blob_{1}d.{2!s}.pkl".format(\
-                    self.prefix, nd, name)
-                _ddf = glob.glob(search_for)
-                        
-                if self.include_checkpoints is None:
-                    ddf = _ddf
-                else:
-                    ddf = []
-                    for dd in self.include_checkpoints:
-                        ddid = str(dd).zfill(4)
-                        tmp = "{0!s}.dd{1!s}.blob_{2}d.{3!s}.pkl".format(\
-                            self.prefix, ddid, nd, name)
-                        ddf.append(tmp)
-                             
-                # Need to put in order if we want to match up with
-                # chain etc.
-                ddf = np.sort(ddf)
+        # First, look for processor-by-processor outputs
+        fn = "{0!s}.000.blob_{1}d.{2!s}.pkl".format(self.prefix, nd, name)
+        if os.path.exists(fn):
+            fns = []
+            fid = 0
+            while os.path.exists(fn):
+                fns.append(fn)
+                fid += 1
+                fn = "{0!s}.{1!s}.blob_{2}d.{3!s}.pkl".format(self.prefix,\
+                    str(fid).zfill(3), nd, name)
+            return fns
+                    
+        # Then, those where each checkpoint has its own file    
+        search_for = "{0!s}.dd????.blob_{1}d.{2!s}.pkl".format(\
+            self.prefix, nd, name)
+        _ddf = glob.glob(search_for)
                 
-                # Start with the first
-                fn = ddf[0]
-                        
-        fid = 0
-        to_return = []
-        while True:
-            
+        if self.include_checkpoints is None:
+            ddf = _ddf
+        else:
+            ddf = []
+            for dd in self.include_checkpoints:
+                ddid = str(dd).zfill(4)
+                tmp = "{0!s}.dd{1!s}.blob_{2}d.{3!s}.pkl".format(\
+                    self.prefix, ddid, nd, name)
+                ddf.append(tmp)
+                     
+        # Need to put in order if we want to match up with
+        # chain etc.
+        fns = []
+        for fn in sorted(ddf):
             if not os.path.exists(fn):
                 break
+            fns.append(fn)
+            
+        if not fns:
+            raise IOError('No files found for blob={}.'.format(name))
+            
+        return fns
+        
+    def iter_blob_chunks(self, name):
+        """
+        Read blob `name` from disk one chunk (i.e., checkpoint) at a time.
+        
+        Useful for analyzing big chains without having every sample of the
+        blob in memory at once. Non-finite elements are NOT masked.
         
+        Returns
+        -------
+        Generator of arrays, each with shape (samples in chunk, blob dims).
+        
+        """
+        
+        # Already in memory
+        if name in self.blob_data:
+            yield self.blob_data[name].data
+            return
+        
+        for fn in self._blob_files(name):
+            with open(fn, 'rb') as f:
+                while True:
+                    try:
+                        if sys.version_info[0] < 3:
+                            data_chunk = pickle.load(f)
+                        else:
+                            data_chunk = pickle.load(f, encoding='latin1')
+                    except EOFError:
+                        break
+                        
+                    yield np.array(data_chunk, dtype=np.float64)
+    
+    def _get_item(self, name):
+        
+        to_return = []
+        for fn in self._blob_files(name):
+            
             all_data = []
             data_chunks = read_pickle_file(fn, nloads=None, verbose=False)
             for data_chunk in data_chunks:
@@ -766,20 +946,6 @@ class BlobFactory(object):
             # somehow it resolved itself.
             all_data = np.array(all_data, dtype=np.float64)
             to_return.extend(all_data)
-            
-            if not (by_proc or by_dd):
-                break
-                
-            fid += 1
-            
-            if by_proc:
-                fn = "{0!s}.{1!s}.blob_{2}d.{3!s}.pkl".format(self.prefix,\
-                    str(fid).zfill(3), nd, name)
-            else:
-                if (fid >= len(ddf)):
-                    break
-                    
-                fn = ddf[fid]
         
         mask = np.logical_not(np.isfinite(to_return))
         masked_data = np.ma.array(to_return, mask=mask)
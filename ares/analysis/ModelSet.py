@@ -13,6 +13,9 @@ Description: For analysis of MCMC fitting.
 import pickle
 import shutil
 import numpy as np
+import multiprocessing
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
 import matplotlib as mpl
 from ..util.Math import smooth
 import matplotlib.pyplot as pl
@@ -29,13 +32,15 @@ from ..util import labels as default_labels
 from ..util.Pickling import read_pickle_file, write_pickle_file
 import matplotlib.patches as patches
 from ..util.Aesthetics import Labeler
-from ..util.PrintInfo import print_model_set
+from ..util.PrintInfo import print_model_set, print_warning
 from .DerivedQuantities import DerivedQuantities as DQ
 from ..util.ParameterFile import count_populations, par_info
 from matplotlib.collections import PatchCollection, LineCollection
 from ..util.SetDefaultParameterValues import SetAllDefaults, TanhParameters
+from ..util.Caching import fingerprint
 from ..util.Stats import Gauss1D, GaussND, error_2D, _error_2D_crude, \
-    bin_e2c, correlation_matrix
+    bin_e2c, correlation_matrix, StreamingQuantiles, bin_all_pairs, \
+    smooth_fft
 from ..util.ReadData import concatenate, read_pickled_chain,\
     read_pickled_logL
 try:
@@ -90,6 +95,77 @@ numerical_types = [float, np.float64, np.float32, int, np.int32, np.int64]
 # Machine precision
 MP = np.finfo(float).eps
 
+# Binned PDFs kept by ModelSet.densities, least recently used dropped first.
+densities_max_bytes = 2**28
+
+# Set in each worker process when generating blobs in parallel.
+_worker_func = None
+
+def _init_worker(func):
+    global _worker_func
+    _worker_func = func
+
+def _chunk_worker(bounds):
+    return bounds, _worker_func(*bounds)
+
+def _code_desc(code):
+    # Nested code objects (lambdas, comprehensions) include their address
+    # in their repr, so describe those by their contents too.
+    consts = tuple([_code_desc(c) if hasattr(c, 'co_code') else c \
+        for c in code.co_consts])
+    return code.co_code, consts, code.co_names
+
+def _chunk_key(func, *args):
+    """
+    Identify a calculation done by ModelSet._run_in_chunks, i.e., the code
+    of `func` and whatever `args` it depends on, so that chunks left over
+    from some other calculation are never re-used.
+    """
+    code = getattr(func, '__code__', None)
+    if code is None:
+        desc = repr(func)
+    else:
+        desc = (getattr(func, '__module__', None), func.__name__,
+            _code_desc(code), getattr(func, '__defaults__', None))
+
+    return fingerprint(repr(desc), *args)
+
+def _read_chunks(fn, key=None, repair=False):
+    """
+    Read all (start, stop, result) records written by ModelSet._run_in_chunks.
+
+    Records from a different calculation, i.e., with a key other than `key`,
+    are ignored. So is a truncated last record (i.e., if we were killed
+    mid-write). If repair=True, these are removed from the file altogether,
+    so that we can safely append to it.
+    """
+
+    records = []
+    bad = False
+    with open(fn, 'rb') as f:
+        while True:
+            try:
+                record = pickle.load(f)
+            except EOFError:
+                break
+            except Exception:
+                # Anything can happen if the last record is incomplete.
+                bad = True
+                break
+
+            if (len(record) != 4) or (record[2] != key):
+                bad = True
+                continue
+
+            records.append(record)
+
+    if repair and bad:
+        with open(fn, 'wb') as f:
+            for record in records:
+                pickle.dump(record, f, protocol=2)
+
+    return [(start, stop, result) for (start, stop, _key, result) in records]
+
 def err_str(label, mu, err, log, labels=None):
     s = undo_mathify(make_label(label, log, labels))
 
@@ -1922,6 +1998,121 @@ class ModelSet(BlobFactory):
 
         return nu, levels
 
+    @property
+    def densities(self):
+        """
+        Cache of binned 1-D and 2-D PDFs, see `_bin_samples`.
+
+        Holds at most `densities_max_bytes` worth of histograms.
+        """
+        if not hasattr(self, '_densities'):
+            self._densities = OrderedDict()
+            self._densities_bytes = 0
+        return self._densities
+
+    def clear_densities(self):
+        """
+        Forget all binned PDFs, see `_bin_samples`.
+        """
+        self._densities = OrderedDict()
+        self._densities_bytes = 0
+
+    def _store_density(self, key, entry):
+        self.densities[key] = entry
+        self._densities_bytes += entry['hist'].nbytes
+
+        while (len(self._densities) > 1) \
+            and (self._densities_bytes > densities_max_bytes):
+            _, old = self._densities.popitem(last=False)
+            self._densities_bytes -= old['hist'].nbytes
+
+    def _sample_id(self, x):
+        """
+        Fingerprint of samples `x` (and their mask), see `_bin_samples`.
+        """
+        return fingerprint(np.ma.getdata(x), np.ma.getmaskarray(x))
+
+    def _bin_samples(self, data, bins, pairs=[], skip=0, stop=None,
+        smooth=None, ids=None):
+        """
+        Histogram samples in 1-D and in pairs of dimensions, all at once.
+
+        Results are cached (keyed by the data themselves, the bins, etc.), so
+        re-making a plot with different colors, contours, and so on requires
+        no new binning.
+
+        Parameters
+        ----------
+        data : list
+            Samples for each quantity. These will be sliced via [skip:stop].
+        bins : list
+            Bin edges for each quantity.
+        pairs : list
+            Pairs of indices (into `data`) for which we need 2-D PDFs.
+        smooth : int, float
+            If supplied, smooth PDFs with a Gaussian kernel of this width (in
+            units of bins), i.e., a binned kernel density estimate.
+        ids : list
+            Result of `_sample_id` for each element of `data`. Hashing the
+            samples is the slow part of looking up a cached PDF, so callers
+            that bin the same data repeatedly should compute these once.
+
+        Returns
+        -------
+        Tuple containing a list of cache entries for each quantity and a list
+        of cache entries for each pair. Each entry is a dictionary with the
+        histogram ('hist'), bin edges ('edges'), and dictionary of contour
+        levels ('levels', see `get_levels`).
+
+        """
+
+        if ids is None:
+            ids = [self._sample_id(x) for x in data]
+
+        fps = [fingerprint(_id, b, skip, stop) for _id, b in zip(ids, bins)]
+
+        keys1 = [(fp, smooth) for fp in fps]
+        keys2 = [(fps[i], fps[j], smooth) for (i, j) in pairs]
+
+        # Hold on to what we find, in case storing new entries evicts it.
+        found = {}
+        for key in keys1 + keys2:
+            if key in self.densities:
+                self.densities.move_to_end(key)
+                found[key] = self.densities[key]
+
+        todo = [pair for pair, key in zip(pairs, keys2) if key not in found]
+
+        if todo or any([key not in found for key in keys1]):
+            hist1d, hist2d = bin_all_pairs([x[skip:stop] for x in data],
+                bins, pairs=todo)
+
+            for k, key in enumerate(keys1):
+                if key in found:
+                    continue
+
+                hist = hist1d[k]
+                if smooth:
+                    hist = smooth_fft(hist, smooth)
+
+                found[key] = {'hist': hist, 'edges': [bins[k]], 'levels': {}}
+                self._store_density(key, found[key])
+
+            for (i, j) in todo:
+                hist = hist2d[(i, j)]
+                if smooth:
+                    hist = smooth_fft(hist, smooth)
+
+                for key, entry in \
+                    [((fps[i], fps[j], smooth), {'hist': hist,
+                        'edges': [bins[i], bins[j]], 'levels': {}}),
+                     ((fps[j], fps[i], smooth), {'hist': hist.T,
+                        'edges': [bins[j], bins[i]], 'levels': {}})]:
+                    found[key] = entry
+                    self._store_density(key, entry)
+
+        return [found[key] for key in keys1], [found[key] for key in keys2]
+
     def PruneSet(self, pars, bin_edges, N, ivar=None, take_log=False,
         un_log=False, multiplier=1.):
         """
@@ -2496,7 +2687,8 @@ class ModelSet(BlobFactory):
         multiplier=1., like=[0.95, 0.68], cdf=False,
         color_by_like=False, fill=True, take_log=False, un_log=False,
         bins=20, skip=0, skim=1,
-        contour_method='raw', excluded=False, stop=None, **kwargs):
+        contour_method='raw', excluded=False, stop=None, smooth=None,
+        sample_ids=None, **kwargs):
         """
         Compute posterior PDF for supplied parameters.
 
@@ -2531,6 +2723,14 @@ class ModelSet(BlobFactory):
         excluded : bool
             If True, and fill == True, fill the area *beyond* the given contour with
             cross-hatching, rather than the area interior to it.
+        smooth : int, float
+            If supplied, smooth the PDF with a Gaussian kernel of this width
+            (in units of bins) via FFT, i.e., a binned kernel density
+            estimate. Best used with finer bins than usual.
+        sample_ids : list
+            Fingerprints of the samples in `to_hist`, one per element of
+            `pars`, as computed by `_sample_id`. Saves re-hashing the
+            samples to look up cached PDFs.
 
         Returns
         -------
@@ -2586,20 +2786,32 @@ class ModelSet(BlobFactory):
         if len(pars) == 1:
 
             if type(to_hist) is dict:
-                tohist = to_hist[pars[0]][skip:stop]
+                tohist = to_hist[pars[0]]
                 b = binvec[pars[0]]
             elif type(to_hist) is list:
-                tohist = to_hist[0][skip:stop]
+                tohist = to_hist[0]
                 b = binvec[0]
             else:
-                tohist = to_hist[skip:stop]
+                tohist = to_hist
                 b = bins
 
-            if hasattr(tohist, 'compressed'):
-                tohist = tohist.compressed()
+            # Binned PDFs are cached, unless we have weights
+            if (weights is None) and (np.ndim(b) == 1):
+                (entry,), _ = self._bin_samples([tohist], [b], skip=skip,
+                    stop=stop, smooth=smooth, ids=sample_ids)
+
+                bin_edges = entry['edges'][0]
+                hist = entry['hist'] / np.diff(bin_edges) / entry['hist'].sum()
+            else:
+                tohist = tohist[skip:stop]
+                if hasattr(tohist, 'compressed'):
+                    tohist = tohist.compressed()
+
+                hist, bin_edges = \
+                    np.histogram(tohist, density=True, bins=b, weights=weights)
 
-            hist, bin_edges = \
-                np.histogram(tohist, density=True, bins=b, weights=weights)
+                if smooth:
+                    hist = smooth_fft(hist, smooth)
 
             bc = bin_e2c(bin_edges)
 
@@ -2617,24 +2829,40 @@ class ModelSet(BlobFactory):
         else:
 
             if type(to_hist) is dict:
-                tohist1 = to_hist[pars[0]][skip:stop]
-                tohist2 = to_hist[pars[1]][skip:stop]
+                tohist1 = to_hist[pars[0]]
+                tohist2 = to_hist[pars[1]]
                 b = [binvec[pars[0]], binvec[pars[1]]]
             else:
-                tohist1 = to_hist[0][skip:stop]
-                tohist2 = to_hist[1][skip:stop]
+                tohist1 = to_hist[0]
+                tohist2 = to_hist[1]
                 b = [binvec[0], binvec[1]]
 
-            # If each quantity has a different set of masked elements,
-            # we'll get an error at plot-time.
-            if hasattr(tohist1, 'compressed'):
-                tohist1 = tohist1.compressed()
-            if hasattr(tohist2, 'compressed'):
-                tohist2 = tohist2.compressed()
+            # Binned PDFs are cached, unless we have weights
+            if (weights is None) and (np.ndim(b[0]) == np.ndim(b[1]) == 1):
+                _, (entry,) = self._bin_samples([tohist1, tohist2], b,
+                    pairs=[(0, 1)], skip=skip, stop=stop, smooth=smooth,
+                    ids=sample_ids)
+
+                hist = entry['hist']
+                xedges, yedges = entry['edges']
+            else:
+                entry = None
+                tohist1 = tohist1[skip:stop]
+                tohist2 = tohist2[skip:stop]
+
+                # If each quantity has a different set of masked elements,
+                # we'll get an error at plot-time.
+                if hasattr(tohist1, 'compressed'):
+                    tohist1 = tohist1.compressed()
+                if hasattr(tohist2, 'compressed'):
+                    tohist2 = tohist2.compressed()
 
-            # Compute 2-D histogram
-            hist, xedges, yedges = \
-                np.histogram2d(tohist1, tohist2, bins=b, weights=weights)
+                # Compute 2-D histogram
+                hist, xedges, yedges = \
+                    np.histogram2d(tohist1, tohist2, bins=b, weights=weights)
+
+                if smooth:
+                    hist = smooth_fft(hist, smooth)
 
             hist = hist.T
 
@@ -2649,7 +2877,13 @@ class ModelSet(BlobFactory):
                 # Get likelihood contours (relative to peak) that enclose
                 # nu-% of the area
 
-                if contour_method == 'raw':
+                if (contour_method == 'raw') and (entry is not None):
+                    if tuple(like) not in entry['levels']:
+                        entry['levels'][tuple(like)] = error_2D(None, None,
+                            hist, None, nu=like, method='raw')
+
+                    nu, levels = entry['levels'][tuple(like)]
+                elif contour_method == 'raw':
                     nu, levels = error_2D(None, None, hist, None, nu=like,
                         method='raw')
                 else:
@@ -2935,7 +3169,7 @@ class ModelSet(BlobFactory):
         skip=0, skim=1, stop=None, oned=True, twod=True, fill=True,
         show_errors=False, label_panels=None, return_axes=False,
         fix=True, skip_panels=[], mp_kwargs={}, inputs_scatter=False,
-        input_marker='+',
+        input_marker='+', smooth=None,
         **kwargs):
         """
         Make an NxN panel plot showing 1-D and 2-D posterior PDFs.
@@ -2994,6 +3228,9 @@ class ModelSet(BlobFactory):
         polygons : bool
             If True, will just plot bounding polygons around samples rather
             than plotting the posterior PDF.
+        smooth : int, float
+            If supplied, smooth PDFs with a Gaussian kernel of this width (in
+            units of bins). See `PosteriorPDF`.
         mp_kwargs : dict
             panel_size : list, tuple (2 elements)
                 Multiplicative factor in (x, y) to be applied to the default
@@ -3035,6 +3272,23 @@ class ModelSet(BlobFactory):
         if polygons:
             oned = False
 
+        # Bin all pairs of quantities in one pass. PosteriorPDF will find
+        # the results in the cache, given the fingerprint of each quantity.
+        ids = [None] * len(pars)
+        if not (scatter or polygons or hasattr(self, '_weights')):
+            if type(to_hist) is dict:
+                data = [to_hist[par] for par in pars]
+            else:
+                data = to_hist
+
+            if all([np.ndim(b) == 1 for b in bins]):
+                ids = [self._sample_id(x) for x in data]
+                pairs = [(_i, _j) for _i in range(len(pars)) \
+                    for _j in range(_i + 1, len(pars))] if twod else []
+                self._bin_samples(data, bins, pairs=pairs, skip=skip,
+                    stop=-int(stop) if stop is not None else None,
+                    smooth=smooth, ids=ids)
+
         # Can opt to exclude 1-D panels along diagonal
         if oned:
             Nd = len(pars)
@@ -3115,7 +3369,8 @@ class ModelSet(BlobFactory):
                         take_log=take_log[-1::-1][i], ivar=ivar[-1::-1][i],
                         un_log=un_log[-1::-1][i],
                         multiplier=[multiplier[-1::-1][i]],
-                        bins=[bins[-1::-1][i]],
+                        bins=[bins[-1::-1][i]], smooth=smooth,
+                        sample_ids=None if ids[j] is None else [ids[j]],
                         skip=skip, skim=skim, stop=stop, **kwargs)
 
                     # Stick this stuff in fix_ticks?
@@ -3189,7 +3444,9 @@ class ModelSet(BlobFactory):
                         un_log=[un_log[j], un_log[-1::-1][i]],
                         multiplier=[multiplier[j], multiplier[-1::-1][i]],
                         bins=[bins[j], bins[-1::-1][i]], fill=fill,
-                        skip=skip, stop=stop, **kwargs)
+                        sample_ids=None if ids[j] is None \
+                            else [ids[j], ids[-1::-1][i]],
+                        skip=skip, stop=stop, smooth=smooth, **kwargs)
 
                 if row != 0:
                     mp.grid[k].set_xlabel('')
@@ -3426,7 +3683,7 @@ class ModelSet(BlobFactory):
         expr=None, new_x=None, is_logx=False, smooth_boundary=False,
         multiplier=1, skip=0, stop=None, return_data=False, z_to_freq=False,
         best='mode', fill=True, samples=None, ivars=None, E_to_freq=False,
-        **kwargs):
+        stream=False, **kwargs):
         """
         Reconstructed evolution in whatever the independent variable is.
 
@@ -3459,6 +3716,13 @@ class ModelSet(BlobFactory):
         samples : int, str
             If 'all', will plot all realizations individually. If an integer,
             will plot only the last `samples` realizations.
+        stream : bool, int
+            If not False, compute `percentile` bounds by reading the blob a
+            chunk at a time, rather than reading it all into memory. Results
+            are exact for chains with up to `stream` samples (10^5 if
+            stream=True), and approximate beyond that. See
+            ares.util.Stats.StreamingQuantiles. In this case, `return_data`
+            returns the (lower, upper) bounds instead of all the data.
 
         """
 
@@ -3518,37 +3782,50 @@ class ModelSet(BlobFactory):
         # Real work starts here.
         ##
 
-        # First, read-in data from disk. Slice it up depending on if
-        # skip or stop were provided. Squeeze arrays to remove NaNs etc.
+        # Percentiles can be computed without reading in all the data
+        streaming = stream and percentile and (samples is None) \
+            and not (use_best and self.is_mcmc)
 
-        # 1-D case. Don't need to specify ivar by hand.
-        if nd == 1:
+        if streaming:
+            if nd == 1:
+                xarr = ivars[0]
+            elif ivar[0] is None:
+                xarr = ivars[0]
+            else:
+                xarr = ivars[1]
 
-            # Read in the independent variable(s) and data itself
-            xarr = ivars[0]
+            xarr = self._transform_ivar(xarr, z_to_freq=z_to_freq,
+                E_to_freq=E_to_freq, is_logx=is_logx, new_x=new_x)
 
-            if new_x is not None:
-                xarr = new_x
-                print("You better know what you're doing!")
+            buffer_size = 10**5 if stream is True else stream
 
-            # Convert redshifts to frequencies
-            if z_to_freq:
-                xarr = nu_0_mhz / (1. + xarr)
+            yblob = self._percentiles_by_chunk(name, (q1, q2),
+                ivars=ivars if nd == 2 else None, ivar=ivar, skip=skip,
+                stop=stop, take_log=take_log, un_log=un_logy,
+                multiplier=multiplier, expr=expr, buffer_size=buffer_size)
 
-            if E_to_freq:
-                xarr = xarr * erg_per_ev / h_p
+            if yblob is None:
+                return
 
-            if is_logx:
-                xarr = 10**xarr
+            lo, hi = yblob
+
+            self._plot_band(ax, xarr, lo, hi, fill=fill,
+                smooth_boundary=smooth_boundary, **kwargs)
+
+        # First, read-in data from disk. Slice it up depending on if
+        # skip or stop were provided. Squeeze arrays to remove NaNs etc.
+
+        # 1-D case. Don't need to specify ivar by hand.
+        elif nd == 1:
 
-            if new_x is not None:
-                xarr = new_x
-                print("You better know what you're doing!")
+            # Read in the independent variable(s) and data itself
+            xarr = self._transform_ivar(ivars[0], z_to_freq=z_to_freq,
+                E_to_freq=E_to_freq, is_logx=is_logx, new_x=new_x)
 
             #if len(names) == 1:
-            tmp = self.ExtractData(name,
-                take_log=take_log, un_log=un_logy, multiplier=multiplier)
-            yblob = tmp[name].squeeze()
+            tmp = self.ExtractData(name, un_log=un_logy)
+            yblob = self._scale_blob(tmp[name].squeeze(), multiplier,
+                take_log)
 
             if expr is not None:
                 yblob = eval(expr)
@@ -3611,26 +3888,8 @@ class ModelSet(BlobFactory):
             elif percentile:
                 lo, hi = np.percentile(yblob[keep==1], (q1, q2), axis=0)
 
-                if smooth_boundary:
-                    lo = smooth(lo, smooth_boundary)
-                    hi = smooth(hi, smooth_boundary)
-
-                if fill:
-                    ax.fill_between(xarr, lo, hi, **kwargs)
-                else:
-
-                    kw_lo = kwargs.copy()
-                    kw_hi = kwargs.copy()
-
-                    if 'ls' in kwargs:
-                        if type(kwargs['ls']) in [list, tuple]:
-                            kw_lo['ls'] = kwargs['ls'][0]
-                            kw_hi['ls'] = kwargs['ls'][1]
-
-                    ax.plot(xarr, lo, **kw_lo)
-                    if 'label' in kwargs:
-                        del kwargs['label'], kw_hi['label']
-                    ax.plot(xarr, hi, **kw_hi)
+                self._plot_band(ax, xarr, lo, hi, fill=fill,
+                    smooth_boundary=smooth_boundary, **kwargs)
             else:
                 raise NotImplemented('help')
                 ax.plot(xarr, yblob.T[0], **kwargs)
@@ -3651,27 +3910,15 @@ class ModelSet(BlobFactory):
                 vector = xarr = ivars[1]
                 slc = slice(0, None, 1)
 
-            # Convert redshifts to frequencies
-            if z_to_freq:
-                xarr = nu_0_mhz / (1. + xarr)
-
-            if E_to_freq:
-                xarr = xarr * erg_per_ev / h_p
-
-            if is_logx:
-                xarr = 10**xarr
-
-            if new_x is not None:
-                xarr = new_x
-                print("You better know what you're doing!")
+            xarr = self._transform_ivar(xarr, z_to_freq=z_to_freq,
+                E_to_freq=E_to_freq, is_logx=is_logx, new_x=new_x)
 
             if type(multiplier) not in [list, np.ndarray, tuple]:
                 multiplier = [multiplier] * len(vector)
 
-            tmp = self.ExtractData(name, ivar=ivar,
-                take_log=take_log, un_log=un_logy)
+            tmp = self.ExtractData(name, ivar=ivar, un_log=un_logy)
 
-            _yblob = tmp[name]
+            _yblob = self._scale_blob(tmp[name], multiplier, take_log)
 
             if expr is not None:
                 _yblob = eval(expr)
@@ -3725,25 +3972,9 @@ class ModelSet(BlobFactory):
             # Plot contours enclosing some amount of likelihood
             elif percentile:
                 lo, hi = np.nanpercentile(yblob[keep == 1], (q1, q2), axis=0)
-                if smooth_boundary:
-                    lo = smooth(lo, smooth_boundary)
-                    hi = smooth(hi, smooth_boundary)
 
-                if fill:
-                    ax.fill_between(xarr, lo, hi, **kwargs)
-                else:
-                    kw_lo = kwargs.copy()
-                    kw_hi = kwargs.copy()
-
-                    if 'ls' in kwargs:
-                        if type(kwargs['ls']) in [list, tuple]:
-                            kw_lo['ls'] = kwargs['ls'][0]
-                            kw_hi['ls'] = kwargs['ls'][1]
-
-                    ax.plot(xarr, lo, **kw_lo)
-                    if 'label' in kwargs:
-                        del kwargs['label'], kw_hi['label']
-                    ax.plot(xarr, hi, **kw_hi)
+                self._plot_band(ax, xarr, lo, hi, fill=fill,
+                    smooth_boundary=smooth_boundary, **kwargs)
             else:
                 raise NotImplemented('help')
 
@@ -3872,6 +4103,170 @@ class ModelSet(BlobFactory):
         else:
             return ax
 
+    def _transform_ivar(self, xarr, z_to_freq=False, E_to_freq=False,
+        is_logx=False, new_x=None):
+        """
+        Convert independent variable for plotting in ReconstructedFunction.
+        """
+
+        # Convert redshifts to frequencies
+        if z_to_freq:
+            xarr = nu_0_mhz / (1. + xarr)
+
+        if E_to_freq:
+            xarr = xarr * erg_per_ev / h_p
+
+        if is_logx:
+            xarr = 10**xarr
+
+        if new_x is not None:
+            xarr = new_x
+            print("You better know what you're doing!")
+
+        return xarr
+
+    def _plot_band(self, ax, xarr, lo, hi, fill=True, smooth_boundary=False,
+        **kwargs):
+        """
+        Plot region between `lo` and `hi` (or just its boundaries).
+        """
+
+        if smooth_boundary:
+            lo = smooth(lo, smooth_boundary)
+            hi = smooth(hi, smooth_boundary)
+
+        if fill:
+            ax.fill_between(xarr, lo, hi, **kwargs)
+        else:
+            kw_lo = kwargs.copy()
+            kw_hi = kwargs.copy()
+
+            if 'ls' in kwargs:
+                if type(kwargs['ls']) in [list, tuple]:
+                    kw_lo['ls'] = kwargs['ls'][0]
+                    kw_hi['ls'] = kwargs['ls'][1]
+
+            ax.plot(xarr, lo, **kw_lo)
+            if 'label' in kwargs:
+                del kw_hi['label']
+            ax.plot(xarr, hi, **kw_hi)
+
+    def _scale_blob(self, y, multiplier=1, take_log=False):
+        """
+        Multiply blob samples by `multiplier`, then (optionally) take log10.
+
+        Parameters
+        ----------
+        y : np.ndarray
+            Samples of blob (or slice of one), with shape
+            (number of samples, number of independent variable values).
+        multiplier : int, float, list, np.ndarray
+            Either a single number or one number per independent variable
+            value, i.e., per column of `y`.
+
+        """
+
+        mult = np.asarray(multiplier, dtype=float)
+
+        if np.ma.isMaskedArray(y):
+            return np.ma.array(self._scale_blob(y.data, mult, take_log),
+                mask=y.mask)
+
+        if np.any(mult != 1):
+            y = y * mult
+
+        if take_log:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                y = np.log10(y)
+
+        return y
+
+    def _percentiles_by_chunk(self, name, q, ivars=None, ivar=None, skip=0,
+        stop=None, take_log=False, un_log=False, multiplier=1, expr=None,
+        buffer_size=10**5):
+        """
+        Compute percentiles of a blob without reading it all into memory.
+
+        Follows the same rules as ReconstructedFunction for discarding
+        samples, i.e., for 1-D blobs we throw out samples with any non-finite
+        elements, while for slices of 2-D blobs (set by `ivars` and `ivar`)
+        we only throw out samples that are entirely non-finite.
+
+        Parameters
+        ----------
+        name : str
+            Name of blob.
+        q : list, tuple
+            Percentiles of interest, in [0, 100].
+        un_log : bool
+            Handled as in ExtractData. Blobs are never stored as log10 of
+            their true values, so this leaves them untouched.
+        buffer_size : int
+            Maximum number of samples to hold in memory at once. Results are
+            exact for chains with fewer samples than this.
+
+        Returns
+        -------
+        Array with shape (len(q), number of independent variable values).
+
+        """
+
+        N = self.chain.shape[0]
+
+        if self.mask.ndim == 2:
+            cmask = self.mask[:,0]
+        else:
+            cmask = self.mask
+
+        if (stop is not None) and (stop < 0):
+            stop += N
+
+        # Slice of 2-D blob
+        if ivars is not None:
+            if ivar[0] is None:
+                k = np.argmin(np.abs(ivars[1] - ivar[1]))
+                slc = (slice(None), slice(None), k)
+            else:
+                k = np.argmin(np.abs(ivars[0] - ivar[0]))
+                slc = (slice(None), k)
+
+        sq = StreamingQuantiles(q, buffer_size=buffer_size)
+
+        i1 = 0
+        for chunk in self.iter_blob_chunks(name):
+            i0, i1 = i1, i1 + chunk.shape[0]
+
+            rows = np.arange(i0, i1)
+            keep = np.logical_not(cmask[i0:i1])
+            if skip is not None:
+                keep[rows < skip] = False
+            if stop is not None:
+                keep[rows >= stop] = False
+
+            y = chunk[keep == 1]
+
+            if ivars is not None:
+                y = y[slc]
+
+            y = self._scale_blob(y, multiplier, take_log)
+
+            if expr is not None:
+                y = eval(expr, {'np': np, 'yblob': y, '_yblob': y})
+
+            ok = np.isfinite(y)
+            if ivars is None:
+                y = y[np.all(ok, axis=1)]
+            else:
+                y = np.nan_to_num(y[np.any(ok, axis=1)])
+
+            sq.update(y)
+
+        if sq.N == 0:
+            print("WARNING: no finite elements for field={}.".format(name))
+            return None
+
+        return sq.get()
+
     def CovarianceMatrix(self, pars, ivar=None):
         """
         Compute covariance matrix for input parameters.
@@ -4047,6 +4442,16 @@ class ModelSet(BlobFactory):
                 return blob
 
             assert len(ivar) == 2, "Must supply 2-D coordinate for blob!"
+
+            if ivar[0] is None:
+                k2 = np.argmin(np.abs(self.blob_ivars[i][1] - ivar[1]))
+
+                if not np.allclose(self.blob_ivars[i][1][k2], ivar[1]):
+                    print("WARNING: Looking for `{}` at ivar={}, closest found is {}.".format(name,
+                        ivar[1], self.blob_ivars[i][1][k2]))
+
+                return blob[:,:,k2]
+
             k1 = np.argmin(np.abs(self.blob_ivars[i][0] - ivar[0]))
 
             if not np.allclose(self.blob_ivars[i][0][k1], ivar[0]):
@@ -4123,12 +4528,172 @@ class ModelSet(BlobFactory):
 
         return self._max_like_pars
 
-    def ExpensiveBlob(self, func, ivar, name, skip=0, clobber=False):
+    def _run_in_chunks(self, func, N, tmp, skip=0, fill=0., num_workers=1,
+        worker_type='process', chunk_size=None, restart=True, name='ares',
+        key=None):
+        """
+        Evaluate `func` for elements skip:N of the chain, a chunk at a time.
+
+        Chunks are farmed out to a local pool of `num_workers` workers (and
+        divided among MPI processes, if there are several). Each chunk is
+        written to disk as soon as it's finished, so if we're interrupted,
+        calling this again with restart=True only computes what's missing.
+
+        .. note :: Process pools rely on fork to inherit `func` rather than
+            pickling it. If fork is unavailable, we fall back to threads.
+
+        Parameters
+        ----------
+        func : function
+            Takes two arguments, `start` and `stop`, and returns an array of
+            results for chain elements start:stop (along its first axis).
+        N : int
+            Number of chain elements.
+        tmp : str
+            Finished chunks are saved to files named `tmp`.part.<rank>.
+        fill : int, float
+            Value for elements that weren't computed, i.e., the first `skip`.
+        worker_type : str
+            'process' or 'thread'.
+        chunk_size : int
+            Number of chain elements per chunk. By default, we'll aim for
+            ten chunks per worker.
+        restart : bool
+            If False, discard any chunks left over from a previous call.
+        key : str
+            Identifies the calculation (see `_chunk_key`). Chunks left over
+            from a previous call with a different key are discarded.
+
+        Returns
+        -------
+        Array of results for all chain elements on the root processor, None
+        on all others.
+
+        """
+
+        if worker_type not in ['process', 'thread']:
+            raise ValueError("Unrecognized worker_type={}.".format(worker_type))
+
+        if chunk_size is None:
+            chunk_size = int(np.ceil((N - skip) / (10. * num_workers * size)))
+
+        chunk_size = max(chunk_size, 1)
+
+        parts = '{!s}.part.*'.format(tmp)
+
+        if rank == 0:
+            for fn in glob.glob(parts):
+                if restart:
+                    _read_chunks(fn, key=key, repair=True)
+                else:
+                    os.remove(fn)
+
+        if size > 1:
+            MPI.COMM_WORLD.Barrier()
+
+        # Figure out what's been done already
+        finished = np.zeros(N, dtype=bool)
+        for fn in glob.glob(parts):
+            for start, stop, result in _read_chunks(fn, key=key):
+                finished[start:stop] = True
+
+        chunks = [(lo, min(lo + chunk_size, N)) \
+            for lo in range(skip, N, chunk_size)]
+        chunks = [(lo, hi) for (lo, hi) in chunks \
+            if not np.all(finished[lo:hi])]
+
+        if finished.any() and (rank == 0):
+            print("Resuming {}: {} chunks of {} elements left.".format(name,
+                len(chunks), chunk_size))
+
+        # Divide among MPI processes
+        chunks = chunks[rank::size]
+
+        if worker_type == 'process' and num_workers > 1:
+            if not hasattr(multiprocessing, 'get_context'):
+                ctx = multiprocessing
+            elif 'fork' in multiprocessing.get_all_start_methods():
+                ctx = multiprocessing.get_context('fork')
+            else:
+                print_warning("Process pools require fork. Using threads.")
+                worker_type = 'thread'
+
+        if num_workers == 1 or len(chunks) < 2:
+            pool = None
+            results = (((lo, hi), func(lo, hi)) for (lo, hi) in chunks)
+        elif worker_type == 'process':
+            pool = ctx.Pool(num_workers, initializer=_init_worker,
+                initargs=(func,))
+            results = pool.imap_unordered(_chunk_worker, chunks)
+        else:
+            pool = ThreadPool(num_workers)
+            results = pool.imap_unordered(lambda bounds: \
+                (bounds, func(*bounds)), chunks)
+
+        fn = '{0!s}.part.{1}'.format(tmp, rank)
+
+        pb = ProgressBar(len(chunks), name=name)
+        pb.start()
+
+        try:
+            for k, ((lo, hi), result) in enumerate(results):
+                write_pickle_file((lo, hi, key, result), fn, open_mode='a',
+                    ndumps=1, safe_mode=False, verbose=False)
+                pb.update(k)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        pb.finish()
+
+        if size > 1:
+            MPI.COMM_WORLD.Barrier()
+
+        if rank > 0:
+            return None
+
+        # Put it all together
+        out = None
+        for fn in sorted(glob.glob(parts)):
+            for start, stop, result in _read_chunks(fn, key=key):
+                if out is None:
+                    shape = (N,) + np.shape(result)[1:]
+                    if isinstance(result, np.ma.MaskedArray):
+                        out = np.ma.masked_all(shape)
+                    else:
+                        out = fill * np.ones(shape)
+
+                out[start:stop] = result
+
+        if out is None:
+            out = fill * np.ones(N)
+
+        return out
+
+    def ExpensiveBlob(self, func, ivar, name, skip=0, clobber=False,
+        num_workers=1, worker_type='process', chunk_size=None, restart=True):
         """
         Generate a new blob from parameters only, i.e., we need to re-run
         some ARES calculation, which is wrapped by `func`.
 
-        No restart option yet. Should add that.
+        Models are run in chunks, optionally in parallel over a pool of
+        `num_workers` local workers. Chunks are saved as they're finished,
+        so if this is interrupted, calling it again will pick up where it
+        left off (unless restart=False or clobber=True, or `func` or its
+        inputs have changed). See `_run_in_chunks` for more.
+
+        Parameters
+        ----------
+        func : function
+            Called as func(ivar, **kwargs) for each element of the chain.
+        ivar : list, tuple
+            Independent variables, as (name, values) pairs.
+        name : str
+            Name of new blob.
+        skip : int
+            Skip this many elements at the start of the chain.
+
         """
 
         kwargs = self.AssembleParametersList(include_bkw=True)
@@ -4148,29 +4713,17 @@ class ModelSet(BlobFactory):
                 'hand.').format(fn))
             return
 
-        pb = ProgressBar(len(kwargs), name=name)
-        pb.start()
-
-        all_results = -99999 * np.ones(shape)
-        for k, kw in enumerate(kwargs):
-
-            if k < skip:
-                continue
-
-            if k % size != rank:
-                continue
-
-            result = func(ivar, **kw)
-            all_results[k] = result
+        def run_chunk(start, stop):
+            return np.array([func(ivar, **kwargs[k]) \
+                for k in range(start, stop)]).reshape([stop - start] + shape[1:])
 
-            pb.update(k)
-
-        pb.finish()
-
-        if size > 1:
-            tmp = np.zeros_like(all_results)
-            nothing = MPI.COMM_WORLD.Allreduce(all_results, tmp)
-            all_results = tmp
+        tmp = '{0!s}.blob_{1}d.{2!s}'.format(self.prefix, nd, name)
+        key = _chunk_key(func, ivar, np.ma.getdata(self.chain), 
+            self.parameters)
+        all_results = self._run_in_chunks(run_chunk, len(kwargs), tmp,
+            skip=skip, fill=-99999, num_workers=num_workers,
+            worker_type=worker_type, chunk_size=chunk_size,
+            restart=restart and (not clobber), name=name, key=key)
 
         if rank > 0:
             return
@@ -4178,8 +4731,12 @@ class ModelSet(BlobFactory):
         write_pickle_file(all_results, fn, open_mode='w', ndumps=1,\
             safe_mode=False, verbose=False)
 
+        for _fn in glob.glob('{!s}.part.*'.format(tmp)):
+            os.remove(_fn)
+
     def DeriveBlob(self, func=None, fields=None, expr=None, varmap=None,
-        save=True, ivar=None, name=None, clobber=False):
+        save=True, ivar=None, name=None, clobber=False, num_workers=1,
+        worker_type='process', chunk_size=None, restart=True):
         """
         Derive new blob from pre-existing ones.
 
@@ -4212,8 +4769,35 @@ class ModelSet(BlobFactory):
         clobber : bool
             If file with same ``name`` exists, overwrite it?
 
+        To evaluate `func` or `expr` in chunks of the chain, optionally in
+        parallel over `num_workers` local workers, supply `num_workers` > 1
+        and/or `chunk_size`. This assumes that each element of the result
+        depends only on the same element of the input fields. Chunks are
+        saved as they're finished, so if interrupted, calling this again
+        picks up where it left off (unless restart=False or clobber=True,
+        or `func`, `expr`, etc. have changed). Requires save=True. See
+        `_run_in_chunks` for more.
+
         """
 
+        chunked = (num_workers > 1) or (chunk_size is not None)
+
+        if chunked:
+            assert save and (name is not None), \
+                "Must supply name (and save=True) to derive blob in chunks!"
+
+            fn = glob.glob('{0!s}.blob_*d.{1!s}.pkl'.format(self.prefix, name))
+            if fn and (not clobber):
+                print(('{!s} exists! Set clobber=True or remove by ' +\
+                    'hand.').format(fn[0]))
+                data = self.ExtractData(name)
+                return data[name]
+
+            tmp = '{0!s}.blob.{1!s}'.format(self.prefix, name)
+            kw_chunks = {'num_workers': num_workers, 'chunk_size': chunk_size,
+                'worker_type': worker_type, 'name': name,
+                'restart': restart and (not clobber)}
+
         if func is not None:
             data = self.ExtractData(fields)
 
@@ -4242,7 +4826,17 @@ class ModelSet(BlobFactory):
                     ivars_for_func[key] = None
                     ivars[key] = None
 
-            result = func(data, ivars_for_func)
+            if chunked:
+                def run_chunk(start, stop):
+                    _data = {key: data[key][start:stop] for key in data}
+                    return func(_data, ivars_for_func)
+
+                N = len(data[list(data.keys())[0]])
+                key = _chunk_key(func, fields, N)
+                result = self._run_in_chunks(run_chunk, N, tmp, key=key,
+                    **kw_chunks)
+            else:
+                result = func(data, ivars_for_func)
         else:
             blobs = list(varmap.values())
             if ivar is not None:
@@ -4251,7 +4845,22 @@ class ModelSet(BlobFactory):
                 iv = None
 
             data = self.ExtractData(blobs, ivar=iv)
-            result = eval(expr, {var: data[varmap[var]] for var in varmap.keys()})
+
+            if chunked:
+                def run_chunk(start, stop):
+                    return eval(expr, {var: data[varmap[var]][start:stop] \
+                        for var in varmap.keys()})
+
+                N = len(data[blobs[0]])
+                key = _chunk_key(None, expr, sorted(varmap.items()), ivar, N)
+                result = self._run_in_chunks(run_chunk, N, tmp, key=key,
+                    **kw_chunks)
+            else:
+                result = eval(expr,
+                    {var: data[varmap[var]] for var in varmap.keys()})
+
+        if chunked and (rank > 0):
+            return None
 
         if save:
             assert name is not None, "Must supply name for new blob!"
@@ -4318,6 +4927,10 @@ class ModelSet(BlobFactory):
                     write_pickle_file(ivars_f, fn_md, open_mode='a',\
                         ndumps=1, safe_mode=False, verbose=False)
 
+            if chunked:
+                for _fn in glob.glob('{!s}.part.*'.format(tmp)):
+                    os.remove(_fn)
+
         return result
 
     def z_to_freq(self, clobber=False):
@@ -1,9 +1,51 @@
-from ares.analysis.ModelSet import ModelSet
-from ares.analysis.MultiPlot import MultiPanel
-from ares.analysis.RaySegment import RaySegment
-from ares.analysis.Global21cm import Global21cm
-from ares.analysis.PowerSpectrum import PowerSpectrum
-from ares.analysis.GalaxyPopulation import GalaxyPopulation
-from ares.analysis.Animation import Animation, AnimationSet
-from ares.analysis.MultiPhaseMedium import MultiPhaseMedium
-from ares.analysis.MetaGalacticBackground import MetaGalacticBackground
+import sys as _sys
+import importlib as _importlib
+from types import ModuleType as _ModuleType
+
+# Everything we export, and the module it lives in. Modules are imported the
+# first time something is requested, so that, e.g., simulations that only
+# need BlobFactory don't drag matplotlib along with them.
+_exports = \
+{
+ 'ModelSet': 'ModelSet',
+ 'MultiPanel': 'MultiPlot',
+ 'RaySegment': 'RaySegment',
+ 'Global21cm': 'Global21cm',
+ 'PowerSpectrum': 'PowerSpectrum',
+ 'GalaxyPopulation': 'GalaxyPopulation',
+ 'Animation': 'Animation',
+ 'AnimationSet': 'Animation',
+ 'MultiPhaseMedium': 'MultiPhaseMedium',
+ 'MetaGalacticBackground': 'MetaGalacticBackground',
+}
+
+class _LazyPackage(_ModuleType):
+    def __getattr__(self, name):
+        if name not in _exports:
+            from .. import _import_submodule
+            return _import_submodule(self.__name__, name)
+
+        mod = _importlib.import_module('{}.{}'.format(self.__name__, 
+            _exports[name]))
+        obj = getattr(mod, name)
+        _ModuleType.__setattr__(self, name, obj)
+
+        return obj
+
+    def __setattr__(self, name, value):
+        # Importing a sub-module sets it as an attribute of this package, 
+        # which would shadow the class of the same name, e.g., Global21cm.
+        if (name in _exports) and isinstance(value, _ModuleType):
+            return
+        _ModuleType.__setattr__(self, name, value)
+
+    def __dir__(self):
+        return sorted(set(self.__dict__.keys()) | set(_exports.keys()))
+
+# Assigning a module's __class__ requires Python 3.5+.
+if _sys.version_info < (3, 5):
+    for _name in _exports:
+        setattr(_sys.modules[__name__], _name, getattr(_importlib.import_module(
+            '{}.{}'.format(__name__, _exports[_name])), _name))
+else:
+    _sys.modules[__name__].__class__ = _LazyPackage
@@ -7,3 +7,7 @@ from ares.inference.CalibrateModel import CalibrateModel
 #from ares.inference.OptimizeSpectrum import SpectrumOptimization
 from ares.inference.FitGalaxyPopulation import FitGalaxyPopulation
 
+
+def __getattr__(name):
+    from .. import _import_submodule
+    return _import_submodule(__name__, name)
@@ -13,7 +13,6 @@ Description:
 import numpy as np
 from ..util import ParameterFile
 from ..physics.Constants import nu_0_mhz
-from ..analysis.Global21cm import Global21cm
 from ..util.SetDefaultParameterValues import GaussianParameters
 
 # Default parameters
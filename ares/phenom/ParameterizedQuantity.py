@@ -13,7 +13,9 @@ Description:
 import gc
 import numpy as np
 from types import FunctionType
+from collections import OrderedDict
 from ..util import ParameterFile
+from ..util.Caching import fingerprint
 from ..util.ParameterFile import get_pq_pars
 try:
     # this runs with no issues in python 2 but raises error in python 3
@@ -50,6 +52,15 @@ Np_max = 15
 
 optional_kwargs = 'pq_val_ceil', 'pq_val_floor', 'pq_var_ceil', 'pq_var_floor'
 numeric_types = [int, float, np.int, np.int64, np.float64]    
+
+# Results for inputs with at least this many elements are saved, so that
+# repeated calls on the same (z, Mh) grid are free. Smaller calls (e.g., one
+# redshift at a time in an ODE solver) are cheaper to redo than to look up.
+# Each quantity keeps at most memo_max results, totaling at most
+# memo_max_bytes.
+memo_min_size = 64
+memo_max = 8
+memo_max_bytes = 2**25
     
 class BasePQ(object): 
     def __init__(self, **kwargs):
@@ -59,7 +70,16 @@ class BasePQ(object):
             if name not in kwargs:
                 continue
                 
-            self.args.append(kwargs[name])    
+            # Nested PQ, e.g., 'pq_func_par0[0]'='pq[1]'
+            if isinstance(kwargs[name], dict):
+                self.args.append(ParameterizedQuantity(**kwargs[name]))
+            else:
+                self.args.append(kwargs[name])
+
+        # Parameters that are themselves PQs get evaluated at call time.
+        self.pars = self.args[:]
+        self.nested = [isinstance(arg, ParameterizedQuantity) \
+            for arg in self.args]
 
         self.x = kwargs['pq_func_var']
         
@@ -100,7 +120,8 @@ class PowerLaw(BasePQ):
         else:
             ok = np.logical_and(self.xlim[0] <= x, x <= self.xlim[1])
             if self.xfill is not None:
-                x[~ok] = self.xfill
+                # Don't modify input array (it may belong to the caller)
+                x = np.where(ok, x, self.xfill)
                 ok = np.ones_like(x)                
 
         return ok * self.args[0] * (x / self.args[1])**self.args[2]
@@ -657,8 +678,25 @@ class ParameterizedQuantity(object):
         else:
             raise NotImplemented('help')
             
+    @property
+    def is_nested(self):
+        return any(self.func.nested)
+
     def __call__(self, **kwargs):
-        
+        """
+        Evaluate this quantity.
+
+        Inputs can be anything that broadcasts, e.g., to evaluate on a grid
+        of redshifts and halo masses, pass z=z[:,None] and Mh=Mh[None,:],
+        in which case the result has shape (z.size, Mh.size). This is much
+        faster than passing the output of np.meshgrid, since anything that
+        depends only on redshift (evolving normalizations, peak masses, etc.)
+        is computed once per redshift.
+
+        Results for large inputs are saved, so calling again with the same
+        inputs just returns a copy of the saved result.
+        """
+
         # Patch up kwargs. Make sure inputs are arrays and that they lie
         # within the specified range (if there is one).
         kw = {}
@@ -679,6 +717,33 @@ class ParameterizedQuantity(object):
                 
             kw[key] = var
 
+        shape = np.broadcast(*kw.values()).shape
+        size = int(np.prod(shape))
+
+        if size >= memo_min_size:
+            key = fingerprint(*[item for name in sorted(kw) \
+                for item in (name, kw[name])])
+            if not hasattr(self, '_memo'):
+                self._memo = OrderedDict()
+                self._memo_bytes = 0
+            if key in self._memo:
+                return self._memo[key].copy()
+        else:
+            key = None
+
+        # On a grid (or if parameters are themselves functions of z and Mh),
+        # the independent variable must have the shape of the output, but
+        # z-only quantities can stay small.
+        grid = len(shape) > 1
+        if (grid or self.is_nested) and (self.func.x in kw):
+            x = kw[self.func.x]
+            if x.shape != shape:
+                kw[self.func.x] = x * np.ones(shape)
+
+        if self.is_nested:
+            self.func.args = [arg(**kwargs) if nested else arg \
+                for arg, nested in zip(self.func.pars, self.func.nested)]
+
         y = self.func.__call__(**kw)
         
         if self.func.val_ceil is not None:
@@ -687,7 +752,16 @@ class ParameterizedQuantity(object):
         if self.func.val_floor is not None:
             if type(self.func.val_floor) in numeric_types:
                 y = np.maximum(y, self.func.val_floor)
-            
+
+        if grid and (np.shape(y) != shape):
+            y = y * np.ones(shape)
+
+        if (key is not None) and (y.nbytes <= memo_max_bytes):
+            self._memo[key] = y
+            self._memo_bytes += y.nbytes
+            while (len(self._memo) > memo_max) \
+                or (self._memo_bytes > memo_max_bytes):
+                self._memo_bytes -= self._memo.popitem(last=False)[1].nbytes
+            return y.copy()
+
         return y
-        
-        
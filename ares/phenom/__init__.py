@@ -4,3 +4,7 @@ from ares.phenom.Gaussian21cm import Gaussian21cm
 from ares.phenom.DustCorrection import DustCorrection
 from ares.phenom.Parametric21cm import Parametric21cm
 from ares.phenom.ParameterizedQuantity import ParameterizedQuantity
+
+def __getattr__(name):
+    from .. import _import_submodule
+    return _import_submodule(__name__, name)
@@ -14,11 +14,20 @@ import numpy as np
 from scipy.misc import derivative
 from scipy.optimize import fsolve
 from scipy.integrate import quad, ode
-from ..util.Math import interp1d
+from ..util.Math import interp1d, interp_hermite
+from ..util.Caching import cached_property
 from ..util.ParameterFile import ParameterFile
+from ..util.SetDefaultParameterValues import CosmologyParameters
 from .InitialConditions import InitialConditions
 from .Constants import c, G, km_per_mpc, m_H, m_He, sigma_SB, g_per_msun, \
     cm_per_mpc, cm_per_kpc, k_B, m_p
+
+# Comoving distances are tabulated on a grid evenly spaced in log(1+z) out
+# to this redshift. Beyond it, we integrate directly.
+_dcom_zmax = 1e4
+_dcom_N = 1000
+
+_cosmo_pars = list(CosmologyParameters().keys())
     
 _ares_to_planck = \
 {
@@ -569,11 +578,75 @@ class Cosmology(InitialConditions):
         us (z = 0).
         """
         
-        integr = quad(lambda z: self.hubble_0 / self.HubbleParameter(z), 
-            0.0, z)[0]
-        
-        return integr * c * (1. + z) / self.hubble_0
+        return self._dcom(z) * (1. + np.asarray(z))
         
+    @cached_property(*_cosmo_pars)
+    def _tab_dcom(self):
+        """
+        Table of comoving radial distance from z=0.
+
+        Integrals between nodes are done with 8-point Gauss-Legendre
+        quadrature, so the table is as accurate as `quad` would be. Since we
+        know the derivatives exactly (they're just c / H), we can use cubic
+        Hermite interpolation in between nodes, and to invert the table.
+
+        Returns
+        -------
+        Tuple containing log(1+z), distance [cm], and dD / dlog(1+z) [cm].
+
+        """
+        lx = np.linspace(0., np.log(1. + _dcom_zmax), _dcom_N)
+        ddlx = lambda lx: c * np.exp(lx) / self.HubbleParameter(np.exp(lx) - 1.)
+
+        x, w = np.polynomial.legendre.leggauss(8)
+        hw = 0.5 * np.diff(lx)
+        xx = lx[:-1,None] + hw[:,None] * (x[None,:] + 1.)
+
+        dD = hw * np.sum(w[None,:] * ddlx(xx), axis=1)
+        D = np.concatenate(([0.], np.cumsum(dD)))
+
+        return lx, D, ddlx(lx)
+
+    def _dcom(self, z):
+        """
+        Comoving radial distance from z=0 to z [cm]. Vectorized.
+        """
+        lx, D, dDdlx = self._tab_dcom
+
+        z = np.asarray(z, dtype=float)
+        ok = np.logical_and(z >= 0, z <= _dcom_zmax)
+
+        d = interp_hermite(np.log1p(np.where(ok, z, 0.)), lx, D, dDdlx)
+
+        if not np.all(ok):
+            integrand = lambda zz: self.hubble_0 / self.HubbleParameter(zz)
+            d = np.array(d)
+            d[~ok] = [c * quad(integrand, 0., zz)[0] / self.hubble_0 \
+                for zz in np.atleast_1d(z)[np.atleast_1d(~ok)]]
+
+        return d[()]
+
+    def _z_of_dcom(self, d):
+        """
+        Redshift at which comoving radial distance from z=0 is `d` [cm].
+        Vectorized.
+        """
+        lx, D, dDdlx = self._tab_dcom
+
+        d = np.asarray(d, dtype=float)
+        ok = np.logical_and(d >= 0, d <= D[-1])
+
+        # Inverse function has derivative 1 / (dD / dlog(1+z))
+        z = np.expm1(interp_hermite(np.where(ok, d, 0.), D, lx, 1. / dDdlx))
+
+        if not np.all(ok):
+            z = np.array(z)
+            f = lambda zz, dd: self._dcom(zz) - dd
+            z[~ok] = [fsolve(f, x0=_dcom_zmax, args=(dd,))[0] \
+                for dd in np.atleast_1d(d)[np.atleast_1d(~ok)]]
+
+        return z[()]
+
     def DifferentialRedshiftElement(self, z, dl):
         """
         Given a redshift and a LOS distance, return the corresponding dz.
@@ -597,8 +670,15 @@ class Cosmology(InitialConditions):
         return dz
         
     def DeltaZed(self, z0, dR):
-        f = lambda z2: self.ComovingRadialDistance(z0, z2) / cm_per_mpc - dR
-        return fsolve(f, x0=z0+0.1)[0] - z0
+        """
+        Redshift interval corresponding to comoving distance `dR` [Mpc]
+        beyond redshift `z0`. Vectorized.
+        """
+        if self.approx_highz:
+            return self.DifferentialRedshiftElement(z0, np.asarray(dR))
+
+        d = self._dcom(z0) + np.asarray(dR) * cm_per_mpc
+        return self._z_of_dcom(d) - z0
         
     def ComovingRadialDistance(self, z0, z):
         """
@@ -609,10 +689,7 @@ class Cosmology(InitialConditions):
             return 2. * c * ((1. + z0)**-0.5 - (1. + z)**-0.5) \
                 / self.hubble_0 / np.sqrt(self.omega_m_0)
                 
-        # Otherwise, do the integral - normalize to H0 for numerical reasons
-        integrand = lambda z: self.hubble_0 / self.HubbleParameter(z)
-
-        return c * quad(integrand, z0, z)[0] / self.hubble_0  
+        return self._dcom(z) - self._dcom(z0)
             
     def ProperRadialDistance(self, z0, z):
         return self.ComovingRadialDistance(z0, z) / (1. + z0)    
@@ -668,7 +745,7 @@ class Cosmology(InitialConditions):
         
         dA = angle_rad * d_cm
         
-        dldz = quad(self.ComovingLineElement, z-0.5*dz, z+0.5*dz)[0]
+        dldz = self._dcom(z+0.5*dz) - self._dcom(z-0.5*dz)
         
         return dA**2 * dldz / cm_per_mpc**3
     
@@ -688,8 +765,9 @@ class Cosmology(InitialConditions):
         """
         Convert a length scale (co-moving) to an observed angle [arcmin].
         """
-        f = lambda ang: self.AngleToComovingLength(z, ang) - R
-        return fsolve(f, x0=0.1)[0]
+        # Inverse of AngleToComovingLength
+        in_rad = np.arctan(np.asarray(R) * cm_per_mpc / self._dcom(z))
+        return in_rad * 60. * 180. / np.pi
         
     def AngleToComovingLength(self, z, angle):
         return self.AngleToProperLength(z, angle) * (1. + z)
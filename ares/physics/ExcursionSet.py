@@ -13,7 +13,6 @@ Description:
 import numpy as np
 from .Constants import rho_cgs
 from .Cosmology import Cosmology
-from ..util.Math import central_difference
 from ..util.ParameterFile import ParameterFile
 from scipy.integrate import simps, quad
 from scipy.interpolate import interp1d
@@ -129,15 +128,19 @@ class ExcursionSet(object):
         return W    
         
     def WindowFourier(self, k, R):
+        """
+        Return Fourier-space window function.
+        
+        Any combination of `k` and `R` that broadcast against one another 
+        is OK, e.g., `k` with shape (Nk,) and `R` with shape (NR, 1) yields
+        an array of shape (NR, Nk).
+        """
         if self.pf['xset_window'] == 'sharp-fourier':
-            W = np.zeros_like(k)
-            ok = 1. - k * R >= 0.
-            W[ok == 1] = 1.
+            W = np.where(1. - k * R >= 0., 1., 0.)
         elif self.pf['xset_window'] == 'tophat-real':
             W = 3. * (np.sin(k * R) - k * R * np.cos(k * R)) / (k * R)**3
         elif self.pf['xset_window'] == 'tophat-fourier':    
-            W = np.zeros_like(k)
-            W[k <= 1./R] = 1.
+            W = np.where(k <= 1. / R, 1., 0.)
         else:
             raise NotImplemented('help')
     
@@ -157,17 +160,50 @@ class ExcursionSet(object):
     def Variance(self, z, R):
         """
         Compute the variance in the field on some scale `R`.
+        
+        Parameters
+        ----------
+        z : int, float, np.ndarray
+            Redshift(s) of interest.
+        R : int, float, np.ndarray
+            Scale(s) of interest.
+        
+        Returns
+        -------
+        Variance with shape (len(z), len(R)), with any scalar dimensions 
+        removed, i.e., a single number if both `z` and `R` are scalars.
+        
         """
         
-        iz = np.argmin(np.abs(z - self.tab_z))
+        iz = np.argmin(np.abs(np.reshape(z, (-1, 1)) - self.tab_z), axis=1)
         
-        # Window function
-        W = self.WindowFourier(self.tab_k, R)
+        # Window function, one row for each R
+        W = self.WindowFourier(self.tab_k, np.reshape(R, (-1, 1)))
         
-        # Dimensionless power spectrum
+        # Dimensionless power spectrum, one row for each z
         D = self.tab_k**3 * self.tab_ps[iz,:] / two_pi_sq
+        
+        # Trapezoidal integral over ln(k) for all (z, R) at once.
+        S = np.dot(D * self._trapz_weights, (np.abs(W)**2).T)
+        
+        if np.ndim(R) == 0:
+            S = S[:,0]
+        if np.ndim(z) == 0:
+            S = S[0]
                         
-        return np.trapz(D * np.abs(W)**2, x=np.log(self.tab_k))
+        return S
+        
+    @property
+    def _trapz_weights(self):
+        """
+        Weights such that sum(y * w) = np.trapz(y, x=np.log(self.tab_k)).
+        """
+        if not hasattr(self, '_trapz_weights_'):
+            dlnk = np.diff(np.log(self.tab_k))
+            self._trapz_weights_ = np.zeros_like(self.tab_k)
+            self._trapz_weights_[1:] += 0.5 * dlnk
+            self._trapz_weights_[0:-1] += 0.5 * dlnk
+        return self._trapz_weights_
         
     def CollapsedFraction(self):
         pass
@@ -178,15 +214,18 @@ class ExcursionSet(object):
         
         Parameters
         ----------
-        z: int, float
-            Redshift of interest.
+        z: int, float, np.ndarray
+            Redshift(s) of interest. The variance is computed for all 
+            redshifts at once, so this is much faster than calling this 
+            function once per redshift.
             
         Returns
         -------
         Tuple containing (in order) the radii, masses, and the
         differential size distribution. Each is an array of length
         self.tab_M, i.e., with elements corresponding to the masses
-        used to compute the variance of the density field.
+        used to compute the variance of the density field. If `z` is an
+        array, the size distribution has shape (len(z), len(R) - 2).
             
         """
         
@@ -194,14 +233,14 @@ class ExcursionSet(object):
         rho0_m = self.cosm.rho_m_z0 * rho_cgs
 
         M = self.Mass(R)
-        S = np.array([self.Variance(z, RR) for RR in R])
+        S = self.Variance(z, R)
 
-        _M, _dlnSdlnM = central_difference(np.log(M[-1::-1]), np.log(S[-1::-1]))
-        _M = _M[-1::-1]
-        dlnSdlnM = _dlnSdlnM[-1::-1]
-        dSdM = dlnSdlnM * (S[1:-1] / M[1:-1])
+        # Central difference (see `util.Math.central_difference`) in last axis.
+        dlnSdlnM = (np.log(S[...,2:]) - np.log(S[...,0:-2])) \
+                 / (np.log(M[2:]) - np.log(M[0:-2]))
+        dSdM = dlnSdlnM * (S[...,1:-1] / M[1:-1])
 
-        dFdM = self.FCD(z, R, dcrit, dzero)[1:-1] * np.abs(dSdM)
+        dFdM = self._FCD(S, dcrit, dzero)[...,1:-1] * np.abs(dSdM)
 
         # This is, e.g., Eq. 17 in Zentner (2006) 
         # or Eq. 9.38 in Loeb and Furlanetto (2013)
@@ -216,14 +255,11 @@ class ExcursionSet(object):
         i.e., dF/dS where S=sigma^2.
         """
         
-        S = np.array([self.Variance(z, RR) for RR in R])
+        return self._FCD(self.Variance(z, R), dcrit, dzero)
         
+    def _FCD(self, S, dcrit=1.686, dzero=0.0):
         norm = (dcrit - dzero) / np.sqrt(two_pi) / S**1.5
         
         p = norm * np.exp(-(dcrit - dzero)**2 / 2. / S)
         
         return p
-        
-        
-        
-        
\ No newline at end of file
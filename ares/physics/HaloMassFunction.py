@@ -14,7 +14,7 @@ import os, re, sys
 import numpy as np
 from . import Cosmology
 from types import FunctionType
-from ..util import ParameterFile
+from ..util.ParameterFile import ParameterFile
 from scipy.misc import derivative
 from scipy.optimize import fsolve
 from ..util.Warnings import no_hmf
@@ -22,9 +22,11 @@ from scipy.integrate import cumtrapz, simps
 from ..util.PrintInfo import print_hmf
 from ..util.ProgressBar import ProgressBar
 from ..util.ParameterFile import ParameterFile
+from ..util.Caching import cached_property, ParameterDependent, _matches
 from ..util.Math import central_difference, smooth
 from ..util.Pickling import read_pickle_file, write_pickle_file
 from ..util.SetDefaultParameterValues import CosmologyParameters
+from ..util.Timer import timed
 from .Constants import g_per_msun, cm_per_mpc, s_per_yr, G, cm_per_kpc, \
     m_H, k_B, s_per_myr
 from scipy.interpolate import UnivariateSpline, RectBivariateSpline, \
@@ -85,7 +87,12 @@ sqrt2 = np.sqrt(2.)
 tiny_fcoll = 1e-18
 tiny_dfcolldz = 1e-18
 
-class HaloMassFunction(object):
+_cosmo_pars = list(CosmologyParameters().keys())
+
+# Anything that changes the tabulated mass function itself
+_hmf_pars = ['hmf_*'] + _cosmo_pars
+
+class HaloMassFunction(ParameterDependent):
     def __init__(self, **kwargs):
         """
         Initialize HaloDensity object.
@@ -137,6 +144,32 @@ class HaloMassFunction(object):
         """
         self.pf = ParameterFile(**kwargs)
 
+        self._locate_table()
+
+        self._is_loaded = False
+
+        if self.pf['hmf_dfcolldz_smooth']:
+            assert self.pf['hmf_dfcolldz_smooth'] % 2 != 0, \
+                'hmf_dfcolldz_smooth must be odd!'
+
+    def invalidate(self, *pars):
+        # Changes to the HMF itself mean we need to find (and load) a new
+        # table: throw out the old one.
+        if any([_matches(par, _hmf_pars) for par in pars]):
+            for key in list(self.__dict__.keys()):
+                if key.startswith('tab_') or key.startswith('_tab_'):
+                    del self.__dict__[key]
+
+            self._locate_table()
+            self._is_loaded = False
+
+        return ParameterDependent.invalidate(self, *pars)
+
+    def _locate_table(self):
+        """
+        Find the HMF table that matches the current set of parameters.
+        """
+
         # Read in a few parameters for convenience
         self.tab_name = self.pf["hmf_table"]
         self.hmf_func = self.pf['hmf_model']
@@ -228,12 +261,6 @@ class HaloMassFunction(object):
         #else:
         #    self.load_hmf()
 
-        self._is_loaded = False
-
-        if self.pf['hmf_dfcolldz_smooth']:
-            assert self.pf['hmf_dfcolldz_smooth'] % 2 != 0, \
-                'hmf_dfcolldz_smooth must be odd!'
-
     @property
     def Mmax_ceil(self):
         if not hasattr(self, '_Mmax_ceil'):
@@ -246,7 +273,7 @@ class HaloMassFunction(object):
             self._logMmax_ceil = np.log10(self.Mmax_ceil)
         return self._logMmax_ceil
 
-    @property
+    @cached_property(*_cosmo_pars)
     def cosm(self):
         if not hasattr(self, '_cosm'):
             self._cosm = Cosmology(pf=self.pf, **self.pf)
@@ -365,6 +392,7 @@ class HaloMassFunction(object):
             self._tab_MAR = 10**(np.diff(log_tmar, axis=0).squeeze() \
                 * (m_X - m_X_l) + log_tmar[0])
 
+    @timed('hmf')
     def _load_hmf(self):
         """ Load table from HDF5 or binary. """
 
@@ -512,13 +540,13 @@ class HaloMassFunction(object):
                 'Ob0':self.cosm.omega_b_0,
                 'H0':self.cosm.h70*100}
 
-    @property
+    @cached_property('hmf_dlna')
     def pars_growth(self):
         if not hasattr(self, '_pars_growth'):
             self._pars_growth = {'dlna': self.pf['hmf_dlna']}
         return self._pars_growth
 
-    @property
+    @cached_property('hmf_transfer_*')
     def pars_transfer(self):
         if not hasattr(self, '_pars_transfer'):
             _transfer_pars = \
@@ -532,7 +560,7 @@ class HaloMassFunction(object):
 
         return self._pars_transfer
 
-    @property
+    @cached_property(*_hmf_pars)
     def _MF(self):
         if not hasattr(self, '_MF_'):
 
@@ -570,19 +598,19 @@ class HaloMassFunction(object):
     def _MF(self, value):
         self._MF_ = value
 
-    @property
+    @cached_property(*_hmf_pars)
     def tab_dndlnm(self):
         if not hasattr(self, '_tab_dndlnm'):
             self._tab_dndlnm = self.tab_M * self.tab_dndm
         return self._tab_dndlnm
 
-    @property
+    @cached_property(*_hmf_pars)
     def tab_fcoll(self):
         if not hasattr(self, '_tab_fcoll'):
             self._tab_fcoll = self.tab_mgtm / self.cosm.mean_density0
         return self._tab_fcoll
 
-    @property
+    @cached_property(*_hmf_pars)
     def tab_bias(self):
         if not hasattr(self, '_tab_bias'):
             self._tab_bias = np.zeros((self.tab_z.size, self.tab_M.size))
@@ -598,7 +626,7 @@ class HaloMassFunction(object):
             tab_z = self.tab_z
         return self._tab_t
 
-    @property
+    @cached_property(*_hmf_pars)
     def tab_z(self):
         if not hasattr(self, '_tab_z'):
             if (self.pf['hmf_table'] is not None) or (self.pf['hmf_pca'] is not None):
@@ -643,6 +671,7 @@ class HaloMassFunction(object):
         if rank == 0:
             print_hmf(self)
 
+    @timed('hmf_tab')
     def TabulateHMF(self, save_MAR=True):
         """
         Build a lookup table for the halo mass function / collapsed fraction.
@@ -831,7 +860,7 @@ class HaloMassFunction(object):
         # OK, *now* we're done.
         ##
 
-    @property
+    @cached_property(*_hmf_pars)
     def tab_MAR(self):
         if not hasattr(self, '_tab_MAR'):
             if (not self._is_loaded) and self.pf['hmf_load']:
@@ -845,7 +874,8 @@ class HaloMassFunction(object):
     def tab_MAR(self, value):
         self._tab_MAR = value
 
-    @property
+    @cached_property('pop_Tmin', 'pop_Mmin', 'pop_Tmax', 'pop_Mmax', 'mu',
+        *_hmf_pars)
     def fcoll_Tmin(self):
         if not hasattr(self, '_fcoll_Tmin'):
             self.build_1d_splines(Tmin=self.pf['pop_Tmin'], mu=self.pf['mu'])
@@ -960,7 +990,7 @@ class HaloMassFunction(object):
 
         return fcoll_spline, dfcolldz_spline, None
 
-    @property
+    @cached_property(*_hmf_pars)
     def tab_fcoll_2d(self):
         if not hasattr(self, '_tab_fcoll_2d'):
             # Remember that mgtm and mean_density have factors of h**2
@@ -972,7 +1002,7 @@ class HaloMassFunction(object):
 
         return self._tab_fcoll_2d
 
-    @property
+    @cached_property(*_hmf_pars)
     def fcoll_spline_2d(self):
         if not hasattr(self, '_fcoll_spline_2d'):
             self._fcoll_spline_2d = RectBivariateSpline(self.tab_z,
@@ -1017,7 +1047,7 @@ class HaloMassFunction(object):
 
         return bias
 
-    @property
+    @cached_property(*_hmf_pars)
     def LinearPS(self):
         """
         Interpolant for the linear matter power spectrum.
@@ -1035,7 +1065,7 @@ class HaloMassFunction(object):
                 np.log(self.tab_k_lin), self.tab_ps_lin, kx=3, ky=3)
         return self._LinearPS
 
-    @property
+    @cached_property(*_hmf_pars)
     def LinearPS(self):
         """
         Interpolant for the linear matter power spectrum.
@@ -1107,7 +1137,7 @@ class HaloMassFunction(object):
 
         return M
 
-    @property
+    @cached_property(*_hmf_pars)
     def tab_MAR_delayed(self):
         if not hasattr(self, '_tab_MAR_delayed'):
             tdyn = self.DynamicalTime(self.tab_z)
@@ -1119,16 +1149,29 @@ class HaloMassFunction(object):
     def MAR_func(self, z, M):
         return self.MAR_func_(z, M)
 
-    @property
-    def MAR_func_(self):
-        if not hasattr(self, '_MAR_func_'):
-            mask = np.isfinite(self.tab_MAR)
+    def MAR_func_ev(self, z, M):
+        """
+        Like `MAR_func`, but evaluated at pairs (z[i], M[i]) rather than on
+        the grid spanned by `z` and `M`.
+        """
+        return np.exp(self._spline_ln_MAR.ev(z, np.log(M)))
 
+    @cached_property(*_hmf_pars)
+    def _spline_ln_MAR(self):
+        if not hasattr(self, '_spline_ln_MAR_'):
             tab = np.log(self.tab_MAR)
             bad = np.logical_or(np.isnan(self.tab_MAR), np.isinf(tab))
             tab[bad==1] = -50
 
-            _MAR_func = RectBivariateSpline(self.tab_z, np.log(self.tab_M), tab)
+            self._spline_ln_MAR_ = \
+                RectBivariateSpline(self.tab_z, np.log(self.tab_M), tab)
+
+        return self._spline_ln_MAR_
+
+    @cached_property(*_hmf_pars)
+    def MAR_func_(self):
+        if not hasattr(self, '_MAR_func_'):
+            _MAR_func = self._spline_ln_MAR
 
             self._MAR_func_ = lambda z, M: np.exp(_MAR_func(z, np.log(M))).squeeze()
 
@@ -1222,7 +1265,7 @@ class HaloMassFunction(object):
         return np.sqrt(self.VirialRadius(z, M, mu)**3 * cm_per_kpc**3 \
             / G / M / g_per_msun)
 
-    @property
+    @cached_property(*_hmf_pars)
     def tab_Mmin_floor(self):
         if not hasattr(self, '_tab_Mmin_floor'):
             if not self._is_loaded:
@@ -1239,7 +1282,7 @@ class HaloMassFunction(object):
         assert len(value) == len(self.tab_z)
         self._tab_Mmin_floor = value
 
-    @property
+    @cached_property()
     def Tegmark(self):
         if not hasattr(self, '_Tegmark'):
             def func(z):
@@ -9,6 +9,7 @@ from types import FunctionType
 from scipy.integrate import quad
 from scipy.interpolate import interp1d, Akima1DInterpolator
 from ..util.ProgressBar import ProgressBar
+from ..util.Caching import cached_property
 from .Constants import rho_cgs, c, cm_per_mpc
 from .HaloMassFunction import HaloMassFunction
 
@@ -672,7 +673,7 @@ class HaloModel(HaloMassFunction):
         # 
         return np.abs(ps)
     
-    @property
+    @cached_property('hps_dlnk', 'hps_lnk_min', 'hps_lnk_max')
     def tab_k(self):
         """
         k-vector constructed from mps parameters.
@@ -689,7 +690,7 @@ class HaloModel(HaloMassFunction):
     def tab_k(self, value):
         self._tab_k = value
     
-    @property
+    @cached_property('hps_dlnR', 'hps_lnR_min', 'hps_lnR_max')
     def tab_R(self):
         """
         R-vector constructed from mps parameters.
@@ -702,7 +703,7 @@ class HaloModel(HaloMassFunction):
             
         return self._tab_R
         
-    @property
+    @cached_property('hps_zmin', 'hps_zmax', 'hps_dz')
     def tab_z_ps(self):
         """
         Redshift array -- different than HMF redshifts!
@@ -11,7 +11,8 @@ Description:
 """
 
 import numpy as np
-from ares.util import ParameterFile, read_lit
+from ..util.ReadData import read_lit
+from ..util.ParameterFile import ParameterFile
 from ares.physics.Hydrogen import Hydrogen
 from ares.physics.RateCoefficients import RateCoefficients
 from ares.physics.Constants import h_p, c, k_B, erg_per_ev, E_LyA, E_LL, Ryd, \
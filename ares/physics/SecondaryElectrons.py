@@ -108,7 +108,7 @@ class SecondaryElectrons(object):
         
         The parameter 'channel' determines which we want, and could be:
         
-            channel = (heat, h_1, he_1, he_2, lya)
+            channel = (heat, h_1, he_1, he_2, lya, exc)
         
         also,
                     
@@ -118,6 +118,9 @@ class SecondaryElectrons(object):
             Method = 3: Lookup tables of Furlanetto & Stoever 2010.
             
         xHII is preferably an array of values (corresponding to grid elements).
+        E (the electron energy in eV) can be an array too, in which case
+        it is broadcast against xHII, e.g., pass E[:,None] and xHII[None,:]
+        to get fractions for all combinations.
             
         """
         
@@ -126,23 +129,28 @@ class SecondaryElectrons(object):
         
         if not isinstance(xHII, Iterable):
             xHII = np.array([xHII])
+        else:
+            xHII = np.asarray(xHII, dtype=float)
                     
         if E is None: 
             E = tiny_number
+            
+        E = np.asarray(E, dtype=float)
+        
+        # Output has the shape of xHII and E broadcast together
+        ones = np.ones(np.broadcast(xHII, E).shape)
         
         if method == 0:
             if channel == 'heat':
-                return np.ones_like(xHII)
+                return ones
             else: 
-                return np.zeros_like(xHII)
+                return 0.0 * ones
             
         if method == 1: 
+            xHII = xHII * ones
             if channel == 'heat': 
-                tmp = tiny_number * np.zeros_like(xHII)
-                tmp[xHII <= 1e-4] = 0.15 * np.ones(len(tmp[xHII <= 1e-4]))
-                tmp[xHII > 1e-4] = 0.9971 * (1. - pow(1. - 
-                    pow(xHII[xHII > 1e-4], 0.2663), 1.3163))
-                return tmp
+                return np.where(xHII <= 1e-4, 0.15,
+                    0.9971 * (1. - pow(1. - pow(xHII, 0.2663), 1.3163)))
             if channel == 'h_1': 
                 return 0.3908 * pow(1. - pow(xHII, 0.4092), 1.7592)
             if channel == 'he_1': 
@@ -154,56 +162,82 @@ class SecondaryElectrons(object):
             
         # Ricotti, Gnedin, & Shull (2002)
         if method == 2:
+            xHII = xHII * ones
+            E = E * ones
             if channel == 'heat': 
-                tmp = tiny_number * np.zeros_like(xHII)
-                tmp[xHII <= 1e-4] = 0.15 * np.ones_like(tmp[xHII <= 1e-4]) 
-                if E >= 11:
-                    tmp[xHII > 1e-4] = 3.9811 * (11. / E)**0.7 \
-                        * pow(xHII[xHII > 1e-4], 0.4) * \
-                        (1. - pow(xHII[xHII > 1e-4] , 0.34))**2 + \
-                        (1. - (1. - pow(xHII[xHII > 1e-4] , 0.2663))**1.3163)
-                else:
-                    tmp[xHII > 1e-4] = (1. - tiny_number) \
-                        * np.ones_like(tmp[xHII > 1e-4]) 
+                # Avoid evaluating fit where it doesn't apply (E < 11 eV)
+                Ehi = np.maximum(E, 11.)
+                fhi = 3.9811 * (11. / Ehi)**0.7 \
+                    * pow(xHII, 0.4) * (1. - pow(xHII, 0.34))**2 \
+                    + (1. - (1. - pow(xHII, 0.2663))**1.3163)
+                fhi = np.where(E >= 11, fhi, 1. - tiny_number)
                     
-                return tmp
+                return np.where(xHII <= 1e-4, 0.15, fhi)
                     
             if channel == 'h_1': 
-                if E >= 28:
-                    return np.maximum(-0.6941 * (28. / E)**0.4 * pow(xHII, 0.2) * \
-                        (1. - pow(xHII, 0.38))**2 + \
-                        0.3908 * (1. - pow(xHII, 0.4092))**1.7592, tiny_number)
-                else:
-                    return tiny_number * np.zeros_like(xHII)
+                Ehi = np.maximum(E, 28.)
+                f = np.maximum(-0.6941 * (28. / Ehi)**0.4 * pow(xHII, 0.2) * \
+                    (1. - pow(xHII, 0.38))**2 + \
+                    0.3908 * (1. - pow(xHII, 0.4092))**1.7592, tiny_number)
+                return np.where(E >= 28, f, 0.0)
             if channel == 'he_1': 
-                if E >= 28:
-                    return np.maximum(-0.0984 * (28. / E)**0.4 * pow(xHII, 0.2) * \
-                        (1. - pow(xHII, 0.38))**2 + \
-                        0.0554 * (1. - pow(xHII, 0.4614))**1.6660, tiny_number)
-                else:
-                    return tiny_number * np.zeros_like(xHII)
+                Ehi = np.maximum(E, 28.)
+                f = np.maximum(-0.0984 * (28. / Ehi)**0.4 * pow(xHII, 0.2) * \
+                    (1. - pow(xHII, 0.38))**2 + \
+                    0.0554 * (1. - pow(xHII, 0.4614))**1.6660, tiny_number)
+                return np.where(E >= 28, f, 0.0)
             if channel == 'he_2': 
                 return tiny_number * np.zeros_like(xHII)
         
         # Furlanetto & Stoever (2010)
         if method == 3:
             
-            f = tiny_number * np.zeros_like(xHII)
+            splines = {'heat': self.fh, 'h_1': self.fHI, 'he_1': self.fHeI,
+                'he_2': self.fHeII, 'lya': self.flya, 'exc': self.fexc}
             
-            for i, x in enumerate(xHII):
-            
-                if channel == 'heat':
-                    f[i] = self.fh(E, x)
-                if channel == 'h_1': 
-                    f[i] = self.fHI(E, x)
-                if channel == 'he_1': 
-                    f[i] = self.fHeI(E, x)
-                if channel == 'he_2': 
-                    f[i] = self.fHeII(E, x)
-                if channel == 'lya':
-                    f[i] = self.flya(E, x)
-                if channel == 'exc':
-                    f[i] = self.fexc(E, x)
-            
-            return f
+            Eb = (E * ones).ravel()
+            xb = (xHII * ones).ravel()
             
+            return splines[channel].ev(Eb, xb).reshape(ones.shape)
+
+    def DepositionFractionTable(self, E, channel='heat', method=None):
+        """
+        Tabulate deposition fractions on the grid of ionized fractions, 
+        self.x, for an array of electron energies.
+        
+        Parameters
+        ----------
+        E : np.ndarray
+            Electron energies [eV].
+        
+        Returns
+        -------
+        Array of shape (E.size, self.x.size). Use InterpolateTable to get
+        fractions at some ionized fraction.
+        
+        """
+        
+        E = np.atleast_1d(E)
+
+        # Last element of self.x can exceed unity by round-off, in which
+        # case the fits (methods 1 and 2) return NaN.
+        x = np.minimum(self.x, 1.)
+
+        return self.DepositionFraction(x[None,:], E=E[:,None],
+            channel=channel, method=method)
+
+    def InterpolateTable(self, tab, xHII):
+        """
+        Interpolate a table from DepositionFractionTable to ionized fraction
+        `xHII` (a scalar), i.e., get fractions for all energies at once.
+        
+        Values of `xHII` outside the range of self.x are set to the edges.
+        """
+        
+        x = self.x
+        
+        i = np.searchsorted(x, xHII, side='right') - 1
+        i = min(max(i, 0), x.size - 2)
+        w = min(max((xHII - x[i]) / (x[i+1] - x[i]), 0.), 1.)
+        
+        return tab[:,i] * (1. - w) + tab[:,i+1] * w
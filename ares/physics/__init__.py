@@ -8,3 +8,7 @@ from ares.physics.HaloMassFunction import HaloMassFunction
 from ares.physics.RateCoefficients import RateCoefficients
 from ares.physics.SecondaryElectrons import SecondaryElectrons
 from ares.physics.CrossSections import PhotoIonizationCrossSection
+
+def __getattr__(name):
+    from .. import _import_submodule
+    return _import_submodule(__name__, name)
@@ -17,19 +17,20 @@ from ..util import read_lit
 from inspect import ismethod
 from types import FunctionType
 from ..util import ProgressBar
-from ..analysis import ModelSet
 from scipy.misc import derivative
 from scipy.optimize import fsolve, minimize
 from ..analysis.BlobFactory import BlobFactory
 from scipy.integrate import quad, simps, cumtrapz, ode
 from ..util.ParameterFile import par_info, get_pq_pars
+from ..util.Caching import cached_property
 from ..physics.RateCoefficients import RateCoefficients
 from scipy.interpolate import RectBivariateSpline
 from .GalaxyAggregate import GalaxyAggregate
 from .Population import normalize_sed
 from ..util.Stats import bin_c2e, bin_e2c
 from ..util.Math import central_difference, interp1d_wrapper, interp1d, \
-    LinearNDInterpolator
+    LinearNDInterpolator, integrate_rows
+from ..util.Timer import timed
 from ..phenom.ParameterizedQuantity import ParameterizedQuantity
 from ..physics.Constants import s_per_yr, g_per_msun, cm_per_mpc, G, m_p, \
     k_B, h_p, erg_per_ev, ev_per_hz, sigma_T, c, t_edd, cm_per_kpc, E_LL, E_LyA, \
@@ -52,6 +53,15 @@ z0 = 9. # arbitrary
 tiny_phi = 1e-18
 _sed_tab_attributes = ['Nion', 'Nlw', 'rad_yield', 'L1600_per_sfr',
     'L_per_sfr']
+
+# Parameters that can affect the SFE, either directly or via abundance
+# matching. See `SFE` and `fstar`.
+_sfe_pars = ['pop_sfr_model', 'pop_sfr', 'pop_star_formation', 'pop_fstar*',
+    'pop_mlf', 'pop_fshock', 'pop_calib_*', 'pop_ssp', 'pop_uvlf',
+    'pop_mag_*', 'pop_histories', 'pop_lum_per_sfr', 'pq_*']
+
+# Parameters that set `zform` and `zdead`
+_z_pars = ['pop_zform', 'pop_zdead', 'first_light_redshift']
     
 class GalaxyCohort(GalaxyAggregate,BlobFactory):
             
@@ -160,9 +170,53 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
             
         # Check to see if Z?
         setattr(self, name, result)
-                
+
+        # Keep track of these so `invalidate` can clear them
+        if not hasattr(self, '_dynamic_attrs'):
+            self._dynamic_attrs = []
+        self._dynamic_attrs.append(name)
+
         return result
 
+    def invalidate(self, *pars):
+        cleared = GalaxyAggregate.invalidate(self, *pars)
+
+        # Quantities generated on-the-fly in __getattr__, e.g., fesc, focc.
+        if hasattr(self, '_dynamic_attrs'):
+            new_pq = any([par.startswith('pq') for par in pars])
+            new_src = 'src' in cleared
+
+            for name in self._dynamic_attrs[:]:
+                if 'pop_' + name in pars:
+                    pass
+                elif new_pq and (name in self._pq_registry):
+                    pass
+                elif new_src and (name in _sed_tab_attributes):
+                    pass
+                else:
+                    continue
+
+                delattr(self, name)
+                self._dynamic_attrs.remove(name)
+                if name in self._pq_registry:
+                    del self._pq_registry[name]
+
+        if 'fstar' in cleared:
+            for name in ['_fstar_inst', '_mlf_inst']:
+                if hasattr(self, name):
+                    delattr(self, name)
+            if hasattr(self, '_pq_registry') and ('mlf' in self._pq_registry):
+                del self._pq_registry['mlf']
+
+        # Plain caches built from tables that are now gone
+        if '_tab_sfr' in cleared and hasattr(self, '_spline_sfr'):
+            del self._spline_sfr
+        if hasattr(self, '_N_per_Msun') and \
+            any([par in ['pop_Nion', 'pop_Nlw'] for par in pars]):
+            del self._N_per_Msun
+
+        return cleared
+
     def get_field(self, z, field):
         """
         Return results from SAM (all masses) at input redshift.
@@ -229,7 +283,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
             
         return self._N_per_Msun[(Emin, Emax)]
         
-    @property
+    @cached_property()
     def _spline_nh(self):
         if not hasattr(self, '_spline_nh_'):
             self._spline_nh_ = \
@@ -237,48 +291,65 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
                     self.halos.tab_dndm)
         return self._spline_nh_
     
-    @property
+    @cached_property()
     def _tab_MAR(self):
         if not hasattr(self, '_tab_MAR_'):
             self._tab_MAR_ = self.halos.tab_MAR
 
         return self._tab_MAR_
     
-    @property
+    @cached_property('pop_fsmooth', 'pop_MAR', 'pq_*')
     def _tab_MAR_at_Mmin(self):
         if not hasattr(self, '_tab_MAR_at_Mmin_'):
-            self._tab_MAR_at_Mmin_ = \
-                np.array([self.MAR(self.halos.tab_z[i], self._tab_Mmin[i]) \
-                    for i in range(self.halos.tab_z.size)])                    
+            z = self.halos.tab_z
+            Mmin = self._tab_Mmin
+
+            # Evaluate at (z, Mmin(z)) pairs all at once. Same as calling
+            # self.MAR(z, Mmin) in a loop, except that MAR(z, Mh) evaluates
+            # the splines on a grid.
+            if np.all(self._tab_eta == 1):
+                eta = 1.
+            elif self._tab_eta.ndim == 1:
+                eta = self._tab_eta
+            else:
+                eta = RectBivariateSpline(z, np.log10(self.halos.tab_M), 
+                    self._tab_eta).ev(z, np.log10(Mmin))
+
+            if self.pf['pop_MAR'] == 'hmf':
+                MGR = self.halos.MAR_func_ev(z, Mmin)
+            else:
+                MGR = self.MGR(z, Mmin)
+
+            self._tab_MAR_at_Mmin_ = eta \
+                * np.maximum(MGR * self.fsmooth(z=z, Mh=Mmin), 0.)
 
         return self._tab_MAR_at_Mmin_ 
     
-    @property
+    @cached_property()
     def _tab_nh_at_Mmin(self):
         if not hasattr(self, '_tab_nh_at_Mmin_'):
-            self._tab_nh_at_Mmin_ = \
-                np.array([self._spline_nh(self.halos.tab_z[i], 
-                    np.log(self._tab_Mmin[i])) \
-                    for i in range(self.halos.tab_z.size)]).squeeze()
+            self._tab_nh_at_Mmin_ = self._spline_nh.ev(self.halos.tab_z, 
+                np.log(self._tab_Mmin))
 
         return self._tab_nh_at_Mmin_
         
-    @property
+    @cached_property(*_sfe_pars)
     def _tab_fstar_at_Mmin(self):
         if not hasattr(self, '_tab_fstar_at_Mmin_'):
             self._tab_fstar_at_Mmin_ = \
                 self.SFE(z=self.halos.tab_z, Mh=self._tab_Mmin)
         return self._tab_fstar_at_Mmin_
         
-    @property
+    @cached_property('pop_tstar', 'pop_fsmooth', *_sfe_pars)
     def _tab_sfr_at_Mmin(self):
         if not hasattr(self, '_tab_sfr_at_Mmin_'):
-            self._tab_sfr_at_Mmin_ = \
-                np.array([self.SFR(z=self.halos.tab_z[i], Mh=self._tab_Mmin[i]) \
-                    for i in range(self.halos.tab_z.size)])
+            # Same as self.SFR(z=z, Mh=Mmin) at each redshift
+            self._tab_sfr_at_Mmin_ = 10**self._spline_log10sfr.ev(
+                self.halos.tab_z, np.log10(self._tab_Mmin))
         return self._tab_sfr_at_Mmin_
 
-    @property
+    @cached_property('pop_sfr_cross_threshold', 'pop_sfr_cross_upto_Tmin',
+        'pop_fsup', 'pop_focc', 'mu', *_sfe_pars)
     def _tab_sfrd_at_threshold(self):
         """
         Star formation rate density from halos just crossing threshold.
@@ -524,7 +595,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         # until CALLED. Used only for tunneling (see `pop_tunnel` parameter). 
         return self.SFRD(z)
         
-    @property   
+    @cached_property('pop_interp_sfrd')
     def SFRD(self):
         """
         Compute star-formation rate density (SFRD).
@@ -541,7 +612,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
     def SFRD(self, value):
         self._SFRD = value 
         
-    @property   
+    @cached_property('pop_interp_sfrd')
     def nactive(self):
         """
         Compute number of active halos.
@@ -553,7 +624,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
     
         return self._nactive
     
-    @property   
+    @cached_property('pop_interp_sfrd')
     def SMD(self):
         """
         Compute stellar mass density (SMD).
@@ -575,7 +646,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         # Mass "delivery" rate
         return self.MGR(z, Mh) * (1. - self.fsmooth(z=z, Mh=Mh))
         
-    @property
+    @cached_property()
     def eta(self):
         if not hasattr(self, '_eta'):
             if np.all(self._tab_eta == 1):
@@ -589,7 +660,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
                     
         return self._eta
 
-    @property
+    @cached_property('pop_MAR_corr', 'pop_interp_MAR')
     def _tab_eta(self):
         """
         Correction factor for MAR.
@@ -723,13 +794,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
             # in cases where we just want to know the SFR at a few redshifts
             # and/or halo masses. But, we're rarely doing such things.
             if not hasattr(self, '_spline_sfr'):
-                log10sfr = np.log10(self._tab_sfr)
-                # Filter zeros since we're going log10
-                log10sfr[np.isinf(log10sfr)] = -90.
-                log10sfr[np.isnan(log10sfr)] = -90.
-                
-                _spline_sfr = RectBivariateSpline(self.halos.tab_z, 
-                    np.log10(self.halos.tab_M), log10sfr)
+                _spline_sfr = self._spline_log10sfr
                 
                 #func = lambda z, log10M: 10**_spline_sfr(z, log10M).squeeze()
                 
@@ -755,6 +820,19 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         return self.cosm.fbar_over_fcdm * self.MAR(z, Mh) * self.eta(z) \
             * self.SFE(z=z, Mh=Mh)
 
+    @cached_property()
+    def _spline_log10sfr(self):
+        if not hasattr(self, '_spline_log10sfr_'):
+            log10sfr = np.log10(self._tab_sfr)
+            # Filter zeros since we're going log10
+            log10sfr[np.isinf(log10sfr)] = -90.
+            log10sfr[np.isnan(log10sfr)] = -90.
+
+            self._spline_log10sfr_ = RectBivariateSpline(self.halos.tab_z, 
+                np.log10(self.halos.tab_M), log10sfr)
+
+        return self._spline_log10sfr_
+
     def Emissivity(self, z, E=None, Emin=None, Emax=None):
         """
         Compute the emissivity of this population as a function of redshift
@@ -886,7 +964,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         else:
             return Mobs, cgal
 
-    @property
+    @cached_property('pop_uvlf')
     def is_uvlf_parametric(self):
         if not hasattr(self, '_is_uvlf_parametric'):
             self._is_uvlf_parametric = self.pf['pop_uvlf'] is not None
@@ -1178,7 +1256,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
 
         return self.MUV(z, self.Mmin(z))
 
-    @property
+    @cached_property('pop_fstar_negligible')
     def _tab_Mmax_active(self):
         """ most massive star-forming halo. """
         if not hasattr(self, '_tab_Mmax_active_'):
@@ -1190,7 +1268,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
                 self._tab_Mmax_active_[i] = self.halos.tab_M[immsfh]
         return self._tab_Mmax_active_
     
-    @property
+    @cached_property()
     def Mmax_active(self):
         if not hasattr(self, '_Mmax_active_'):
             self._Mmax_active_ = \
@@ -1205,14 +1283,14 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         # Long story.
         return np.interp(z, self.halos.tab_z, self._tab_Mmax)
         
-    @property
+    @cached_property('mu', attr='_Matom')
     def M_atom(self):
         if not hasattr(self, '_Matom'):
             Mvir = lambda z: self.halos.VirialMass(z, 1e4, mu=self.pf['mu'])
             self._Matom = np.array(list(map(Mvir, self.halos.tab_z)))
         return self._Matom    
     
-    @property
+    @cached_property()
     def Mmin(self):
         if not hasattr(self, '_Mmin'):  
             self._Mmin = lambda z: \
@@ -1233,13 +1311,13 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         # Long story.
         return np.interp(z, self.halos.tab_z, self._tab_Mmax)
 
-    @property
+    @cached_property()
     def _tab_logMmin(self):
         if not hasattr(self, '_tab_logMmin_'):
             self._tab_logMmin_ = np.log(self._tab_Mmin)
         return self._tab_logMmin_
     
-    @property
+    @cached_property()
     def _tab_logMmax(self):
         if not hasattr(self, '_tab_logMmax_'):
             self._tab_logMmax_ = np.log(self._tab_Mmax)
@@ -1255,7 +1333,8 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
     def _loaded_guesses(self, value):
         self._loaded_guesses_ = value
     
-    @property
+    @cached_property('feedback_LW_guesses', 'pop_Mmin', 'pop_Tmin',
+        'pop_Mmin_*', 'pop_Tmin_*', 'mu')
     def _tab_Mmin(self):
         if not hasattr(self, '_tab_Mmin_'):
                                     
@@ -1308,9 +1387,9 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
     
         self._tab_Mmin_ = self._apply_lim(self._tab_Mmin_, s='min')
 
-    @property
-    def _spline_ngtm(self):
-        if not hasattr(self, '_spline_ngtm_'):
+    @cached_property()
+    def _spline_log10_ngtm(self):
+        if not hasattr(self, '_spline_log10_ngtm_'):
             # Need to setup spline for n(>M)                        
             log10_ngtm = np.log10(self.halos.tab_ngtm)
             not_ok = np.isinf(log10_ngtm)
@@ -1318,14 +1397,21 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
             
             log10_ngtm[ok==0] = -40.
     
-            _spl = RectBivariateSpline(self.halos.tab_z, 
+            self._spline_log10_ngtm_ = RectBivariateSpline(self.halos.tab_z, 
                np.log10(self.halos.tab_M), log10_ngtm)
+
+        return self._spline_log10_ngtm_
+
+    @cached_property()
+    def _spline_ngtm(self):
+        if not hasattr(self, '_spline_ngtm_'):
+            _spl = self._spline_log10_ngtm
             self._spline_ngtm_  = \
                 lambda z, log10M: 10**_spl(z, log10M).squeeze()
             
         return self._spline_ngtm_    
         
-    @property
+    @cached_property()
     def _tab_n_Mmin(self):
         """
         Number of objects in each Mmin bin. Only use this for setting
@@ -1334,9 +1420,8 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         if not hasattr(self, '_tab_n_Mmin_'):
             
             # Interpolate halo abundances onto Mmin axis.
-            ngtm_Mmin = np.array([self._spline_ngtm(self.halos.tab_z[i],
-                np.log10(self._tab_Mmin)[i]) \
-                    for i in range(self.halos.tab_z.size)])
+            ngtm_Mmin = 10**self._spline_log10_ngtm.ev(self.halos.tab_z,
+                np.log10(self._tab_Mmin))
 
             # Number of halos in this Mmin bin is just the difference
             # in N(M>Mmin) between two redshift steps.
@@ -1348,7 +1433,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
 
         return self._tab_n_Mmin_    
 
-    @property    
+    @cached_property('feedback_streaming', 'feedback_vel_at_rec')
     def _tab_Mmin_floor(self):
         if not hasattr(self, '_tab_Mmin_floor_'):
             self._tab_Mmin_floor_ = self.halos.Mmin_floor(self.halos.tab_z)
@@ -1396,7 +1481,8 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
             self._done_setting_Mmax_ = False
         return self._done_setting_Mmax_
 
-    @property
+    @cached_property('pop_*', 'pq_*', 'initial_redshift', 'final_redshift',
+        'mu')
     def _tab_Mmax(self):
         if not hasattr(self, '_tab_Mmax_'):
                                                 
@@ -1489,7 +1575,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         else:
             self._tab_Mmax_ = value
         
-    @property
+    @cached_property(*_z_pars)
     def _tab_sfr_mask(self):
         if not hasattr(self, '_tab_sfr_mask_'):
             # Mmin is like tab_z, make it like (z, M)
@@ -1609,7 +1695,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         
         return fstar
         
-    @property
+    @cached_property('pop_tstar', 'debug', *(_sfe_pars + _z_pars))
     def _tab_sfr(self):
         """
         SFR as a function of redshift and halo mass.
@@ -1689,133 +1775,50 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
                                             
         return self._tab_sfr_
 
-    @property
+    @cached_property()
     def SFRD_at_threshold(self):
         if not hasattr(self, '_SFRD_at_threshold'):
             self._SFRD_at_threshold = \
                 lambda z: np.interp(z, self.halos.tab_z, self._tab_sfrd_at_threshold)
         return self._SFRD_at_threshold
         
-    @property
+    @cached_property('pop_sfr_above_threshold', 'initial_redshift', *_z_pars)
     def _tab_nh_active(self):
         if not hasattr(self, '_tab_nh_active_'):
             self._tab_nh_active_ = np.ones_like(self.halos.tab_z)
 
-            lnM = np.log(self.halos.tab_M)
-            
-            # Loop from high-z to low-z
-            for k, z in enumerate(self.halos.tab_z[-1::-1]):
-
-                i = self.halos.tab_z.size - k - 1
-                
-                if not self.pf['pop_sfr_above_threshold']:
-                    break
-
-                if z > self.zform:
-                    continue
+            if not self.pf['pop_sfr_above_threshold']:
+                self._tab_nh_active_ *= 1. / cm_per_mpc**3
+                return self._tab_nh_active_
 
-                integrand = self.halos.tab_dndlnm[i] * self._tab_focc[k,:]
+            z = self.halos.tab_z
+            on = z <= self.zform
 
-                # Mmin and Mmax will never be exactly on Mh grid points 
-                # so we interpolate to more precisely determine SFRD.    
+            # Mmin and Mmax will never be exactly on Mh grid points so we
+            # interpolate the cumulative integral to more precisely
+            # determine the abundance of active halos.
+            integrand = self.halos.tab_dndlnm[on] * self._tab_focc[on]
 
-                c1 = self.halos.tab_M >= self._tab_Mmin[i]
-                c2 = self.halos.tab_M <= self._tab_Mmax[i]
-                ok = np.logical_and(c1, c2)
-                
-                if self._tab_Mmin[i] == self._tab_Mmax[i]:
-                    self._tab_nh_active_[i] = 0
-                    
-                    # We 'break' here because once Mmax = Mmin, PopIII
-                    # should be gone forever.
-                    
-                    if z < self.pf['initial_redshift']:
-                        break
-                    else:
-                        continue
-                    
-                # This can happen if Mmin and Mmax are within the same mass bin,
-                # or if they straddle a single mass bin. Need to be a bit careful.
-                if ok.sum() in [0, 1]:                                        
-                    i1 = np.argmin(np.abs(self.halos.tab_M - self._tab_Mmin[i]))
-                    if self.halos.tab_M[i1] > self._tab_Mmin[i]:
-                        i1 -= 1
-                    i2 = i1 + 1
-                    
-                    # Trapezoid here we come
-                    b = self._tab_logMmax[i] - self._tab_logMmin[i]
-                    
-                    M1 = self._tab_logMmin[i]
-                    M2 = self._tab_logMmax[i]
-                    y1 = np.interp(M1, [np.log(self.halos.tab_M[i1]), np.log(self.halos.tab_M[i2])],
-                        [integrand[i1], integrand[i2]])
-                    y2 = np.interp(M2, [np.log(self.halos.tab_M[i1]), np.log(self.halos.tab_M[i2])],
-                        [integrand[i1], integrand[i2]])
-                    
-                    h = abs(y2 - y1)
-                    
-                    self._tab_nh_active_[i] = 0.5 * b * (y1 + y2)
+            self._tab_nh_active_[on] = integrate_rows(integrand, 
+                np.log(self.halos.tab_M), self._tab_logMmin[on], 
+                self._tab_logMmax[on])
 
-                    continue
+            # Once Mmax = Mmin, PopIII should be gone forever.
+            gone = np.logical_and(on, self._tab_Mmin == self._tab_Mmax)
+            self._tab_nh_active_[gone] = 0
 
-                # Otherwise, do the normal thing.
-                #if ok.sum() == 1:
-                #    iok = [np.argwhere(ok).squeeze()]
-                #else:
-                iok = np.argwhere(ok).squeeze()
-
-                Mlo1 = min(iok)
-                Mhi1 = max(iok)
-                Mlo2 = Mlo1 - 1
-                Mhi2 = Mhi1 + 1
-
-                # This happens if Mmin and Mmax straddle a mass bin
-                if ok.sum() == 1:
-                    raise ValueError('help')
-                    b = np.log(self.halos.tab_M[Mlo1+1]) - np.log(self.halos.tab_M[Mlo1])
-                    #h = abs(integrand[Mlo1+1] - integrand[Mlo1])
-                    #b = self.halos.lnM[Mlo1] - self.self.halos.lnM[Mlo1+1]
-                    
-                    M1 = self._tab_logMmin[i]
-                    M2 = self._tab_logMmax[i]
-                    y1 = np.interp(M1, [np.log(self.halos.tab_M[i1]), np.log(self.halos.tab_M[i2])],
-                        [integrand[i1], integrand[i2]])
-                    y2 = np.interp(M2, [np.log(self.halos.tab_M[i1]), np.log(self.halos.tab_M[i2])],
-                        [integrand[i1], integrand[i2]])
-                    
-                    h = abs(y2 - y1)
-                    
-                    tot = 0.5 * b * h
-                else:
-                    # This is essentially an integral from Mlo1 to Mhi1
-                    tot = np.trapz(integrand[ok], x=np.log(self.halos.tab_M[ok]))      
-                integ_lo = np.trapz(integrand[Mlo2:Mhi1+1], 
-                    x=np.log(self.halos.tab_M[Mlo2:Mhi1+1]))
-                                
-                # Interpolating over lower integral bound
-                sfrd_lo = np.interp(self._tab_logMmin[i], 
-                    [np.log(self.halos.tab_M[Mlo2]), np.log(self.halos.tab_M[Mlo1])], 
-                    [integ_lo, tot]) - tot
-                                                
-                if Mhi2 >= self.halos.tab_M.size:    
-                    sfrd_hi = 0.0
-                else:
-                    integ_hi = np.trapz(integrand[Mlo1:Mhi2+1], 
-                        x=np.log(self.halos.tab_M[Mlo1:Mhi2+1]))
-                    sfrd_hi = np.interp(self._tab_logMmax[i], 
-                        [np.log(self.halos.tab_M[Mhi1]), np.log(self.halos.tab_M[Mhi2])], 
-                        [tot, integ_hi]) - tot
-                
-                self._tab_nh_active_[i] = tot + sfrd_lo + sfrd_hi
+            # Leave later times alone, as the original loop did.
+            gone = np.logical_and(gone, z < self.pf['initial_redshift'])
+            if np.any(gone):
+                i = np.argwhere(gone).max()
+                self._tab_nh_active_[0:i] = 1.
 
             self._tab_nh_active_ *= 1. / cm_per_mpc**3
 
-            #if self.pf['pop_sfr_cross_threshold']:
-            #    self._tab_sfrd_total_ += self._tab_sfrd_at_threshold
-
         return self._tab_nh_active_
       
-    @property
+    @cached_property('initial_redshift', 'final_redshift', *_z_pars)
+    @timed('sfrd')
     def _tab_sfrd_total(self):
         """
         SFRD as a function of redshift.
@@ -1825,43 +1828,23 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         """
 
         if not hasattr(self, '_tab_sfrd_total_'):
-            Nz = self.halos.tab_z.size
-            
-            ok = ~self._tab_sfr_mask
-            integrand = self._tab_sfr * self.halos.tab_dndlnm \
-                * self._tab_focc
+            z = self.halos.tab_z
+
+            on = np.logical_and(z >= self.pf['final_redshift'], 
+                z <= self.pf['initial_redshift'])
+            on = np.logical_and(on, z <= self.zform)
+            on = np.logical_and(on, z >= self.zdead)
+
+            integrand = self._tab_sfr[on] * self.halos.tab_dndlnm[on] \
+                * self._tab_focc[on]
                   
             ##
             # Use cumtrapz instead and interpolate onto Mmin, Mmax
             ##
-            self._tab_sfrd_total_ = np.zeros_like(self.halos.tab_z)
-            for i, z in enumerate(self.halos.tab_z):
-                
-                if z < self.pf['final_redshift']:
-                    continue
-                
-                if z > self.pf['initial_redshift']:
-                    continue    
-                
-                if z > self.zform:
-                    continue
-
-                if z < self.zdead:
-                    continue
-                
-                tot = np.trapz(integrand[i], x=np.log(self.halos.tab_M))
-                cumtot = cumtrapz(integrand[i], x=np.log(self.halos.tab_M), 
-                    initial=0.0)
-                    
-                above_Mmin = np.interp(np.log(self._tab_Mmin[i]), 
-                        np.log(self.halos.tab_M), tot - cumtot)
-                above_Mmax = np.interp(np.log(self._tab_Mmax[i]), 
-                        np.log(self.halos.tab_M), tot - cumtot)    
-                
-                #if above_Mmin < above_Mmax:
-                #    print("WARNING: SFRD(>Mmin) < SFRD(>Mmax) at z={}".format(z))
-                                    
-                self._tab_sfrd_total_[i] = above_Mmin - above_Mmax
+            self._tab_sfrd_total_ = np.zeros_like(z)
+            self._tab_sfrd_total_[on] = integrate_rows(integrand, 
+                np.log(self.halos.tab_M), np.log(self._tab_Mmin[on]),
+                np.log(self._tab_Mmax[on]))
                 
             self._tab_sfrd_total_ *= g_per_msun / s_per_yr / cm_per_mpc**3
                         
@@ -1898,11 +1881,15 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
     
             return self._sfrd_above_MUV_tab[(z, MUV)]
     
-    @property        
+    @cached_property('pop_focc', 'pq_*')
     def _tab_focc(self):
         if not hasattr(self, '_tab_focc_'):
-            yy, xx = self._tab_Mz
-            focc = self.focc(z=xx, Mh=yy)
+            if isinstance(self.focc, ParameterizedQuantity):
+                zz, MM = self._tab_zM
+                focc = self.focc(z=zz, Mh=MM)
+            else:
+                yy, xx = self._tab_Mz
+                focc = self.focc(z=xx, Mh=yy)
             
             if type(focc) in [int, float, np.float64]:
                 self._tab_focc_ = focc * np.ones_like(self.halos.tab_dndm)
@@ -1965,7 +1952,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         raise ValueError('help')
 
 
-    @property
+    @cached_property('pop_fesc', 'pop_Nion', 'pq_*')
     def LLyC_tab(self):
         """
         Number of LyC photons emitted per unit SFR in halos of mass M.
@@ -1989,7 +1976,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
             
         return self._LLyC_tab
                 
-    @property
+    @cached_property('pop_fesc_LW', 'pop_Nlw', 'pq_*')
     def LLW_tab(self):
         if not hasattr(self, '_LLW_tab'):
             M = self.halos.tab_M
@@ -2036,7 +2023,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         else:    
             return self.fstar(**kwargs)
 
-    @property
+    @cached_property('pop_rad_yield', 'pq_*')
     def yield_per_sfr(self):
         # Need this to avoid inheritance issue with GalaxyAggregate
         if not hasattr(self, '_yield_per_sfr'):
@@ -2048,7 +2035,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
             
         return self._yield_per_sfr
 
-    @property
+    @cached_property(*_sfe_pars)
     def fstar(self):
         if not hasattr(self, '_fstar'):
             
@@ -2093,9 +2080,12 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
 
                     self._fstar_inst = ParameterizedQuantity(**pars)
 
-                    self._fstar = \
-                        lambda **kwargs: self._fstar_inst.__call__(**kwargs) \
-                            * boost 
+                    if boost == 1:
+                        self._fstar = self._fstar_inst
+                    else:
+                        self._fstar = \
+                            lambda **kwargs: self._fstar_inst.__call__(**kwargs) \
+                                * boost 
             else:
                 raise ValueError('Unrecognized data type for pop_fstar!')  
 
@@ -2123,19 +2113,34 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         
         return derivative(logfst, np.log10(Mh), dx=0.01)[0]
 
-    @property
+    @cached_property()
     def _tab_Mz(self):
         if not hasattr(self, '_tab_Mz_'):
             yy, xx = np.meshgrid(self.halos.tab_M, self.halos.tab_z)
             self._tab_Mz_ = yy, xx
         return self._tab_Mz_
     
-    @property
+    @cached_property()
+    def _tab_zM(self):
+        """
+        Redshifts and halo masses of the HMF table, shaped such that they
+        broadcast to the shape of tab_dndm. Cheaper than _tab_Mz for PQs.
+        """
+        if not hasattr(self, '_tab_zM_'):
+            self._tab_zM_ = self.halos.tab_z[:,None], self.halos.tab_M[None,:]
+        return self._tab_zM_
+    
+    @cached_property(*_sfe_pars)
     def _tab_fstar(self):
         if not hasattr(self, '_tab_fstar_'):
-            yy, xx = self._tab_Mz
             # Should be like tab_dndm
-            self._tab_fstar_ = self.SFE(z=xx, Mh=yy)
+            if isinstance(self.fstar, ParameterizedQuantity) and \
+                self.pf['pop_sfr_model'] != 'uvlf':
+                zz, MM = self._tab_zM
+                self._tab_fstar_ = self.fstar(z=zz, Mh=MM)
+            else:
+                yy, xx = self._tab_Mz
+                self._tab_fstar_ = self.SFE(z=xx, Mh=yy)
 
         return self._tab_fstar_
     
@@ -2462,7 +2467,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
                 
         return np.array(results)
         
-    @property
+    @cached_property()
     def is_sfe_constant(self):
         if not hasattr(self, '_is_sfe_constant'):
             
@@ -2479,7 +2484,7 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
                                
         return self._is_sfe_constant
 
-    @property
+    @cached_property('pop_sfr')
     def is_sfr_constant(self):
         if not hasattr(self, '_is_sfr_constant'):
             if self.pf['pop_sfr'] is not None:
@@ -2501,7 +2506,8 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         
         return data
 
-    @property
+    @cached_property('pop_*', 'pq_*', 'initial_redshift', 'final_redshift',
+        'mu')
     def scaling_relations(self):
         if not hasattr(self, '_scaling_relations'):
             if self.is_sfe_constant:
@@ -2688,7 +2694,8 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
             
         return new_data
         
-    @property
+    @cached_property('pop_*', 'pq_*', 'initial_redshift', 'final_redshift',
+        'mu')
     def _trajectories(self):
         if not hasattr(self, '_trajectories_'):
             raise AttributeError('Must set by hand or run `Trajectories`.')
@@ -2698,7 +2705,8 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
     def _trajectories(self, value):
         self._trajectories_ = value
         
-    @property
+    @cached_property('pop_*', 'pq_*', 'initial_redshift', 'final_redshift',
+        'mu')
     def histories(self):
         if not hasattr(self, '_histories'):
             self._histories = self.Trajectories()[1]
@@ -3550,6 +3558,9 @@ class GalaxyCohort(GalaxyAggregate,BlobFactory):
         if fn is None:
             return None
         
+        # Only import plotting stuff if we need it
+        from ..analysis import ModelSet
+        
         if type(fn) is str:
             anl = ModelSet(fn)
         elif isinstance(fn, ModelSet): 
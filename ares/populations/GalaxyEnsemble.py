@@ -20,13 +20,16 @@ from ..util.Math import smooth
 from ..util import ProgressBar
 from ..util.Survey import Survey
 from .Halo import HaloPopulation
+from ..util.Caching import cached_property
 from scipy.optimize import curve_fit
 from .GalaxyCohort import GalaxyCohort
+from .Population import _cosmo_pars, _src_pars
 from scipy.interpolate import interp1d
 from scipy.integrate import quad, cumtrapz
 from ..util.Photometry import what_filters
 from ..analysis.BlobFactory import BlobFactory
 from ..util.Stats import bin_e2c, bin_c2e, bin_samples
+from ..util.Timer import timed
 from ..static.SpectralSynthesis import SpectralSynthesis
 from ..sources.SynthesisModelSBS import SynthesisModelSBS
 from ..physics.Constants import rhodot_cgs, s_per_yr, s_per_myr, \
@@ -55,6 +58,10 @@ pars_affect_mars = ["pop_MAR", "pop_MAR_interp", "pop_MAR_corr"]
 pars_affect_sfhs = ["pop_scatter_sfr", "pop_scatter_sfe", "pop_scatter_mar"]
 pars_affect_sfhs.extend(["pop_update_dt", "pop_thin_hist"])
 
+# Halo and galaxy histories depend on just about everything
+_hist_pars = ['pop_*', 'pq_*', 'hmf_*', 'initial_redshift', 'final_redshift']
+_hist_pars.extend(_cosmo_pars)
+
 class GalaxyEnsemble(HaloPopulation,BlobFactory):
 
     def __init__(self, **kwargs):
@@ -62,19 +69,13 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
         # May not actually need this...
         HaloPopulation.__init__(self, **kwargs)
 
-    def __dict__(self, name):
-        if name in self.__dict__:
-            return self.__dict__[name]
-
-        raise NotImplemented('help!')
-
     #@property
     #def dust(self):
     #    if not hasattr(self, '_dust'):
     #        self._dust = DustCorrection(**self.pf)
     #    return self._dust
 
-    @property
+    @cached_property(*_hist_pars)
     def tab_z(self):
         if not hasattr(self, '_tab_z'):
             h = self._gen_halo_histories()
@@ -84,14 +85,14 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
     def tab_z(self, value):
         self._tab_z = value
 
-    @property
+    @cached_property(*_cosmo_pars)
     def tab_t(self):
         if not hasattr(self, '_tab_t'):
             # Array of times corresponding to all z' > z [years]
             self._tab_t = self.cosm.t_of_z(self.tab_z) / s_per_yr
         return self._tab_t
 
-    @property
+    @cached_property()
     def tab_dz(self):
         if not hasattr(self, '_tab_dz'):
             dz = np.diff(self.tab_z)
@@ -101,19 +102,19 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
 
         return self._tab_dz
 
-    @property
+    @cached_property()
     def _b14(self):
         if not hasattr(self, '_b14_'):
             self._b14_ = read_lit('bouwens2014')
         return self._b14_
 
-    @property
+    @cached_property()
     def _c94(self):
         if not hasattr(self, '_c94_'):
             self._c94_ = read_lit('calzetti1994').windows
         return self._c94_
 
-    @property
+    @cached_property()
     def _nircam(self): # pragma: no cover
         if not hasattr(self, '_nircam_'):
             nircam = Survey(cam='nircam')
@@ -126,6 +127,18 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
     def run(self):
         return
 
+    def invalidate(self, *pars):
+        cleared = HaloPopulation.invalidate(self, *pars)
+
+        # Luminosities, LFs, etc. are all derived from histories
+        if cleared:
+            for name in ['_cache_L_', '_cache_lf_', '_cache_smf_',
+                '_cache_mags_', '_cache_beta_', '_cache_ehat_']:
+                if hasattr(self, name):
+                    delattr(self, name)
+
+        return cleared
+
     def cSFRD(self, z, Mh):
         """
         Compute cumulative SFRD as a function of lower-mass bound.
@@ -240,7 +253,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
               - arr
         return noise
 
-    @property
+    @cached_property('pop_scatter_mar*')
     def tab_scatter_mar(self):
         if not hasattr(self, '_tab_scatter_mar'):
             self._tab_scatter_mar = np.random.normal(scale=sigma,
@@ -262,7 +275,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
     def tab_shape(self, value):
         self._tab_shape = value
 
-    @property
+    @cached_property(*_hist_pars)
     def _cache_halos(self):
         if not hasattr(self, '_cache_halos_'):
             self._cache_halos_ = self._gen_halo_histories()
@@ -452,7 +465,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
 
         return histories
 
-    @property
+    @cached_property(*_hist_pars)
     def histories(self):
         if not hasattr(self, '_histories'):
             self._histories = self.RunSAM()
@@ -483,6 +496,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
     def Trajectories(self):
         return self.RunSAM()
 
+    @timed('sam', save_as='timing')
     def RunSAM(self):
         """
         Run models. If deterministic, will just return pre-determined
@@ -496,7 +510,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
         else:
             raise NotImplemented('Unrecognized pop_sam_method={}.'.format(self.pf['pop_sam_method']))
 
-    @property
+    @cached_property(*_hist_pars)
     def guide(self):
         if not hasattr(self, '_guide'):
             if self.pf['pop_guide_pop'] is not None:
@@ -517,7 +531,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
         if not hasattr(self, '_tab_cmf'):
             pass
 
-    @property
+    @cached_property()
     def _norm(self):
         if not hasattr(self, '_norm_'):
             mf = lambda logM: self.ClusterMF(10**logM)
@@ -528,7 +542,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
     def ClusterMF(self, M, beta=-2, Mmin=50.):
         return (M / Mmin)**beta * np.exp(-Mmin / M)
 
-    @property
+    @cached_property()
     def tab_Mcl(self):
         if not hasattr(self, '_tab_Mcl'):
             self._tab_Mcl = np.logspace(-1., 8, 10000)
@@ -538,7 +552,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
     def tab_Mcl(self, value):
         self._tab_Mcl = value
 
-    @property
+    @cached_property()
     def tab_cdf(self):
         if not hasattr(self, '_tab_cdf'):
             mf = lambda logM: self.ClusterMF(10**logM)
@@ -559,7 +573,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
 
         return self._cdf_cl
 
-    @property
+    @cached_property()
     def Mcl(self):
         if not hasattr(self, '_Mcl'):
             mf = lambda logM: self.ClusterMF(10**logM)
@@ -568,13 +582,13 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
 
         return self._Mcl
 
-    @property
+    @cached_property(*_src_pars)
     def tab_imf_me(self):
         if not hasattr(self, '_tab_imf_me'):
             self._tab_imf_me = 10**bin_c2e(self.src.pf['source_imf_bins'])
         return self._tab_imf_me
 
-    @property
+    @cached_property(*_src_pars)
     def tab_imf_mc(self):
         if not hasattr(self, '_tab_imf_mc'):
             self._tab_imf_mc = 10**self.src.pf['source_imf_bins']
@@ -1666,7 +1680,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
         return self.XMHM(z, field='Ms', Mh=Mh, return_mean_only=return_mean_only,
             Mbin=Mbin)
 
-    @property
+    @cached_property(*_src_pars)
     def _stars(self):
         if not hasattr(self, '_stars_'):
             self._stars_ = SynthesisModelSBS(**self.src_kwargs)
@@ -1791,7 +1805,8 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
         for i in range(self.histories['Mh'].shape[0]):
             yield self.get_history(i)
 
-    @property
+    @cached_property('pop_ssp_oversample*', 'pop_synth_*', 'dustcorr_*',
+        *_src_pars)
     def synth(self):
         if not hasattr(self, '_synth'):
             self._synth = SpectralSynthesis(**self.pf)
@@ -2153,7 +2168,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
 
         return None
 
-    @property
+    @cached_property('pop_dust_yield')
     def extras(self):
         if not hasattr(self, '_extras'):
             if self.pf['pop_dust_yield'] is not None:
@@ -2831,7 +2846,7 @@ class GalaxyEnsemble(HaloPopulation,BlobFactory):
         pickle.dump(self.pf)
         f.close()
         
-    @property
+    @cached_property('dust_*')
     def dust(self):
         """
         (void) -> DustPopulation
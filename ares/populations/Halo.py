@@ -17,9 +17,10 @@ from types import FunctionType
 from .Population import Population
 from scipy.integrate import cumtrapz
 from ..util.PrintInfo import print_pop
+from ..util.Caching import cached_property
 from scipy.interpolate import interp1d
 from ..physics.HaloModel import HaloModel
-from ..physics.HaloMassFunction import HaloMassFunction
+from ..physics.HaloMassFunction import HaloMassFunction, _hmf_pars
 from ..util.Math import central_difference, forward_difference
 from ..physics.Constants import cm_per_mpc, s_per_yr, g_per_msun
 
@@ -30,7 +31,7 @@ class HaloPopulation(Population):
         # class. Also creates the parameter file attribute ``pf``.
         Population.__init__(self, **kwargs)
 
-    @property
+    @cached_property('pop_k_ion_igm', 'pop_k_ion_cgm', 'pop_k_heat_igm')
     def parameterized(self):
         if not hasattr(self, '_parameterized'):
             not_parameterized = (self.pf['pop_k_ion_igm']) is None
@@ -47,14 +48,16 @@ class HaloPopulation(Population):
     #
     #    return self._dndm
 
-    @property
+    @cached_property('pop_sfrd', 'pop_fcoll', 'pop_dfcolldz', 'pop_Tmin',
+        'pop_Mmin', 'pop_Tmax', 'pop_Mmax', 'mu')
     def fcoll(self):
         if not hasattr(self, '_fcoll'):
             self._init_fcoll(return_fcoll=True)
     
         return self._fcoll
 
-    @property
+    @cached_property('pop_sfrd', 'pop_fcoll', 'pop_dfcolldz', 'pop_Tmin',
+        'pop_Mmin', 'pop_Tmax', 'pop_Mmax', 'mu')
     def dfcolldz(self):
         if not hasattr(self, '_dfcolldz'):
             self._init_fcoll()
@@ -68,7 +71,7 @@ class HaloPopulation(Population):
         self._fcoll, self._dfcolldz, self._d2fcolldz2 = \
             self.halos.build_1d_splines(Tmin, mu, return_fcoll=return_fcoll)
 
-    @property
+    @cached_property()
     def gf_spline(self):
         if not hasattr(self, '_gf_spline'):
             gf = self.halos.growth_factor
@@ -80,7 +83,7 @@ class HaloPopulation(Population):
     def growth_factor(self, z):
         return self.gf_spline(z)
                 
-    @property
+    @cached_property('hmf_instance', *_hmf_pars)
     def halos(self):
         if not hasattr(self, '_halos'):
             if self.pf['hmf_instance'] is not None:
@@ -103,7 +106,7 @@ class HaloPopulation(Population):
             self._fcoll, self._dfcolldz = \
                 self.pf['pop_fcoll'], self.pf['pop_dfcolldz']
     
-    @property
+    @cached_property('pop_MAR', 'verbose', attr='_MAR')
     def MGR(self):
         """
         Mass growth rate of halos of mass M at redshift z.
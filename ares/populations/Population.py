@@ -22,6 +22,7 @@ from ..util.Warnings import no_lya_warning
 from scipy.interpolate import interp1d as interp1d_scipy
 from ..util import MagnitudeSystem
 from ..util.ReadData import read_lit
+from ..util.Caching import cached_property, ParameterDependent
 from scipy.interpolate import interp1d
 from ..util.PrintInfo import print_pop
 from ..phenom.DustCorrection import DustCorrection
@@ -35,12 +36,19 @@ _multi_pop_error_msg += "Population objects are by definition for single populat
 _multi_pop_error_msg += 'This population: '
 
 from ..util.SetDefaultParameterValues import StellarParameters, \
-    BlackHoleParameters, SynthesisParameters
+    BlackHoleParameters, SynthesisParameters, CosmologyParameters
 
 _synthesis_models = ['leitherer1999', 'eldridge2009']
 _single_star_models = ['schaerer2002']
 _sed_tabs = ['leitherer1999', 'eldridge2009', 'schaerer2002', 'hybrid']
 
+_cosmo_pars = list(CosmologyParameters().keys())
+
+# Parameters that get handed to ares.sources objects (see `src_kwargs`)
+_src_pars = ['pop_sed', 'pop_kwargs', 'pop_psm_instance', 'pop_src_instance']
+for _pars in [StellarParameters(), BlackHoleParameters(), SynthesisParameters()]:
+    _src_pars.extend([par.replace('source', 'pop') for par in _pars])
+
 def normalize_sed(pop):
     """
     Convert yield to erg / g.
@@ -93,7 +101,7 @@ def normalize_sed(pop):
     return energy_per_sfr * Zfactor
 
 
-class Population(object):
+class Population(ParameterDependent):
     def __init__(self, grid=None, cosm=None, **kwargs):
 
         # why is this necessary?
@@ -120,6 +128,18 @@ class Population(object):
         # Avoid breaks in fitting (make it look like ares.simulation object)
         pass
 
+    def invalidate(self, *pars):
+        cleared = ParameterDependent.invalidate(self, *pars)
+
+        self.zform = min(self.pf['pop_zform'], self.pf['first_light_redshift'])
+        self.zdead = self.pf['pop_zdead']
+
+        if ('src' in cleared) or ('cosm' in cleared):
+            self._eV_per_phot = {}
+            self._conversion_factors = {}
+
+        return cleared
+
     @property
     def info(self):
         if not self.parameterized:
@@ -138,19 +158,19 @@ class Population(object):
     def id_num(self, value):
         self._id_num = int(value)
 
-    @property
+    @cached_property('dustcorr_*')
     def dust(self):
         if not hasattr(self, '_dust'):
             self._dust = DustCorrection(**self.pf)
         return self._dust
 
-    @property
+    @cached_property()
     def magsys(self):
         if not hasattr(self, '_magsys'):
             self._magsys = MagnitudeSystem(cosm=self.cosm, **self.pf)
         return self._magsys
 
-    @property
+    @cached_property(*_cosmo_pars)
     def cosm(self):
         if not hasattr(self, '_cosm'):
             if self.grid is not None:
@@ -162,7 +182,7 @@ class Population(object):
 
         return self._cosm
 
-    @property
+    @cached_property()
     def zone(self):
         if not hasattr(self, '_zone'):
             if self.affects_cgm and (not self.affects_igm):
@@ -179,19 +199,19 @@ class Population(object):
 
         return self._zone
 
-    @property
+    @cached_property()
     def is_src_anything(self):
         if not hasattr(self, '_is_src_anything'):
             self._is_src_anything = self.is_src_oir or self.is_src_uv \
                 or self.is_src_xray
 
-    @property
+    @cached_property()
     def affects_cgm(self):
         if not hasattr(self, '_affects_cgm'):
             self._affects_cgm = self.is_src_ion_cgm
         return self._affects_cgm
 
-    @property
+    @cached_property()
     def affects_igm(self):
         if not hasattr(self, '_affects_igm'):
             self._affects_igm = self.is_src_ion_igm or self.is_src_heat_igm
@@ -201,7 +221,7 @@ class Population(object):
     def is_aging(self):
         return self.pf['pop_aging']
 
-    @property
+    @cached_property('pop_sed_model', 'pop_Emin', 'pop_Emax', 'pop_oir_src')
     def is_src_oir(self):
         if not hasattr(self, '_is_src_oir'):
             if self.pf['pop_sed_model']:
@@ -220,7 +240,7 @@ class Population(object):
     def is_src_oir_fl(self):
         return False
 
-    @property
+    @cached_property('pop_sed_model', 'pop_Emin', 'pop_Emax', 'pop_radio_src')
     def is_src_radio(self):
         if not hasattr(self, '_is_src_radio'):
             if self.pf['pop_sed_model']:
@@ -237,7 +257,7 @@ class Population(object):
     def is_src_radio_fl(self):
         return False
 
-    @property
+    @cached_property('pop_sed_model', 'pop_Emin', 'pop_Emax', 'pop_lya_src')
     def is_src_lya(self):
         if not hasattr(self, '_is_src_lya'):
             if self.pf['pop_sed_model']:
@@ -253,7 +273,7 @@ class Population(object):
 
         return self._is_src_lya
 
-    @property
+    @cached_property('pop_lya_fl', 'ps_include_lya')
     def is_src_lya_fl(self):
         if not hasattr(self, '_is_src_lya_fl'):
             self._is_src_lya_fl = False
@@ -265,7 +285,8 @@ class Population(object):
 
         return self._is_src_lya_fl
 
-    @property
+    @cached_property('pop_sed_model', 'pop_Emin', 'pop_Emax',
+        'pop_ion_src_cgm')
     def is_src_ion_cgm(self):
         if not hasattr(self, '_is_src_ion_cgm'):
             if self.pf['pop_sed_model']:
@@ -277,7 +298,8 @@ class Population(object):
 
         return self._is_src_ion_cgm
 
-    @property
+    @cached_property('pop_sed_model', 'pop_Emin', 'pop_Emax',
+        'pop_ion_src_igm')
     def is_src_ion_igm(self):
         if not hasattr(self, '_is_src_ion_igm'):
             if self.pf['pop_sed_model']:
@@ -289,13 +311,13 @@ class Population(object):
 
         return self._is_src_ion_igm
 
-    @property
+    @cached_property()
     def is_src_ion(self):
         if not hasattr(self, '_is_src_ion'):
             self._is_src_ion = self.is_src_ion_cgm #or self.is_src_ion_igm
         return self._is_src_ion
 
-    @property
+    @cached_property('pop_ion_fl', 'ps_include_ion')
     def is_src_ion_fl(self):
         if not hasattr(self, '_is_src_ion_fl'):
             self._is_src_ion_fl = False
@@ -311,7 +333,8 @@ class Population(object):
     def is_src_heat(self):
         return self.is_src_heat_igm
 
-    @property
+    @cached_property('pop_sed_model', 'pop_Emin', 'pop_Emax',
+        'pop_heat_src_igm')
     def is_src_heat_igm(self):
         if not hasattr(self, '_is_src_heat_igm'):
             if self.pf['pop_sed_model']:
@@ -323,7 +346,7 @@ class Population(object):
 
         return self._is_src_heat_igm
 
-    @property
+    @cached_property('pop_temp_fl', 'ps_include_temp')
     def is_src_heat_fl(self):
         if not hasattr(self, '_is_src_heat_fl'):
             self._is_src_heat_fl = False
@@ -335,7 +358,8 @@ class Population(object):
 
         return self._is_src_heat_fl
 
-    @property
+    @cached_property('pop_sed_model', 'pop_Emin', 'pop_Emax',
+        'pop_ion_src_cgm')
     def is_src_uv(self):
         # Delete this eventually but right now doing so will break stuff
         if not hasattr(self, '_is_src_uv'):
@@ -348,7 +372,8 @@ class Population(object):
 
         return self._is_src_uv
 
-    @property
+    @cached_property('pop_sed_model', 'pop_Emin', 'pop_Emax',
+        'pop_heat_src_igm')
     def is_src_xray(self):
         if not hasattr(self, '_is_src_xray'):
             if self.pf['pop_sed_model']:
@@ -360,7 +385,8 @@ class Population(object):
 
         return self._is_src_xray
 
-    @property
+    @cached_property('pop_sed_model', 'pop_Emin', 'pop_Emax',
+        'radiative_transfer', 'pop_lw_src')
     def is_src_lw(self):
         if not hasattr(self, '_is_src_lw'):
             if not self.pf['radiative_transfer']:
@@ -386,7 +412,7 @@ class Population(object):
         """
         return True
 
-    @property
+    @cached_property('pop_aging', 'pop_rad_yield*', 'pop_fesc*', 'pq_*')
     def is_emissivity_scalable(self):
         """
         Can we just determine a luminosity density by scaling the SFRD?
@@ -443,7 +469,7 @@ class Population(object):
 
         return self._is_emissivity_scalable
 
-    @property
+    @cached_property('pop_sed', 'verbose')
     def _Source(self):
         if not hasattr(self, '_Source_'):
             if self.pf['pop_sed'] == 'bb':
@@ -472,7 +498,7 @@ class Population(object):
 
         return self._Source_
 
-    @property
+    @cached_property(*_src_pars)
     def src_kwargs(self):
         """
         Dictionary of kwargs to pass on to an ares.source instance.
@@ -525,7 +551,7 @@ class Population(object):
 
         return self._src_kwargs
 
-    @property
+    @cached_property(*_src_pars)
     def src(self):
         if not hasattr(self, '_src'):
             if self.pf['pop_psm_instance'] is not None:
@@ -544,7 +570,7 @@ class Population(object):
 
         return self._src
 
-    @property
+    @cached_property(*_src_pars)
     def _src_csfr(self):
         """
         Exact clone of `src` except forces source_ssp=False.
@@ -568,7 +594,8 @@ class Population(object):
 
         return self._src_csfr_
 
-    @property
+    @cached_property('pop_rad_yield*', 'pop_EminNorm', 'pop_EmaxNorm',
+        'pop_Enorm', 'pop_Z')
     def yield_per_sfr(self):
         if not hasattr(self, '_yield_per_sfr'):
 
@@ -603,7 +630,7 @@ class Population(object):
     def is_user_sfe(self):
         return type(self.pf['pop_sfr_model']) == 'sfe-func'
 
-    @property
+    @cached_property('pop_sed')
     def sed_tab(self):
         if not hasattr(self, '_sed_tab'):
             if self.pf['pop_sed'] in _sed_tabs:
@@ -612,7 +639,7 @@ class Population(object):
                 self._sed_tab = False
         return self._sed_tab
 
-    @property
+    @cached_property('pop_EminNorm', 'pop_EmaxNorm')
     def reference_band(self):
         if not hasattr(self, '_reference_band'):
             if self.sed_tab:
@@ -622,7 +649,7 @@ class Population(object):
                     (self.pf['pop_EminNorm'], self.pf['pop_EmaxNorm'])
         return self._reference_band
 
-    @property
+    @cached_property('pop_Emin', 'pop_Emax')
     def full_band(self):
         if not hasattr(self, '_full_band'):
             self._full_band = (self.pf['pop_Emin'], self.pf['pop_Emax'])
@@ -773,7 +800,7 @@ class Population(object):
 
         return on
 
-    @property
+    @cached_property()
     def Mmin(self):
         if not hasattr(self, '_Mmin'):
             self._Mmin = lambda z: \
@@ -781,7 +808,8 @@ class Population(object):
 
         return self._Mmin
 
-    @property
+    @cached_property('feedback_LW_guesses', 'pop_Mmin', 'pop_Tmin', 'mu',
+        'pop_Mmin_*', 'pop_Tmin_*')
     def _tab_Mmin(self):
         if not hasattr(self, '_tab_Mmin_'):
             # First, compute threshold mass vs. redshift
@@ -847,7 +875,7 @@ class Population(object):
 
         return out
 
-    @property
+    @cached_property('feedback_streaming', 'feedback_vel_at_rec')
     def _tab_Mmin_floor(self):
         if not hasattr(self, '_tab_Mmin_floor_'):
             self._tab_Mmin_floor_ = self.halos.Mmin_floor(self.halos.tab_z)
@@ -1,2 +1,6 @@
 from ares.populations.Halo import HaloPopulation
 from ares.populations.GalaxyPopulation import GalaxyPopulation
+
+def __getattr__(name):
+    from .. import _import_submodule
+    return _import_submodule(__name__, name)
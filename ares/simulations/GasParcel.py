@@ -70,12 +70,13 @@ class GasParcel(object):
             self._cosm = Cosmology(pf=self.pf, **self.pf)
         return self._cosm 
         
-    def _set_chemistry(self):
+    def _set_chemistry(self, batch=False):
         self.chem = Chemistry(self.grid, rt=self.pf['radiative_transfer'],
             recombination=self.pf['recombination'], 
             interp_rc=self.pf['interp_rc'], 
             rtol=self.pf['solver_rtol'],
-            atol=self.pf['solver_atol'])
+            atol=self.pf['solver_atol'],
+            batch=batch)
         
     def reset(self):
         del self.gen
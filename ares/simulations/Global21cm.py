@@ -18,9 +18,10 @@ import numpy as np
 from types import FunctionType
 from ..util.Math import interp1d
 from ..util.PrintInfo import print_sim
-from ..util.ReadData import _sort_history
+from ..util.History import HistoryRecorder
 from ..util.Pickling import write_pickle_file
 from ..util import ParameterFile, ProgressBar, get_hash
+from ..util.Timer import timed
 from ..analysis.Global21cm import Global21cm as AnalyzeGlobal21cm
 from ..physics.Constants import nu_0_mhz, E_LyA, h_p, erg_per_ev, k_B, c
 
@@ -32,6 +33,10 @@ except ImportError:
     rank = 0
     size = 1
 
+# Needed to compute the 21-cm signal, even if not requested explicitly
+_required_fields = ['igm_Tk', 'igm_h_2', 'igm_e', 'igm_dTb', 'igm_Ts',
+    'igm_Ja', 'igm_Jlw', 'cgm_h_2']
+
 class Global21cm(AnalyzeGlobal21cm):
     def __init__(self, **kwargs):
         """
@@ -121,10 +126,10 @@ class Global21cm(AnalyzeGlobal21cm):
         """
         Compute differential brightness temperature for initial conditions.
         """
-        z = self.all_z
+        z = self.medium.all_z
 
         dTb = []
-        for i, data_igm in enumerate(self.all_data_igm):
+        for i, data_igm in enumerate(self.medium.all_data_igm):
 
             n_H = self.medium.parcel_igm.grid.cosm.nH(z[i])
 
@@ -135,7 +140,7 @@ class Global21cm(AnalyzeGlobal21cm):
 
             # Compute volume-averaged ionized fraction
             if self.pf['include_cgm']:
-                QHII = self.all_data_cgm[i]['h_2']
+                QHII = self.medium.all_data_cgm[i]['h_2']
             else:
                 QHII = 0.0
 
@@ -143,8 +148,8 @@ class Global21cm(AnalyzeGlobal21cm):
 
             # Derive brightness temperature
             Tb = self.medium.parcel_igm.grid.hydr.dTb(z[i], xavg, Ts)
-            self.all_data_igm[i]['dTb'] = Tb
-            self.all_data_igm[i]['Ts'] = np.array([Ts])
+            data_igm['dTb'] = Tb
+            data_igm['Ts'] = np.array([Ts])
             dTb.append(Tb)
 
         return dTb
@@ -208,6 +213,7 @@ class Global21cm(AnalyzeGlobal21cm):
 
         return True
 
+    @timed('gs21cm', save_as='timing')
     def run(self):
         """
         Run a 21-cm simulation.
@@ -243,19 +249,29 @@ class Global21cm(AnalyzeGlobal21cm):
         pb = self.pb = ProgressBar(tf, use=self.pf['progress_bar'],
             name='gs-21cm')
 
-        # Lists for data in general
-        self.all_t, self.all_z, self.all_data_igm, self.all_data_cgm, \
-            self.all_RC_igm, self.all_RC_cgm = \
-            self.medium.all_t, self.medium.all_z, self.medium.all_data_igm, \
-            self.medium.all_data_cgm, self.medium.all_RCs_igm, self.medium.all_RCs_cgm
-
-        # Add zeros for Ja
-        for element in self.all_data_igm:
+        # Add zeros for Ja to initial conditions. These live in the medium
+        # only until `_init_recorders` moves them into its recorders, so 
+        # don't keep references to them here.
+        for element in self.medium.all_data_igm:
             element['Ja'] = 0.0
             element['Jlw'] = 0.0
 
-        # List for extrema-finding
-        self.all_dTb = self._init_dTb()
+        all_dTb = self._init_dTb()
+
+        # Will save only what's needed to compute dTb, Ts, etc., if
+        # a subset of fields was provided.
+        if self.pf['history_fields'] is not None:
+            fields = list(self.pf['history_fields']) + _required_fields
+        else:
+            fields = None
+
+        self.medium._init_recorders(fields)
+
+        # Need dTb for extrema-finding
+        self._rec_dTb = HistoryRecorder()
+        for dTb in all_dTb:
+            self._rec_dTb.append({'dTb': np.squeeze(dTb)})
+
         for t, z, data_igm, data_cgm, rc_igm, rc_cgm in self.step():
 
             # Occasionally the progress bar breaks if we're not careful
@@ -272,34 +288,22 @@ class Global21cm(AnalyzeGlobal21cm):
             pb.update(t)
 
             # Save data
-            self.all_z.append(z)
-            self.all_t.append(t)
-            self.all_dTb.append(data_igm['dTb'][0])
-            self.all_data_igm.append(data_igm.copy())
-            self.all_RC_igm.append(rc_igm.copy())
-
-            if self.pf['include_cgm']:
-                self.all_data_cgm.append(data_cgm.copy())
-                self.all_RC_cgm.append(rc_cgm.copy())
+            self.medium._record(t, z, data_igm, data_cgm, rc_igm, rc_cgm)
+            self._rec_dTb.append({'dTb': data_igm['dTb'][0]})
 
             # Automatically find turning points
             if self.pf['track_extrema']:
-                if self.track.is_stopping_point(self.all_z, self.all_dTb):
+                if self.track.is_stopping_point(self.medium._rec_tz['z'], 
+                    self._rec_dTb['dTb']):
                     break
 
         pb.finish()
 
-        self.history_igm = _sort_history(self.all_data_igm, prefix='igm_',
-            squeeze=True)
-
-        if self.pf['include_cgm']:
-            self.history_cgm = _sort_history(self.all_data_cgm, prefix='cgm_',
-                squeeze=True)
-        else:
-            self.history_cgm = {}
+        self.medium._set_history()
 
-        self.history = self.history_igm.copy()
-        self.history.update(self.history_cgm)
+        self.history_igm = self.medium.history_igm
+        self.history_cgm = self.medium.history_cgm
+        self.history = self.medium.history.copy()
 
         ##
         # In the future, could do this better by only calculating Ja at
@@ -322,18 +326,10 @@ class Global21cm(AnalyzeGlobal21cm):
         self.history['Ja'] = self.history['igm_Ja']
         self.history['Jlw'] = self.history['igm_Jlw']
 
-        # Save rate coefficients [optional]
+        # Rate coefficients [optional] already included by medium
         if self.pf['save_rate_coefficients']:
-            self.rates_igm = \
-                _sort_history(self.all_RC_igm, prefix='igm_', squeeze=True)
-            self.rates_cgm = \
-                _sort_history(self.all_RC_cgm, prefix='cgm_', squeeze=True)
-
-            self.history.update(self.rates_igm)
-            self.history.update(self.rates_cgm)
-
-        self.history['t'] = np.array(self.all_t)
-        self.history['z'] = np.array(self.all_z)
+            self.rates_igm = self.medium.rates_igm
+            self.rates_cgm = self.medium.rates_cgm
 
         ##
         # Optional extra radio background
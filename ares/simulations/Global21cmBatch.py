@@ -0,0 +1,444 @@
+"""
+
+Global21cmBatch.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 15:02:37 PDT 2026
+
+Description: Evolve many global 21-cm models in lockstep.
+
+"""
+
+import time
+import numpy as np
+from .Global21cm import Global21cm, _required_fields
+from .MultiPhaseMedium import MultiPhaseMedium
+from ..util.Caching import _is_same
+from ..util import ProgressBar
+from ..util.SetDefaultParameterValues import GridParameters, \
+    MultiPhaseParameters, PhysicsParameters, CosmologyParameters
+from ..util.Timer import timed
+
+# Anything that affects the gas (rather than the sources) must be the same
+# for all models, since they share a grid (one cell per model).
+_shared_pars = ['initial_redshift', 'final_redshift', 'kill_redshift',
+    'initial_timestep', 'max_timestep', 'epsilon_dt', 'restricted_timestep',
+    'load_ics', 'solver_rtol', 'solver_atol', 'interp_rc', 'stop_igm_h_2',
+    'stop_cgm_h_2', 'history_fields', 'save_rate_coefficients']
+for _pset in [GridParameters, MultiPhaseParameters, PhysicsParameters,
+    CosmologyParameters]:
+    _shared_pars.extend(list(_pset().keys()))
+
+class Global21cmBatch(object):
+    def __init__(self, models, **kwargs):
+        """
+        Set up many global 21-cm calculations to be run simultaneously.
+
+        Each model gets its own radiation backgrounds (i.e., populations),
+        but the IGM and HII region "parcels" of all models are evolved
+        together, as a single grid with one cell per model, so that the
+        chemistry, spin temperature, and brightness temperature are computed
+        for all models at once on a common (adaptive) time-step.
+
+        Typical use is to evaluate all walkers of an MCMC at once, e.g.,
+        with `emcee` and `vectorize=True`:
+
+            def loglikelihood(theta):
+                models = [dict(zip(names, pars)) for pars in theta]
+                sim = ares.simulations.Global21cmBatch(models, **base_pars)
+                sim.run()
+                ...
+
+        Parameters
+        ----------
+        models : list
+            List of dictionaries, one per model, containing parameters that
+            differ from those in `kwargs`. Only parameters that control
+            sources (not the gas, cosmology, or time-stepping) may vary from
+            model to model.
+        kwargs : dict
+            Parameters common to all models.
+
+        """
+
+        self.kwargs = kwargs
+        self.models = [kwargs.copy() for model in models]
+        for i, model in enumerate(models):
+            self.models[i].update(model)
+
+        self.N = len(self.models)
+        self.is_complete = False
+
+        assert self.N > 0, "Must supply at least one model!"
+
+        self._check_shared()
+
+    def __len__(self):
+        return self.N
+
+    def __getitem__(self, i):
+        return self.sims[i]
+
+    @property
+    def sims(self):
+        """
+        List of `Global21cm` instances, one per model.
+        """
+        if not hasattr(self, '_sims'):
+            self._sims = []
+            for kw in self.models:
+                # Don't print info for every single model
+                kw = kw.copy()
+                kw['verbose'] = False
+
+                sim = Global21cm(**kw)
+
+                if sim.is_phenom:
+                    raise ValueError('Phenomenological models cannot be batched.')
+
+                self._sims.append(sim)
+
+        return self._sims
+
+    @property
+    def pf(self):
+        return self.sims[0].pf
+
+    @property
+    def cosm(self):
+        return self.sims[0].cosm
+
+    def _check_shared(self):
+        for par in _shared_pars:
+            val = self.sims[0].pf[par]
+            for sim in self.sims[1:]:
+                if _is_same(val, sim.pf[par]):
+                    continue
+                raise ValueError(("Parameter `{}` must be the same for all " +\
+                    "models in a batch.").format(par))
+
+    @property
+    def medium(self):
+        """
+        MultiPhaseMedium whose grid patches contain one cell per model.
+        """
+        if not hasattr(self, '_medium'):
+            kw = self.models[0].copy()
+            kw['igm_grid_cells'] = kw['cgm_grid_cells'] = self.N
+            if 'problem_type' not in kw:
+                kw['problem_type'] = 101
+
+            self._medium = MultiPhaseMedium(cosm=self.cosm, batch=True, **kw)
+
+        return self._medium
+
+    @property
+    def hydr(self):
+        return self.medium.parcel_igm.grid.hydr
+
+    def _stack(self, rcs):
+        """
+        Combine rate coefficients from each model into arrays for the grid.
+        """
+        return {key: np.concatenate([rc[key] for rc in rcs], axis=0) \
+            for key in rcs[0]}
+
+    def _freeze(self, data, data_pre, frozen):
+        """
+        Restore previous values for models that have stopped evolving.
+        """
+        for key in data_pre:
+            if np.shape(data_pre[key]) != (self.N,):
+                continue
+            data[key][frozen] = data_pre[key][frozen]
+
+    def _tile(self, snapshot):
+        """
+        Copy initial conditions (1 cell) to all models.
+        """
+        for key in snapshot:
+            if np.size(snapshot[key]) == 1:
+                snapshot[key] = np.ones(self.N) * np.squeeze(snapshot[key])
+        return snapshot
+
+    @timed('gs21cm_batch', save_as='timing')
+    def run(self):
+        """
+        Run all 21-cm simulations.
+
+        .. note :: Unlike `Global21cm`, extrema are not tracked on-the-fly,
+            since models in a batch generally want to stop at different
+            times. Each model will run to `final_redshift`.
+
+        Returns
+        -------
+        Nothing: sets `history` attribute, which contains arrays of shape
+        (number of redshifts, number of models), and the `history` of each
+        element of `sims`.
+
+        """
+
+        if self.is_complete:
+            print("Already ran simulations!")
+            return
+
+        t1 = time.time()
+
+        # Share cosmology so we don't re-create it for every model
+        for sim in self.sims[1:]:
+            sim._cosm = self.cosm
+
+        for sim in self.sims:
+            for pop in sim.pops:
+                if pop.is_src_radio:
+                    raise NotImplementedError('No radio backgrounds in batches (yet).')
+
+        # Need to generate radiation backgrounds first.
+        for sim in self.sims:
+            if self.pf['radiative_transfer']:
+                sim.medium.field.run()
+                sim._f_Ja  = sim.medium.field._f_Ja
+                sim._f_Jlw = sim.medium.field._f_Jlw
+            else:
+                sim._f_Ja  = lambda z: 0.0
+                sim._f_Jlw = lambda z: 0.0
+
+        medium = self.medium
+
+        medium._insert_inits()
+        medium.all_data_igm = list(map(self._tile, medium.all_data_igm))
+        if self.pf['include_cgm']:
+            medium.all_data_cgm = list(map(self._tile, medium.all_data_cgm))
+
+        for i, data_igm in enumerate(medium.all_data_igm):
+            z = medium.all_z[i]
+            n_H = self.cosm.nH(z)
+
+            Ts = self.hydr.Ts(z, data_igm['Tk'], 0.0, data_igm['h_2'],
+                data_igm['e'] * n_H)
+
+            if self.pf['include_cgm']:
+                QHII = medium.all_data_cgm[i]['h_2']
+            else:
+                QHII = 0.0
+
+            xavg = QHII + (1. - QHII) * data_igm['h_2']
+
+            data_igm['Ja'] = np.zeros(self.N)
+            data_igm['Jlw'] = np.zeros(self.N)
+            data_igm['Ts'] = Ts
+            data_igm['dTb'] = self.hydr.dTb(z, xavg, Ts)
+
+        if self.pf['history_fields'] is not None:
+            fields = list(self.pf['history_fields']) + _required_fields
+        else:
+            fields = None
+
+        medium._init_recorders(fields)
+
+        pb = ProgressBar(medium.tf, use=self.pf['progress_bar'],
+            name='gs-21cm-batch')
+        pb.start()
+
+        for t, z, data_igm, data_cgm, rc_igm, rc_cgm in self.step():
+
+            if z < self.pf['final_redshift']:
+                break
+            if z < self.pf['kill_redshift']:
+                break
+
+            pb.update(t)
+
+            medium._record(t, z, data_igm, data_cgm, rc_igm, rc_cgm)
+
+        pb.finish()
+
+        medium._set_history()
+
+        self.history = medium.history.copy()
+        self.history['dTb'] = self.history['igm_dTb']
+        self.history['Ts'] = self.history['igm_Ts']
+        self.history['Ja'] = self.history['igm_Ja']
+        self.history['Jlw'] = self.history['igm_Jlw']
+
+        # Correct the brightness temperature if there are non-CMB backgrounds
+        zall = self.history['z']
+        if self.hydr.Tbg is not None:
+            Tr = self.hydr.Tbg(zall)[:,None] * np.ones(self.N)
+            n_H = self.cosm.nH(zall)[:,None]
+            Ts = self.hydr.Ts(zall[:,None], self.history['igm_Tk'],
+                self.history['Ja'], self.history['igm_h_2'],
+                self.history['igm_e'] * n_H, Tr)
+
+            if self.pf['floor_Ts']:
+                Ts = np.maximum(Ts, self.hydr.Ts_floor(z=zall[:,None]))
+
+            xavg = self.history['cgm_h_2'] \
+                 + (1. - self.history['cgm_h_2']) * self.history['igm_h_2']
+
+            self.history['dTb_no_radio'] = self.history['dTb'].copy()
+            self.history['dTb'] = self.hydr.dTb(zall[:,None], xavg, Ts, Tr)
+        else:
+            Tr = np.zeros((zall.size, self.N))
+
+        self.history['Tr'] = Tr
+
+        # Hand results off to each model so they can be analyzed as usual
+        for i, sim in enumerate(self.sims):
+            hist = {}
+            for key in self.history:
+                if np.ndim(self.history[key]) > 1:
+                    hist[key] = self.history[key][:,i].copy()
+                else:
+                    hist[key] = self.history[key].copy()
+
+            sim.history = hist
+            sim.is_complete = True
+
+        self.timer = time.time() - t1
+        self.is_complete = True
+
+    def step(self):
+        """
+        Generator for the 21-cm signal of all models.
+
+        .. note :: This is MultiPhaseMedium.step and Global21cm.step rolled
+            into one, except rate coefficients are gathered from each model's
+            radiation background and the parcels evolve all models at once.
+
+        Returns
+        -------
+        Generator yielding the current time, redshift, IGM and CGM data,
+        and rate coefficients. Each element of the data dictionaries is an
+        array with one element per model.
+
+        """
+
+        medium = self.medium
+        pf = self.pf
+
+        t = 0.0
+        z = pf['initial_redshift']
+        dt = pf['time_units'] * pf['initial_timestep']
+        zf = pf['final_redshift']
+
+        if pf['include_igm']:
+            parcel_igm = medium.parcel_igm
+            data_igm = parcel_igm.grid.data.copy()
+            grid = parcel_igm.grid
+        else:
+            grid = medium.parcel_cgm.grid
+
+        if pf['include_cgm']:
+            parcel_cgm = medium.parcel_cgm
+            data_cgm = parcel_cgm.grid.data.copy()
+
+        # Evolve in time!
+        while z > zf:
+
+            if z < pf['kill_redshift']:
+                break
+
+            # Increment time / redshift
+            dtdz = medium.default_parcel.grid.cosm.dtdz(z)
+            t += dt
+            z -= dt / dtdz
+
+            if pf['include_igm']:
+                # Models that have finished reionizing are frozen
+                if pf['stop_igm_h_2'] is not None:
+                    frozen = data_igm['h_2'] > pf['stop_igm_h_2']
+                else:
+                    frozen = np.zeros(self.N, dtype=bool)
+
+                if np.all(frozen):
+                    data_igm = data_igm_pre.copy()
+                    dt1 = 1e50
+                else:
+                    rcs = []
+                    for i, sim in enumerate(self.sims):
+                        also = {}
+                        for sp in grid.absorbers:
+                            also['igm_{!s}'.format(sp)] = data_igm[sp][i:i+1]
+
+                        rcs.append(sim.medium.field.update_rate_coefficients(z,
+                            zone='igm', return_rc=True, **also))
+
+                    RC_igm = self._stack(rcs)
+
+                    t1, dt1, data_igm = next(medium.gen_igm)
+
+                    if np.any(frozen):
+                        self._freeze(data_igm, data_igm_pre, frozen)
+
+                    parcel_igm.update_rate_coefficients(data_igm, **RC_igm)
+            else:
+                dt1 = 1e50
+                RC_igm = None
+                data_igm = {'h_1': np.ones(self.N)}
+
+            if pf['include_cgm']:
+                if pf['stop_cgm_h_2'] is not None:
+                    frozen = data_cgm['h_2'] > pf['stop_cgm_h_2']
+                else:
+                    frozen = np.zeros(self.N, dtype=bool)
+
+                if np.all(frozen):
+                    data_cgm = data_cgm_pre.copy()
+                    dt2 = 1e50
+                else:
+                    rcs = []
+                    for i, sim in enumerate(self.sims):
+                        rcs.append(sim.medium.field.update_rate_coefficients(z,
+                            zone='cgm', return_rc=True,
+                            cgm_h_1=data_cgm['h_1'][i:i+1]))
+
+                    RC_cgm = self._stack(rcs)
+
+                    parcel_cgm.update_rate_coefficients(data_cgm, **RC_cgm)
+
+                    t2, dt2, data_cgm = next(medium.gen_cgm)
+
+                    if np.any(frozen):
+                        self._freeze(data_cgm, data_cgm_pre, frozen)
+            else:
+                dt2 = 1e50
+                RC_cgm = data_cgm = None
+
+            # Must update timesteps in unison
+            dt = min(dt1, dt2)
+            dt = min(dt, pf['max_timestep'] * pf['time_units'])
+
+            if pf['include_igm']:
+                data_igm_pre = data_igm.copy()
+                parcel_igm.dt = dt
+            if pf['include_cgm']:
+                data_cgm_pre = data_cgm.copy()
+                parcel_cgm.dt = dt
+
+            ##
+            # 21-cm stuff, now for all models at once.
+            ##
+            Ja = np.array([sim._f_Ja(z) for sim in self.sims]).ravel()
+            Jlw = np.array([sim._f_Jlw(z) for sim in self.sims]).ravel()
+
+            if pf['include_igm']:
+                n_H = self.cosm.nH(z)
+                Ts = self.hydr.Ts(z, data_igm['Tk'], Ja, data_igm['h_2'],
+                    data_igm['e'] * n_H)
+
+                if pf['floor_Ts']:
+                    Ts = np.maximum(Ts, self.hydr.Ts_floor(z=z))
+
+                if pf['include_cgm']:
+                    xavg = data_cgm['h_2'] \
+                         + (1. - data_cgm['h_2']) * data_igm['h_2']
+                else:
+                    xavg = data_igm['h_2']
+
+                dTb = self.hydr.dTb(z, xavg, Ts)
+
+                data_igm.update({'Ts': Ts, 'dTb': dTb, 'Ja': Ja, 'Jlw': Jlw})
+
+            yield t, z, data_igm, data_cgm, RC_igm, RC_cgm
@@ -15,12 +15,15 @@ import time
 import scipy
 import numpy as np
 from ..static import Grid
+from ..static.RateCoefficientArray import RateCoefficientArray
 from ..util.Math import smooth
+from ..util.Caching import fingerprint
 from ..util.Pickling import write_pickle_file
 from types import FunctionType
 from ..util import ParameterFile
 from ..phenom import Madau1995
 from ..util.Math import interp1d
+from scipy.interpolate import interp1d as interp1d_scipy
 from ..solvers import UniformBackground
 from ..analysis.MetaGalacticBackground import MetaGalacticBackground \
     as AnalyzeMGB
@@ -28,6 +31,7 @@ from ..physics.Constants import E_LyA, E_LL, ev_per_hz, erg_per_ev, \
     sqdeg_per_std, s_per_myr, rhodot_cgs, cm_per_mpc, c, h_p, k_B, \
     cm_per_m, erg_per_s_per_nW
 from ..util.ReadData import _sort_history, flatten_energies, flatten_flux
+from ..util.Timer import timed
 try:
     # this runs with no issues in python 2 but raises error in python 3
     basestring
@@ -44,6 +48,10 @@ else:
     _interp1d_kwargs = {}
     
 _tiny_sfrd = 1e-12
+
+# Converged Mmin(z) from the last model run in this process, for each
+# population and kind of model (see `_warm_start_key`).
+_warm_start = {}
     
 def NH2(z, Mh, fH2=3.5e-4):
     return 1e17 * (fH2 / 3.5e-4) * (Mh / 1e6)**(1. / 3.) * ((1. + z) / 20.)**2.
@@ -76,6 +84,55 @@ def get_Mmin_func(zarr, Jlw, Mmin_prev, **kwargs):
             kwargs['feedback_LW_Mmin']))
     
     return f_M
+
+def anderson_step(x, f, beta=1.):
+    """
+    Anderson mixing for the fixed-point problem x = g(x).
+    
+    Parameters
+    ----------
+    x : list
+        History of iterates, oldest first. Each element is an array.
+    f : list
+        History of residuals, g(x) - x, for each element of `x`.
+    beta : int, float
+        Damping (mixing) parameter. beta=1 means no damping.
+        
+    Returns
+    -------
+    Next iterate.
+    
+    """
+    
+    if len(x) == 1:
+        return x[-1] + beta * f[-1]
+        
+    dX = np.diff(np.array(x), axis=0).T
+    dF = np.diff(np.array(f), axis=0).T
+    
+    gamma = np.linalg.lstsq(dF, f[-1], rcond=None)[0]
+    
+    return x[-1] + beta * f[-1] - np.dot(dX + beta * dF, gamma)
+    
+def secant_step(x, f, beta=1.):
+    """
+    Element-wise secant update for the fixed-point problem x = g(x).
+    
+    Falls back to a fixed-point step wherever the residual didn't change
+    between the last two iterations. Either way, steps are damped by `beta`.
+    """
+    
+    step = beta * f[-1]
+    
+    if len(x) == 1:
+        return x[-1] + step
+        
+    df = f[-1] - f[-2]
+    ok = np.abs(df) > 1e-10
+    
+    step[ok] = -beta * f[-1][ok] * (x[-1][ok] - x[-2][ok]) / df[ok]
+    
+    return x[-1] + step
         
 class MetaGalacticBackground(AnalyzeMGB):
     def __init__(self, pf=None, grid=None, **kwargs):
@@ -151,6 +208,7 @@ class MetaGalacticBackground(AnalyzeMGB):
     
         return rank
     
+    @timed('mgb', save_as='timing')
     def run(self, include_pops=None, xe=None):
         """
         Loop over populations, determine background intensity.
@@ -172,6 +230,9 @@ class MetaGalacticBackground(AnalyzeMGB):
 
         if not hasattr(self, '_data_'):
             self._data_ = {}
+            
+        if self.count == 0 and self.pf['feedback_LW_warm_start']:
+            self._apply_warm_start()
 
         for i, popid in enumerate(include_pops):
             z, fluxes = self.run_pop(popid=popid, xe=xe)
@@ -198,6 +259,12 @@ class MetaGalacticBackground(AnalyzeMGB):
                 left=0.0, right=0.0)
             self._f_Jlw = lambda z: np.interp(z, self._zarr, self._Jlw,
                 left=0.0, right=0.0)
+                
+            if self.pf['feedback_LW'] and hasattr(self, '_Mmin_now') and \
+               (include_pops == self._lwb_sources):
+                for popid in self._LW_felt_by:
+                    _warm_start[self._warm_start_key(popid)] = \
+                        self.z_unique.copy(), self._Mmin_now.copy()
                         
             # Now that feedback is done, evolve all non-LW sources to get
             # final background.
@@ -223,6 +290,80 @@ class MetaGalacticBackground(AnalyzeMGB):
 
         self._count += 1
     
+    def _apply_warm_start(self):
+        """
+        Set Mmin(z) of feedback-susceptible populations to the converged
+        solution from the last model, if there is one.
+        """
+        
+        if not self.pf['feedback_LW']:
+            return
+        if self.pf['feedback_LW_guesses'] is not None:
+            return
+        
+        for popid in self._LW_felt_by:
+            key = self._warm_start_key(popid)
+            if key not in _warm_start:
+                continue
+                
+            zarr, Mmin = _warm_start[key]
+            pop = self.pops[popid]
+            
+            # Only populations with settable Mmin, e.g., GalaxyCohort.
+            try:
+                pop._tab_Mmin = np.interp(pop.halos.tab_z, zarr, Mmin)
+            except AttributeError:
+                continue
+                
+    def _warm_start_key(self, popid):
+        """
+        Identify models whose converged Mmin(z) can serve as a first guess
+        for population `popid`.
+        
+        Requires the same kind of population, halo mass function, and 
+        feedback prescription. Other parameters (e.g., those being varied 
+        in an MCMC) can differ, which is the point.
+        """
+        pars = [(key, self.pf[key]) for key in sorted(self.pf.keys()) \
+            if key.startswith('hmf_') or key.startswith('feedback_LW')]
+        
+        return popid, type(self.pops[popid]).__name__, fingerprint(pars)
+        
+    def _accelerate(self, Mnext):
+        """
+        Determine Mmin(z) for the next iteration using the history of
+        previous iterations, rather than simple fixed-point iteration.
+        
+        Works with log10(Mmin) since Mmin spans orders of magnitude.
+        """
+        
+        if self.count == 1:
+            self._accel_x = []
+            self._accel_f = []
+            
+        x = np.log10(self._Mmin_pre)
+        self._accel_x.append(x)
+        self._accel_f.append(np.log10(Mnext) - x)
+        
+        depth = self.pf['feedback_LW_accel_depth']
+        self._accel_x = self._accel_x[-(depth+1):]
+        self._accel_f = self._accel_f[-(depth+1):]
+        
+        beta = self.pf['feedback_LW_accel_damping']
+        
+        if self.pf['feedback_LW_accel'] == 'anderson':
+            log10M = anderson_step(self._accel_x, self._accel_f, beta)
+        elif self.pf['feedback_LW_accel'] == 'secant':
+            log10M = secant_step(self._accel_x, self._accel_f, beta)
+        else:
+            raise NotImplementedError('Unrecognized feedback_LW_accel={}'.format(
+                self.pf['feedback_LW_accel']))
+                
+        # Don't trust extrapolation to very different values
+        log10M = np.minimum(np.maximum(log10M, x - 1.), x + 1.)
+        
+        return 10**log10M
+    
     @property
     def today(self):
         """
@@ -416,6 +557,7 @@ class MetaGalacticBackground(AnalyzeMGB):
         
         return self._lwb_sources_
                         
+    @timed('rte')
     def run_pop(self, popid=0, xe=None):
         """
         Evolve radiation background in time.
@@ -598,7 +740,8 @@ class MetaGalacticBackground(AnalyzeMGB):
 
         Returns
         -------
-        Dictionary of rate coefficients.
+        RateCoefficientArray, which behaves like a dictionary of rate 
+        coefficients summed over populations.
 
         """
         
@@ -640,12 +783,10 @@ class MetaGalacticBackground(AnalyzeMGB):
 
                 Nz = len(zarr)
 
-                self._rc_tabs[i]['k_ion'] = np.zeros((Nz,
-                        self.grid.N_absorbers))
-                self._rc_tabs[i]['k_ion2'] = np.zeros((Nz,
-                        self.grid.N_absorbers, self.grid.N_absorbers))
-                self._rc_tabs[i]['k_heat'] = np.zeros((Nz,
-                        self.grid.N_absorbers))
+                # All coefficients for this population, with the same 
+                # layout as RateCoefficientArray.data[i]
+                self._rc_tabs[i]['rc'] = np.zeros((Nz,
+                        self.grid.N_absorbers, 2 + self.grid.N_absorbers))
                 self._rc_tabs[i]['Ja'] = np.zeros(Nz)
                 self._rc_tabs[i]['Jlw'] = np.zeros(Nz)
             
@@ -679,14 +820,10 @@ class MetaGalacticBackground(AnalyzeMGB):
                     coeff = self.solver.update_rate_coefficients(redshift, 
                         popid=i, **kw)
                                         
-                    self._rc_tabs[i]['k_ion'][_iz,:] = \
-                        coeff['k_ion'].copy()
-                    self._rc_tabs[i]['k_ion2'][_iz,:] = \
-                        coeff['k_ion2'].copy()
-                    self._rc_tabs[i]['k_heat'][_iz,:] = \
-                        coeff['k_heat'].copy()
+                    self._rc_tabs[i]['rc'][_iz] = coeff.data[i]
                         
             self._interp = [{} for i in range(self.solver.Npops)]
+            zarrs = {}
             for i, pop in enumerate(self.pops):
                 if self.solver.redshifts[i] is None:
                     zarr = self.z_unique
@@ -694,35 +831,29 @@ class MetaGalacticBackground(AnalyzeMGB):
                     zarr = self.solver.redshifts[i]
 
                 # Create functions
-                self._interp[i]['k_ion'] = \
-                    [None for _i in range(self.grid.N_absorbers)]
-                self._interp[i]['k_ion2'] = \
-                    [[None,None,None] for _i in range(self.grid.N_absorbers)]
-                self._interp[i]['k_heat'] = \
-                    [None for _i in range(self.grid.N_absorbers)]
-            
                 self._interp[i]['Ja'] = interp1d(zarr, 
                     self._rc_tabs[i]['Ja'], kind=self.pf['interp_all'],
                     bounds_error=False, fill_value=0.0)
                 self._interp[i]['Jlw'] = interp1d(zarr, 
                     self._rc_tabs[i]['Jlw'], kind=self.pf['interp_all'],
                     bounds_error=False, fill_value=0.0)    
+                
+                key = fingerprint(zarr)
+                if key not in zarrs:
+                    zarrs[key] = zarr, []
+                zarrs[key][1].append(i)
             
-                for j in range(self.grid.N_absorbers):
-                    self._interp[i]['k_ion'][j] = \
-                        interp1d(zarr, self._rc_tabs[i]['k_ion'][:,j], 
-                            kind=self.pf['interp_all'], 
-                            bounds_error=False, fill_value=0.0)    
-                    self._interp[i]['k_heat'][j] = \
-                        interp1d(zarr, self._rc_tabs[i]['k_heat'][:,j], 
-                            kind=self.pf['interp_all'],
-                            bounds_error=False, fill_value=0.0)    
-                    
-                    for k in range(self.grid.N_absorbers):
-                        self._interp[i]['k_ion2'][j][k] = \
-                            interp1d(zarr, self._rc_tabs[i]['k_ion2'][:,j,k],
-                                kind=self.pf['interp_all'],
-                                bounds_error=False, fill_value=0.0)
+            # One interpolant for all coefficients of all populations that
+            # share a redshift grid (usually all of them).
+            self._rc_interp = []
+            for zarr, popids in zarrs.values():
+                tab = np.array([self._rc_tabs[i]['rc'] for i in popids])
+                f = interp1d_scipy(zarr, np.moveaxis(tab, 1, 0), axis=0,
+                    kind=self.pf['interp_all'], bounds_error=False, 
+                    fill_value=0.0, **_interp1d_kwargs)
+                self._rc_interp.append((np.array(popids), f))
+            
+            self._rc_in_zone = {}
                      
             self._has_coeff = True  
                            
@@ -730,51 +861,35 @@ class MetaGalacticBackground(AnalyzeMGB):
             
         else:
                         
-            to_return = \
-            {
-             'k_ion': np.zeros((1,self.grid.N_absorbers)),
-             'k_ion2': np.zeros((1,self.grid.N_absorbers, self.grid.N_absorbers)),
-             'k_heat': np.zeros((1,self.grid.N_absorbers)),
-            }
-        
-            for i, pop in enumerate(self.pops):
-        
-                if pop.zone != kwargs['zone']:
-                    continue
-        
-                fset = self._interp[i]             
-        
-                # Call interpolants, add 'em all up.
-                this_pop = \
-                {
-                 'k_ion':  np.array([[fset['k_ion'][j](z) \
-                    for j in range(self.grid.N_absorbers)]]),
-                 'k_heat': np.array([[fset['k_heat'][j](z) \
-                    for j in range(self.grid.N_absorbers)]]),
-                 'Ja': fset['Ja'](z),
-                 'Jlw': fset['Jlw'](z),
-                }
-                                
-                # Convert to rate coefficient                
-                for j, absorber in enumerate(self.grid.absorbers):
-                    x = kwargs['{0!s}_{1!s}'.format(pop.zone, absorber)]
-                    this_pop['k_ion'][0][j] /= x
-                    
-                    # No helium for cgm, at least not this carefully
-                    if pop.zone == 'cgm':
-                        break
-
-                tmp = np.zeros((self.grid.N_absorbers, self.grid.N_absorbers))
-                for j in range(self.grid.N_absorbers):
-                    for k in range(self.grid.N_absorbers):
-                        tmp[j,k] = fset['k_ion2'][j][k](z)
-
-                this_pop['k_ion2'] = np.array([tmp])
-
-                for key in to_return:
-                    to_return[key] += this_pop[key]
+            rc = RateCoefficientArray(self.solver.Npops, 
+                self.grid.N_absorbers)
+            
+            # Only populations that affect this zone
+            zone = kwargs['zone']
+            if zone not in self._rc_in_zone:
+                self._rc_in_zone[zone] = \
+                    np.array([pop.zone == zone for pop in self.pops])
+            
+            in_zone = self._rc_in_zone[zone]
+            if not np.any(in_zone):
+                return rc
+            
+            for popids, f in self._rc_interp:
+                rc.data[popids] = f(z)
+            
+            rc.data[~in_zone] = 0.0
+            
+            # Convert to rate coefficient. No helium for cgm, at least not 
+            # this carefully.
+            x = np.ones(self.grid.N_absorbers)
+            for j, absorber in enumerate(self.grid.absorbers):
+                x[j] = np.squeeze(kwargs['{0!s}_{1!s}'.format(zone, absorber)])
+                if zone == 'cgm':
+                    break
+            
+            rc.ion[in_zone] /= x[None,:]
 
-            return to_return
+            return rc
                           
     @property
     def z_unique(self):
@@ -1043,7 +1158,9 @@ class MetaGalacticBackground(AnalyzeMGB):
         mdel = self.pf['feedback_LW_mixup_delay']
         
         # Set Mmin for the next iteration
-        if mfreq > 0 and self.count >= mdel and \
+        if self.pf['feedback_LW_accel'] is not None:
+            _Mmin_next = self._accelerate(Mnext)
+        elif mfreq > 0 and self.count >= mdel and \
            (self.count - mdel) % mfreq == 0:
             _Mmin_next = np.sqrt(np.product(self._Mmin_bank[-2:], axis=0))
         elif (self.count > 1) and (self.pf['feedback_LW_softening'] is not None):   
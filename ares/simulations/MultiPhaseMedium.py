@@ -15,7 +15,7 @@ from ..static import Grid
 from types import FunctionType
 from .GasParcel import GasParcel
 from ..physics.Cosmology import Cosmology
-from ..util.ReadData import _sort_history
+from ..util.History import HistoryRecorder
 from ..util.ParameterFile import get_pq_pars
 from ..util import ParameterFile, ProgressBar
 from .MetaGalacticBackground import MetaGalacticBackground
@@ -25,7 +25,7 @@ from ..util.SetDefaultParameterValues import MultiPhaseParameters
 _mpm_defs = MultiPhaseParameters()
 
 class MultiPhaseMedium(object):
-    def __init__(self, pf=None, cosm=None, **kwargs):
+    def __init__(self, pf=None, cosm=None, batch=False, **kwargs):
         """
         Initialize a MultiPhaseMedium object.
         
@@ -34,12 +34,17 @@ class MultiPhaseMedium(object):
         respectively. To perform a single-zone calculation, simply set 
         ``include_cgm=False`` or ``include_igm=False``.
         
+        If `batch` is True, each cell of the IGM and CGM grids is assumed
+        to be independent, and the chemistry is solved for all cells at
+        once (see `ares.simulations.Global21cmBatch`).
+        
         """
         
         if pf is not None:
             self.pf = pf
             
         self._cosm_ = cosm    
+        self.batch = batch
             
         self.kwargs = kwargs
                 
@@ -204,6 +209,9 @@ class MultiPhaseMedium(object):
 
                 parcel_igm = GasParcel(cosm=self.cosm, **self.kw_igm)
                 
+                if self.batch:
+                    parcel_igm._set_chemistry(batch=True)
+                
                 self.gen_igm = parcel_igm.step()
 
                 # Set initial values for rate coefficients
@@ -216,7 +224,7 @@ class MultiPhaseMedium(object):
                 self.kw_cgm = kw.copy()
                 parcel_cgm = GasParcel(cosm=self.cosm, **self.kw_cgm)
                 parcel_cgm.grid.set_recombination_rate(True)
-                parcel_cgm._set_chemistry()
+                parcel_cgm._set_chemistry(batch=self.batch)
                 self.gen_cgm = parcel_cgm.step()
                 
                 parcel_cgm.chem.chemnet.monotonic_EoR = \
@@ -256,6 +264,7 @@ class MultiPhaseMedium(object):
         """
         
         self._insert_inits()
+        self._init_recorders()
 
         pb = ProgressBar(self.tf, use=self.pf['progress_bar'])
         pb.start()
@@ -266,38 +275,83 @@ class MultiPhaseMedium(object):
             pb.update(t)
                         
             # Save data
-            self.all_z.append(z)
-            self.all_t.append(t)
-            
-            if self.pf['include_cgm']:    
-                self.all_data_cgm.append(data_cgm.copy())
-            #else:
-            #    self.all_data_cgm = []
-            
-            if self.pf['include_igm']:
-                self.all_data_igm.append(data_igm.copy())  
-            #else:
-            #    self.all_data_igm = []   
-                
-            if self.pf['save_rate_coefficients']:
-                if self.pf['include_cgm']:     
-                    self.all_RCs_cgm.append(RC_cgm.copy())
-                if self.pf['include_igm']:
-                    self.all_RCs_igm.append(RC_igm.copy())
+            self._record(t, z, data_igm, data_cgm, RC_igm, RC_cgm)
 
         pb.finish()          
 
+        self._set_history()
+
+    def _init_recorders(self, fields=None):
+        """
+        Setup storage for the history of the simulation, starting with the
+        initial conditions (see `_insert_inits`).
+        
+        Parameters
+        ----------
+        fields : list
+            Names of quantities to save. By default, uses `history_fields` 
+            parameter, and if that is None, saves everything.
+        
+        """
+        
+        if fields is None:
+            fields = self.pf['history_fields']
+        
+        save_rc = self.pf['save_rate_coefficients']
+        
+        self._rec_tz = HistoryRecorder()
+        
+        if self.pf['include_igm']:
+            self._rec_igm = HistoryRecorder('igm_', fields)
+            self._rec_igm.extend(self.all_data_igm)
+            if save_rc:
+                self._rec_rc_igm = HistoryRecorder('igm_', fields)
+                self._rec_rc_igm.extend(self.all_RCs_igm)
+        if self.pf['include_cgm']:
+            self._rec_cgm = HistoryRecorder('cgm_', fields)
+            self._rec_cgm.extend(self.all_data_cgm)
+            if save_rc:
+                self._rec_rc_cgm = HistoryRecorder('cgm_', fields)
+                self._rec_rc_cgm.extend(self.all_RCs_cgm)
+                
+        for t, z in zip(self.all_t, self.all_z):
+            self._rec_tz.append({'t': t, 'z': z})
+            
+        # Don't need these anymore
+        self.all_t, self.all_z, self.all_data_igm, self.all_data_cgm = \
+            [], [], [], []
+        self.all_RCs_igm, self.all_RCs_cgm = [], []
+        
+    def _record(self, t, z, data_igm, data_cgm, RC_igm, RC_cgm):
+        """
+        Save a snapshot. Values are copied, so inputs can be modified later.
+        """
+        
+        self._rec_tz.append({'t': t, 'z': z})
+        
+        if self.pf['include_igm']:
+            self._rec_igm.append(data_igm)
+            if self.pf['save_rate_coefficients']:
+                self._rec_rc_igm.append(RC_igm)
+        if self.pf['include_cgm']:
+            self._rec_cgm.append(data_cgm)
+            if self.pf['save_rate_coefficients']:
+                self._rec_rc_cgm.append(RC_cgm)
+                
+    def _set_history(self):
+        """
+        Convert recorded snapshots to `history` dictionary.
+        """
+        
         # Sort everything by time
         if self.pf['include_igm']:
-            self.history_igm = \
-                _sort_history(self.all_data_igm, prefix='igm_', squeeze=True)
+            self.history_igm = self._rec_igm.to_dict()
             self.history = self.history_igm.copy()
         else:
             self.history = {}
             
         if self.pf['include_cgm']:    
-            self.history_cgm = \
-                _sort_history(self.all_data_cgm, prefix='cgm_', squeeze=True)        
+            self.history_cgm = self._rec_cgm.to_dict()
             self.history.update(self.history_cgm)
         else:
             self.history_cgm = {}
@@ -305,19 +359,17 @@ class MultiPhaseMedium(object):
         # Save rate coefficients [optional]
         if self.pf['save_rate_coefficients']:
             if self.pf['include_igm']:
-                self.rates_igm = \
-                    _sort_history(self.all_RCs_igm, prefix='igm_', squeeze=True)
+                self.rates_igm = self._rec_rc_igm.to_dict()
                 self.history.update(self.rates_igm)
             
             if self.pf['include_cgm']:    
-                self.rates_cgm = \
-                    _sort_history(self.all_RCs_cgm, prefix='cgm_', squeeze=True)
+                self.rates_cgm = self._rec_rc_cgm.to_dict()
                 self.history.update(self.rates_cgm)
             else:
                 self.rates_cgm = {}
 
-        self.history['t'] = np.array(self.all_t)
-        self.history['z'] = np.array(self.all_z)
+        self.history['t'] = self._rec_tz['t'].copy()
+        self.history['z'] = self._rec_tz['z'].copy()
                 
     def step(self):
         """
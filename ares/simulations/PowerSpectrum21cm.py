@@ -1,12 +1,16 @@
 import os
 import copy
 import pickle
+import threading
 import numpy as np
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 from types import FunctionType
 from ..static import Fluctuations
 from .Global21cm import Global21cm
 from ..physics.HaloModel import HaloModel
 from ..util import ParameterFile, ProgressBar
+from ..util.PrintInfo import print_warning
 #from ..analysis.BlobFactory import BlobFactory
 from ..physics.Constants import cm_per_mpc, c, s_per_yr
 from ..analysis.PowerSpectrum import PowerSpectrum as AnalyzePS
@@ -22,6 +26,16 @@ defaults = \
  'load_ics': True,
 }
 
+# Set in each worker process when run in parallel over redshift.
+_worker_sim = None
+
+def _init_worker(sim):
+    global _worker_sim
+    _worker_sim = sim
+
+def _step_worker(z):
+    return _worker_sim._step_z(z, _worker_sim.field)
+
 class PowerSpectrum21cm(AnalyzePS): # pragma: no cover
     def __init__(self, **kwargs):
         """ Set up a power spectrum calculation. """
@@ -117,8 +131,18 @@ class PowerSpectrum21cm(AnalyzePS): # pragma: no cover
         pb = self.pb = ProgressBar(N, use=self.pf['progress_bar'], 
             name='ps-21cm')
 
+        if self.pf['ps_num_workers'] > 1:
+            gen = self._step_parallel()
+        else:
+            gen = self.step()
+
         all_ps = []                        
-        for i, (z, data) in enumerate(self.step()):
+        for i, (z, data) in enumerate(gen):
+
+            # Per-redshift model inputs. Keep those from the last redshift,
+            # but they don't go in the history.
+            for key in ['zeta', 'R_s', 'Th']:
+                setattr(self, key, data.pop(key))
 
             # Do stuff
             all_ps.append(data.copy())
@@ -232,305 +256,413 @@ class PowerSpectrum21cm(AnalyzePS): # pragma: no cover
         self.field.tab_Mmin = self.tab_Mmin    
         
         for i, z in enumerate(self.z):
+            yield z, self._step_z(z, self.field)
 
-            data = {}
-                
-            ## 
-            # First, loop over populations and determine total
-            # UV and X-ray outputs. 
-            ##          
-            
-            # Prepare for the general case of Mh-dependent things
-            Nion = np.zeros_like(self.halos.tab_M)
-            Nlya = np.zeros_like(self.halos.tab_M)
-            fXcX = np.zeros_like(self.halos.tab_M)
-            zeta_ion = zeta = np.zeros_like(self.halos.tab_M)
-            zeta_lya = np.zeros_like(self.halos.tab_M)
-            zeta_X = np.zeros_like(self.halos.tab_M)
-            #Tpro = None
-            for j, pop in enumerate(self.pops):
-                pop_zeta = pop.IonizingEfficiency(z=z)
-                
-                if pop.is_src_ion:
+    def _setup_parallel(self):
+        """
+        Do everything that all redshifts have in common before we fork.
 
-                    if type(pop_zeta) is tuple:
-                        _Mh, _zeta = pop_zeta
-                        zeta += np.interp(self.halos.tab_M, _Mh, _zeta)
-                        Nion += pop.src.Nion
-                    else:
-                        zeta += pop_zeta
-                        Nion += pop.pf['pop_Nion']
-                        Nlya += pop.pf['pop_Nlw']
+        This way, the global 21-cm solution, halo mass function, etc., are
+        computed just once and shared (read-only) by all workers. In
+        'thread' mode, the halo mass function and populations are the very
+        same objects in every thread, so anything they build lazily in
+        `_step_z` must be built here, before the threads start.
+        """
+        self.mean_history
+        self.field.tab_Mmin = self.tab_Mmin
 
-                    zeta = np.maximum(zeta, 1.) # why?
+        for halos in [self.field.halos] + [pop.halos for pop in self.pops]:
+            halos.tab_dndm
+            halos.fcoll_spline_2d
 
-                if pop.is_src_heat:
-                    pop_zeta_X = pop.HeatingEfficiency(z=z)
-                    zeta_X += pop_zeta_X
+        for pop in self.pops:
+            pop.IonizingEfficiency(z=self.z[0])
 
-                if pop.is_src_lya:
-                    Nlya += pop.pf['pop_Nlw']
-                    #Nlya += pop.src.Nlw
-
-            # Only used if...ps_lya_method==0?
-            zeta_lya += zeta * (Nlya / Nion)
-                                                                        
-            ##
-            # Make scalar if it's a simple model
-            ##
-            if np.all(np.diff(zeta) == 0):
-                zeta = zeta[0]
-            if np.all(np.diff(zeta_X) == 0):
-                zeta_X = zeta_X[0]    
-            if np.all(np.diff(zeta_lya) == 0):
-                zeta_lya = zeta_lya[0]
-                
-            self.field.zeta = zeta
-            self.field.zeta_X = zeta_X
-                            
-            self.zeta = zeta    
-                
-            ##
-            # Figure out scaling from ionized regions to heated regions.
-            # Right now, only constant (relative) scaling is allowed.
-            ##    
-            asize = self.pf['bubble_shell_asize_zone_0']
-            if self.pf['ps_include_temp'] and asize is not None:
-                
-                self.field.is_Rs_const = False
-                
-                if type(asize) is FunctionType:
-                    R_s = lambda R, z: R + asize(z)
-                else:    
-                    R_s = lambda R, z: R + asize
-                
-            elif self.pf['ps_include_temp'] and self.pf['ps_include_ion']:
-                fvol = self.pf["bubble_shell_rvol_zone_0"]
-                frad = self.pf['bubble_shell_rsize_zone_0']
-                
-                assert (fvol is not None) + (frad is not None) <= 1
-                
-                if fvol is not None:
-                    assert frad is None
-                    
-                    # Assume independent variable is redshift for now.
-                    if type(fvol) is FunctionType:
-                        frad = lambda z: (1. + fvol(z))**(1./3.) - 1.
-                        self.field.is_Rs_const = False
-                    else:
-                        frad = lambda z: (1. + fvol)**(1./3.) - 1.
-                        
-                elif frad is not None:
-                    if type(frad) is FunctionType:
-                        self.field.is_Rs_const = False
-                    else:
-                        frad = lambda z: frad
-                else:
-                    # If R_s = R_s(z), must re-compute overlap volumes on each
-                    # step. Should set attribute if this is the case.
-                    raise NotImplemented('help')
-                
-                R_s = lambda R, z: R * (1. + frad(z))
-                
-                
+            if pop.is_src_heat:
+                pop.HeatingEfficiency(z=self.z[0])
+
+    def _get_field(self):
+        """
+        Retrieve this thread's Fluctuations instance, creating it if need be.
+        """
+        if not hasattr(self, '_local'):
+            self._local = threading.local()
+
+        if not hasattr(self._local, 'field'):
+            field = Fluctuations(**self.kwargs)
+            field._halos = self.field.halos
+            field.tab_Mmin = self.tab_Mmin
+            self._local.field = field
+
+        return self._local.field
+
+    def _step_thread(self, z):
+        return self._step_z(z, self._get_field())
+
+    def _step_parallel(self):
+        """
+        Like `step`, but farm redshifts out to a pool of workers.
+
+        Set `ps_num_workers` to the number of workers, and `ps_worker_type`
+        to 'process' or 'thread'. Results are yielded in the same order as
+        `self.z`, so `run` can't tell the difference.
+
+        .. note :: Process pools rely on fork to inherit this object rather
+            than pickling it. If fork is unavailable, we fall back to threads.
+
+        """
+
+        Nw = self.pf['ps_num_workers']
+        kind = self.pf['ps_worker_type']
+
+        if kind not in ['process', 'thread']:
+            raise ValueError("Unrecognized ps_worker_type={}.".format(kind))
+
+        self._setup_parallel()
+
+        if kind == 'process':
+            if not hasattr(multiprocessing, 'get_context'):
+                ctx = multiprocessing
+            elif 'fork' in multiprocessing.get_all_start_methods():
+                ctx = multiprocessing.get_context('fork')
             else:
-                R_s = lambda R, z: None    
-                Th = None
-                
-            # Must be constant, for now.
-            Th = self.pf["bubble_shell_ktemp_zone_0"]
-            
-            self.R_s = R_s
-            self.Th = Th
-                
-                
-            ##
-            # First: some global quantities we'll need
-            ##
-            Tcmb = self.cosm.TCMB(z)
-            Tk = np.interp(z, self.mean_history['z'][-1::-1],
-                self.mean_history['igm_Tk'][-1::-1])
-            Ts = np.interp(z, self.mean_history['z'][-1::-1],
-                self.mean_history['Ts'][-1::-1])
-            Ja = np.interp(z, self.mean_history['z'][-1::-1],
-                self.mean_history['Ja'][-1::-1])
-            xHII, ne = [0] * 2
-            
-            xa = self.hydr.RadiativeCouplingCoefficient(z, Ja, Tk)
-            xc = self.hydr.CollisionalCouplingCoefficient(z, Tk)
-            xt = xa + xc
-            
-            # Won't be terribly meaningful if temp fluctuations are off.
-            C = self.field.TempToContrast(z, Th=Th, Tk=Tk, Ts=Ts, Ja=Ja)            
-            data['c'] = C
-            data['Ts'] = Ts
-            data['Tk'] = Tk
-            data['xa'] = xa
-            data['Ja'] = Ja
+                print_warning("Process pools require fork. Using threads.")
+                kind = 'thread'
+
+        if kind == 'process':
+            pool = ctx.Pool(Nw, initializer=_init_worker, initargs=(self,))
+            func = _step_worker
+        else:
+            pool = ThreadPool(Nw)
+            func = self._step_thread
+
+        try:
+            for z, data in zip(self.z, pool.imap(func, self.z)):
+                yield z, data
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _step_z(self, z, field):
+        """
+        Compute everything we need at a single redshift.
+
+        Parameters
+        ----------
+        z : int, float
+            Redshift of interest.
+        field : ares.static.Fluctuations instance
+            Does the heavy lifting. In serial, this is just `self.field`,
+            but each worker thread gets its own so they don't clobber one
+            another's caches.
+
+        Returns
+        -------
+        Dictionary of results at this redshift.
+
+        """
+
+        data = {}
             
+        ## 
+        # First, loop over populations and determine total
+        # UV and X-ray outputs. 
+        ##          
+        
+        # Prepare for the general case of Mh-dependent things
+        Nion = np.zeros_like(self.halos.tab_M)
+        Nlya = np.zeros_like(self.halos.tab_M)
+        fXcX = np.zeros_like(self.halos.tab_M)
+        zeta_ion = zeta = np.zeros_like(self.halos.tab_M)
+        zeta_lya = np.zeros_like(self.halos.tab_M)
+        zeta_X = np.zeros_like(self.halos.tab_M)
+        #Tpro = None
+        for j, pop in enumerate(self.pops):
+            pop_zeta = pop.IonizingEfficiency(z=z)
             
+            if pop.is_src_ion:
+
+                if type(pop_zeta) is tuple:
+                    _Mh, _zeta = pop_zeta
+                    zeta += np.interp(self.halos.tab_M, _Mh, _zeta)
+                    Nion += pop.src.Nion
+                else:
+                    zeta += pop_zeta
+                    Nion += pop.pf['pop_Nion']
+                    Nlya += pop.pf['pop_Nlw']
+
+                zeta = np.maximum(zeta, 1.) # why?
+
+            if pop.is_src_heat:
+                pop_zeta_X = pop.HeatingEfficiency(z=z)
+                zeta_X += pop_zeta_X
+
+            if pop.is_src_lya:
+                Nlya += pop.pf['pop_Nlw']
+                #Nlya += pop.src.Nlw
+
+        # Only used if...ps_lya_method==0?
+        zeta_lya += zeta * (Nlya / Nion)
+                                                                    
+        ##
+        # Make scalar if it's a simple model
+        ##
+        if np.all(np.diff(zeta) == 0):
+            zeta = zeta[0]
+        if np.all(np.diff(zeta_X) == 0):
+            zeta_X = zeta_X[0]    
+        if np.all(np.diff(zeta_lya) == 0):
+            zeta_lya = zeta_lya[0]
             
-            # Assumes strong coupling. Mapping between temperature 
-            # fluctuations and contrast fluctuations.
-            #Ts = Tk
+        field.zeta = zeta
+        field.zeta_X = zeta_X
+
+        # Don't set attributes here: in 'thread' mode, many redshifts are
+        # in progress at once. `run` will pick these up from `data`.
+        data['zeta'] = zeta
             
+        ##
+        # Figure out scaling from ionized regions to heated regions.
+        # Right now, only constant (relative) scaling is allowed.
+        ##    
+        asize = self.pf['bubble_shell_asize_zone_0']
+        if self.pf['ps_include_temp'] and asize is not None:
             
-            # Add beta factors to dictionary
-            for f1 in ['x', 'd', 'a']:
-                func = self.hydr.__getattribute__('beta_%s' % f1)
-                data['beta_%s' % f1] = func(z, Tk, xHII, ne, Ja)
+            field.is_Rs_const = False
             
-            Qi_gs = np.interp(z, self.gs.history['z'][-1::-1], 
-                self.gs.history['cgm_h_2'][-1::-1])
+            if type(asize) is FunctionType:
+                R_s = lambda R, z: R + asize(z)
+            else:    
+                R_s = lambda R, z: R + asize
             
-            # Ionization fluctuations
-            if self.pf['ps_include_ion']:
+        elif self.pf['ps_include_temp'] and self.pf['ps_include_ion']:
+            fvol = self.pf["bubble_shell_rvol_zone_0"]
+            frad = self.pf['bubble_shell_rsize_zone_0']
             
-                Ri, Mi, Ni = self.field.BubbleSizeDistribution(z, ion=True)
+            assert (fvol is not None) + (frad is not None) <= 1
             
-                data['n_i'] = Ni
-                data['m_i'] = Mi
-                data['r_i'] = Ri
-                data['delta_B'] = self.field._B(z, ion=True)
+            if fvol is not None:
+                assert frad is None
+                
+                # Assume independent variable is redshift for now.
+                if type(fvol) is FunctionType:
+                    frad = lambda z: (1. + fvol(z))**(1./3.) - 1.
+                    field.is_Rs_const = False
+                else:
+                    frad = lambda z: (1. + fvol)**(1./3.) - 1.
+                    
+            elif frad is not None:
+                if type(frad) is FunctionType:
+                    field.is_Rs_const = False
+                else:
+                    frad = lambda z: frad
             else:
-                Ri = Mi = Ni = None    
+                # If R_s = R_s(z), must re-compute overlap volumes on each
+                # step. Should set attribute if this is the case.
+                raise NotImplemented('help')
             
-            Qi = self.field.MeanIonizedFraction(z)
+            R_s = lambda R, z: R * (1. + frad(z))
             
-            Qi_bff = self.field.BubbleFillingFactor(z)
             
-            xibar = Qi_gs                
-                            
-            #print(z, Qi_bff, Qi, xibar, Qi_bff / Qi)
-                            
-            if self.pf['ps_include_temp']:
-                # R_s=R_s(Ri,z)
-                Qh = self.field.MeanIonizedFraction(z, ion=False)
-                data['Qh'] = Qh
-            else:
-                data['Qh'] = Qh = 0.0
+        else:
+            R_s = lambda R, z: None    
+            Th = None
             
-            # Interpolate global signal onto new (coarser) redshift grid.
-            dTb_ps = np.interp(z, self.gs.history['z'][-1::-1], 
-                self.gs.history['dTb'][-1::-1])
+        # Must be constant, for now.
+        Th = self.pf["bubble_shell_ktemp_zone_0"]
             
-            xavg_gs = np.interp(z, self.gs.history['z'][-1::-1], 
-                self.gs.history['xavg'][-1::-1])
-                                
-            data['dTb'] = dTb_ps
             
-            #data['dTb_bulk'] = np.interp(z, self.gs.history['z'][-1::-1], 
-            #    self.gs.history['dTb_bulk'][-1::-1])
+        ##
+        # First: some global quantities we'll need
+        ##
+        Tcmb = self.cosm.TCMB(z)
+        Tk = np.interp(z, self.mean_history['z'][-1::-1],
+            self.mean_history['igm_Tk'][-1::-1])
+        Ts = np.interp(z, self.mean_history['z'][-1::-1],
+            self.mean_history['Ts'][-1::-1])
+        Ja = np.interp(z, self.mean_history['z'][-1::-1],
+            self.mean_history['Ja'][-1::-1])
+        xHII, ne = [0] * 2
+        
+        xa = self.hydr.RadiativeCouplingCoefficient(z, Ja, Tk)
+        xc = self.hydr.CollisionalCouplingCoefficient(z, Tk)
+        xt = xa + xc
+        
+        # Won't be terribly meaningful if temp fluctuations are off.
+        C = field.TempToContrast(z, Th=Th, Tk=Tk, Ts=Ts, Ja=Ja)            
+        data['c'] = C
+        data['Ts'] = Ts
+        data['Tk'] = Tk
+        data['xa'] = xa
+        data['Ja'] = Ja
+        
+        
+        
+        # Assumes strong coupling. Mapping between temperature 
+        # fluctuations and contrast fluctuations.
+        #Ts = Tk
+        
+        
+        # Add beta factors to dictionary
+        for f1 in ['x', 'd', 'a']:
+            func = self.hydr.__getattribute__('beta_%s' % f1)
+            data['beta_%s' % f1] = func(z, Tk, xHII, ne, Ja)
+        
+        Qi_gs = np.interp(z, self.gs.history['z'][-1::-1], 
+            self.gs.history['cgm_h_2'][-1::-1])
+        
+        # Ionization fluctuations
+        if self.pf['ps_include_ion']:
+        
+            Ri, Mi, Ni = field.BubbleSizeDistribution(z, ion=True)
+        
+            data['n_i'] = Ni
+            data['m_i'] = Mi
+            data['r_i'] = Ri
+            data['delta_B'] = field._B(z, ion=True)
+        else:
+            Ri = Mi = Ni = None    
+
+        # Evaluate now: lambdas can't be sent back from worker processes.
+        data['R_s'] = R_s(Ri, z)
+        data['Th'] = Th
+
+        Qi = field.MeanIonizedFraction(z)
+        
+        Qi_bff = field.BubbleFillingFactor(z)
+        
+        xibar = Qi_gs                
+                        
+        #print(z, Qi_bff, Qi, xibar, Qi_bff / Qi)
+                        
+        if self.pf['ps_include_temp']:
+            # R_s=R_s(Ri,z)
+            Qh = field.MeanIonizedFraction(z, ion=False)
+            data['Qh'] = Qh
+        else:
+            data['Qh'] = Qh = 0.0
+        
+        # Interpolate global signal onto new (coarser) redshift grid.
+        dTb_ps = np.interp(z, self.gs.history['z'][-1::-1], 
+            self.gs.history['dTb'][-1::-1])
+        
+        xavg_gs = np.interp(z, self.gs.history['z'][-1::-1], 
+            self.gs.history['xavg'][-1::-1])
+                            
+        data['dTb'] = dTb_ps
+        
+        #data['dTb_bulk'] = np.interp(z, self.gs.history['z'][-1::-1], 
+        #    self.gs.history['dTb_bulk'][-1::-1])
 
+        
+        ##
+        # Correct for fraction of ionized and heated volumes
+        # and densities!
+        ##            
+        if self.pf['ps_include_temp']:
+            data['dTb_vcorr'] = None#(1 - Qh - Qi) * data['dTb_bulk'] \
+                #+ Qh * self.hydr.dTb(z, 0.0, Th)
+        else:
+            data['dTb_vcorr'] = None#data['dTb_bulk'] * (1. - Qi)
+        
+        if self.pf['ps_include_xcorr_ion_rho']:
+            pass
+        if self.pf['ps_include_xcorr_ion_hot']:
+            pass
             
-            ##
-            # Correct for fraction of ionized and heated volumes
-            # and densities!
-            ##            
-            if self.pf['ps_include_temp']:
-                data['dTb_vcorr'] = None#(1 - Qh - Qi) * data['dTb_bulk'] \
-                    #+ Qh * self.hydr.dTb(z, 0.0, Th)
-            else:
-                data['dTb_vcorr'] = None#data['dTb_bulk'] * (1. - Qi)
+        # Just for now    
+        data['dTb0'] = data['dTb']
+        data['dTb0_2'] = data['dTb0_1'] = data['dTb_vcorr']
+        
+        #if self.pf['include_ion_fl']:
+        #    if self.pf['ps_rescale_Qion']:
+        #        xibar = min(np.interp(z, self.pops[0].halos.z,
+        #            self.pops[0].halos.fcoll_Tmin) * zeta, 1.)
+        #        Qi = xibar
+        #        
+        #        xibar = np.interp(z, self.mean_history['z'][-1::-1],
+        #            self.mean_history['cgm_h_2'][-1::-1])
+        #        
+        #    else:
+        #        Qi = field.BubbleFillingFactor(z, zeta)
+        #        xibar = 1. - np.exp(-Qi)
+        #else:
+        #    Qi = 0.
+        
+        
+                            
+        #if self.pf['ps_force_QHII_gs'] or self.pf['ps_force_QHII_fcoll']:
+        #    rescale_Q = True
+        #else:
+        #    rescale_Q = False
             
-            if self.pf['ps_include_xcorr_ion_rho']:
-                pass
-            if self.pf['ps_include_xcorr_ion_hot']:
-                pass
-                
-            # Just for now    
-            data['dTb0'] = data['dTb']
-            data['dTb0_2'] = data['dTb0_1'] = data['dTb_vcorr']
+        #Qi = np.mean([QHII_gs, field.BubbleFillingFactor(z, zeta)])    
+                                                            
+        #xibar = np.interp(z, self.mean_history['z'][-1::-1],
+        #    self.mean_history['cgm_h_2'][-1::-1])
             
-            #if self.pf['include_ion_fl']:
-            #    if self.pf['ps_rescale_Qion']:
-            #        xibar = min(np.interp(z, self.pops[0].halos.z,
-            #            self.pops[0].halos.fcoll_Tmin) * zeta, 1.)
-            #        Qi = xibar
-            #        
-            #        xibar = np.interp(z, self.mean_history['z'][-1::-1],
-            #            self.mean_history['cgm_h_2'][-1::-1])
-            #        
-            #    else:
-            #        Qi = self.field.BubbleFillingFactor(z, zeta)
-            #        xibar = 1. - np.exp(-Qi)
-            #else:
-            #    Qi = 0.
+        # Avoid divide by zeros when reionization is over
+        if Qi == 1:
+            Tbar = 0.0
+        else:
+            Tbar = data['dTb0_2']
+                            
+        xbar = 1. - xibar
+        data['Qi'] = Qi
+        data['xibar'] = xibar
+        data['dTb0'] = Tbar            
+        #data['dTb_bulk'] = dTb_ps / (1. - xavg_gs)
+                    
+        ##
+        # 21-cm fluctuations
+        ##
+        if self.pf['ps_include_21cm']:
             
+            data['cf_21'] = field.CorrelationFunction(z,
+                R=self.R, term='21', R_s=R_s(Ri,z), Ts=Ts, Th=Th,
+                Tk=Tk, Ja=Ja, k=self.k)
+                                    
+            # Always compute the 21-cm power spectrum. Individual power
+            # spectra can be saved by setting ps_save_components=True.
+            data['ps_21'] = field.PowerSpectrumFromCF(self.k, 
+                data['cf_21'], self.R, 
+                split_by_scale=self.pf['ps_split_transform'],
+                epsrel=self.pf['ps_fht_rtol'],
+                epsabs=self.pf['ps_fht_atol'])
+                                    
+        # Should just do the above, and then loop over whatever is in 
+        # the cache and save also. If ps_save_components is True, then
+        # FT everything we haven't already. 
+        for term in ['dd', 'ii', 'id', 'psi', 'phi']:
+            # Should change suffix to _ev
+            jp_1 = field._cache_jp(z, term)
+            cf_1 = field._cache_cf(z, term)
             
-                                
-            #if self.pf['ps_force_QHII_gs'] or self.pf['ps_force_QHII_fcoll']:
-            #    rescale_Q = True
-            #else:
-            #    rescale_Q = False
-                
-            #Qi = np.mean([QHII_gs, self.field.BubbleFillingFactor(z, zeta)])    
-                                                                
-            #xibar = np.interp(z, self.mean_history['z'][-1::-1],
-            #    self.mean_history['cgm_h_2'][-1::-1])
-                
-            # Avoid divide by zeros when reionization is over
-            if Qi == 1:
-                Tbar = 0.0
-            else:
-                Tbar = data['dTb0_2']
-                                
-            xbar = 1. - xibar
-            data['Qi'] = Qi
-            data['xibar'] = xibar
-            data['dTb0'] = Tbar            
-            #data['dTb_bulk'] = dTb_ps / (1. - xavg_gs)
-                        
-            ##
-            # 21-cm fluctuations
-            ##
-            if self.pf['ps_include_21cm']:
-                
-                data['cf_21'] = self.field.CorrelationFunction(z,
-                    R=self.R, term='21', R_s=R_s(Ri,z), Ts=Ts, Th=Th,
-                    Tk=Tk, Ja=Ja, k=self.k)
-                                        
-                # Always compute the 21-cm power spectrum. Individual power
-                # spectra can be saved by setting ps_save_components=True.
-                data['ps_21'] = self.field.PowerSpectrumFromCF(self.k, 
-                    data['cf_21'], self.R, 
-                    split_by_scale=self.pf['ps_split_transform'],
-                    epsrel=self.pf['ps_fht_rtol'],
-                    epsabs=self.pf['ps_fht_atol'])
-                                        
-            # Should just do the above, and then loop over whatever is in 
-            # the cache and save also. If ps_save_components is True, then
-            # FT everything we haven't already. 
-            for term in ['dd', 'ii', 'id', 'psi', 'phi']:
-                # Should change suffix to _ev
-                jp_1 = self.field._cache_jp(z, term)
-                cf_1 = self.field._cache_cf(z, term)
-                
-                if (jp_1 is None and cf_1 is None) and (term not in ['psi', 'phi', 'oo']):
-                    continue
-                        
-                _cf = self.field.CorrelationFunction(z, 
-                    R=self.R, term=term, R_s=R_s(Ri,z), Ts=Ts, Th=Th,
-                    Tk=Tk, Ja=Ja, k=self.k)
-                        
-                data['cf_{}'.format(term)] = _cf.copy()
-                
-                if not self.pf['ps_output_components']:
-                    continue
+            if (jp_1 is None and cf_1 is None) and (term not in ['psi', 'phi', 'oo']):
+                continue
                     
-                data['ps_{}'.format(term)] = \
-                    self.field.PowerSpectrumFromCF(self.k, 
-                    data['cf_{}'.format(term)], self.R, 
-                    split_by_scale=self.pf['ps_split_transform'],
-                    epsrel=self.pf['ps_fht_rtol'],
-                    epsabs=self.pf['ps_fht_atol'])    
-                
-            # Always save the matter correlation function.        
-            data['cf_dd'] = self.field.CorrelationFunction(z, 
-                term='dd', R=self.R)
+            _cf = field.CorrelationFunction(z, 
+                R=self.R, term=term, R_s=R_s(Ri,z), Ts=Ts, Th=Th,
+                Tk=Tk, Ja=Ja, k=self.k)
                     
-            yield z, data
+            data['cf_{}'.format(term)] = _cf.copy()
             
+            if not self.pf['ps_output_components']:
+                continue
+                
+            data['ps_{}'.format(term)] = \
+                field.PowerSpectrumFromCF(self.k, 
+                data['cf_{}'.format(term)], self.R, 
+                split_by_scale=self.pf['ps_split_transform'],
+                epsrel=self.pf['ps_fht_rtol'],
+                epsabs=self.pf['ps_fht_atol'])    
+            
+        # Always save the matter correlation function.        
+        data['cf_dd'] = field.CorrelationFunction(z, 
+            term='dd', R=self.R)
+                
+        return data
+        
     def save(self, prefix, suffix='pkl', clobber=False, fields=None):
         """
         Save results of calculation. Pickle parameter file dict.
@@ -1,8 +1,13 @@
 from ares.simulations.GasParcel import GasParcel
 from ares.simulations.RaySegment import RaySegment
 from ares.simulations.Global21cm import Global21cm
+from ares.simulations.Global21cmBatch import Global21cmBatch
 from ares.simulations.MultiPhaseMedium import MultiPhaseMedium
 from ares.simulations.PowerSpectrum21cm import PowerSpectrum21cm
 from ares.simulations.MetaGalacticBackground import MetaGalacticBackground
 
 
+
+def __getattr__(name):
+    from .. import _import_submodule
+    return _import_submodule(__name__, name)
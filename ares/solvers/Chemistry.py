@@ -19,13 +19,14 @@ import numpy as np
 from scipy.integrate import ode
 from ..physics.Constants import k_B
 from ..static.ChemicalNetwork import ChemicalNetwork
+from ..util.Timer import timed
     
 tiny_ion = 1e-12 
 
 class Chemistry(object):
     """ Class for evolving chemical reaction equations. """
     def __init__(self, grid, rt=False, atol=1e-8, rtol=1e-8, rate_src='fk94',
-        recombination='B', interp_rc='linear'):
+        recombination='B', interp_rc='linear', batch=False):
         """
         Create a chemistry object.
         
@@ -35,11 +36,17 @@ class Chemistry(object):
             Need this!
         rt: bool
             Use radiative transfer?
+        batch : bool
+            If True, evolve all cells with a single call to the ODE solver 
+            rather than one call per cell. Only appropriate when cells are 
+            independent of one another, e.g., when each cell represents a 
+            different model (see `ares.simulations.Global21cmBatch`).
             
         """
 
         self.grid = grid
         self.rtON = rt
+        self.batch = batch
         
         self.chemnet = ChemicalNetwork(grid, rate_src=rate_src,
             recombination=recombination, interp_rc=interp_rc)
@@ -55,6 +62,18 @@ class Chemistry(object):
             nsteps=1e4, atol=atol, rtol=rtol)
         
         self.solver._integrator.iwork[2] = -1
+        
+        # Cells are independent, so the Jacobian of the full system is 
+        # block diagonal. Telling LSODA it's banded means it only needs 
+        # ~2 * Nev (rather than Nev * dims) evaluations of the rate 
+        # equations to estimate it. LSODA's error test uses a weighted 
+        # max-norm, so the usual tolerances apply to each cell separately.
+        if self.batch:
+            Nev = len(self.grid.evolving_fields)
+            self.solver_batch = ode(self._RateEquationsBatch).set_integrator(
+                'lsoda', nsteps=1e4, atol=atol, rtol=rtol, 
+                lband=Nev-1, uband=Nev-1)
+            self.solver_batch._integrator.iwork[2] = -1
             
         # Empty arrays in the shapes we often need
         self.zeros_gridxq = np.zeros([self.grid.dims, 
@@ -62,6 +81,7 @@ class Chemistry(object):
         self.zeros_grid_x_abs = np.zeros_like(self.grid.zeros_grid_x_absorbers)
         self.zeros_grid_x_abs2 = np.zeros_like(self.grid.zeros_grid_x_absorbers2)
         
+    @timed('chemistry')
     def Evolve(self, data, t, dt, **kwargs):
         """
         Evolve all cells by dt.
@@ -106,33 +126,36 @@ class Chemistry(object):
         # For debugging
         self.kwargs_by_cell = kwargs_by_cell
         
-        # Loop over grid and solve chemistry
-        for cell in range(self.grid.dims):
+        if self.batch:
+            self._EvolveBatch(data, newdata, t, dt, kwargs)
+        else:
+            # Loop over grid and solve chemistry
+            for cell in range(self.grid.dims):
 
-            # Construct q vector
-            q = np.zeros(len(self.grid.evolving_fields))
-            for i, species in enumerate(self.grid.evolving_fields):
-                q[i] = data[species][cell]
+                # Construct q vector
+                q = np.zeros(len(self.grid.evolving_fields))
+                for i, species in enumerate(self.grid.evolving_fields):
+                    q[i] = data[species][cell]
                                     
-            kwargs_cell = kwargs_by_cell[cell]
+                kwargs_cell = kwargs_by_cell[cell]
                     
-            if self.rtON:
-                args = (cell, kwargs_cell['k_ion'], kwargs_cell['k_ion2'],
-                    kwargs_cell['k_heat'], data['n'][cell], t)
-            else:
-                args = (cell, self.grid.zeros_absorbers, 
-                    self.grid.zeros_absorbers2, self.grid.zeros_absorbers, 
-                    data['n'][cell], t)
-
-            self.solver.set_initial_value(q, 0.0).set_f_params(args).set_jac_params(args)
+                if self.rtON:
+                    args = (cell, kwargs_cell['k_ion'], kwargs_cell['k_ion2'],
+                        kwargs_cell['k_heat'], data['n'][cell], t)
+                else:
+                    args = (cell, self.grid.zeros_absorbers, 
+                        self.grid.zeros_absorbers2, self.grid.zeros_absorbers, 
+                        data['n'][cell], t)
+
+                self.solver.set_initial_value(q, 0.0).set_f_params(args).set_jac_params(args)
                         
-            self.solver.integrate(dt)
+                self.solver.integrate(dt)
 
-            self.q_grid[cell] = q.copy()
-            self.dqdt_grid[cell] = self.chemnet.dqdt.copy()
+                self.q_grid[cell] = q.copy()
+                self.dqdt_grid[cell] = self.chemnet.dqdt.copy()
 
-            for i, value in enumerate(self.solver.y):
-                newdata[self.grid.evolving_fields[i]][cell] = self.solver.y[i]
+                for i, value in enumerate(self.solver.y):
+                    newdata[self.grid.evolving_fields[i]][cell] = self.solver.y[i]
 
         # Compute particle density
         newdata['n'] = self.grid.particle_density(newdata, z - dz)
@@ -146,6 +169,46 @@ class Chemistry(object):
 
         return newdata  
 
+    def _EvolveBatch(self, data, newdata, t, dt, kwargs):
+        """
+        Evolve all cells at once. Results are written to `newdata`.
+        
+        The state vector is ordered by cell, i.e., it is the flattened 
+        version of an array with shape (cells, evolving fields).
+        """
+        
+        fields = self.grid.evolving_fields
+        q = np.array([data[species] for species in fields]).T
+        
+        # Put cell dimension last so rate equations broadcast over cells
+        if self.rtON:
+            k_ion = np.moveaxis(kwargs['k_ion'], 0, -1)
+            k_ion2 = np.moveaxis(kwargs['k_ion2'], 0, -1)
+            k_heat = np.moveaxis(kwargs['k_heat'], 0, -1)
+        else:
+            k_ion = k_heat = np.zeros((self.grid.N_absorbers, self.grid.dims))
+            k_ion2 = np.zeros([self.grid.N_absorbers] * 2 + [self.grid.dims])
+                    
+        args = (slice(None), k_ion, k_ion2, k_heat, data['n'], t)
+        
+        self.solver_batch.set_initial_value(q.ravel(), 0.0).set_f_params(args)
+        self.solver_batch.integrate(dt)
+        
+        self.q_grid = q
+        self.dqdt_grid = self.chemnet.dqdt.T.copy()
+        
+        y = self.solver_batch.y.reshape(q.shape)
+        for i, species in enumerate(fields):
+            newdata[species] = y[:,i].copy()
+    
+    def _RateEquationsBatch(self, t, q, args):
+        """
+        Wrapper around `ChemicalNetwork.RateEquations` for flattened q.
+        """
+        Nev = len(self.grid.evolving_fields)
+        q = np.reshape(q, (-1, Nev)).T
+        return self.chemnet.RateEquations(t, q, args).T.ravel()
+
     def _sort_kwargs_by_cell(self, kwargs):
         """
         Convert kwargs dictionary to list.
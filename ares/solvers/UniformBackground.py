@@ -14,12 +14,18 @@ import numpy as np
 from math import ceil
 import os, re, types, gc
 from ..util import ParameterFile
+from ..util.ParameterFile import pop_id_num
 from ..static import GlobalVolume
+from ..static.RateCoefficientArray import RateCoefficientArray
 from ..util.Misc import num_freq_bins
 from ..util.Math import interp1d
+from ..util.Caching import cached_property, clear_cached, \
+    ParameterDependent
 from .OpticalDepth import OpticalDepth
 from ..util.Warnings import no_tau_table
+from ..util.Timer import timed
 from ..physics import Hydrogen, Cosmology
+from ..populations.Population import _cosmo_pars
 from ..populations.Composite import CompositePopulation
 from ..populations.GalaxyAggregate import GalaxyAggregate
 from scipy.integrate import quad, romberg, romb, trapz, simps
@@ -48,6 +54,12 @@ except ImportError:
 
 ARES = os.getenv('ARES')
 
+# Parameters that determine the redshift/energy grids for the RTE
+_grid_pars = ['pop_Emin*', 'pop_Emax*', 'pop_solve_rte*', 'pop_tau_Nz*',
+    'pop_zform*', 'pop_zdead*', 'initial_redshift', 'final_redshift',
+    'first_light_redshift', 'tau_*', 'include_He', 'approx_He']
+_grid_pars.extend(_cosmo_pars)
+
 log10 = np.log(10.)    # for when we integrate in log-space
 four_pi = 4. * np.pi
 c_over_four_pi = c / four_pi
@@ -67,7 +79,7 @@ defkwargs = \
  'zxavg':0.0,   
 }       
 
-class UniformBackground(object):
+class UniformBackground(ParameterDependent):
     def __init__(self, pf=None, grid=None, **kwargs):
         """
         Initialize a UniformBackground object.
@@ -100,22 +112,75 @@ class UniformBackground(object):
             self.cosm = Cosmology(pf=self.pf, **self.pf)
 
         self._set_integrator()
-        
-    @property
+
+    def update(self, **kwargs):
+        """
+        Change the values of some parameters in place.
+
+        Population parameters are passed along to the relevant populations,
+        i.e., 'pop_fesc{1}' will only update population #1, while 'pop_fesc'
+        will update any population that has such a parameter.
+
+        Returns
+        -------
+        List of parameters whose values actually changed.
+
+        """
+        changed = ParameterDependent.update(self, **kwargs)
+
+        if not hasattr(self, '_pops'):
+            return changed
+
+        pop_changed = []
+        for par in changed:
+            prefix, num = pop_id_num(par)
+            for i, pop in enumerate(self.pops):
+                if (num is not None) and (num != i):
+                    continue
+                if prefix not in pop.pf:
+                    continue
+
+                pop_changed.extend(pop.update(**{prefix: kwargs[par]}))
+
+        if pop_changed:
+            self.invalidate(*pop_changed)
+
+        return changed
+
+    def invalidate(self, *pars):
+        if (self.grid is None) and \
+            any([par in _cosmo_pars for par in pars]):
+            self.cosm = Cosmology(pf=self.pf, **self.pf)
+
+        cleared = ParameterDependent.invalidate(self, *pars)
+
+        # Set as by-products of bands_by_pop
+        if 'bands_by_pop' in cleared:
+            for name in ['_energies', '_redshifts']:
+                if hasattr(self, name):
+                    delattr(self, name)
+
+        # Must re-tabulate fluxes if emissivities change
+        if 'emissivities' in cleared or 'tau' in cleared:
+            clear_cached(self, 'generators', '_fluxes_from_')
+
+        return cleared
+
+    @cached_property(*_cosmo_pars)
     def hydr(self):
         if not hasattr(self, '_hydr'):
             self._hydr = Hydrogen(pf=self.pf, cosm=self.cosm, **self.pf)
 
         return self._hydr
 
-    @property
+    @cached_property(*_cosmo_pars)
     def volume(self):
         if not hasattr(self, '_volume'):
             self._volume = GlobalVolume(self)
 
         return self._volume      
         
-    @property
+    @cached_property('pop_solve_rte*')
     def solve_rte(self):
         """
         By population and band, are we solving the RTE in detail?    
@@ -225,7 +290,7 @@ class UniformBackground(object):
                                 
         return bands
 
-    @property
+    @cached_property('pop_solve_rte*')
     def approx_all_pops(self):
         if not hasattr(self, '_approx_all_pops'):
             
@@ -242,7 +307,7 @@ class UniformBackground(object):
 
         return self._approx_all_pops
 
-    @property
+    @cached_property()
     def pops(self):
         if not hasattr(self, '_pops'):
             self._pops = CompositePopulation(pf=self.pf, cosm=self.cosm,
@@ -254,19 +319,19 @@ class UniformBackground(object):
     def Npops(self):
         return len(self.pops)
     
-    @property
+    @cached_property(*_grid_pars)
     def energies(self):
         if not hasattr(self, '_energies'):
             bands = self.bands_by_pop
         return self._energies
     
-    @property
+    @cached_property(*_grid_pars)
     def redshifts(self):
         if not hasattr(self, '_redshifts'):
             bands = self.bands_by_pop
         return self._redshifts
         
-    @property
+    @cached_property()
     def effects_by_pop(self):
         if not hasattr(self, '_effects_by_pop'):
             self._effects_by_pop = [[] for i in range(self.Npops)]
@@ -287,7 +352,7 @@ class UniformBackground(object):
 
         return self._effects_by_pop
 
-    @property
+    @cached_property()
     def effects_by_pop(self):
         if not hasattr(self, '_effects_by_pop'):
             self._effects_by_pop = [[] for i in range(self.Npops)]
@@ -308,7 +373,7 @@ class UniformBackground(object):
     
         return self._effects_by_pop
     
-    @property
+    @cached_property(*_grid_pars)
     def bands_by_pop(self):
         if not hasattr(self, '_bands_by_pop'):
             # Figure out which band each population emits in
@@ -337,7 +402,7 @@ class UniformBackground(object):
                     
         return self._bands_by_pop            
 
-    @property
+    @cached_property(*_grid_pars)
     def tau(self):
         if not hasattr(self, '_tau'):
             self._tau = []
@@ -353,7 +418,7 @@ class UniformBackground(object):
         
         return self._tau
     
-    @property
+    @cached_property('pop_*', 'pq_*', *_grid_pars)
     def emissivities(self):
         if not hasattr(self, '_emissivities'):
             self._emissivities = []
@@ -482,7 +547,7 @@ class UniformBackground(object):
                 
         return z, energies_by_band, tau_by_band, emissivity_by_band
 
-    @property
+    @cached_property('tau_*', *_cosmo_pars)
     def tau_solver(self):
         if not hasattr(self, '_tau_solver'):
             # Create an ares.simulations.OpticalDepth instance
@@ -498,6 +563,7 @@ class UniformBackground(object):
     def tau_solver(self, value):
         self._tau_solver = value
 
+    @timed('tau')
     def _set_tau(self, z, E, pop):
         """
         Tabulate the optical depth.
@@ -593,7 +659,7 @@ class UniformBackground(object):
         # Return what we got, not what we asked for
         return _z, _E, tau
 
-    @property
+    @cached_property()
     def generators(self):
         """
         Create generators for each population.
@@ -628,23 +694,21 @@ class UniformBackground(object):
         self._atol = self.pf["integrator_atol"]
         self._divmax = int(self.pf["integrator_divmax"])
     
+    @timed('rates')
     def update_rate_coefficients(self, z, popid=None, **kwargs):
         """
         Compute ionization and heating rate coefficients.
 
         Returns
         -------
-        Dictionary containing ionization and heating rate coefficients.
+        RateCoefficientArray containing ionization and heating rate 
+        coefficients for each population (which behaves like a dictionary
+        of coefficients summed over populations).
 
         """
         
-        # Setup arrays for results - sorted by sources and absorbers
-        # The middle dimension of length 1 is the number of cells
-        # which is always 1 for these kinds of calculations
-        self.k_ion  = np.zeros([self.Npops, 1, self.grid.N_absorbers])
-        self.k_ion2 = np.zeros([self.Npops, 1, self.grid.N_absorbers, 
-            self.grid.N_absorbers])
-        self.k_heat = np.zeros([self.Npops, 1, self.grid.N_absorbers])
+        # Setup array for results - sorted by sources and absorbers
+        rc = RateCoefficientArray(self.Npops, self.grid.N_absorbers)
         
         # Loop over sources
         for i, source in enumerate(self.pops):
@@ -661,7 +725,8 @@ class UniformBackground(object):
             for j, species in enumerate(self.grid.absorbers):
 
                 if not np.any(self.solve_rte[i]):
-                    self._update_by_band_and_species(z, i, j, None, **kwargs)
+                    self._update_by_band_and_species(rc, z, i, j, None, 
+                        **kwargs)
                     continue
 
                 # Sum over bands
@@ -676,40 +741,28 @@ class UniformBackground(object):
                
                     # Still may not necessarily solve the RTE
                     if self.solve_rte[i][k]:
-                        self._update_by_band_and_species(z, i, j, k, 
+                        self._update_by_band_and_species(rc, z, i, j, k, 
                             **kwargs)
                     else:
-                        self._update_by_band_and_species(z, i, j, None, 
+                        self._update_by_band_and_species(rc, z, i, j, None, 
                             **kwargs)    
                             
-        # Sum over sources
-        self.k_ion_tot = np.sum(self.k_ion, axis=0)
-        self.k_ion2_tot = np.sum(self.k_ion2, axis=0)
-        self.k_heat_tot = np.sum(self.k_heat, axis=0)
-
-        to_return = \
-        {
-         'k_ion': self.k_ion_tot,
-         'k_ion2': self.k_ion2_tot,
-         'k_heat': self.k_heat_tot,
-        }
-
-        return to_return
+        return rc
 
-    def _update_by_band_and_species(self, z, i, j, k, **kwargs):
+    def _update_by_band_and_species(self, rc, z, i, j, k, **kwargs):
         """
-        i, j, k = source, species, band.
+        i, j, k = source, species, band. Results are added to `rc`.
         """        
         if kwargs['zone'] in ['igm', 'both']:
-            self.k_ion[i,0,j] += \
+            rc.ion[i,j] += \
                 self.volume.IonizationRateIGM(z, species=j, popid=i,
                 band=k, **kwargs)
-            self.k_heat[i,0,j] += \
+            rc.heat[i,j] += \
                 self.volume.HeatingRate(z, species=j, popid=i,
                 band=k, **kwargs)
     
             for h, donor in enumerate(self.grid.absorbers):
-                self.k_ion2[i,0,j,h] += \
+                rc.ion2[i,j,h] += \
                     self.volume.SecondaryIonizationRateIGM(z, 
                     species=j, donor=h, popid=i, band=k, **kwargs)
     
@@ -718,7 +771,7 @@ class UniformBackground(object):
             Gamma = self.volume.IonizationRateCGM(z, species=j, popid=i,
                 band=k, **kwargs)
                         
-            self.k_ion[i,0,j] += Gamma
+            rc.ion[i,j] += Gamma
                         
     def LymanWernerFlux(self, z, E=None, popid=0, **kwargs):
         """
@@ -809,7 +862,7 @@ class UniformBackground(object):
     
         return flux
         
-    @property
+    @cached_property('lya_nmax')
     def frec(self):
         if not hasattr(self, '_frec'):
             n = np.arange(2, self.pf['lya_nmax'])
@@ -817,7 +870,7 @@ class UniformBackground(object):
     
         return self._frec
         
-    @property
+    @cached_property('lya_nmax')
     def narr(self):
         if not hasattr(self, '_narr'):
             self._narr = np.arange(2, self.pf['lya_nmax'])    
@@ -921,6 +974,7 @@ class UniformBackground(object):
         self.tabname = good_tab
         return good_tab
 
+    @timed('emissivity')
     def TabulateEmissivity(self, z, E, pop):
         """
         Tabulate emissivity over photon energy and redshift.
@@ -3,3 +3,7 @@ from ares.solvers.RadialField import RadialField
 from ares.solvers.OpticalDepth import OpticalDepth
 from ares.solvers.UniformBackground import UniformBackground
 
+
+def __getattr__(name):
+    from .. import _import_submodule
+    return _import_submodule(__name__, name)
@@ -13,6 +13,7 @@ Description:
 import numpy as np
 from .Source import Source
 from ..util.Math import interp1d
+from scipy.interpolate import interp1d as interp1d_scipy
 from ares.physics import Cosmology
 from scipy.optimize import minimize
 from ..util.ReadData import read_lit
@@ -205,6 +206,10 @@ class SynthesisMaster(Source):
         UV luminosity per unit SFR.
         """
 
+        # Arrays of metallicities are OK, but need something hashable
+        if np.ndim(Z) > 0:
+            Z = tuple(Z)
+
         cached_result = self._cache_L(wave, avg, Z)
 
         if cached_result is not None:
@@ -222,10 +227,7 @@ class SynthesisMaster(Source):
             j = np.argmin(np.abs(wave - self.wavelengths))
 
             if Z is not None:
-                Zvals = np.sort(list(self.metallicities.values()))
-                k = np.argmin(np.abs(Z - Zvals))
-                raw = self.data # just to be sure it has been read in.
-                data = self._data_all_Z[k,j]
+                data = self._interp_Z(Z, self.data_all_Z[:,j])
             else:
                 data = self.data[j,:]
 
@@ -540,6 +542,96 @@ class SynthesisModel(SynthesisMaster):
                     self._neb_cont_[:,i] = self._nebula.Continuum(spec) / self.dwdn
         return self._neb_cont_
 
+    def _normalize(self, data):
+        """
+        Normalize SED(s) by SFR or cluster mass.
+        """
+        if self.pf['source_ssp']:
+            # The factor of a million is built-in to the lookup tables
+            return data * self.pf['source_mass'] / 1e6
+        else:
+            return data * self.pf['source_sfr']
+
+    @property
+    def data_all_Z(self):
+        """
+        SEDs at all tabulated metallicities (in ascending order).
+        
+        Same units as `data`, but without nebular continuum. Shape is 
+        (metallicity, wavelength, time).
+        """
+        if not hasattr(self, '_data_all_Z'):
+            Zall_l = list(self.metallicities.values())
+            Zall = np.sort(Zall_l)
+
+            if self.pf['source_sed_by_Z'] is not None:
+                _tmp = self.pf['source_sed_by_Z'][1]
+                assert len(_tmp) == len(Zall)
+            elif self.pf['source_Z'] in Zall_l:
+                _tmp = []
+                for Z in Zall:
+                    kw = self.pf.copy()
+                    kw['source_Z'] = Z
+                    _waves, _data, _fn = self._litinst._load(**kw)
+                    _tmp.append(_data)
+                    
+                if not hasattr(self, '_wavelengths'):
+                    self._wavelengths = _waves
+            else:
+                # Will load in all metallicities
+                self._wavelengths, _tmp, _fn = \
+                    self._litinst._load(**self.pf)
+
+                if self.pf['verbose']:
+                    for _fn_ in _fn:
+                        print("# Loaded {}".format(_fn_.replace(self.cosm.path_ARES, '$ARES')))
+                
+            self._data_all_Z = self._normalize(np.array(_tmp))
+
+        return self._data_all_Z
+
+    def _interp_Z(self, Z, data, logZ=True):
+        """
+        Interpolate `data`, whose first axis is metallicity, to `Z`.
+        
+        Metallicities outside the tabulated range are set to the edges.
+        """
+        Zall = np.sort(list(self.metallicities.values()))
+        
+        if logZ:
+            x, x0 = np.log10(Zall), np.log10(Z)
+        else:
+            x, x0 = Zall, np.asarray(Z, dtype=float)
+            
+        func = interp1d_scipy(x, data, axis=0, kind=self.pf['interp_Z'], 
+            assume_sorted=True)
+            
+        return func(np.clip(x0, x[0], x[-1]))
+
+    def data_at_Z(self, Z, logZ=True):
+        """
+        Interpolate SEDs in metallicity.
+        
+        .. note :: Interpolation is linear (or whatever `interp_Z` is) in
+            log10(Z) by default, and in Z if logZ=False. The SEDs themselves 
+            are interpolated linearly, since interpolating log10(SED) causes
+            problems in bins with zero flux, e.g., when nebular emission is
+            on, or for starburst99.
+        
+        Parameters
+        ----------
+        Z : int, float, np.ndarray
+            Metallicity, or an array of them.
+        
+        Returns
+        -------
+        Array with shape (wavelength, time) if Z is a scalar, and 
+        (Z, wavelength, time) otherwise. Same units as `data`, but without
+        nebular continuum.
+        
+        """
+        return self._interp_Z(Z, self.data_all_Z, logZ=logZ)
+        
     @property
     def data(self):
         """
@@ -565,12 +657,12 @@ class SynthesisModel(SynthesisMaster):
                 return self._data
 
             Zall_l = list(self.metallicities.values())
-            Zall = np.sort(Zall_l)
 
-            # Check to see dimensions of tmp. Depending on if we're
-            # interpolating in Z, it might be multiple arrays.
+            # If metallicity isn't tabulated, interpolate between SEDs at
+            # all tabulated metallicities.
             if (self.pf['source_Z'] in Zall_l):
                 if self.pf['source_sed_by_Z'] is not None:
+                    Zall = np.sort(Zall_l)
                     _tmp = self.pf['source_sed_by_Z'][1]
                     self._data = _tmp[np.argmin(np.abs(Zall - self.pf['source_Z']))]
                 else:
@@ -580,57 +672,10 @@ class SynthesisModel(SynthesisMaster):
                     if self.pf['verbose']:
                         print("# Loaded {}".format(_fn.replace(self.cosm.path_ARES,
                             '$ARES')))
+                            
+                self._data = self._normalize(self._data)
             else:
-                if self.pf['source_sed_by_Z'] is not None:
-                    _tmp = self.pf['source_sed_by_Z'][1]
-                    assert len(_tmp) == len(Zall)
-                else:
-                    # Will load in all metallicities
-                    self._wavelengths, _tmp, _fn = \
-                        self._litinst._load(**self.pf)
-
-                    if self.pf['verbose']:
-                        for _fn_ in _fn:
-                            print("# Loaded {}".format(_fn_.replace(self.cosm.path_ARES, '$ARES')))
-
-                # Shape is (Z, wavelength, time)?
-                to_interp = np.array(_tmp)
-                self._data_all_Z = to_interp
-
-                # If outside table's metallicity range, just use endpoints
-                if self.pf['source_Z'] > max(Zall):
-                    _raw_data = np.log10(to_interp[-1])
-                elif self.pf['source_Z'] < min(Zall):
-                    _raw_data = np.log10(to_interp[0])
-                else:
-                    # At each time, interpolate between SEDs at two different
-                    # metallicities. Note: interpolating to log10(SED) caused
-                    # problems when nebular emission was on and when
-                    # starburst99 was being used (mysterious),
-                    # hence the log-linear approach here.
-                    _raw_data = np.zeros_like(to_interp[0])
-                    for i, t in enumerate(self._litinst.times):
-                        inter = interp1d(np.log10(Zall),
-                            to_interp[:,:,i], axis=0,
-                            fill_value=0.0, kind=self.pf['interp_Z'])
-                        _raw_data[:,i] = inter(np.log10(self.pf['source_Z']))
-
-                self._data = _raw_data
-
-                # By doing the interpolation in log-space we sometimes
-                # get ourselves into trouble in bins with zero flux.
-                # Gotta correct for that!
-                #self._data[np.argwhere(np.isnan(self._data))] = 0.0
-
-            # Normalize by SFR or cluster mass.
-            if self.pf['source_ssp']:
-                # The factor of a million is built-in to the lookup tables
-                self._data *= self.pf['source_mass'] / 1e6
-                if hasattr(self, '_data_all_Z'):
-                    self._data_all_Z *= self.pf['source_mass'] / 1e6
-            else:
-                #raise NotImplemented('need to revisit this.')
-                self._data *= self.pf['source_sfr']
+                self._data = self.data_at_Z(self.pf['source_Z'])
 
         # Add in nebular continuum (just once!)
         if not hasattr(self, '_neb_cont_'):
@@ -13,7 +13,6 @@ Description:
 import sys
 import numpy as np
 from .Source import Source
-import matplotlib.pyplot as pl
 from ..util.ReadData import read_lit
 from scipy.integrate import quad, cumtrapz
 from ..util.Stats import bin_c2e, bin_e2c
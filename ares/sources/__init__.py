@@ -9,3 +9,7 @@ from ares.sources.SynthesisModel import SynthesisModel
 from ares.sources.SynthesisModelToy import SynthesisModelToy
 from ares.sources.SynthesisModelSBS import SynthesisModelSBS
 from ares.sources.SynthesisModelHybrid import SynthesisModelHybrid
+
+def __getattr__(name):
+    from .. import _import_submodule
+    return _import_submodule(__name__, name)
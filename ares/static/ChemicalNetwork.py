@@ -313,16 +313,18 @@ class ChemicalNetwork(object):
             dqdt['Tk'] += self.grid._exotic_func(z=z) * to_temp
             
         # Can effectively turn off ionization equations once EoR is over.
+        # Use np.where so this works for many cells at once (`cell` a slice)
         if self.monotonic_EoR:
-            if x['h_1'] <= self.monotonic_EoR:
-                dqdt['h_1'] = dqdt['h_2'] = 0.0
+            done = x['h_1'] <= self.monotonic_EoR
+            dqdt['h_1'] = np.where(done, 0.0, dqdt['h_1'])
+            dqdt['h_2'] = np.where(done, 0.0, dqdt['h_2'])
             if self.include_He:
-                if x['he_1'] <= self.monotonic_EoR:
-                    dqdt['he_1'] = 0.0
-                if x['he_2'] <= self.monotonic_EoR:
-                    dqdt['he_2'] = 0.0
+                dqdt['he_1'] = np.where(x['he_1'] <= self.monotonic_EoR, 
+                    0.0, dqdt['he_1'])
+                dqdt['he_2'] = np.where(x['he_2'] <= self.monotonic_EoR, 
+                    0.0, dqdt['he_2'])
                         
-        self.dqdt = self.zeros_q.copy()
+        self.dqdt = np.zeros_like(q)
         for i, sp in enumerate(self.grid.qmap):
             self.dqdt[i] = dqdt[sp]
 
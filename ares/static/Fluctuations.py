@@ -15,14 +15,14 @@ from math import factorial
 from ..physics import Cosmology
 from ..util import ParameterFile
 from ..util.Stats import bin_c2e
+from ..util.Caching import fingerprint, _is_same
 from scipy.special import erfinv
 from scipy.optimize import fsolve
 from scipy.interpolate import interp1d
 from scipy.integrate import quad, simps
 from ..physics.Hydrogen import Hydrogen
 from ..physics.HaloModel import HaloModel
-from ..util.Math import LinearNDInterpolator
-from ..populations.Composite import CompositePopulation
+from ..util.Math import LinearNDInterpolator, integrate_rows
 from ..physics.CrossSections import PhotoIonizationCrossSection
 from ..physics.Constants import g_per_msun, cm_per_mpc, dnu, s_per_yr, c, \
     s_per_myr, erg_per_ev, k_B, m_p, dnu, g_per_msun
@@ -30,6 +30,11 @@ from ..physics.Constants import g_per_msun, cm_per_mpc, dnu, s_per_yr, c, \
 root2 = np.sqrt(2.)
 four_pi = 4. * np.pi
 
+# Overlap volumes depend only on geometry, so they can be shared across
+# redshifts and instances. Keys are built in `Fluctuations._tab_volumes`.
+_volume_cache = {}
+_volume_cache_size = 64
+
 class Fluctuations(object): # pragma: no cover
     def __init__(self, grid=None, **kwargs):
         """
@@ -60,6 +65,8 @@ class Fluctuations(object): # pragma: no cover
         
     @zeta.setter
     def zeta(self, value):
+        if hasattr(self, '_zeta') and not _is_same(self._zeta, value):
+            self.clear_cache()
         self._zeta = value
     
     @property
@@ -70,6 +77,8 @@ class Fluctuations(object): # pragma: no cover
         
     @zeta_X.setter
     def zeta_X(self, value):
+        if hasattr(self, '_zeta_X') and not _is_same(self._zeta_X, value):
+            self.clear_cache()
         self._zeta_X = value    
         
     @property
@@ -109,23 +118,25 @@ class Fluctuations(object): # pragma: no cover
     def _overlap_region(self, dr, R1, R2):
         """
         Volume of intersection between two spheres of radii R1 < R2.
+        
+        Any combination of scalars and arrays that broadcast against one
+        another is OK, e.g., separations with shape (N, 1) and radii with
+        shape (M,) will yield an (N, M) array of volumes.
         """
         
         Vo = np.pi * (R2 + R1 - dr)**2 \
             * (dr**2 + 2. * dr * R1 - 3. * R1**2 \
              + 2. * dr * R2 + 6. * R1 * R2 - 3. * R2**2) / 12. / dr
         
-        if type(Vo) == np.ndarray:
-            # Small-scale vs. large Scale
-            SS = dr <= R2 - R1
-            LS = dr >= R1 + R2
-            
-            Vo[LS == 1] = 0.0
-
-            if type(R1) == np.ndarray:
-                Vo[SS == 1] = 4. * np.pi * R1[SS == 1]**3 / 3.
-            else:
-                Vo[SS == 1] = 4. * np.pi * R1**3 / 3.
+        # Small-scale vs. large Scale
+        SS = dr <= R2 - R1
+        LS = dr >= R1 + R2
+        
+        Vo = np.where(LS, 0.0, Vo)
+        Vo = np.where(SS, 4. * np.pi * R1**3 / 3., Vo)
+        
+        if Vo.ndim == 0:
+            return float(Vo)
             
         return Vo
         
@@ -178,36 +189,105 @@ class Fluctuations(object): # pragma: no cover
             
         Vt = 4. * np.pi * R2**3 / 3.
     
-        V11 = IV(dr, R1, R1)
+        # Each of these is needed several times below
+        IV11 = IV(dr, R1, R1)
+        IV12 = IV(dr, R1, R2)
+        IV22 = IV(dr, R2, R2)
+    
+        V11 = IV11
         
         if self.pf['ps_include_temp'] and self.pf['ps_temp_model'] == 2:
             V12 = V1
         else:
-            V12 = 2 * IV(dr, R1, R2) - IV(dr, R1, R1)
+            V12 = 2 * IV12 - IV11
             
-        V22 = IV(dr, R2, R2)
+        V22 = IV22
         if self.pf['ps_temp_model'] == 1:
-            V22 += -2. * IV(dr, R1, R2) + IV(dr, R1, R1)
+            V22 = V22 - 2. * IV12 + IV11
         
         if self.pf['ps_include_temp'] and self.pf['ps_temp_model'] == 1:
-            V1n = V1 - IV(dr, R1, R2)
+            V1n = V1 - IV12
         elif self.pf['ps_include_temp'] and self.pf['ps_temp_model'] == 2:    
             V1n = V1
         else:
             V1n = V1 - V11
                 
-        V2n = V2 - IV(dr, R2, R2) 
+        V2n = V2 - IV22 
         if self.pf['ps_temp_model'] == 1:
-            V2n += IV(dr, R1, R2)
+            V2n = V2n + IV12
         
         # 'anything' to one point, 'nothing' to other.
         # Without temperature fluctuations, same as V1n
         if self.pf['ps_include_temp']:
-            Van = Vt - IV(dr, R2, R2)
+            Van = Vt - IV22
         else:
             Van = V1n
             
         return V11, V12, V22, V1n, V2n, Van
+        
+    def tab_overlap_volumes(self, R, R1, R2):
+        """
+        Overlap volumes (see `overlap_volumes`) for all separations at once.
+        
+        These are pure geometry, so they are memoized based on the values
+        of the input arrays (not redshift), and shared by all instances.
+        
+        Parameters
+        ----------
+        R : np.ndarray
+            Separations between points.
+        R1, R2 : np.ndarray
+            Radii of bubbles (and shells, if any).
+        
+        Returns
+        -------
+        Array with shape (len(R), 6, len(R1)).
+        
+        """
+        
+        key = ('Vo', self.pf['ps_temp_model'], self.pf['ps_include_temp'],
+            fingerprint(R, R1, R2))
+                
+        return self._tab_volumes(key, self.overlap_volumes, R, R1, R2)
+        
+    def tab_intersectional_volumes(self, R, R1, R2, R3):
+        """
+        Intersectional volumes (see `intersectional_volumes`) for all
+        separations at once.
+        
+        Returns
+        -------
+        Array with shape (len(R), 6, len(R1)).
+        
+        """
+        
+        key = ('IV', fingerprint(R, R1, R2, R3))
+        
+        return self._tab_volumes(key, self.intersectional_volumes, R, R1, 
+            R2, R3)
+                    
+    def _tab_volumes(self, key, func, R, *radii):
+        if key in _volume_cache:
+            return _volume_cache[key]
+            
+        # Separations along first axis, bubble sizes along last
+        dr = np.reshape(R, (-1, 1))
+        
+        V = np.broadcast_arrays(*func(dr, *radii))
+        shape = (len(R), np.size(radii[0]))
+        tab = np.array([np.broadcast_to(Vx, shape) for Vx in V])
+        tab = np.swapaxes(tab, 0, 1)
+        
+        # Shared, so nobody should modify it in place
+        tab.flags.writeable = False
+        
+        # Don't let this grow without bound
+        if len(_volume_cache) >= _volume_cache_size:
+            del _volume_cache[list(_volume_cache.keys())[0]]
+            
+        _volume_cache[key] = tab
+        
+        return tab
     
     def exclusion_volumes(self, dr, R1, R2, R3):
         """
@@ -437,6 +517,9 @@ class Fluctuations(object): # pragma: no cover
         else:
             assert value.size == self.halos.tab_z.size
             
+        if hasattr(self, '_tab_Mmin') and not _is_same(self._tab_Mmin, value):
+            self.clear_cache()
+            
         self._tab_Mmin = value
         
     def Mmin(self, z):
@@ -799,8 +882,9 @@ class Fluctuations(object): # pragma: no cover
         
         Parameters
         ----------
-        z: int, float
-            Redshift of interest.
+        z: int, float, np.ndarray
+            Redshift(s) of interest. If an array, the barrier is computed 
+            for all redshifts at once, re-using sigma(M) and dlns/dlnm.
         zeta : int, float, np.ndarray
             Ionizing efficiency.
             
@@ -809,7 +893,8 @@ class Fluctuations(object): # pragma: no cover
         Tuple containing (in order) the bubble radii, masses, and the
         differential bubble size distribution. Each is an array of length
         self.halos.tab_M, i.e., with elements corresponding to the masses
-        used to compute the variance of the density field.
+        used to compute the variance of the density field. If `z` is an 
+        array, each has shape (len(z), len(self.halos.tab_M)).
             
         """
         
@@ -819,20 +904,23 @@ class Fluctuations(object): # pragma: no cover
             zeta = self.zeta_X
             
         if ion and not self.pf['ps_include_ion']:
-            R_i = M_b = dndm = np.zeros_like(self.m)
+            R_i = M_b = dndm = np.zeros(np.shape(z) + self.m.shape)
             return R_i, M_b, dndm
         if (not ion) and not self.pf['ps_include_temp']:
-            R_i = M_b = dndm = np.zeros_like(self.m)    
+            R_i = M_b = dndm = np.zeros(np.shape(z) + self.m.shape)
             return R_i, M_b, dndm
+            
+        # Internally, redshift varies along the first axis, mass the second.
+        zarr = np.reshape(z, (-1, 1)).astype(float)
 
-        reionization_over = False 
+        reionization_over = np.zeros(zarr.shape, dtype=bool)
 
         # Comoving matter density
         rho0_m = self.cosm.mean_density0
         rho0_b = rho0_m * self.cosm.fbaryon 
 
         # Mean (over-)density of bubble material
-        delta_B = self._B(z, ion)
+        delta_B = self._B(zarr, ion)
 
         if self.bsd_model is None:
             if self.pf['bubble_density'] is not None:
@@ -846,7 +934,7 @@ class Fluctuations(object): # pragma: no cover
             M_b = self.halos.tab_M * zeta
             # Assumes bubble material is at cosmic mean density
             R_i = (3. * M_b / rho0_b / 4. / np.pi)**(1./3.)
-            iz = np.argmin(np.abs(z - self.halos.tab_z))
+            iz = np.argmin(np.abs(zarr - self.halos.tab_z), axis=1)
             dndm = self.halos.tab_dndm[iz].copy()
         
         elif self.bsd_model == 'fzh04':
@@ -863,15 +951,14 @@ class Fluctuations(object): # pragma: no cover
             # This is Eq. 9.38 from Steve's book.
             # The factors of 2, S, and M_b are from using dlns instead of 
             # dS (where S=s^2)
-            dndm = rho0_m * self.pcross(z, ion) * 2 * np.abs(self.dlns_dlnm) \
-                * self.sigma**2 / M_b**2
+            dndm = rho0_m * self.pcross(zarr, ion) \
+                * 2 * np.abs(self.dlns_dlnm) * self.sigma**2 / M_b**2
                 
             # Reionization is over!
             # Only use barrier condition if we haven't asked to rescale
             # or supplied Q ourselves.
-            if self._B0(z, ion) <= 0:
-                reionization_over = True
-                dndm = np.zeros_like(dndm)
+            reionization_over = self._B0(zarr, ion) <= 0
+            dndm = np.where(reionization_over, 0.0, dndm)
                             
             #elif Q is not None:
             #    if Q == 1:
@@ -884,12 +971,31 @@ class Fluctuations(object): # pragma: no cover
         
         # This is a trick to guarantee that the integral over the bubble
         # size distribution yields the mean ionized fraction.    
-        if (not reionization_over) and rescale:
-            Mmin = self.Mmin(z) * zeta
-            iM = np.argmin(np.abs(M_b - Mmin))
-            Qi = np.trapz(dndm[iM:] * V_i[iM:] * M_b[iM:], x=np.log(M_b[iM:]))
-            xibar = self.MeanIonizedFraction(z, ion=ion)
-            dndm *= -np.log(1. - xibar) / Qi
+        if rescale and (not np.all(reionization_over)):
+            lnM = np.log(M_b)
+            iM = np.argmin(np.abs(M_b - self.Mmin(zarr) * zeta), axis=1)
+            
+            # Zero-out masses below Mmin so they can't pollute the 
+            # cumulative integral (e.g., with infs).
+            ok = np.arange(M_b.size) >= iM[:,None]
+            integrand = np.where(ok, dndm * V_i * M_b, 0.0)
+            Qi = integrate_rows(integrand, lnM, lnM[iM], lnM[-1])
+            
+            for i, _z_ in enumerate(zarr[:,0]):
+                if reionization_over[i]:
+                    continue
+                
+                xibar = self.MeanIonizedFraction(_z_, ion=ion)
+                dndm[i] *= -np.log(1. - xibar) / Qi[i]
+                        
+        # Make sure everything has shape (len(z), len(M)), then ditch the
+        # redshift dimension for scalar input.
+        shape = (zarr.size, np.size(M_b))
+        R_i = np.array(np.broadcast_to(R_i, shape))
+        M_b = np.array(np.broadcast_to(M_b, shape))
+
+        if np.ndim(z) == 0:
+            return R_i[0], M_b[0], dndm[0]
                         
         return R_i, M_b, dndm
         
@@ -950,7 +1056,45 @@ class Fluctuations(object): # pragma: no cover
         return 4. * np.pi * (R_i * cm_per_mpc / (1. + z))**3 \
             * self.cosm.nH(z) / 3.
                     
+    def clear_cache(self):
+        """
+        Throw away everything computed for the current ionization and
+        temperature field model, i.e., when `zeta`, `zeta_X`, or `tab_Mmin`
+        change.
+        """
+        for name in ['_cache_jp_', '_cache_cf_', '_cache_ps_', '_cache_p_',
+            '_cache_Vo_', '_cache_IV_', '_cache_ev2pt_']:
+            if hasattr(self, name):
+                delattr(self, name)
+    
+    @property
+    def _model_fingerprint(self):
+        """
+        Identifies the current model for the bubble size distribution.
+        
+        Setting `zeta` etc. clears caches anyways, but this makes sure we're
+        safe if someone modifies these arrays in place.
+        """
+        return fingerprint(getattr(self, '_zeta', None), 
+            getattr(self, '_zeta_X', None), getattr(self, '_tab_Mmin', None))
+    
+    def _field_key(self, *args):
+        """
+        Identifies the current ionization and temperature field model, i.e.,
+        `_model_fingerprint` plus whatever arguments (R_s, Th, Ts, etc.)
+        determine a cached quantity.
+        """
+        return fingerprint(self._model_fingerprint, *args)
+    
     def _cache_jp(self, z, term):
+        """
+        Report whether (and how) the joint probability for `term` was last
+        computed at redshift `z`.
+        
+        .. note :: This is only a record: values are looked up in the
+            `ExpectationValue2pt` cache, which knows about R, R_s, Ts, etc.
+            
+        """
         if not hasattr(self, '_cache_jp_'):
             self._cache_jp_ = {}
         
@@ -963,18 +1107,31 @@ class Fluctuations(object): # pragma: no cover
             #print("Loaded P_{} at z={} from cache.".format(term, z))
             return self._cache_jp_[z][term]
         
-    def _cache_cf(self, z, term):
+    def _cache_cf(self, z, term, key=None):
+        """
+        Retrieve a cached correlation function, if there is one.
+        
+        Entries are stored by `key`, which identifies the field model (see
+        `_field_key`). If `key` is None, just report whether `term` has
+        been computed at this redshift for any model.
+        """
         if not hasattr(self, '_cache_cf_'):
             self._cache_cf_ = {}
     
         if z not in self._cache_cf_:
             self._cache_cf_[z] = {}
     
-        if term not in self._cache_cf_[z]:
+        if key is None:
+            for _term, _key in self._cache_cf_[z]:
+                if _term == term:
+                    return self._cache_cf_[z][(_term, _key)]
+            return None
+    
+        if (term, key) not in self._cache_cf_[z]:
             return None
         else:
             #print("Loaded cf_{} at z={} from cache.".format(term, z))
-            return self._cache_cf_[z][term]    
+            return self._cache_cf_[z][(term, key)]    
     
     def _cache_ps(self, z, term):
         if not hasattr(self, '_cache_ps_'):
@@ -1088,7 +1245,8 @@ class Fluctuations(object): # pragma: no cover
         ##
         # Check cache for match
         ##
-        cached_result = self._cache_p(z, term)
+        p_key = (z, self._field_key(R_s, R3, Th, Ts, Tk, Ja))
+        cached_result = self._cache_p(p_key, term)
         
         if cached_result is not None:
             return cached_result
@@ -1272,7 +1430,7 @@ class Fluctuations(object): # pragma: no cover
         else:
             raise ValueError('Don\' know how to handle <{}>'.format(term))
                 
-        self._cache_p_[z][term] = val
+        self._cache_p_[p_key][term] = val
         
         return val
                 
@@ -1288,8 +1446,6 @@ class Fluctuations(object): # pragma: no cover
         
         basics = {}
         for term in ['ii', 'ih', 'ib', 'hh', 'hb', 'bb']:
-            cache = self._cache_jp(z, term)
-            
             
             if self.pf['ps_include_temp'] and self.pf['ps_temp_model'] == 2:
                 Qi = self.MeanIonizedFraction(z)
@@ -1316,16 +1472,18 @@ class Fluctuations(object): # pragma: no cover
                 #    basics[term] = P, P1, P2
                 #    continue    
                 
-            if cache is None and term != 'bb':
+            # Don't look in `_cache_jp_`: it's keyed on (z, term) only, so
+            # it can't tell whether R, R_s, Ts, etc. have changed.
+            # ExpectationValue2pt is cached on all of them.
+            if term != 'bb':
                 P, P1, P2 = self.ExpectationValue2pt(z, 
                     R=R, term=term, R_s=R_s, Th=Th, Ts=Ts, Tk=Tk, Ja=Ja)
-            elif cache is None and term == 'bb':
+            else:
                 P = 1. - (basics['ii'][0] + 2 * basics['ib'][0]
                   + 2 * basics['ih'][0] + basics['hh'][0] + 2 * basics['hb'][0])
                 P1 = P2 = np.zeros_like(P)  
+                self._cache_jp(z, term)
                 self._cache_jp_[z][term] = R, P, np.zeros_like(P), np.zeros_like(P)
-            else:
-                P, P1, P2 = cache[1:]
                 
             basics[term] = P, P1, P2
             
@@ -1340,6 +1498,37 @@ class Fluctuations(object): # pragma: no cover
         terms like <cc'>, <xc'>, etc., from their component probabilities
         <hh'>, <ih'>, etc.
         
+        Results are cached. The key contains everything that determines the
+        result, i.e., the redshift, term, scales, temperature field model 
+        (R_s, R3, Th, Ts, Tk, Ja), and ionization field model (see 
+        `_model_fingerprint`). One-point terms and correlation functions 
+        are cached by the same criteria, so the caches can stay on safely.
+        
+        See `_ExpectationValue2pt` for description of inputs and outputs.
+        
+        """
+        
+        if not hasattr(self, '_cache_ev2pt_'):
+            self._cache_ev2pt_ = {}
+            
+        key = (z, term, self._getting_basics, self._model_fingerprint,
+            fingerprint(R, R_s, R3, Th, Ts, Tk, Ja, k))
+            
+        if key not in self._cache_ev2pt_:
+            result = self._ExpectationValue2pt(z, R, term=term, R_s=R_s, 
+                R3=R3, Th=Th, Ts=Ts, Tk=Tk, Ja=Ja, k=k)
+            self._cache_ev2pt_[key] = tuple(np.copy(el) for el in result)
+            
+        # Return copies so the cache can't be modified by accident
+        return tuple(np.copy(el) for el in self._cache_ev2pt_[key])
+        
+    def _ExpectationValue2pt(self, z, R, term='ii', R_s=None, R3=None, 
+        Th=500.0, Ts=None, Tk=None, Ja=None, k=None):
+        """
+        Essentially a wrapper around JointProbability that scales
+        terms like <cc'>, <xc'>, etc., from their component probabilities
+        <hh'>, <ih'>, etc.
+        
         Parameters
         ----------
         z : int, float
@@ -1355,22 +1544,10 @@ class Fluctuations(object): # pragma: no cover
         
         
         """
+        
+        # Some terms are saved here (see `get_basics`), so make sure it exists
+        self._cache_jp(z, term)
                 
-        ##
-        # Check cache for match
-        ##
-        #cached_result = self._cache_jp(z, term)
-        #
-        #if cached_result is not None:
-        #    _R, _jp, _jp1, _jp2 = cached_result
-        #    
-        #    if _R.size == R.size:
-        #        if np.allclose(_R, R):
-        #            return cached_result[1:]
-        #
-        #    print("interpolating jp_{}".format(ii))
-        #    return np.interp(R, _R, _jp), np.interp(R, _R, _jp1), np.interp(R, _R, _jp2)
-
         # Remember, we scaled the BSD so that these two things are equal
         # by construction.
         xibar = Q = Qi = self.MeanIonizedFraction(z)
@@ -1679,29 +1856,9 @@ class Fluctuations(object): # pragma: no cover
         Mmin = self.Mmin(z) * self.zeta
         iM = np.argmin(np.abs(M_b - Mmin))
         
-        # Only need overlap volumes once per redshift
-        all_OV_z = self._cache_Vo(z)
-        if all_OV_z is None:
-            all_OV_z = np.zeros((len(R), 6, len(R_i)))
-            for i, sep in enumerate(R):
-                all_OV_z[i,:,:] = \
-                    np.array(self.overlap_volumes(sep, R_i, R_s))
-
-            self._cache_Vo_[z] = all_OV_z.copy()
-
-            #print("Generated z={} overlap_volumes".format(z))
-           
-        #else:    
-        #   print("Read in z={} overlap_volumes".format(z))
-           
-        all_IV_z = self._cache_IV(z)
-        if all_IV_z is None:
-            all_IV_z = np.zeros((len(R), 6, len(R_i)))
-            for i, sep in enumerate(R):
-                all_IV_z[i,:,:] = \
-                    np.array(self.intersectional_volumes(sep, R_i, R_s, R3))
-        
-            self._cache_IV_[z] = all_IV_z.copy()    
+        # Memoized based on radii, so no need to cache by redshift
+        all_OV_z = self.tab_overlap_volumes(R, R_i, R_s)
+        all_IV_z = self.tab_intersectional_volumes(R, R_i, R_s, R3)
         
         Mmin_b = self.Mmin(z) * self.zeta
         Mmin_h = self.Mmin(z)
@@ -2636,7 +2793,8 @@ class Fluctuations(object): # pragma: no cover
         ##
         # Check cache for match
         ##
-        cached_result = self._cache_cf(z, term)
+        cf_key = self._field_key(R_s, R3, Th, Tc, Ts, k, Tk, Ja)
+        cached_result = self._cache_cf(z, term, cf_key)
         
         if cached_result is not None:
             _R, _cf = cached_result
@@ -2717,7 +2875,7 @@ class Fluctuations(object): # pragma: no cover
             
             if not self.pf['ps_include_density']:
                 cf = np.zeros_like(R)    
-                self._cache_cf_[z][term] = R, cf
+                self._cache_cf_[z][(term, cf_key)] = R, cf
                 return cf
             
             iz = np.argmin(np.abs(z - self.halos.tab_z_ps))
@@ -2733,7 +2891,7 @@ class Fluctuations(object): # pragma: no cover
         elif term == 'ii':
             if not self.pf['ps_include_ion']:
                 cf = np.zeros_like(R)    
-                self._cache_cf_[z][term] = R, cf
+                self._cache_cf_[z][(term, cf_key)] = R, cf
                 return cf
                 
             ev_ii, ev_ii_1, ev_ii_2 = \
@@ -2750,7 +2908,7 @@ class Fluctuations(object): # pragma: no cover
         elif term == 'hh':
             if not self.pf['ps_include_temp']:
                 cf = np.zeros_like(R)    
-                self._cache_cf_[z][term] = R, cf
+                self._cache_cf_[z][(term, cf_key)] = R, cf
                 return cf
         
             jp_hh, jp_hh_1, jp_hh_2 = \
@@ -2778,7 +2936,7 @@ class Fluctuations(object): # pragma: no cover
         elif term == 'id':
             if self.pf['ps_include_xcorr_ion_rho'] == 0:
                 cf = np.zeros_like(R)
-                self._cache_cf_[z][term] = R, cf
+                self._cache_cf_[z][(term, cf_key)] = R, cf
                 return cf
 
             #jp_ii, jp_ii_1, jp_ii_2 = \
@@ -2807,7 +2965,7 @@ class Fluctuations(object): # pragma: no cover
         elif term == 'cc':
             if not self.pf['ps_include_temp']:
                 cf = np.zeros_like(R)    
-                self._cache_cf_[z][term] = R, cf
+                self._cache_cf_[z][(term, cf_key)] = R, cf
                 return cf
                 
             ev_cc, ev_cc_1, ev_cc_2 = \
@@ -2841,7 +2999,7 @@ class Fluctuations(object): # pragma: no cover
         elif term == 'ih':
             if not self.pf['ps_include_temp']:
                 cf = np.zeros_like(R)    
-                self._cache_cf_[z][term] = R, cf
+                self._cache_cf_[z][(term, cf_key)] = R, cf
                 return cf
                 
             if self.pf['ps_temp_model'] == 2:
@@ -2936,7 +3094,7 @@ class Fluctuations(object): # pragma: no cover
         #if term not in ['21', 'mm']:
         #    cf /= (2. * np.pi)**3
         
-        self._cache_cf_[z][term] = R, cf.copy()
+        self._cache_cf_[z][(term, cf_key)] = R, cf.copy()
         
         return cf
             
@@ -14,6 +14,7 @@ import time
 import numpy as np
 from ..util.Pickling import write_pickle_file
 from ..util.ProgressBar import ProgressBar
+from ..util.Timer import timed
 from ..physics.Constants import erg_per_ev
 from ..physics.SecondaryElectrons import *
 import os, re, scipy, itertools, math, copy
@@ -215,6 +216,7 @@ class IntegralTable:
         else:
             return "log{0!s}_{1!s}".format(integral, absorber)       
               
+    @timed('rate_integrals')
     def TabulateRateIntegrals(self):
         """
         Return a dictionary of lookup tables, and also store a copy as 
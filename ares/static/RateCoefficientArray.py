@@ -0,0 +1,90 @@
+"""
+
+RateCoefficientArray.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 21:04:37 PDT 2026
+
+Description: Container for photo-ionization and photo-heating rate
+coefficients due to all source populations.
+
+"""
+
+import numpy as np
+
+class RateCoefficientArray(object):
+    def __init__(self, Npops, N_absorbers, data=None):
+        """
+        Rate coefficients for each source population and absorbing species.
+
+        Everything lives in a single array, `data`, with shape
+        (Npops, N_absorbers, 2 + N_absorbers). Along the last axis are
+        the ionization and heating rate coefficients, followed by the
+        secondary ionization rate coefficient due to photo-electrons from
+        each donor species.
+
+        Sums over all populations are available via the keys 'k_ion',
+        'k_ion2', and 'k_heat', each with a leading axis of length 1 (for
+        the single cell of a GasParcel). This object behaves like the
+        dictionary of rate coefficients used by GasParcel and Chemistry,
+        i.e., it can be unpacked directly into update_rate_coefficients.
+
+        """
+        self.Npops = Npops
+        self.N_absorbers = N_absorbers
+
+        if data is None:
+            self.data = np.zeros((Npops, N_absorbers, 2 + N_absorbers))
+        else:
+            self.data = data
+
+    @property
+    def ion(self):
+        """ Ionization rate coefficients, shape (Npops, N_absorbers). """
+        return self.data[...,0]
+
+    @property
+    def heat(self):
+        """ Heating rate coefficients, shape (Npops, N_absorbers). """
+        return self.data[...,1]
+
+    @property
+    def ion2(self):
+        """
+        Secondary ionization rate coefficients, with shape
+        (Npops, N_absorbers, N_absorbers), the last axis being the donor.
+        """
+        return self.data[...,2:]
+
+    def keys(self):
+        return ['k_ion', 'k_ion2', 'k_heat']
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return 3
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __getitem__(self, key):
+        tot = self.data.sum(axis=0)
+
+        if key == 'k_ion':
+            return tot[None,:,0]
+        elif key == 'k_heat':
+            return tot[None,:,1]
+        elif key == 'k_ion2':
+            return tot[None,:,2:]
+        else:
+            raise KeyError(key)
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def copy(self):
+        return RateCoefficientArray(self.Npops, self.N_absorbers,
+            data=self.data.copy())
+
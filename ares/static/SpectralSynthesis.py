@@ -16,6 +16,7 @@ from ..util import Survey
 from ..util import ProgressBar
 from ..phenom import Madau1995
 from ..util import ParameterFile
+from ..util.Timer import timed
 from scipy.optimize import curve_fit
 from scipy.interpolate import interp1d
 from ..physics.Cosmology import Cosmology
@@ -144,9 +145,7 @@ class SpectralSynthesis(object):
 
         tarr = self.src.times
         Zarr = np.sort(list(self.src.metallicities.values()))
-        L = np.zeros((tarr.size, Zarr.size))
-        for j, Z in enumerate(Zarr):
-            L[:,j] = self.src.L_per_sfr_of_t(wave, Z=Z)
+        L = self.src.L_per_sfr_of_t(wave, Z=Zarr).T
 
         # Interpolant
         self._L_of_Z_t[wave] = RectBivariateSpline(np.log10(tarr),
@@ -919,6 +918,7 @@ class SpectralSynthesis(object):
         else:
             return kwds, None
 
+    @timed('synthesis')
     def Luminosity(self, wave=1600., sfh=None, tarr=None, zarr=None, window=1,
         zobs=None, tobs=None, band=None, idnum=None, hist={}, extras={},
         load=True, use_cache=True, energy_units=True):
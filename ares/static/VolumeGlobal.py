@@ -16,6 +16,7 @@ from ..util import ProgressBar
 from ..physics.Constants import *
 import types, os, re, sys
 from ..util.Misc import num_freq_bins
+from ..util.Caching import fingerprint
 from ..physics import SecondaryElectrons
 from scipy.integrate import dblquad, romb, simps, quad, trapz
 
@@ -147,6 +148,10 @@ class GlobalVolume(object):
         
         """
 
+        # Weights for rates depend on everything we're about to compute
+        self._quad_w = {}
+        self._rate_w = {}
+
         # Remember: these will all be [Npops, Nbands/pop, Nenergies/band]
         self._E = self.background.energies
         self.logE = [[] for k in range(self.Npops)]
@@ -261,44 +266,33 @@ class GlobalVolume(object):
                 # Pre-compute secondary ionization and heating factors
                 if self.esec.method > 1:
                 
-                    # Don't worry: we'll fill these in in a sec!
-                    self.fheat[i][j] = np.ones([N, len(self.esec.x)])
-                    self.flya[i][j] = np.ones([N, len(self.esec.x)])
-                    self.fexc[i][j] = np.ones([N, len(self.esec.x)])
-                
                     # Must evaluate at ELECTRON energy, not photon energy
-                    for k, nrg in enumerate(E - E_th[0]):
-                        self.fheat[i][j][k] = \
-                            self.esec.DepositionFraction(self.esec.x, E=nrg, 
-                            channel='heat')
-                        self.fion['h_1'][i][j][k] = \
-                            self.esec.DepositionFraction(self.esec.x, E=nrg, 
-                            channel='h_1')
+                    self.fheat[i][j] = \
+                        self.esec.DepositionFractionTable(E - E_th[0], 
+                        channel='heat')
+                    self.fion['h_1'][i][j] = \
+                        self.esec.DepositionFractionTable(E - E_th[0], 
+                        channel='h_1')
                 
-                        if self.pf['secondary_lya']:
-                            self.flya[i][j][k] = \
-                                self.esec.DepositionFraction(self.esec.x, E=nrg, 
-                                channel='lya') 
-                            self.fexc[i][j][k] = \
-                                self.esec.DepositionFraction(self.esec.x, E=nrg, 
-                                channel='exc')    
+                    if self.pf['secondary_lya']:
+                        self.flya[i][j] = \
+                            self.esec.DepositionFractionTable(E - E_th[0], 
+                            channel='lya')
+                        self.fexc[i][j] = \
+                            self.esec.DepositionFractionTable(E - E_th[0], 
+                            channel='exc')
+                    else:
+                        self.flya[i][j] = np.ones([N, len(self.esec.x)])
+                        self.fexc[i][j] = np.ones([N, len(self.esec.x)])
                 
                     # Helium
                     if self.pf['include_He'] and not self.pf['approx_He']:
-                
-                        # Don't worry: we'll fill these in in a sec!
-                        self.fion['he_1'][i][j] = np.ones([N, len(self.esec.x)])
-                        self.fion['he_2'][i][j] = np.ones([N, len(self.esec.x)])
-                
-                        for k, nrg in enumerate(E - E_th[1]):
-                            self.fion['he_1'][i][j][k] = \
-                                self.esec.DepositionFraction(self.esec.x, 
-                                E=nrg, channel='he_1')
-                
-                        for k, nrg in enumerate(E - E_th[2]):
-                            self.fion['he_2'][i][j][k] = \
-                                self.esec.DepositionFraction(self.esec.x, 
-                                E=nrg, channel='he_2')    
+                        self.fion['he_1'][i][j] = \
+                            self.esec.DepositionFractionTable(E - E_th[1], 
+                            channel='he_1')
+                        self.fion['he_2'][i][j] = \
+                            self.esec.DepositionFractionTable(E - E_th[2], 
+                            channel='he_2')
                 
                     else:
                         self.fion['he_1'][i][j] = np.zeros([N, len(self.esec.x)])
@@ -312,6 +306,154 @@ class GlobalVolume(object):
         self.rtol = self.pf["integrator_rtol"]
         self.atol = self.pf["integrator_atol"]
         self.divmax = int(self.pf["integrator_divmax"])
+
+    def _quadrature_weights(self, popid, band, lo=None, hi=None, 
+        integrator='simps'):
+        """
+        Weights for integrating over photon energy within a band.
+        
+        Integrating some quantity y, sampled at the photon energies of this
+        band, over log E, i.e., int y E dlogE, is equivalent to
+        np.dot(w, y[lo:hi]). Since all of our integrators are linear in y, 
+        we get w by integrating unit vectors, a block at a time so we never
+        need an (N x N) array, and then multiplying by E.
+        
+        Returns
+        -------
+        Array of weights, with size equal to the number of energies in
+        the range [lo:hi].
+        
+        """
+        
+        if not hasattr(self, '_quad_w'):
+            self._quad_w = {}
+            
+        key = (popid, band, fingerprint(self.E[popid][band]), lo, hi, 
+            integrator)
+        if key in self._quad_w:
+            return self._quad_w[key]
+        
+        E = self.E[popid][band][lo:hi]
+        x = self.logE[popid][band][lo:hi]
+        
+        w = np.zeros_like(E)
+        for i in range(0, E.size, 256):
+            rows = np.arange(i, min(i + 256, E.size))
+            I = np.zeros((rows.size, E.size))
+            I[np.arange(rows.size),rows] = 1.
+        
+            if integrator == 'romb':
+                dx = self.dlogE[popid][band][0 if lo is None else lo]
+                w[rows] = romb(I, dx=dx, axis=1)
+            elif integrator == 'trapz':
+                w[rows] = np.trapz(I, x=x, axis=1)
+            else:
+                w[rows] = simps(I, x=x, axis=1)
+            
+        w = w * E * log10
+            
+        self._quad_w[key] = w
+        
+        return w
+        
+    def _energy_range(self, popid, band, Emax):
+        """
+        Indices bounding the photon energies used in HeatingRate.
+        
+        Returns
+        -------
+        Tuple: (lo, hi, integrator). If hi == 0, there's nothing to integrate.
+        
+        """
+        
+        E = self.E[popid][band]
+        
+        if Emax is not None:
+            imax = np.argmin(np.abs(E - Emax))
+            if imax == (len(E) - 1):  
+                imax = None 
+                
+            if self.sampled_integrator == 'romb':
+                raise ValueError("Romberg's method cannot be used for integrating subintervals.")
+                
+            return None, imax, 'simps'
+        
+        imin = np.argmin(np.abs(E - self.pops[popid].pf['pop_Emin']))
+        
+        return imin, None, self.sampled_integrator
+        
+    def _rate_weights(self, name, popid, band, species, donor=None, lo=None,
+        hi=None, integrator='simps'):
+        """
+        Weights for computing rate coefficients from the background flux.
+        
+        Rates are np.dot(w, fluxes[popid][band][lo:hi]), where the weights 
+        combine the quadrature weights, cross sections, photo-electron 
+        energies, and deposition fractions. If the latter come from tables
+        in ionized fraction (secondary_ionization > 1), so do the weights, 
+        in which case they have shape (number of energies, len(self.esec.x)), 
+        and must be interpolated to the current ionized fraction with
+        self.esec.InterpolateTable.
+        
+        Weights are saved, keyed by (among other things) the photon energies
+        of the band, so they're re-computed if the energy grid changes.
+        
+        Parameters
+        ----------
+        name : str
+            'heat', 'ion', or 'ion2'.
+        
+        """
+        
+        if not hasattr(self, '_rate_w'):
+            self._rate_w = {}
+            
+        key = (name, popid, band, fingerprint(self.E[popid][band]), species, 
+            donor, lo, hi, integrator)
+        if key in self._rate_w:
+            return self._rate_w[key]
+        
+        species_str = species_i_to_str[species]
+        w = self._quadrature_weights(popid, band, lo, hi, integrator)
+        E = self.E[popid][band][lo:hi]
+        sigma_E = lambda sp: self.sigma_E[sp][popid][band][lo:hi]
+        norm = J21_num * self.sigma0
+        
+        if name == 'heat':
+            K = sigma_E(species_str) * (E - E_th[species])
+            if self.approx_He:
+                K += self.cosm.y * sigma_E('he_1') * (E - E_th[1])
+            
+            w = w * K / norm / ev_per_hz
+                
+            if (self.esec.method > 1) and \
+               (self.pops[popid].pf['pop_fXh'] is None):
+                w = w[:,None] * self.fheat[popid][band][lo:hi]
+                
+        elif name == 'ion':
+            w = w * sigma_E(species_str) / norm / ev_per_hz
+        elif name == 'ion2':
+            donor_str = species_i_to_str[donor]
+            K = sigma_E(donor_str) * (E - E_th[donor])
+            
+            if self.pf['approx_He']:
+                KHe = self.cosm.y * sigma_E('he_1') * (E - E_th[1])
+            else:
+                KHe = 0.0
+            
+            w = w / E_th[species] / norm / ev_per_hz
+                
+            if self.esec.method > 1:
+                f = self.fion[species_str][popid][band][lo:hi]
+                w = w[:,None] * (f * K[:,None] + np.reshape(KHe, (-1, 1)))
+            else:
+                w = w * (K + KHe)
+        else:
+            raise NotImplementedError('Unrecognized rate \'{}\''.format(name))
+            
+        self._rate_w[key] = w
+        
+        return w
     
     def RestFrameEnergy(self, z, E, zp):
         """
@@ -434,23 +576,12 @@ class GlobalVolume(object):
             solve_rte = False    
             
         # Compute fraction of photo-electron energy deposited as heat
+        # (if tabulated, it's folded into the weights used below).
         if pop.pf['pop_fXh'] is None:
             
             # Interpolate in energy and ionized fraction
             if (self.esec.method > 1) and solve_rte:
-                if kw['igm_e'] <= self.esec.x[0]:
-                    fheat = self.fheat[popid][band][:,0]
-                else:
-                    i_x = np.argmin(np.abs(kw['igm_e'] - self.esec.x))
-                    if self.esec.x[i_x] > kw['igm_e']:
-                        i_x -= 1
-                        
-                    j = i_x + 1    
-                    
-                    fheat = self.fheat[popid][band][:,i_x] \
-                        + (self.fheat[popid][band][:,j] - self.fheat[popid][band][:,i_x]) \
-                        * (kw['igm_e'] - self.esec.x[i_x]) \
-                        / (self.esec.x[j] - self.esec.x[i_x])                
+                fheat = 1.
             elif self.esec.method > 1:
                 print("popid={}".format(popid))
                 raise ValueError('Only know how to do advanced secondary ionization with solve_rte=True')
@@ -496,52 +627,24 @@ class GlobalVolume(object):
                     self.rb.AngleAveragedFluxSlice(z, E, zz, xavg=kw['xavg'], 
                     zxavg=kw['zxavg']) * self.sigma(E, species=1) \
                     * (E - E_th[species]) * fheat / norm / ev_per_hz
-        
-        # This means the fluxes have been computed already - integrate
-        # over discrete set of points
-        else:
-            
-            integrand = self.sigma_E[species_str][popid][band] \
-                * (self._E[popid][band] - E_th[species])
-
-            if self.approx_He:
-                integrand += self.cosm.y * self.sigma_E['he_1'][popid][band] \
-                    * (self._E[popid][band] - E_th[1])
                     
-            integrand *= kw['fluxes'][popid][band] * fheat / norm / ev_per_hz
-                         
-        # Compute integral over energy
-        if type(integrand) == types.FunctionType:
             heat, err = dblquad(integrand, z, kw['zf'], lambda a: self.E0, 
                 lambda b: kw['Emax'], epsrel=self.rtol, epsabs=self.atol)
+        
+        # This means the fluxes have been computed already - integrate
+        # over discrete set of points
         else:
-            if kw['Emax'] is not None:
-                imax = np.argmin(np.abs(self._E[popid][band] - kw['Emax']))
-                if imax == 0:
-                    return 0.0
-                elif imax == (len(self._E[popid][band]) - 1):  
-                    imax = None 
-                                        
-                if self.sampled_integrator == 'romb':
-                    raise ValueError("Romberg's method cannot be used for integrating subintervals.")
-                    heat = romb(integrand[0:imax] * self.E[0:imax], 
-                        dx=self.dlogE[0:imax])[0] * log10
-                else:
-                    heat = simps(integrand[0:imax] * self._E[popid][band][0:imax], 
-                        x=self.logE[popid][band][0:imax]) * log10
-            
-            else:
-                imin = np.argmin(np.abs(self._E[popid][band] - pop.pf['pop_Emin']))
+            lo, hi, integrator = self._energy_range(popid, band, kw['Emax'])
+            if hi == 0:
+                return 0.0
+                
+            w = self._rate_weights('heat', popid, band, species, lo=lo, 
+                hi=hi, integrator=integrator)
+                
+            if w.ndim == 2:
+                w = self.esec.InterpolateTable(w, kw['igm_e'])
                 
-                if self.sampled_integrator == 'romb':
-                    heat = romb(integrand[imin:] * self._E[popid][band][imin:], 
-                        dx=self.dlogE[popid][band][imin:])[0] * log10
-                elif self.sampled_integrator == 'trapz':
-                    heat = np.trapz(integrand[imin:] * self._E[popid][band][imin:], 
-                        x=self.logE[popid][band][imin:]) * log10
-                else:
-                    heat = simps(integrand[imin:] * self._E[popid][band][imin:], 
-                        x=self.logE[popid][band][imin:]) * log10
+            heat = fheat * np.dot(w, kw['fluxes'][popid][band][lo:hi])
           
         # Re-normalize, get rid of per steradian units
         heat *= 4. * np.pi * norm * erg_per_ev
@@ -686,15 +789,11 @@ class GlobalVolume(object):
         
         # Integrate over set of discrete points
         else:  
-            integrand = self.sigma_E[species_str][popid][band] \
-                * kw['fluxes'][popid][band] / norm / ev_per_hz
-        
-            if self.sampled_integrator == 'romb':
-                ion = romb(integrand * self.E[popid][band], 
-                    dx=self.dlogE[popid][band])[0] * log10
-            else:
-                ion = simps(integrand * self.E[popid][band], 
-                    x=self.logE[popid][band]) * log10
+            integrator = 'romb' if self.sampled_integrator == 'romb' \
+                else 'simps'
+            w = self._rate_weights('ion', popid, band, species, 
+                integrator=integrator)
+            ion = np.dot(w, kw['fluxes'][popid][band])
                 
         # Re-normalize
         ion *= 4. * np.pi * norm
@@ -773,25 +872,10 @@ class GlobalVolume(object):
         donor_str = species_i_to_str[donor]
 
         if self.esec.method > 1 and solve_rte:
-
             fion_const = 1.
-            if kw['igm_e'] == 0:
-                fion = self.fion[species_str][popid][band][:,0]
-            else:
-                i_x = np.argmin(np.abs(kw['igm_e'] - self.esec.x))
-                if self.esec.x[i_x] > kw['igm_e']:
-                    i_x -= 1
-
-                j = i_x + 1    
-
-                fion = self.fion[species_str][popid][band][:,i_x] \
-                    + (self.fion[species_str][popid][band][:,j] - self.fion[species_str][popid][:,i_x]) \
-                    * (kw['igm_e'] - self.esec.x[i_x]) \
-                    / (self.esec.x[j] - self.esec.x[i_x])
         elif self.esec.method > 1:
             raise ValueError('Only know how to do advanced secondary ionization with solve_rte=True')
         else:
-            fion = 1.0
             fion_const = self.esec.DepositionFraction(kw['igm_e'], 
                 channel=species_str)[0]
 
@@ -809,27 +893,19 @@ class GlobalVolume(object):
                     self.rb.AngleAveragedFluxSlice(z, E, zz, xavg=kw['xavg'], 
                     zxavg=kw['zxavg']) * self.sigma(E) * (E - E_th[0]) \
                     / E_th[0] / norm / ev_per_hz
-        else:
-            integrand = fion * self.sigma_E[donor_str][popid][band] \
-                * (self.E[popid][band] - E_th[donor])
-            
-            if self.pf['approx_He']:
-                integrand += self.cosm.y * self.sigma_E['he_1'][popid][band] \
-                    * (self.E[popid][band] - E_th[1])
-            
-            integrand *= kw['fluxes'][popid][band] / E_th[species] / norm \
-                / ev_per_hz
-        
-        if type(integrand) == types.FunctionType:
+                    
             ion, err = dblquad(integrand, z, kw['zf'], lambda a: self.E0, 
                 lambda b: kw['Emax'], epsrel=self.rtol, epsabs=self.atol)
         else:
-            if self.sampled_integrator == 'romb':
-                ion = romb(integrand * self.E[popid][band], 
-                    dx=self.dlogE[popid][band])[0] * log10
-            else:
-                ion = simps(integrand * self.E[popid][band], 
-                    x=self.logE[popid][band]) * log10    
+            integrator = 'romb' if self.sampled_integrator == 'romb' \
+                else 'simps'
+            w = self._rate_weights('ion2', popid, band, species, donor=donor,
+                integrator=integrator)
+            
+            if w.ndim == 2:
+                w = self.esec.InterpolateTable(w, kw['igm_e'])
+                
+            ion = np.dot(w, kw['fluxes'][popid][band])
                 
         # Re-normalize
         ion *= 4. * np.pi * norm * fion_const
@@ -876,26 +952,10 @@ class GlobalVolume(object):
             ##
     
 
-            if kw['igm_e'] == 0:
-                flya = self.flya[popid][band][:,0] \
-                     * self.fexc[popid][band][:,0]
-    
-            else:
-                flya = 1.
-                for tab in [self.fexc, self.flya]:
-    
-                    i_x = np.argmin(np.abs(kw['igm_e'] - self.esec.x))
-                    if self.esec.x[i_x] > kw['igm_e']:
-                        i_x -= 1
-    
-                    j = i_x + 1    
-    
-                    f = tab[popid][band][:,i_x] \
-                        + (tab[popid][band][:,j] - tab[popid][band][:,i_x]) \
-                        * (kw['igm_e'] - self.esec.x[i_x]) \
-                        / (self.esec.x[j] - self.esec.x[i_x])
-    
-                    flya *= f
+            flya = self.esec.InterpolateTable(self.flya[popid][band], 
+                kw['igm_e']) \
+                 * self.esec.InterpolateTable(self.fexc[popid][band], 
+                kw['igm_e'])
     
         else:
             return 0.0
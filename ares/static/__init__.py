@@ -4,5 +4,10 @@ from ares.static.VolumeGlobal import GlobalVolume
 from ares.static.IntegralTables import IntegralTable
 from ares.static.InterpolationTables import LookupTable
 from ares.static.ChemicalNetwork import ChemicalNetwork
+from ares.static.RateCoefficientArray import RateCoefficientArray
 from ares.static.Fluctuations import Fluctuations
 from ares.static.SpectralSynthesis import SpectralSynthesis
+
+def __getattr__(name):
+    from .. import _import_submodule
+    return _import_submodule(__name__, name)
@@ -10,35 +10,59 @@ Description:
 
 """
 
-import os, imp, re
+import os, re, sys
 import numpy as np
-from matplotlib import cm
+from .. import _load_source
 from .ParameterFile import par_info
-from matplotlib.colors import ListedColormap
 
 # Charlotte's color-maps
 _charlotte1 = ['#301317','#3F2A3D','#2D4A60','#036B66','#48854D','#9D9436','#F69456']
 _charlotte2 = ['#001316', '#2d2779', '#9c207e', '#c5492a', '#819c0c', '#3dd470', '#64cdf6']
 
-cmap_charlotte1 = ListedColormap(_charlotte1, name='charlotte1')
-cmap_charlotte2 = ListedColormap(_charlotte2, name='charlotte2')
-
 _zall = np.arange(4, 11, 1)
 
 _znormed = (_zall - _zall[0]) / float(_zall[-1] - _zall[0])
-_ch_c1 = cm.get_cmap(cmap_charlotte1, _zall.size)
-_ch_c2 = cm.get_cmap(cmap_charlotte2, _zall.size)
 _normz = lambda zz: (zz - _zall[0]) / float(_zall[-1] - _zall[0])
 
-colors_charlotte1 = lambda z: _ch_c1(_normz(z))
-colors_charlotte2 = lambda z: _ch_c2(_normz(z))
+# Built on first use so that importing ares.util doesn't import matplotlib.
+_cmaps = {}
+def _get_cmap_charlotte(num, N=None):
+    if (num, N) not in _cmaps:
+        from matplotlib import cm
+        from matplotlib.colors import ListedColormap
+        
+        colors = _charlotte1 if num == 1 else _charlotte2
+        cmap = ListedColormap(colors, name='charlotte{}'.format(num))
+        
+        if N is not None:
+            cmap = cm.get_cmap(cmap, N)
+            
+        _cmaps[(num, N)] = cmap
+        
+    return _cmaps[(num, N)]
+
+colors_charlotte1 = lambda z: _get_cmap_charlotte(1, _zall.size)(_normz(z))
+colors_charlotte2 = lambda z: _get_cmap_charlotte(2, _zall.size)(_normz(z))
+
+def __getattr__(name):
+    if name == 'cmap_charlotte1':
+        return _get_cmap_charlotte(1)
+    elif name == 'cmap_charlotte2':
+        return _get_cmap_charlotte(2)
+        
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__,
+        name))
 
+# Module-level __getattr__ requires Python 3.7+.
+if sys.version_info < (3, 7):
+    cmap_charlotte1 = _get_cmap_charlotte(1)
+    cmap_charlotte2 = _get_cmap_charlotte(2)
 
 # Load custom defaults    
 HOME = os.environ.get('HOME')
 if os.path.exists('{!s}/.ares/labels.py'.format(HOME)):
-    f, filename, data = imp.find_module('labels', ['{!s}/.ares/'.format(HOME)])
-    custom_labels = imp.load_module('labels.py', f, filename, data).pf
+    custom_labels = _load_source('labels.py', 
+        '{!s}/.ares/labels.py'.format(HOME)).pf
 else:
     custom_labels = {}
     
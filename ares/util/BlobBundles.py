@@ -88,6 +88,16 @@ _shape = {'blob_names':_gs_shape_n,'blob_ivars': None, 'blob_funcs': _gs_shape_f
 _runtime = {'blob_names': ['count', 'timer', 'rank'], 
     'blob_ivars': None, 'blob_funcs': None, 'blob_kwargs': None}
 
+# Wall-clock time spent in various stages of each model (see util.Timer)
+_timing_stages = ['hmf', 'sfrd', 'sam', 'emissivity', 'tau', 'rte', 
+    'rates', 'chemistry']
+_timing = {'blob_names': ['timing_total'] \
+    + ['timing_{}'.format(stage) for stage in _timing_stages],
+    'blob_ivars': None, 
+    'blob_funcs': ['get_timing()'] \
+    + ["get_timing('{}')".format(stage) for stage in _timing_stages],
+    'blob_kwargs': None}
+
 _He = {'blob_names':['igm_he_1', 'igm_he_2', 'igm_he_3'], 
        'blob_ivars': [_def_z],  
        'blob_funcs': None,
@@ -97,7 +107,8 @@ _He = {'blob_names':['igm_he_1', 'igm_he_2', 'igm_he_3'],
 _sfrd = {'blob_names': ['sfrd{0}'],
          'blob_ivars': [_def_z],
          'blob_funcs': ['pops[0].SFRD'],
-         'blob_kwargs': [None, None]}
+         'blob_kwargs': [None, None],
+         'blob_vectorized': [True]}
 
 _Nion = {'blob_names': ['Ndot'],
          'blob_ivars': ('z', np.arange(1.9, 6.2, 0.1)),
@@ -183,19 +194,24 @@ _cooling = \
 _blobs = \
 {
  'gs': {'basics': _extrema, 'history': _history, 'shape': _shape,
-        'runtime': _runtime, 'rates': _rates, 'helium': _He,
-        'cooling': _cooling},
+        'runtime': _runtime, 'timing': _timing, 'rates': _rates, 
+        'helium': _He, 'cooling': _cooling},
  'pop': {'sfrd': _sfrd, 'fluxes': None, 
     'cxrb': _cxrb, 'lf': _lf, 'sd': _sd, 'smf': _smf, 'sfrd_above': _sfrd_above,
     'Nion': _Nion, 'fobsc': _fobsc}
 }
 
-_keys = ('blob_names', 'blob_ivars', 'blob_funcs', 'blob_kwargs')
+_keys = ('blob_names', 'blob_ivars', 'blob_funcs', 'blob_kwargs', 
+    'blob_vectorized')
 
 class BlobBundle(ParameterBundle):
     def __init__(self, bundle=None, **kwargs):
         ParameterBundle.__init__(self, bundle=bundle, bset=_blobs, **kwargs)
 
+        # Most bundles don't bother with this one
+        if 'blob_vectorized' not in self:
+            self['blob_vectorized'] = None
+
         self._check_shape()
 
     def _check_shape(self):
@@ -0,0 +1,264 @@
+"""
+
+Caching.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 09:12:44 PDT 2026
+
+Description: Cached properties that know which parameters they depend on,
+so that objects can be updated in place rather than re-built from scratch.
+
+"""
+
+import hashlib
+import threading
+import numpy as np
+from fnmatch import fnmatchcase
+
+# Per-class list of cached properties, built on first use.
+_registry = {}
+
+# Cached properties currently being computed, per thread and per object.
+# Threads may share objects, so this can't live in the instance dictionary.
+_local = threading.local()
+
+def _stacks():
+    if not hasattr(_local, 'stacks'):
+        _local.stacks = {}
+    return _local.stacks
+
+def _matches(par, patterns):
+    for pattern in patterns:
+        if par == pattern:
+            return True
+        if ('*' in pattern) and fnmatchcase(par, pattern):
+            return True
+    return False
+
+def _is_same(old, new):
+    if old is new:
+        return True
+
+    if isinstance(old, np.ndarray) or isinstance(new, np.ndarray):
+        try:
+            return np.array_equal(old, new)
+        except Exception:
+            return False
+
+    try:
+        return bool(old == new)
+    except Exception:
+        return False
+
+def fingerprint(*args):
+    """
+    Return a short string that identifies the values of `args`.
+
+    Useful as (part of) a key for caches of quantities computed from arrays,
+    which themselves aren't hashable.
+    """
+    h = hashlib.md5()
+    for arg in args:
+        if arg is None:
+            h.update(b'None')
+            continue
+
+        try:
+            arr = np.ascontiguousarray(arg, dtype=float)
+        except (TypeError, ValueError):
+            h.update(repr(arg).encode('utf-8'))
+        else:
+            h.update(repr(arr.shape).encode('utf-8'))
+            h.update(arr.tobytes())
+
+    return h.hexdigest()
+
+class cached_property(object):
+    """
+    Drop-in replacement for @property for quantities that are computed once.
+
+    Usage:
+
+        @cached_property('pop_fesc', 'pq_*')
+        def _tab_fesc(self):
+            ...
+
+    Positional arguments are the parameters (or fnmatch-style patterns of
+    parameters) that the quantity depends on *directly*. Dependencies on
+    other cached properties are discovered automatically: any cached property
+    accessed while this one is being computed is recorded, and invalidating
+    it will also invalidate this one.
+
+    The value is stored in the instance dictionary under `attr`, which by
+    default follows the conventions used throughout ARES: `_tab_x` is stored
+    in `_tab_x_`, and `x` in `_x`. Getters can therefore either return their
+    result or set that attribute themselves (the old ``hasattr`` pattern).
+
+    """
+    def __init__(self, *depends_on, **kwargs):
+        self.depends_on = depends_on
+        self.attr = kwargs.get('attr')
+        self.fget = None
+        self.fset = None
+
+    def __call__(self, fget):
+        self.fget = fget
+        self.name = fget.__name__
+        self.__doc__ = fget.__doc__
+
+        if self.attr is None:
+            if self.name.startswith('_'):
+                self.attr = self.name + '_'
+            else:
+                self.attr = '_' + self.name
+
+        return self
+
+    def setter(self, fset):
+        self.fset = fset
+        return self
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+
+        d = obj.__dict__
+        stacks = _stacks()
+        stack = stacks.get(id(obj))
+
+        # Something else is being computed: remember that it needs us.
+        if stack and stack[-1] != self.name:
+            deps = d.setdefault('_cache_deps', {})
+            deps.setdefault(self.name, set()).add(stack[-1])
+
+        if self.attr in d:
+            return d[self.attr]
+
+        if stack is None:
+            stack = stacks[id(obj)] = []
+
+        stack.append(self.name)
+        try:
+            value = self.fget(obj)
+        finally:
+            stack.pop()
+            if not stack:
+                del stacks[id(obj)]
+
+        return d.setdefault(self.attr, value)
+
+    def __set__(self, obj, value):
+        if self.fset is None:
+            raise AttributeError("can't set attribute {!s}".format(self.name))
+
+        # Anything built on top of the old value is now stale.
+        if '_cache_deps' in obj.__dict__:
+            clear_cached(obj, *obj.__dict__['_cache_deps'].get(self.name, []))
+
+        self.fset(obj, value)
+
+    def __delete__(self, obj):
+        clear_cached(obj, self.name)
+
+def cached_properties(cls):
+    """
+    Return dictionary of all cached properties of a given class.
+    """
+    if cls not in _registry:
+        props = {}
+        for base in reversed(cls.__mro__):
+            for name, val in vars(base).items():
+                if isinstance(val, cached_property):
+                    props[name] = val
+                elif name in props:
+                    # Overridden by something that isn't cached.
+                    del props[name]
+        _registry[cls] = props
+
+    return _registry[cls]
+
+def clear_cached(obj, *names):
+    """
+    Remove cached values of properties `names` and everything built on them.
+    """
+    props = cached_properties(type(obj))
+    deps = obj.__dict__.get('_cache_deps', {})
+
+    cleared = set()
+    todo = list(names)
+    while todo:
+        name = todo.pop()
+        if name in cleared:
+            continue
+
+        cleared.add(name)
+
+        if name in props:
+            obj.__dict__.pop(props[name].attr, None)
+        else:
+            obj.__dict__.pop(name, None)
+
+        todo.extend(deps.get(name, []))
+
+    return cleared
+
+class ParameterDependent(object):
+    """
+    Mix-in for classes with a ``pf`` attribute and cached properties.
+
+    Provides an `update` method that modifies parameters in place and clears
+    only those cached quantities that depend on them.
+    """
+
+    def update(self, **kwargs):
+        """
+        Change the values of some parameters in place.
+
+        Returns
+        -------
+        List of parameters whose values actually changed.
+
+        """
+        changed = {}
+        for par in kwargs:
+            if par not in self.pf:
+                raise KeyError('Unrecognized parameter: {!s}'.format(par))
+
+            if _is_same(self.pf[par], kwargs[par]):
+                continue
+
+            changed[par] = kwargs[par]
+
+        if not changed:
+            return []
+
+        self.pf.update(changed)
+        self.invalidate(*changed.keys())
+
+        return sorted(changed.keys())
+
+    def invalidate(self, *pars):
+        """
+        Clear all cached quantities that depend on parameters `pars`.
+
+        Subclasses with state that isn't managed by cached properties should
+        extend this method.
+
+        Returns
+        -------
+        Set of cached properties that were cleared.
+
+        """
+        names = []
+        for name, prop in cached_properties(type(self)).items():
+            if any([_matches(par, prop.depends_on) for par in pars]):
+                names.append(name)
+
+        return clear_cached(self, *names)
+
+    def clear_cache(self):
+        """
+        Clear all cached properties.
+        """
+        return clear_cached(self, *cached_properties(type(self)).keys())
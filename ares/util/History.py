@@ -0,0 +1,190 @@
+"""
+
+History.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 14:20:51 PDT 2026
+
+Description: Storage for time series of simulation snapshots.
+
+"""
+
+import numpy as np
+
+def _empty(shape, dtype):
+    """
+    Allocate space for a field. Floats start out as NaN, so that snapshots in
+    which a field wasn't recorded are easy to spot.
+    """
+    if np.issubdtype(dtype, np.inexact):
+        return np.full(shape, np.nan, dtype=dtype)
+    return np.zeros(shape, dtype=dtype)
+
+class HistoryRecorder(object):
+    def __init__(self, prefix='', fields=None, size=256):
+        """
+        Record the evolution of a set of quantities one snapshot at a time.
+
+        Rather than saving a copy of every snapshot (a dictionary) and then
+        re-sorting the whole list into arrays at the end (see
+        `ares.util.ReadData._sort_history`), we preallocate an array for
+        each field, write to it in place, and double its size whenever it
+        fills up.
+
+        Each field keeps the dtype of the values recorded for it (upcast if
+        need be, as in `np.array`). If a field is missing from some
+        snapshots, e.g., because it first appears mid-run, those entries are
+        NaN. For fields that can't hold NaN (integers, booleans, etc.), the
+        data are returned as masked arrays instead.
+
+        Parameters
+        ----------
+        prefix : str
+            Will prepend to all dictionary keys, as in `_sort_history`.
+        fields : list, set
+            Names (including prefix) of the only fields to be recorded. If
+            None, will record everything.
+        size : int
+            Number of snapshots to allocate space for initially.
+
+        """
+        self.prefix = prefix
+        self.fields = None if fields is None else set(fields)
+        self.num = 0
+
+        self._size = size
+        self._data = {}
+        self._names = {}
+        self._holes = {}
+
+    def __len__(self):
+        return self.num
+
+    def __contains__(self, name):
+        return name in self._data
+
+    def __getitem__(self, name):
+        """
+        Return view of all data recorded so far for field `name`.
+        """
+        return self._masked(name, self._data[name][0:self.num])
+
+    def keys(self):
+        return self._data.keys()
+
+    def _name(self, key):
+        if key not in self._names:
+            if type(key) is int and not self.prefix.strip():
+                self._names[key] = int(key)
+            else:
+                self._names[key] = '{0!s}{1!s}'.format(self.prefix, key)
+
+        return self._names[key]
+
+    def _masked(self, name, arr):
+        if name not in self._holes:
+            return arr
+
+        mask = self._holes[name][0:arr.shape[0]]
+        mask = np.reshape(mask, mask.shape + (1,) * (arr.ndim - 1))
+
+        return np.ma.array(arr, mask=np.broadcast_to(mask, arr.shape))
+
+    def _add_hole(self, name, i):
+        """
+        Note that field `name` wasn't recorded in snapshot(s) `i`.
+        """
+        # NaN already marks the spot
+        if np.issubdtype(self._data[name].dtype, np.inexact):
+            return
+
+        if name not in self._holes:
+            self._holes[name] = np.zeros(self._size, dtype=bool)
+
+        self._holes[name][i] = True
+
+    def _upcast(self, name, dtype):
+        new = self._data[name].astype(dtype)
+
+        if np.issubdtype(dtype, np.inexact):
+            new[self.num:] = np.nan
+            if name in self._holes:
+                new[self._holes.pop(name)] = np.nan
+
+        self._data[name] = new
+
+    def _grow(self):
+        for name, arr in self._data.items():
+            new = _empty((2 * self._size,) + arr.shape[1:], arr.dtype)
+            new[0:self._size] = arr
+            self._data[name] = new
+
+        for name, holes in self._holes.items():
+            new = np.zeros(2 * self._size, dtype=bool)
+            new[0:self._size] = holes
+            self._holes[name] = new
+
+        self._size *= 2
+
+    def append(self, snapshot):
+        """
+        Add a new snapshot, i.e., a dictionary of values for each field.
+        """
+
+        if self.num == self._size:
+            self._grow()
+
+        done = set()
+        for key in snapshot:
+            name = self._name(key)
+
+            if (self.fields is not None) and (name not in self.fields):
+                continue
+
+            val = np.asarray(snapshot[key])
+
+            if name not in self._data:
+                self._data[name] = _empty((self._size,) + val.shape,
+                    val.dtype)
+                if self.num > 0:
+                    self._add_hole(name, slice(0, self.num))
+
+            arr = self._data[name]
+
+            if (val.dtype != arr.dtype) and \
+                (not np.can_cast(val.dtype, arr.dtype)):
+                self._upcast(name, np.result_type(arr.dtype, val.dtype))
+                arr = self._data[name]
+
+            # Allow, e.g., scalars and 1-element arrays to be mixed.
+            shape = arr.shape[1:]
+            if val.shape != shape:
+                val = np.reshape(val, shape)
+
+            arr[self.num] = val
+            done.add(name)
+
+        if len(done) < len(self._data):
+            for name in self._data:
+                if name not in done:
+                    self._add_hole(name, self.num)
+
+        self.num += 1
+
+    def extend(self, snapshots):
+        for snapshot in snapshots:
+            self.append(snapshot)
+
+    def to_dict(self, squeeze=True):
+        """
+        Convert to a dictionary of arrays, as returned by `_sort_history`.
+        """
+
+        data = {}
+        for name in self._data:
+            data[name] = self._masked(name, self._data[name][0:self.num].copy())
+            if squeeze:
+                data[name] = data[name].squeeze()
+
+        return data
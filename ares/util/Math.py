@@ -12,6 +12,7 @@ Description:
 
 import numpy as np
 from ..physics.Constants import nu_0_mhz
+from scipy.integrate import cumtrapz
 from scipy.interpolate import interp1d as interp1d_scipy
 
 _numpy_kwargs = {'left': None, 'right': None}
@@ -40,6 +41,83 @@ def interp1d(x, y, kind='linear', fill_value=0.0, bounds_error=False,
     else:
         raise NotImplemented("Don\'t understand interpolation method={}".format(method))
 
+def interp_rows(x0, x, y):
+    """
+    Linearly interpolate each row of a 2-D array to its own abscissa.
+
+    Equivalent to ``np.array([np.interp(x0[i], x, y[i]) for i in ...])``,
+    i.e., values outside the range of `x` are set to the edge values.
+
+    Parameters
+    ----------
+    x0 : np.ndarray
+        Points at which to interpolate, one per row of `y`.
+    x : np.ndarray
+        Monotonically increasing abscissae, shared by all rows.
+    y : np.ndarray
+        2-D array of shape (x0.size, x.size).
+
+    """
+
+    j = np.searchsorted(x, x0, side='right') - 1
+    j = np.minimum(np.maximum(j, 0), x.size - 2)
+    w = (x0 - x[j]) / (x[j+1] - x[j])
+    w = np.minimum(np.maximum(w, 0.), 1.)
+
+    rows = np.arange(y.shape[0])
+
+    return y[rows,j] * (1. - w) + y[rows,j+1] * w
+
+def integrate_rows(y, x, lo, hi):
+    """
+    Integrate each row of a 2-D array between its own limits.
+
+    Rather than looping over rows, we compute the cumulative (trapezoidal)
+    integral of the whole array at once and interpolate it onto the limits.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        Integrand, 2-D array of shape (lo.size, x.size).
+    x : np.ndarray
+        Monotonically increasing abscissae, shared by all rows.
+    lo, hi : np.ndarray
+        Lower and upper limits of integration for each row.
+
+    """
+    cumtot = cumtrapz(y, x=x, axis=1, initial=0.0)
+    return interp_rows(hi, x, cumtot) - interp_rows(lo, x, cumtot)
+
+def interp_hermite(x0, x, y, dydx):
+    """
+    Cubic Hermite interpolation, i.e., using known derivatives at each node.
+
+    Much more accurate than a spline when the derivatives are known exactly,
+    and if `y` is monotonic, so is the interpolant (as long as the nodes are
+    not too far apart), which makes it useful for inverting tables.
+
+    Parameters
+    ----------
+    x0 : int, float, np.ndarray
+        Points at which to interpolate. Must lie within range of `x`.
+    x : np.ndarray
+        Monotonically increasing abscissae.
+    y, dydx : np.ndarray
+        Function values and derivatives at `x`.
+
+    """
+
+    j = np.searchsorted(x, x0, side='right') - 1
+    j = np.minimum(np.maximum(j, 0), x.size - 2)
+
+    h = x[j+1] - x[j]
+    t = (x0 - x[j]) / h
+    t2 = t * t
+    t3 = t2 * t
+
+    return (2. * t3 - 3. * t2 + 1.) * y[j] + (t3 - 2. * t2 + t) * h * dydx[j] \
+        + (-2. * t3 + 3. * t2) * y[j+1] + (t3 - t2) * h * dydx[j+1]
+
 def forward_difference(x, y):    
     """
     Compute the derivative of y with respect to x via forward difference.
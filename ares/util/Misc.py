@@ -21,6 +21,17 @@ except:
     # this try/except allows for python 2/3 compatible string type checking
     basestring = str
 
+def load_module(name, path):
+    """
+    Import module `name` from the directory `path`.
+
+    Replaces the old `imp.find_module` / `imp.load_module` dance, e.g., for
+    files in $HOME/.ares or $ARES/input/litdata. As before, the module is
+    re-executed each time this is called.
+    """
+    from .. import _load_source
+    return _load_source(name, os.path.join(path, '{}.py'.format(name)))
+
 def get_cmd_line_kwargs(argv):
 
     cmd_line_kwargs = {}
@@ -11,6 +11,7 @@ Description:
 """
 
 import re
+from .Caching import _is_same
 from .ProblemTypes import ProblemType
 from .BackwardCompatibility import backward_compatibility
 from .SetDefaultParameterValues import ParameterizedQuantityParameters
@@ -32,21 +33,38 @@ old_pars = ['fX', 'cX', 'fstar', 'fesc', 'Nion', 'Nlw', 'Tmin', 'Mmin', 'fXh']
 
 _cosmo_params = CosmologyParameters()
 
+_re_underscores = re.compile(r"\_([0-9])\_")
+_re_braces = re.compile(r"\{([0-9])\}")
+_re_pqid = re.compile(r"\[(\d+(\.\d*)?)\]")
+
+# Parameter names come from a small set, so remember how we've split them.
+_bracketified = {}
+_pop_id_nums = {}
+_par_infos = {}
+
+def _bracketify_name(par):
+    if par in _bracketified:
+        return _bracketified[par]
+
+    m = _re_underscores.search(par)
+
+    if m is None:
+        name = par
+    else:
+        prefix = par.split(m.group(0))[0]
+        name = '{0!s}{{{1}}}'.format(prefix, int(m.group(1)))
+
+    _bracketified[par] = name
+
+    return name
+
 def bracketify(**kwargs):
     """
     Convert underscores to brackets.
     """
     kw = {}
     for par in kwargs:
-        m = re.search(r"\_([0-9])\_", par)
-
-        if m is None:
-            kw[par] = kwargs[par]
-            continue
-
-        prefix = par.split(m.group(0))[0]
-
-        kw['{0!s}{{{1}}}'.format(prefix, int(m.group(1)))] = kwargs[par]
+        kw[_bracketify_name(par)] = kwargs[par]
 
     return kw
 
@@ -58,7 +76,7 @@ def check_for_brackets(pf):
             continue
 
         # Look for integers within curly braces
-        m = re.search(r"\{([0-9])\}", par)
+        m = _re_braces.search(par)
 
         if m is None:
             continue
@@ -77,20 +95,25 @@ def pop_id_num(par):
     if not (par.startswith('pop') or par.startswith('pq') or par.startswith('source')):
         return par, None
 
+    if par in _pop_id_nums:
+        return _pop_id_nums[par]
+
     # Look for integers within curly braces
-    m = re.search(r"\{([0-9])\}", par)
+    m = _re_braces.search(par)
 
     if m is None:
 
         # Look for integers within underscores
-        m = re.search(r"\_([0-9])\_", par)
+        m = _re_underscores.search(par)
 
-        if m is None:
-            return par, None
+    if m is None:
+        result = par, None
+    else:
+        result = par.replace(m.group(0), ''), int(m.group(1))
 
-    prefix = par.replace(m.group(0), '')
+    _pop_id_nums[par] = result
 
-    return prefix, int(m.group(1))
+    return result
 
 def par_info(par):
     """
@@ -98,21 +121,26 @@ def par_info(par):
     identification number that corresponds to a ParameterizedQuantity.
     """
 
+    if par in _par_infos:
+        return _par_infos[par]
+
     prefix1, popid = pop_id_num(par)
 
     if prefix1 is not None:
-        m = re.search(r"\[(\d+(\.\d*)?)\]", prefix1)
+        m = _re_pqid.search(prefix1)
     else:
         m = None
         prefix1 = par
 
     if m is None:
-        return prefix1, popid, None
+        result = prefix1, popid, None
+    else:
+        prefix2 = prefix1.replace(m.group(0), '')
+        result = prefix2, popid, int(m.group(1))
 
-    prefix2 = prefix1.replace(m.group(0), '')
-    phpid = m.group(1)
+    _par_infos[par] = result
 
-    return prefix2, popid, int(phpid)
+    return result
 
 def count_populations(**kwargs):
     """
@@ -265,6 +293,21 @@ def get_pq_pars(par, pf):
         else:
             pars[p] = pf['{0!s}[{1}]'.format(p, phpid)]
 
+    # Parameters of this PQ may be PQs themselves, e.g.,
+    # 'pq_func_par0[0]'='pq[1]'. Collect their parameters too.
+    for p in pars:
+        if not p.startswith('pq_func_par'):
+            continue
+        if not isinstance(pars[p], basestring):
+            continue
+        if not pars[p].startswith('pq['):
+            continue
+
+        if par_info(pars[p])[2] == phpid:
+            raise ValueError('PQ {} depends on itself!'.format(par))
+
+        pars[p] = get_pq_pars(pars[p], pf)
+
     return pars
 
 # All defaults
@@ -288,6 +331,190 @@ for key in defaults:
 
     defaults_pop_indep[key] = defaults[key]
 
+_pq_defaults = ParameterizedQuantityParameters()
+
+# Parameters `backward_compatibility` uses to set others (problem_type=101)
+_legacy_pars = set(old_pars) | set(['xi_LW', 'xi_UV', 'xi_XR'])
+_bc_pars = _legacy_pars | set(['pop_fesc{2}', 'pop_rad_yield{1}'])
+
+# ...and those it can set, i.e., overwrite (prefixes only)
+_bc_targets = set(['pop_Tmin', 'pop_Mmin', 'pop_fstar', 'pop_fesc',
+    'pop_rad_yield', 'pop_rad_yield_units'])
+
+# Results of `_parse` for the most recently used sets of kwargs
+_compiled = []
+_max_compiled = 16
+
+# If more parameters than this have changed, just start from scratch
+_max_overrides = 32
+
+class CompiledParameterFile(object):
+    def __init__(self, pf, kwargs):
+        """
+        Snapshot of everything `_parse` figured out about a set of kwargs.
+
+        New parameter files that differ from this one in only a few
+        parameters can be built by patching up copies of the result, rather
+        than parsing all parameters again. This is what happens in model
+        grids and fits, and when simulation components build their own
+        parameter files from that of their parent.
+
+        Parameters
+        ----------
+        pf : ParameterFile
+            Freshly parsed parameter file.
+        kwargs : dict
+            Keyword arguments from which it was built.
+
+        """
+        self.kwargs = kwargs.copy()
+        self.master = dict(pf)
+        self.pfs = [poppf.copy() for poppf in pf.pfs]
+        self.pf_base = pf.pf_base
+        self.Npops = pf.Npops
+        self.links = pf._links
+        self.linked = pf._linked
+
+        # If so, `backward_compatibility` may overwrite some parameters
+        self.legacy = (self.master['problem_type'] == 101) \
+            or any([kwargs.get(par) is not None for par in _legacy_pars])
+
+    def targets(self, par, val):
+        """
+        Figure out where the value of parameter `par` will end up.
+
+        Returns
+        -------
+        List of (population ID number, parameter name) pairs, or None if
+        setting this parameter requires a proper parse, e.g., because it
+        changes the number of populations or how they're linked.
+
+        """
+
+        # String values may be links to other parameters
+        if isinstance(val, basestring) or (par == 'problem_type'):
+            return None
+
+        par = _bracketify_name(par)
+
+        if (par in self.linked) or par.startswith('php') \
+            or ('pop_yield' in par):
+            return None
+
+        if par in _legacy_pars:
+            return None
+
+        prefix, popid = pop_id_num(par)
+
+        if self.legacy and ((par in _bc_pars) or (prefix in _bc_targets)):
+            return None
+
+        if self.Npops == 1:
+            if popid is not None:
+                return None
+            targets = [(0, par)]
+        elif popid is None:
+            # Non-bracketed PQ parameters get removed in `update_pq_pars`
+            if (par not in defaults_pop_indep) or (par in _pq_defaults):
+                return None
+            targets = [(i, par) for i in range(self.Npops)]
+        elif popid < self.Npops:
+            targets = [(popid, prefix)]
+        else:
+            return None
+
+        # Can't replace strings, e.g., 'pq' would change the number of PQs
+        for i, name in targets:
+            if isinstance(self.pfs[i].get(name), basestring):
+                return None
+
+        return targets
+
+    def apply(self, overrides):
+        """
+        Set parameters in `overrides` and make sure links are respected.
+
+        Returns
+        -------
+        Tuple containing the master parameter file and list of parameter
+        files for each population, or None if we can't do this without
+        parsing everything from scratch.
+
+        """
+
+        targets = {}
+        for par in overrides:
+            targets[par] = self.targets(par, overrides[par])
+            if targets[par] is None:
+                return None
+
+        master = self.master.copy()
+        pfs = [poppf.copy() for poppf in self.pfs]
+
+        changed = set()
+        for par in overrides:
+            for i, name in targets[par]:
+                pfs[i][name] = overrides[par]
+                changed.add((i, name))
+
+        # Same procedure as in `_parse`
+        if any([(link[2], link[3]) in changed for link in self.links]):
+            for popid, name, popid_link, name_link, prefix_link in self.links:
+                if name_link not in pfs[popid_link]:
+                    val = defaults[prefix_link]
+                else:
+                    val = pfs[popid_link][name_link]
+
+                pfs[popid][name] = val
+                changed.add((popid, name))
+
+        for name in set([name for i, name in changed]):
+            for i, poppf in enumerate(pfs):
+                if name not in poppf:
+                    continue
+
+                if self.Npops > 1 and name in defaults_pop_dep:
+                    master['{0!s}{{{1}}}'.format(name, i)] = poppf[name]
+                else:
+                    master[name] = poppf[name]
+
+        return master, pfs
+
+def _compile(pf, kwargs):
+    compiled = CompiledParameterFile(pf, kwargs)
+
+    _compiled.append(compiled)
+    if len(_compiled) > _max_compiled:
+        del _compiled[0]
+
+    return compiled
+
+def _find_compiled(kwargs):
+    """
+    Yield compiled parameter files that differ from `kwargs` by adding or
+    changing only a few parameters, and the parameters that differ.
+    """
+    for compiled in _compiled[-1::-1]:
+        ckw = compiled.kwargs
+        if len(ckw) > len(kwargs):
+            continue
+
+        common = 0
+        overrides = {}
+        for par in kwargs:
+            val = kwargs[par]
+            if par in ckw:
+                common += 1
+                if (type(ckw[par]) is type(val)) and _is_same(ckw[par], val):
+                    continue
+
+            overrides[par] = val
+            if len(overrides) > _max_overrides:
+                break
+        else:
+            if common == len(ckw):
+                yield compiled, overrides
+
 class ParameterFile(dict):
     def __init__(self, **kwargs):
         """
@@ -309,8 +536,24 @@ class ParameterFile(dict):
         #        print "WARNING: {!s} is cosmological parameter.".format(par)
         #        print "       : Must update initial conditions and HMF tables!"
 
-        # Fix up everything
-        self._parse(**kwargs)
+        self._setup(_find_compiled(kwargs))
+
+    def _setup(self, candidates):
+        """
+        Build from the first compiled parameter file in `candidates` that
+        we can, or from scratch if there aren't any.
+        """
+
+        kwargs = self._kwargs
+
+        for compiled, overrides in candidates:
+            if self._load_compiled(compiled, overrides):
+                break
+        else:
+            # Fix up everything
+            self._parse(**kwargs)
+            self._compiled = _compile(self, kwargs)
+            self._overrides = {}
 
         # Check for stuff that'll break...stuff
         if self['debug']:
@@ -322,6 +565,63 @@ class ParameterFile(dict):
             #            print("WARNING: {!s} is an `orphan` parameter.".format(\
             #                key))
 
+    def __getstate__(self):
+        # Compiled parameter files are big, and only useful in this process
+        state = self.__dict__.copy()
+        state.pop('_compiled', None)
+        state.pop('_overrides', None)
+        return state
+
+    def _load_compiled(self, compiled, overrides):
+        parsed = compiled.apply(overrides)
+
+        if parsed is None:
+            return False
+
+        master, self.pfs = parsed
+        dict.update(self, master)
+
+        self.pf_base = compiled.pf_base
+        self._Npops = compiled.Npops
+        self._links = compiled.links
+        self._linked = compiled.linked
+        self._compiled = compiled
+        self._overrides = overrides
+
+        return True
+
+    def copy_with(self, **kwargs):
+        """
+        Create a new parameter file, identical to this one except for the
+        parameters in `kwargs`.
+
+        Equivalent to ``ParameterFile(**dict(pf._kwargs, **kwargs))``, so
+        changes made to this parameter file in place are *not* carried over.
+        Only parameters in `kwargs` get parsed, unless they change the
+        structure of the parameter file, e.g., the number of populations.
+        """
+
+        pf = ParameterFile.__new__(ParameterFile)
+        pf._kwargs = self._kwargs.copy()
+        pf._kwargs.update(kwargs)
+
+        if hasattr(self, '_compiled'):
+            overrides = self._overrides.copy()
+            overrides.update(kwargs)
+            pf._setup([(self._compiled, overrides)])
+        else:
+            pf._setup(_find_compiled(pf._kwargs))
+
+        return pf
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+
+        # Summaries of the contents may be stale now
+        for att in ['_Npqs', '_pqs', '_not_default']:
+            if hasattr(self, att):
+                delattr(self, att)
+
     @property
     def Npops(self):
         if not hasattr(self, '_Npops'):
@@ -369,6 +669,10 @@ class ParameterFile(dict):
 
         """
 
+        # Parameters linked to others, and how: see CompiledParameterFile
+        self._links = []
+        self._linked = set()
+
         # Start w/ problem specific parameters (always)
         if 'problem_type' not in kw:
             kw['problem_type'] = defaults['problem_type']
@@ -531,6 +835,10 @@ class ParameterFile(dict):
 
                 pfs_by_pop[popid][name] = val
 
+                self._links.append((popid, name, popid_link, name_link,
+                    prefix_link))
+                self._linked.add(par)
+
             # Save as attribute
             self.pfs = pfs_by_pop
 
@@ -11,8 +11,8 @@ Description:
 """
 
 import numpy as np
-import imp as _imp
-import os, re, sys, glob
+import os, re, sys, glob, hashlib
+from .Misc import load_module
 from .Pickling import read_pickle_file
 
 try:
@@ -29,6 +29,13 @@ except ImportError:
     
 HOME = os.environ.get('HOME')
 ARES = os.environ.get('ARES')
+
+# Where binary copies of big text tables (e.g., SPS models) are kept, and
+# how big that directory may get (in bytes) before the least recently used
+# tables are deleted.
+_cache_dir = os.environ.get('ARES_CACHE', 
+    '{!s}/.ares/cache'.format(HOME))
+_cache_max_bytes = int(float(os.environ.get('ARES_CACHE_MAX', 4e9)))
 sys.path.insert(1, '{!s}/input/litdata'.format(ARES))
 
 _lit_options = glob.glob('{!s}/input/litdata/*.py'.format(ARES))
@@ -36,10 +43,16 @@ lit_options = []
 for element in _lit_options:
     lit_options.append(element.split('/')[-1].replace('.py', ''))
 
-def read_lit(prefix, path=None, verbose=True):
+# Modules from the literature that have been loaded already, by file.
+_lit_registry = {}
+
+def read_lit(prefix, path=None, verbose=True, reload=False):
     """
     Read data from the literature.
     
+    .. note :: Each module is only executed once per process (unless the file
+        has been modified since), so treat its contents as read-only!
+    
     Parameters
     ----------
     prefix : str
@@ -47,6 +60,8 @@ def read_lit(prefix, path=None, verbose=True):
     path : str
         If you want to look somewhere besides $ARES/input/litdata, provide
         that path here.
+    reload : bool
+        If True, re-execute the module even if it has been loaded already.
 
     """
 
@@ -71,14 +86,145 @@ def read_lit(prefix, path=None, verbose=True):
         print("WARNING: multiple copies of {!s} found.".format(prefix))
         print("       : precedence: CWD -> $HOME -> $ARES/input/litdata")
 
-    _f, _filename, _data = _imp.find_module(prefix, [loc])
-    mod = _imp.load_module(prefix, _f, _filename, _data)
+    fn = os.path.abspath(os.path.join(loc, '{!s}.py'.format(prefix)))
+    mtime = os.path.getmtime(fn)
+    
+    if (not reload) and (fn in _lit_registry):
+        _mtime, mod = _lit_registry[fn]
+        if _mtime == mtime:
+            return mod
+
+    mod = load_module(prefix, loc)
     
     # Save this for sanity checks later
     mod.path = loc
     
+    _lit_registry[fn] = mtime, mod
+    
     return mod
     
+def _table_key(fn, loader, **kwargs):
+    """
+    Keys for the cached version of a table. The first identifies the file
+    and how it was read, the second the version of the file, based on its
+    modification time and size.
+    """
+    h = hashlib.md5()
+    h.update(os.path.abspath(fn).encode('utf-8'))
+    h.update(getattr(loader, '__module__', '').encode('utf-8'))
+    h.update(getattr(loader, '__name__', repr(loader)).encode('utf-8'))
+    for kw in sorted(kwargs.keys()):
+        h.update('{0!s}={1!r}'.format(kw, kwargs[kw]).encode('utf-8'))
+    
+    st = os.stat(fn)
+    v = hashlib.md5('{0!r}:{1}'.format(st.st_mtime, st.st_size).encode('utf-8'))
+        
+    return h.hexdigest(), v.hexdigest()
+    
+def _prune_cache(keep, stale):
+    """
+    Delete cached tables other than `keep` whose names start with `stale`
+    (i.e., old versions of the same table), then the least recently used
+    ones until the cache is no bigger than _cache_max_bytes.
+    """
+    
+    entries = []
+    for name in os.listdir(_cache_dir):
+        if not name.endswith('.npy'):
+            continue
+        
+        cfn = os.path.join(_cache_dir, name)
+        try:
+            if name.startswith(stale) and (cfn != keep):
+                os.remove(cfn)
+            else:
+                st = os.stat(cfn)
+                entries.append((st.st_mtime, st.st_size, cfn))
+        except OSError:
+            # Somebody else got to it first
+            pass
+    
+    total = sum([entry[1] for entry in entries])
+    for mtime, size, cfn in sorted(entries):
+        if total <= _cache_max_bytes:
+            break
+        try:
+            os.remove(cfn)
+        except OSError:
+            pass
+        total -= size
+
+def read_table(fn, loader=np.loadtxt, cache=True, **kwargs):
+    """
+    Read a text file into an array, using a binary copy if we've seen it.
+    
+    The first time a file is read (in any process), the array returned by 
+    `loader` is saved in .npy format in $ARES_CACHE (or $HOME/.ares/cache). 
+    Afterward, it is memory-mapped from there, which is much faster than 
+    parsing the text file, especially for the large SED tables that come 
+    with stellar population synthesis models. Copies are re-made if the
+    file's modification time or size change. Once the cache is bigger than
+    $ARES_CACHE_MAX bytes (default: 4 GB), the least recently used tables
+    are deleted.
+    
+    Parameters
+    ----------
+    fn : str
+        Full path to file.
+    loader : function
+        Function that reads the file, called as loader(fn, **kwargs). 
+        Must return an array.
+    cache : bool
+        If False, don't read or write cached copies.
+    
+    Returns
+    -------
+    Array read in by `loader`, which is read-only if it came from the cache.
+    
+    """
+    
+    if not cache:
+        return loader(fn, **kwargs)
+        
+    src, ver = _table_key(fn, loader, **kwargs)
+    prefix = '{0!s}.{1!s}.'.format(os.path.basename(fn), src)
+    cfn = os.path.join(_cache_dir, '{0!s}{1!s}.npy'.format(prefix, ver))
+        
+    if os.path.exists(cfn):
+        try:
+            data = np.load(cfn, mmap_mode='r')
+        except (IOError, OSError, ValueError):
+            pass
+        else:
+            # Mark as recently used, so it's the last to go
+            try:
+                os.utime(cfn, None)
+            except OSError:
+                pass
+            return data
+        
+    data = loader(fn, **kwargs)
+    
+    # Can't memory-map arrays of objects (e.g., ragged rows)
+    if np.asarray(data).dtype == object:
+        return data
+    
+    # Write to a temporary file first so nobody reads a partial table
+    tmp = '{0!s}.{1}.{2}.tmp'.format(cfn, os.getpid(), rank)
+    try:
+        if not os.path.exists(_cache_dir):
+            os.makedirs(_cache_dir)
+        with open(tmp, 'wb') as f:
+            np.save(f, np.asarray(data))
+        os.rename(tmp, cfn)
+        _prune_cache(cfn, prefix)
+    except (IOError, OSError):
+        # Not the end of the world: just parse the file next time.
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        
+    return data
+    
 def flatten_energies(E):
     """
     Take fluxes sorted by band and flatten to single energy dimension.
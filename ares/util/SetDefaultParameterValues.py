@@ -9,7 +9,7 @@ Description: Defaults for all different kinds of parameters.
 
 """
 
-import os, imp
+import os
 import numpy as np
 from ares import rcParams
 from ..physics.Constants import m_H, cm_per_kpc, s_per_myr, E_LL
@@ -273,6 +273,16 @@ def PhysicsParameters():
     'feedback_LW_guesses_from': None,
     'feedback_LW_guesses_perfect': False,
 
+    # Convergence acceleration: None, 'anderson', or 'secant'. Replaces
+    # softening and mixup (above) if used.
+    'feedback_LW_accel': None,
+    'feedback_LW_accel_depth': 3,
+    'feedback_LW_accel_damping': 1.0,
+
+    # Start from Mmin(z) of the last converged model run by this process,
+    # e.g., the previous step in an MCMC.
+    'feedback_LW_warm_start': False,
+
     # Assume that uniform background only emerges gradually as
     # the typical separation of halos becomes << Hubble length
     "feedback_LW_ramp": 0,
@@ -434,6 +444,10 @@ def PowerSpectrumParameters():
 
      'ps_include_lya_lc': False,
 
+     # Compute power spectra at many redshifts in parallel?
+     'ps_num_workers': 1,
+     'ps_worker_type': 'process', # or 'thread'
+
      "ps_volfix": True,
 
      "ps_rescale_Qlya": False,
@@ -1320,6 +1334,10 @@ def ControlParameters():
 
     "save_rate_coefficients": 1,
 
+    # Only save these quantities (e.g., those needed by blobs) in the
+    # history of a simulation. If None, saves everything.
+    "history_fields": None,
+
     "optically_thin": 0,
 
     # Solvers
@@ -1372,6 +1390,7 @@ def ControlParameters():
     "blob_ivars": None,
     "blob_funcs": None,
     "blob_kwargs": {},
+    "blob_vectorized": None,
 
     # Real-time optical depth calculation once EoR begins
     "EoR_xavg": 1.0,        # ionized fraction indicating start of EoR (OFF by default)
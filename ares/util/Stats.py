@@ -504,3 +504,216 @@ def bin_samples(x, y, xbin_c, weights=None, limits=False, percentile=None,
             method_std='std', inclusive=inclusive)            
          
 
+
+class StreamingQuantiles(object):
+    def __init__(self, q, buffer_size=100000):
+        """
+        Quantiles of many samples, accumulated a chunk at a time.
+
+        Rows of the input are samples, and each column (e.g., each value of
+        the independent variable of a blob) is treated separately. Until
+        more than `buffer_size` rows have been added, we just hold onto all
+        of them, so the results are exact (identical to np.percentile).
+        Past that point, whenever the buffer fills up, each column is
+        compressed to `buffer_size` // 2 equally-weighted points, so memory
+        use is fixed no matter how many samples there are. The error in the
+        rank of each quantile is then of order 2 N / buffer_size**2 (as a
+        fraction of the number of samples, N).
+
+        Parameters
+        ----------
+        q : int, float, list, np.ndarray
+            Percentile(s) of interest, in [0, 100] as for np.percentile.
+        buffer_size : int
+            Maximum number of rows to hold onto.
+
+        """
+        self.q = np.atleast_1d(q)
+        self.buffer_size = max(int(buffer_size), 2)
+        self.exact = True
+        self.N = 0
+
+        self._vals = []
+        self._wts = []
+        self._rows = 0
+        self._ndim = None
+
+    def update(self, data):
+        """
+        Add samples. If 2-D, `data` should have shape (samples, columns).
+        """
+
+        data = np.array(data, dtype=float)
+
+        if self._ndim is None:
+            self._ndim = data.ndim
+
+        if data.ndim == 1:
+            data = data[:,None]
+
+        if data.shape[0] == 0:
+            return
+
+        self._vals.append(data)
+        self._wts.append(np.ones(data.shape[0]))
+        self._rows += data.shape[0]
+        self.N += data.shape[0]
+
+        if self._rows > self.buffer_size:
+            self._compress()
+
+    def _sorted(self):
+        """
+        Return samples sorted in each column and their cumulative weights.
+        """
+        vals = np.concatenate(self._vals)
+        wts = np.concatenate(self._wts)
+
+        order = np.argsort(vals, axis=0)
+        cols = np.arange(vals.shape[1])
+
+        return vals[order,cols], np.cumsum(wts[order], axis=0), wts[order]
+
+    def _compress(self):
+        svals, cw, sw = self._sorted()
+
+        # Replace with values at the middle of `m` chunks of equal weight
+        m = self.buffer_size // 2
+        W = cw[-1,0]
+        target = (np.arange(m) + 0.5) * W / m
+
+        new = np.zeros((m, svals.shape[1]))
+        for j in range(svals.shape[1]):
+            k = np.searchsorted(cw[:,j], target)
+            new[:,j] = svals[np.minimum(k, svals.shape[0] - 1),j]
+
+        self._vals = [new]
+        self._wts = [np.ones(m) * W / m]
+        self._rows = m
+        self.exact = False
+
+    def get(self):
+        """
+        Return quantiles, with shape (len(q), columns) for 2-D input.
+        """
+
+        if self.N == 0:
+            raise ValueError('No samples yet!')
+
+        if self.exact:
+            out = np.percentile(np.concatenate(self._vals), self.q, axis=0)
+        else:
+            svals, cw, sw = self._sorted()
+            W = cw[-1,0]
+
+            # Rank (CDF) at the middle of each point
+            rank = (cw - 0.5 * sw) / W
+
+            out = np.zeros((self.q.size, svals.shape[1]))
+            for j in range(svals.shape[1]):
+                out[:,j] = np.interp(self.q / 100., rank[:,j], svals[:,j])
+
+        if self._ndim == 1:
+            out = out[:,0]
+
+        return out
+
+def bin_all_pairs(data, bins, pairs=None, weights=None):
+    """
+    Histogram samples of several quantities in 1-D and in pairs, at once.
+
+    Each quantity is only binned once, after which every 2-D histogram is a
+    matter of counting pairs of bin indices. This is much cheaper than
+    calling np.histogram2d for each pair separately.
+
+    Parameters
+    ----------
+    data : list
+        Samples of each quantity, i.e., 1-D arrays of the same length.
+        Masked and non-finite elements are ignored.
+    bins : list
+        Bin edges for each quantity. As in np.histogram, samples outside
+        the edges are ignored, and the last bin includes its right edge.
+    pairs : list
+        Pairs of indices (into `data`) to be histogrammed in 2-D. By default,
+        will do all (i, j) with i < j.
+    weights : np.ndarray
+        [optional] Weight of each sample.
+
+    Returns
+    -------
+    Tuple: (list of 1-D histograms, dictionary of 2-D histograms keyed by
+    pairs of indices). 2-D histograms have the same shape as the output of
+    np.histogram2d, i.e., (len(bins[i]) - 1, len(bins[j]) - 1).
+
+    """
+
+    if pairs is None:
+        pairs = [(i, j) for i in range(len(data)) \
+            for j in range(i + 1, len(data))]
+
+    ind = []
+    ok = []
+    for k, x in enumerate(data):
+        edges = np.asarray(bins[k])
+        good = np.logical_not(np.ma.getmaskarray(x))
+        x = np.asarray(np.ma.getdata(x), dtype=float)
+
+        i = np.searchsorted(edges, x, side='right') - 1
+        i[x == edges[-1]] = edges.size - 2
+
+        good &= (i >= 0) & (i < edges.size - 1)
+
+        ind.append(i)
+        ok.append(good)
+
+    hist1d = []
+    for k, i in enumerate(ind):
+        w = None if weights is None else weights[ok[k]]
+        hist1d.append(np.bincount(i[ok[k]], weights=w,
+            minlength=len(bins[k]) - 1).astype(float))
+
+    hist2d = {}
+    for (i, j) in pairs:
+        both = ok[i] & ok[j]
+        nx, ny = len(bins[i]) - 1, len(bins[j]) - 1
+        w = None if weights is None else weights[both]
+        h = np.bincount(ind[i][both] * ny + ind[j][both], weights=w,
+            minlength=nx * ny)
+        hist2d[(i, j)] = np.reshape(h, (nx, ny)).astype(float)
+
+    return hist1d, hist2d
+
+def smooth_fft(hist, width):
+    """
+    Smooth a (1-D or 2-D) histogram with a Gaussian kernel via FFT.
+
+    Applied to finely-binned samples, this is a fast, binned approximation
+    to a kernel density estimate.
+
+    Parameters
+    ----------
+    hist : np.ndarray
+        Histogram.
+    width : int, float, list
+        Standard deviation of the kernel in units of bins. Can supply one
+        value per dimension.
+
+    """
+
+    from scipy.signal import fftconvolve
+
+    width = np.ones(hist.ndim) * width
+
+    kernel = np.ones([1] * hist.ndim)
+    for k, sigma in enumerate(width):
+        n = int(np.ceil(4 * sigma))
+        x = np.arange(-n, n + 1)
+        shape = [1] * hist.ndim
+        shape[k] = x.size
+        kernel = kernel * np.exp(-0.5 * x**2 / sigma**2).reshape(shape)
+
+    kernel /= kernel.sum()
+
+    # FFT round-off can produce tiny negative values
+    return np.maximum(fftconvolve(hist, kernel, mode='same'), 0.0)
@@ -12,7 +12,6 @@ Description:
 
 import re
 import os
-import copy
 import numpy as np
 from ..physics.Constants import c
 from ..physics.Cosmology import Cosmology
@@ -27,6 +26,12 @@ nanoJ = 1e-23 * 1e-9
 
 _path = os.environ.get('ARES') + '/input'
 
+# Filter throughputs are read from disk once per process, no matter how many
+# Survey objects there are. Files in each directory are indexed by path, 
+# and filter properties by (camera, path, filter, force_perfect).
+_filter_files = {}
+_filter_registry = {}
+
 class Survey(object):
     def __init__(self, cam='nircam', mod='modA', chip=1, force_perfect=False,
         cache={}):
@@ -128,6 +133,69 @@ class Survey(object):
             
         return ax
     
+    def get_filter(self, filt):
+        """
+        Return properties of a single filter.
+        
+        Returns
+        -------
+        Tuple containing wavelengths [microns], transmission, mean 
+        wavelength [microns], (red, blue) width [microns], and average
+        transmission.
+        
+        """
+        key = (self.camera, self.path, filt, self.force_perfect)
+        
+        if key in _filter_registry:
+            return _filter_registry[key]
+            
+        data = self._read_throughputs(filter_set=None, filters=[filt])
+        
+        if filt not in data:
+            raise KeyError('No filter {} for camera {}.'.format(filt,
+                self.camera))
+        
+        return data[filt]
+    
+    def _listdir(self, path):
+        if path not in _filter_files:
+            _filter_files[path] = os.listdir(path)
+        return _filter_files[path]
+        
+    def _load_filter(self, pre, fn, cent, units=1., **kwargs):
+        """
+        Read throughput of filter `pre` from file `fn` (unless some Survey
+        has already done so), and compute its properties.
+        
+        Parameters
+        ----------
+        units : int, float
+            Wavelengths in file are divided by this to convert to microns.
+        kwargs : dict
+            Passed to np.loadtxt. The last two columns must be wavelength 
+            and transmission.
+            
+        """
+        key = (self.camera, self.path, pre, self.force_perfect)
+        
+        if key not in _filter_registry:
+            cols = np.loadtxt(fn, unpack=True, **kwargs)
+            x, y = cols[-2], cols[-1]
+            if units != 1:
+                x = x / units
+                
+            _filter_registry[key] = self._get_filter_prop(x, y, cent)
+            
+            # Shared by every Survey in this process, so don't let anyone
+            # modify it in place.
+            for element in _filter_registry[key]:
+                if isinstance(element, np.ndarray):
+                    element.setflags(write=False)
+            
+        self._filter_cache[pre] = _filter_registry[key]
+            
+        return _filter_registry[key]
+
     def _read_throughputs(self, filter_set='W', filters=None):
         
         if ((self.camera, None, 'all') in self.cache) and (filters is not None):
@@ -170,7 +238,7 @@ class Survey(object):
                 filter_set = [filter_set]
 
         data = {}
-        for fn in os.listdir(self.path):
+        for fn in self._listdir(self.path):
                     
             pre = fn.split('_')[0]
                 
@@ -187,12 +255,8 @@ class Survey(object):
                 cent = float('{}.{}'.format(num[0], num[1:]))    
                 
                 # Wavelength [micron], transmission
-                x, y = np.loadtxt('{}/{}'.format(self.path, fn), unpack=True, 
-                    skiprows=1)
-                
-                data[pre] = self._get_filter_prop(x, y, cent)
-                
-                self._filter_cache[pre] = copy.deepcopy(data[pre])
+                data[pre] = self._load_filter(pre, 
+                    '{}/{}'.format(self.path, fn), cent, skiprows=1)
             
             elif filter_set is not None:
                 
@@ -215,12 +279,8 @@ class Survey(object):
                     cent = float('{}.{}'.format(pre[1], pre[2:k]))
                     
                     # Wavelength [micron], transmission
-                    x, y = np.loadtxt('{}/{}'.format(self.path, fn), unpack=True, 
-                        skiprows=1)
-                    
-                    data[pre] = self._get_filter_prop(x, y, cent)
-                    
-                    self._filter_cache[pre] = copy.deepcopy(data[pre])
+                    data[pre] = self._load_filter(pre, 
+                        '{}/{}'.format(self.path, fn), cent, skiprows=1)
         
         return data   
         
@@ -250,7 +310,7 @@ class Survey(object):
                 filter_set = [filter_set]    
             
         data = {}
-        for fn in os.listdir(self.path):
+        for fn in self._listdir(self.path):
             
             # Mac OS creates a bunch of ._wfc_* files. Argh.
             if not fn.startswith('wfc_'):
@@ -269,13 +329,10 @@ class Survey(object):
                     
                 cent = float('0.{}'.format(pre[1:4]))
                 
-                x, y = np.loadtxt('{}/{}'.format(self.path, fn), 
-                    unpack=True, skiprows=1)
-                                            
                 # Convert wavelengths from nanometers to microns
-                data[pre] = self._get_filter_prop(x / 1e4, y, cent)
-            
-                self._filter_cache[pre] = copy.deepcopy(data[pre])    
+                data[pre] = self._load_filter(pre, 
+                    '{}/{}'.format(self.path, fn), cent, units=1e4, 
+                    skiprows=1)
             
             elif filter_set is not None:
                 for _filters in filter_set:
@@ -292,13 +349,10 @@ class Survey(object):
                     k = pre.rfind(_filters)
                     cent = float('0.{}'.format(pre[1:k]))
                     
-                    x, y = np.loadtxt('{}/{}'.format(self.path, fn), 
-                        unpack=True, skiprows=1)
-                                                
                     # Convert wavelengths from nanometers to microns
-                    data[pre] = self._get_filter_prop(x / 1e4, y, cent)
-                
-                    self._filter_cache[pre] = copy.deepcopy(data[pre])
+                    data[pre] = self._load_filter(pre, 
+                        '{}/{}'.format(self.path, fn), cent, units=1e4, 
+                        skiprows=1)
         
         return data    
                  
@@ -318,7 +372,7 @@ class Survey(object):
                 filter_set = [filter_set]    
             
         data = {}
-        for fn in os.listdir(self.path+'/IR'):
+        for fn in self._listdir(self.path+'/IR'):
                     
             pre = fn.split('_IR_throughput')[0]        
 
@@ -331,13 +385,10 @@ class Survey(object):
                     
                 cent = float('{}.{}'.format(pre[1], pre[2:-1]))    
                     
-                _i, x, y = np.loadtxt('{}/IR/{}'.format(self.path, fn), 
-                    unpack=True, skiprows=1, delimiter=',')
-                    
                 # Convert wavelengths from Angstroms to microns
-                data[pre] = self._get_filter_prop(x / 1e4, y, cent)
-            
-                self._filter_cache[pre] = copy.deepcopy(data[pre])    
+                data[pre] = self._load_filter(pre, 
+                    '{}/IR/{}'.format(self.path, fn), cent, units=1e4, 
+                    skiprows=1, delimiter=',')
                     
                         
             elif filter_set is not None:
@@ -356,13 +407,10 @@ class Survey(object):
                     # string identifier.    
                     cent = float('{}.{}'.format(pre[1], pre[2:-1]))
                     
-                    _i, x, y = np.loadtxt('{}/IR/{}'.format(self.path, fn), 
-                        unpack=True, skiprows=1, delimiter=',')
-                                
                     # Convert wavelengths from Angstroms to microns
-                    data[pre] = self._get_filter_prop(x / 1e4, y, cent)
-                
-                    self._filter_cache[pre] = copy.deepcopy(data[pre])
+                    data[pre] = self._load_filter(pre, 
+                        '{}/IR/{}'.format(self.path, fn), cent, units=1e4, 
+                        skiprows=1, delimiter=',')
 
         return data
 
@@ -371,10 +419,7 @@ class Survey(object):
             self._filter_cache = {}
             
         data = {}
-        for fn in os.listdir(self.path):
-            x, y = np.loadtxt('{}/{}'.format(self.path, fn), unpack=True,
-                skiprows=1)
-                
+        for fn in self._listdir(self.path):
             if 'ch1' in fn:
                 cent = 3.6
                 pre = 'ch1'
@@ -384,9 +429,8 @@ class Survey(object):
             else:
                 raise ValueError('Unrecognized IRAC file: {}'.format(fn))
                 
-            data[pre] = self._get_filter_prop(x, y, cent)
-        
-            self._filter_cache[pre] = copy.deepcopy(data[pre])
+            data[pre] = self._load_filter(pre, '{}/{}'.format(self.path, fn),
+                cent, skiprows=1)
             
         return data    
 
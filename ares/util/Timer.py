@@ -0,0 +1,194 @@
+"""
+
+Timer.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 17:24:05 PDT 2026
+
+Description: A lightweight registry of wall-clock timers with nested, named
+scopes, so we can see where time goes in a simulation without resorting to
+cProfile.
+
+"""
+
+import time
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+# Python 2 doesn't have perf_counter
+_clock = getattr(time, 'perf_counter', time.time)
+
+class TimerRegistry(object):
+    """
+    Accumulate time spent in named scopes.
+
+    Scopes nest, and are identified by their full path, e.g., time spent
+    computing the optical depth during a global signal calculation would be
+    stored as 'gs21cm/mgb/tau'. Usage:
+
+    .. code-block:: python
+
+        with timers('hmf'):
+            do_something()
+
+        with timers.record() as breakdown:
+            do_something_else()
+
+    Each thread has its own stack of scopes.
+
+    """
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+        self._local = threading.local()
+
+    @property
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @property
+    def _records(self):
+        if not hasattr(self._local, 'records'):
+            self._local.records = []
+        return self._local.records
+
+    @contextmanager
+    def __call__(self, name):
+        """
+        Time everything within this scope.
+        """
+        stack = self._stack
+        stack.append(name)
+
+        t1 = _clock()
+        try:
+            yield
+        finally:
+            dt = _clock() - t1
+
+            path = '/'.join(stack)
+            self.totals[path] = self.totals.get(path, 0.0) + dt
+            self.counts[path] = self.counts.get(path, 0) + 1
+
+            # Paths within records are relative to where recording began
+            for start, breakdown in self._records:
+                key = '/'.join(stack[start:])
+                breakdown[key] = breakdown.get(key, 0.0) + dt
+
+            stack.pop()
+
+    @contextmanager
+    def record(self):
+        """
+        Collect a breakdown of time spent in all scopes entered from within
+        this one.
+
+        Returns
+        -------
+        Dictionary of total time (in seconds) spent in each scope, keyed by
+        path. It's filled in as we go.
+
+        """
+        breakdown = {}
+        entry = (len(self._stack), breakdown)
+        self._records.append(entry)
+
+        try:
+            yield breakdown
+        finally:
+            self._records.remove(entry)
+
+    def reset(self):
+        self.totals.clear()
+        self.counts.clear()
+
+    def report(self, breakdown=None):
+        """
+        Print (hierarchical) breakdown of time spent in each scope.
+
+        Parameters
+        ----------
+        breakdown : dict
+            Result of `record`, e.g., the `timing` attribute of simulations.
+            If None, will print totals accumulated across all runs.
+
+        """
+
+        if breakdown is None:
+            breakdown = self.totals
+
+        for path in sorted(breakdown.keys()):
+            depth = path.count('/')
+            name = path.split('/')[-1]
+            print('{0}{1:<{2}} {3:10.4f} s'.format('  ' * depth, name,
+                30 - 2 * depth, breakdown[path]))
+
+# Always available
+timers = TimerRegistry()
+
+def timed(name, save_as=None):
+    """
+    Decorator that times every call to a function (or method) as a scope.
+
+    Parameters
+    ----------
+    name : str
+        Name of scope.
+    save_as : str
+        If supplied, will save the breakdown of time spent during each call
+        (including all nested scopes) to an attribute of this name. Only
+        applies to methods.
+
+    .. note :: Don't use this on generators! We'd only time the creation
+        of the generator, not its iteration.
+
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if save_as is None:
+                with timers(name):
+                    return func(*args, **kwargs)
+
+            with timers.record() as breakdown:
+                with timers(name):
+                    result = func(*args, **kwargs)
+
+            setattr(args[0], save_as, breakdown)
+
+            return result
+        return wrapper
+    return decorator
+
+def get_timing(breakdown, stage=None):
+    """
+    Total time spent in a given stage of a calculation.
+
+    Parameters
+    ----------
+    breakdown : dict
+        Result of `TimerRegistry.record`.
+    stage : str
+        Name of scope. We'll add up the time spent in all scopes with this
+        name, no matter where they sit in the hierarchy, being careful not
+        to double count scopes nested within themselves. If None, returns
+        total time spent in all top-level scopes.
+
+    """
+
+    total = 0.0
+    for path, dt in breakdown.items():
+        names = path.split('/')
+
+        if stage is None:
+            if len(names) == 1:
+                total += dt
+        elif (names[-1] == stage) and (stage not in names[0:-1]):
+            total += dt
+
+    return total
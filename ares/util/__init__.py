@@ -8,9 +8,14 @@ from ares.util.Aesthetics import labels
 from ares.util.WriteData import CheckPoints
 from ares.util.BlobBundles import BlobBundle
 from ares.util.ProgressBar import ProgressBar
+from ares.util.Timer import timers, timed
 from ares.util.ParameterFile import ParameterFile
 from ares.util.ReadData import read_lit, lit_options
 from ares.util.MagnitudeSystem import MagnitudeSystem
 from ares.util.ParameterBundles import ParameterBundle
 from ares.util.RestrictTimestep import RestrictTimestep
 from ares.util.Misc import get_hash, get_cmd_line_kwargs
+
+def __getattr__(name):
+    from .. import _import_submodule
+    return _import_submodule(__name__, name)
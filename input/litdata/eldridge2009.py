@@ -13,6 +13,7 @@ import numpy as np
 from scipy.interpolate import interp1d
 from ares.physics.Constants import h_p, c, erg_per_ev, g_per_msun, s_per_yr, \
     s_per_myr, m_H, Lsun
+from ares.util.ReadData import read_table
 
 _input = os.getenv('ARES') + '/input/bpass_v1/SEDS'
 _input2 = os.getenv('ARES') + '/input/bpass_v1_stars/'
@@ -100,10 +101,10 @@ def _load(**kwargs):
     else:        
         fn = _fn = _kwargs_to_fn(**kwargs)
                 
-        _raw_data = np.loadtxt(fn)
+        _raw_data = read_table(fn)
                 
         data = np.array(_raw_data[:,1:])
-        wavelengths = _raw_data[:,0]
+        wavelengths = np.array(_raw_data[:,0])
 
         data *= Lsun
         
@@ -130,7 +131,7 @@ def _load_tracks(**kwargs):
         m = float(fn.split(prefix)[1][1:])
         masses.append(m)
         
-        raw = np.loadtxt(_input2 + '/' + fn, unpack=True)
+        raw = read_table(_input2 + '/' + fn, unpack=True)
         
         all_data[m] = {}
         all_data[m]['t'] = raw[0]
@@ -15,6 +15,7 @@ from scipy.integrate import cumtrapz
 from scipy.interpolate import interp1d, RectBivariateSpline
 from ares.physics.Constants import h_p, c, erg_per_ev, g_per_msun, s_per_yr, \
     s_per_myr, m_H
+from ares.util.ReadData import read_table
 
 _input = os.getenv('ARES') + '/input/starburst99/data'
 
@@ -57,7 +58,11 @@ def _reader(fn, skip=3, dtype=float):
         
     """
 
-    f = open('{0!s}/{1!s}'.format(_input, fn), 'r')
+    return read_table('{0!s}/{1!s}'.format(_input, fn), loader=_parse,
+        skip=skip, dtype=dtype)
+
+def _parse(fn, skip=3, dtype=float):
+    f = open(fn, 'r')
 
     data = []
     for i, line in enumerate(f):
@@ -66,6 +71,8 @@ def _reader(fn, skip=3, dtype=float):
 
         data.append(list(map(dtype, line.split())))
 
+    f.close()
+
     return np.array(data)
 
 def _fignum_to_figname():
@@ -166,14 +173,14 @@ def _load(**kwargs):
         data_3d = np.array(data)
         
         # Same for all metallicities
-        wavelengths = _data[:,0]
+        wavelengths = np.array(_data[:,0])
                  
         data = 10**data_3d
                     
     else:        
         fn = _fn = _figure_name(**kwargs)
         _raw_data = _reader(fn)
-        wavelengths = _raw_data[:,0]
+        wavelengths = np.array(_raw_data[:,0])
         data = 10**_raw_data[:,1:]
         
     return wavelengths, data, _fn
@@ -0,0 +1,268 @@
+"""
+
+benchmarks.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 18:02:37 PDT 2026
+
+Description: Benchmarks for the hot paths in ARES. Run them with
+run_benchmarks.py.
+
+Each benchmark does its setup (anything we *don't* want to time) and returns
+a function that does the work we do want to time. Setup happens anew before
+each repetition, but some results are cached at the module level (or on disk)
+and would otherwise survive it, so run_benchmarks.py calls clear_caches
+before each repetition unless told to time warm caches (--warm). All
+inputs are fixed, and nothing is downloaded, so results only depend on the
+code, the machine, and the contents of $ARES/input.
+
+"""
+
+import shutil
+import tempfile
+import importlib
+import numpy as np
+from collections import OrderedDict
+
+import ares
+from ares.util import ReadData
+
+# Applied to all benchmarks, e.g., to change the cosmology everywhere.
+base_pars = {'verbose': False, 'progress_bar': False}
+
+benchmarks = OrderedDict()
+
+def benchmark(name, repeat=3, ops=1):
+    """
+    Register a benchmark.
+
+    Parameters
+    ----------
+    name : str
+        Name of benchmark, used on the command line and in output.
+    repeat : int
+        Default number of times to run it.
+    ops : int
+        Number of 'operations' done each time, e.g., the number of models
+        in a grid, so that we can report throughput.
+
+    """
+    def decorator(func):
+        func.repeat = repeat
+        func.ops = ops
+        benchmarks[name] = func
+        return func
+    return decorator
+
+# Module-level caches that outlive the objects that filled them.
+_caches = \
+[
+ ('ares.util.ParameterFile', '_compiled'),
+ ('ares.util.ReadData', '_lit_registry'),
+ ('ares.util.Survey', '_filter_files'),
+ ('ares.util.Survey', '_filter_registry'),
+ ('ares.static.Fluctuations', '_volume_cache'),
+ ('ares.simulations.MetaGalacticBackground', '_warm_start'),
+]
+
+# Where ReadData.read_table puts its binary copies of tables while
+# benchmarks run with cold caches.
+_table_cache = {'default': ReadData._cache_dir, 'tmp': None}
+
+def clear_caches():
+    """
+    Empty all caches that could make a repetition faster than the first.
+
+    Binary copies of text tables made by ReadData.read_table are put in a
+    fresh temporary directory, so that tables are parsed again.
+    """
+    for name, attr in _caches:
+        cache = getattr(importlib.import_module(name), attr)
+        if isinstance(cache, dict):
+            cache.clear()
+        else:
+            del cache[:]
+
+    if _table_cache['tmp'] is not None:
+        shutil.rmtree(_table_cache['tmp'], ignore_errors=True)
+
+    _table_cache['tmp'] = tempfile.mkdtemp()
+    ReadData._cache_dir = _table_cache['tmp']
+
+def restore_caches():
+    """
+    Go back to the usual place for binary copies of tables.
+    """
+    if _table_cache['tmp'] is not None:
+        shutil.rmtree(_table_cache['tmp'], ignore_errors=True)
+        _table_cache['tmp'] = None
+
+    ReadData._cache_dir = _table_cache['default']
+
+def _pars(**kwargs):
+    pars = base_pars.copy()
+    pars.update(kwargs)
+    return pars
+
+##
+# X-ray background from power-law sources, as in test_solvers_crte_xrb.py.
+# Doesn't need the HMF.
+_xrb_pars = \
+{
+ 'pop_sfr_model': 'sfrd-func',
+ 'pop_sfrd': lambda z: 0.1 * (1. + z)**-6.,
+ 'pop_sfrd_units': 'msun/yr/mpc^3',
+ 'pop_sed': 'pl',
+ 'pop_alpha': -2.,
+ 'pop_Emin': 2e2,
+ 'pop_Emax': 3e4,
+ 'pop_EminNorm': 2e2,
+ 'pop_EmaxNorm': 3e4,
+ 'pop_logN': -np.inf,
+ 'pop_solve_rte': True,
+ 'tau_redshift_bins': 400,
+ 'initial_redshift': 40.,
+ 'final_redshift': 10.,
+}
+
+@benchmark('gs21cm')
+def bench_gs21cm():
+    """
+    Default global 21-cm signal model, from start to finish.
+    """
+
+    pars = _pars()
+
+    def run():
+        sim = ares.simulations.Global21cm(**pars)
+        sim.run()
+
+    return run
+
+@benchmark('mgb')
+def bench_mgb():
+    """
+    Solve the cosmological RTE for an X-ray background.
+    """
+
+    pars = _pars(**_xrb_pars)
+
+    def run():
+        mgb = ares.simulations.MetaGalacticBackground(**pars)
+        mgb.run()
+
+    return run
+
+@benchmark('tau')
+def bench_tau():
+    """
+    Tabulate the IGM optical depth for a neutral H+He IGM.
+    """
+
+    pars = _pars(**_xrb_pars)
+    pars.update({'tau_Emin': 2e2, 'tau_Emax': 3e4, 'tau_redshift_bins': 100,
+        'include_He': True, 'approx_He': True})
+
+    igm = ares.solvers.OpticalDepth(**pars)
+    igm.ionization_history = lambda z: 0.0
+
+    return igm.TabulateOpticalDepth
+
+@benchmark('rate_integrals')
+def bench_rate_integrals():
+    """
+    Tabulate the integrals in the rate equations for a ray segment, on a
+    fine grid in column density.
+    """
+
+    sim = ares.simulations.RaySegment(**_pars(problem_type=2,
+        tables_dlogN=[0.01]))
+    src = sim.field.sources[0]
+
+    def run():
+        tab = ares.static.IntegralTable(src.pf, src, sim.grid)
+        tab.TabulateRateIntegrals()
+
+    return run
+
+@benchmark('trajectories')
+def bench_trajectories():
+    """
+    Evolve galaxies through halo mass accretion histories (Mirocha+ 2017).
+    """
+
+    pars = ares.util.ParameterBundle('mirocha2017:base').pars_by_pop(0, 1)
+    pars.update(base_pars)
+
+    pop = ares.populations.GalaxyPopulation(**pars)
+
+    # Don't want to time reading the HMF table.
+    pop.halos.tab_dndm
+
+    return pop.Trajectories
+
+@benchmark('synthesis')
+def bench_synthesis():
+    """
+    Synthesize UV luminosities for a batch of 1000 galaxies with noisy
+    star formation histories, using a toy SPS model.
+    """
+
+    toy = ares.sources.SynthesisModelToy(source_dlam=10., source_lmin=1e3,
+        source_lmax=3e3, source_toysps_beta=-2, source_toysps_alpha=8.,
+        source_ssp=True, source_aging=True, **base_pars)
+
+    ss = ares.static.SpectralSynthesis(**base_pars)
+    ss.src = toy
+
+    tarr = np.arange(1., 1000, 1.)
+    sfh = 10**np.random.normal(0., 0.3, size=(1000, tarr.size))
+
+    def run():
+        ss.Luminosity(wave=1600., sfh=sfh, tarr=tarr, load=False,
+            use_cache=False)
+
+    return run
+
+@benchmark('correlation_function')
+def bench_correlation_function():
+    """
+    Correlation function of the ionization field at a single redshift.
+    """
+
+    fluct = ares.static.Fluctuations(**_pars())
+    fluct.halos.tab_dndm
+    fluct.tab_Mmin = 1e8
+    fluct.zeta = 40.
+
+    def run():
+        fluct.CorrelationFunction(10., term='ii')
+
+    return run
+
+_grid_z0 = np.arange(6, 13, 1)
+_grid_dz = np.arange(1, 8, 1)
+
+@benchmark('model_grid', repeat=1, ops=_grid_z0.size * _grid_dz.size)
+def bench_model_grid():
+    """
+    Run a small grid of tanh models, as in test_inference_grid.py, saving
+    blobs to disk.
+    """
+
+    pars = _pars(problem_type=101, tanh_model=True,
+        blob_names=[['z_D', 'dTb_D', 'tau_e'], ['cgm_h_2', 'igm_Tk', 'dTb']],
+        blob_ivars=[None, [('z', np.arange(5, 21))]], blob_funcs=None)
+
+    mg = ares.inference.ModelGrid(**pars)
+    mg.axes = {'tanh_xz0': _grid_z0, 'tanh_xdz': _grid_dz}
+
+    def run():
+        path = tempfile.mkdtemp()
+        try:
+            mg.run('{}/bench_grid'.format(path), clobber=True, save_freq=100)
+        finally:
+            shutil.rmtree(path)
+
+    return run
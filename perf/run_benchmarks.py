@@ -0,0 +1,276 @@
+"""
+
+run_benchmarks.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 18:20:11 PDT 2026
+
+Description: Run the benchmarks in benchmarks.py, save the results, and
+compare them to results from another commit. Usage:
+
+    # Run everything, save results
+    python run_benchmarks.py -o before.json
+
+    # Just a few, with more repetitions, and a different cosmology
+    python run_benchmarks.py tau mgb -n 5 --set cosmology_name=user
+
+    # Time repetitions with caches left over from the first one
+    python run_benchmarks.py gs21cm -n 5 --warm
+
+    # Check for regressions (exits with status 1 if there are any)
+    python run_benchmarks.py --compare before.json after.json
+
+    # Save a profile of each benchmark to <name>.pstats, which can be
+    # visualized with, e.g., gprof2dot or snakeviz.
+    python run_benchmarks.py gs21cm --profile
+
+"""
+
+import os
+import sys
+import ast
+import json
+import time
+import platform
+import argparse
+import subprocess
+from contextlib import contextmanager
+
+import numpy as np
+import scipy
+import ares
+from ares.util.Timer import timers
+
+from benchmarks import benchmarks, base_pars, clear_caches, restore_caches
+
+@contextmanager
+def _quiet(on=True):
+    """
+    Silence print statements, progress reports, etc.
+    """
+    if not on:
+        yield
+        return
+
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as f:
+        sys.stdout = f
+        try:
+            yield
+        finally:
+            sys.stdout = stdout
+
+def _git(*args):
+    path = os.path.dirname(os.path.dirname(os.path.abspath(ares.__file__)))
+    try:
+        out = subprocess.check_output(('git',) + args, cwd=path,
+            stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return out.decode().strip()
+
+def get_metadata():
+    """
+    Everything we need to know to interpret results later.
+    """
+    status = _git('status', '--porcelain', '--untracked-files=no')
+
+    return {'commit': _git('rev-parse', 'HEAD'),
+        'dirty': None if status is None else bool(status),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'host': platform.node(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'base_pars': {key: repr(val) for key, val in base_pars.items()}}
+
+def run_benchmark(name, repeat=None, profile=False, verbose=False,
+    warm=False):
+    """
+    Run a single benchmark.
+
+    Unless `warm` is True, caches are cleared before each repetition (see
+    benchmarks.clear_caches), so that all repetitions do the same work.
+
+    Returns
+    -------
+    Dictionary containing wall-clock time for each repetition, as well as
+    the breakdown of time spent in each timed scope (see ares.util.Timer)
+    for the fastest repetition.
+
+    """
+
+    func = benchmarks[name]
+    repeat = func.repeat if repeat is None else repeat
+
+    if profile:
+        import cProfile
+        prof = cProfile.Profile()
+
+    times = []
+    timing = None
+    try:
+        for i in range(repeat):
+            # Same inputs every time
+            np.random.seed(1234)
+
+            if (not warm) or (i == 0):
+                clear_caches()
+
+            with _quiet(not verbose):
+                run = func()
+
+                if profile:
+                    prof.enable()
+
+                with timers.record() as breakdown:
+                    t1 = time.time()
+                    run()
+                    t2 = time.time()
+
+                if profile:
+                    prof.disable()
+
+            if (timing is None) or (t2 - t1 < min(times)):
+                timing = breakdown
+
+            times.append(t2 - t1)
+    finally:
+        restore_caches()
+
+    if profile:
+        prof.dump_stats('{}.pstats'.format(name))
+
+    return {'times': times, 'min': min(times), 'warm': warm,
+        'median': float(np.median(times)), 'ops': func.ops,
+        'ops_per_sec': func.ops / min(times), 'timing': timing}
+
+def compare(fn_old, fn_new, threshold=0.1):
+    """
+    Compare two sets of results, benchmark by benchmark.
+
+    We compare the minimum time over all repetitions, as it's the least
+    sensitive to whatever else the machine was doing.
+
+    Returns
+    -------
+    List of benchmarks that got slower by more than `threshold`, a
+    fractional change in run time.
+
+    """
+
+    with open(fn_old, 'r') as f:
+        old = json.load(f)
+    with open(fn_new, 'r') as f:
+        new = json.load(f)
+
+    for label, data in [('old', old), ('new', new)]:
+        meta = data['meta']
+        print('{0}: {1} (dirty={2}) on {3}, {4}'.format(label, meta['commit'],
+            meta['dirty'], meta['host'], meta['date']))
+
+    if old['meta']['host'] != new['meta']['host']:
+        print('WARNING: results are from different machines!')
+
+    print('')
+    print('{0:<24} {1:>10} {2:>10} {3:>8}'.format('benchmark', 'old [s]',
+        'new [s]', 'ratio'))
+
+    slower = []
+    for name in new['results']:
+        if name not in old['results']:
+            continue
+
+        t_old = old['results'][name]['min']
+        t_new = new['results'][name]['min']
+        ratio = t_new / t_old
+
+        if old['results'][name].get('warm') != new['results'][name].get('warm'):
+            print('WARNING: only one set of results for {} used warm '
+                'caches!'.format(name))
+
+        if ratio > 1. + threshold:
+            flag = '  SLOWER'
+            slower.append(name)
+        elif ratio < 1. - threshold:
+            flag = '  faster'
+        else:
+            flag = ''
+
+        print('{0:<24} {1:>10.4f} {2:>10.4f} {3:>8.3f}{4}'.format(name, t_old,
+            t_new, ratio, flag))
+
+    return slower
+
+def _parse_value(val):
+    try:
+        return ast.literal_eval(val)
+    except (ValueError, SyntaxError):
+        return val
+
+def main():
+    parser = argparse.ArgumentParser(description='Run ARES benchmarks.')
+    parser.add_argument('names', nargs='*',
+        help='Benchmarks to run (default: all of them).')
+    parser.add_argument('-n', '--repeat', type=int, default=None,
+        help='Number of repetitions (default depends on benchmark).')
+    parser.add_argument('-o', '--output', default=None,
+        help='Save results to this (JSON) file.')
+    parser.add_argument('--set', action='append', default=[],
+        metavar='PAR=VALUE', help='Override parameter in all benchmarks.')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+        help='Compare two sets of results rather than running anything.')
+    parser.add_argument('--threshold', type=float, default=0.1,
+        help='Fractional slow-down that counts as a regression.')
+    parser.add_argument('--warm', action='store_true',
+        help='Don\'t clear caches between repetitions.')
+    parser.add_argument('--profile', action='store_true',
+        help='Save cProfile output to <name>.pstats.')
+    parser.add_argument('--list', action='store_true',
+        help='List available benchmarks and exit.')
+    parser.add_argument('-v', '--verbose', action='store_true',
+        help='Don\'t silence output of benchmarks.')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, func in benchmarks.items():
+            doc = ' '.join(func.__doc__.split())
+            print('{0:<24} {1}'.format(name, doc))
+        return 0
+
+    if args.compare is not None:
+        slower = compare(*args.compare, threshold=args.threshold)
+        return int(len(slower) > 0)
+
+    for item in args.set:
+        par, val = item.split('=', 1)
+        base_pars[par] = _parse_value(val)
+
+    names = args.names if args.names else list(benchmarks.keys())
+    for name in names:
+        if name not in benchmarks:
+            raise KeyError('Unrecognized benchmark \'{}\'.'.format(name))
+
+    results = {'meta': get_metadata(), 'results': {}}
+    for name in names:
+        res = run_benchmark(name, repeat=args.repeat, profile=args.profile,
+            verbose=args.verbose, warm=args.warm)
+        results['results'][name] = res
+
+        print('{0:<24} min={1:.4f} s, median={2:.4f} s ({3} runs)'.format(
+            name, res['min'], res['median'], len(res['times'])))
+
+        if args.verbose:
+            timers.report(res['timing'])
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
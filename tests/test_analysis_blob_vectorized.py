@@ -0,0 +1,79 @@
+"""
+
+test_analysis_blob_vectorized.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 23:31:48 PDT 2026
+
+Description: Make sure blobs flagged as vectorized are computed with a single
+call, and agree with blobs computed element-wise.
+
+"""
+
+import numpy as np
+from ares.analysis.BlobFactory import BlobFactory
+
+class FakeSim(BlobFactory):
+    def __init__(self, **kwargs):
+        self.pf = kwargs
+        self.calls = 0
+
+    def SFRD(self, z):
+        self.calls += 1
+        return np.exp(-np.asarray(z) / 4.)
+
+    def LF(self, z, x, norm=1.):
+        self.calls += 1
+        return norm * 10**(0.4 * (x + 20.)) * (1. + z)**-2.
+
+    def fscalar(self, z, Mh):
+        self.calls += 1
+        # Only works for scalar z, so can't be vectorized
+        return np.log10(Mh) * float(z)
+
+    def const(self, z, x):
+        self.calls += 1
+        return 1.
+
+    def peak(self, z, x):
+        self.calls += 1
+        # Returns a scalar for array inputs, but isn't a constant
+        return np.max(10**(0.4 * (np.asarray(x) + 20.)) \
+            * (1. + np.asarray(z))**-2.)
+
+def test():
+    z = np.arange(4, 10, 0.5)
+    MUV = np.arange(-24, -16, 0.5)
+    Mh = 10**np.arange(8, 12, 0.5)
+
+    pars = \
+    {
+     'blob_names': [['sfrd'], ['lf', 'lf2', 'lf_c', 'lf_max'], ['fscalar']],
+     'blob_ivars': [[('z', z)], [('z', z), ('x', MUV)], [('z', z), ('Mh', Mh)]],
+     'blob_funcs': [['SFRD'], ['LF', 'LF', 'const', 'peak'], ['fscalar']],
+     'blob_kwargs': [None, [{}, {'norm': 2.}, {}, {}], None],
+    }
+
+    loop = FakeSim(**pars)
+    blobs_loop = loop.blobs
+    assert loop.calls == z.size + 5 * z.size
+
+    pars['blob_vectorized'] = [True, True, [True]]
+    vec = FakeSim(**pars)
+    blobs_vec = vec.blobs
+
+    # One call for each vectorized blob (plus two checks for the constant),
+    # fallback for `peak` (after one failed check) and `fscalar`
+    assert vec.calls == 1 + 2 + 3 + (2 + z.size) + (1 + z.size)
+
+    for i in range(len(blobs_loop)):
+        assert blobs_loop[i].shape == blobs_vec[i].shape
+        assert np.allclose(blobs_loop[i], blobs_vec[i])
+
+    assert np.allclose(blobs_vec[1][1], 2 * blobs_vec[1][0])
+    assert np.all(blobs_vec[1][2] == 1)
+    assert not np.all(blobs_vec[1][3] == blobs_vec[1][3][0,0])
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,149 @@
+"""
+
+test_analysis_density.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Tue Oct 20 01:27:45 PDT 2026
+
+Description: Make sure binning all pairs of parameters at once agrees with
+np.histogram2d, and that binned PDFs are re-used when re-making plots.
+
+"""
+
+import os
+import ares
+import shutil
+import tempfile
+import importlib
+import numpy as np
+import matplotlib.pyplot as pl
+from ares.util.Pickling import write_pickle_file
+from ares.util.Stats import bin_all_pairs, smooth_fft
+
+def test(Ns=5000, Nd=4, prefix='test_kde'):
+
+    np.random.seed(2718)
+
+    # First, the binning by itself
+    data = [np.random.normal(size=Ns) for i in range(Nd)]
+    data[1][10] = np.nan
+    data[2] = np.ma.array(data[2], mask=data[2] > 1.5)
+    bins = [np.linspace(-2.5, 2.5, 21 + i) for i in range(Nd)]
+
+    hist1d, hist2d = bin_all_pairs(data, bins)
+    assert len(hist2d) == Nd * (Nd - 1) // 2
+
+    for i in range(Nd):
+        ref, _ = np.histogram(np.ma.compressed(data[i]), bins=bins[i])
+        assert np.array_equal(hist1d[i], ref)
+
+    for (i, j) in hist2d:
+        ok = np.logical_not(np.ma.getmaskarray(data[i]) \
+            | np.ma.getmaskarray(data[j]))
+        x = np.ma.getdata(data[i])[ok]
+        y = np.ma.getdata(data[j])[ok]
+        ref, _, _ = np.histogram2d(x, y, bins=[bins[i], bins[j]])
+        assert np.array_equal(hist2d[(i, j)], ref)
+
+    # Smoothing should conserve probability (away from edges)
+    h = np.zeros((40, 40))
+    h[20, 15] = 1.
+    sm = smooth_fft(h, 2.)
+    assert np.allclose(sm.sum(), 1.) and np.all(sm >= 0)
+    assert np.argmax(sm) == np.argmax(h)
+
+    # Now, with a fake chain
+    cwd = os.getcwd()
+    path = tempfile.mkdtemp()
+    os.chdir(path)
+
+    try:
+        chain = np.random.multivariate_normal(np.zeros(Nd),
+            0.5 * np.eye(Nd) + 0.5, size=Ns)
+        pars = ['par_{}'.format(i) for i in range(Nd)]
+
+        for suffix, val in [('chain', chain), ('logL', np.random.rand(Ns)),
+            ('pinfo', (pars, [False] * Nd)), ('setup', {})]:
+            write_pickle_file(val, '{0!s}.{1!s}.pkl'.format(prefix, suffix),
+                ndumps=1, open_mode='w', safe_mode=False, verbose=False)
+
+        anl = ares.analysis.ModelSet(prefix)
+
+        b = [np.linspace(-3, 3, 31)] * 2
+        ax = anl.PosteriorPDF(pars[0:2], bins=b, skip=100, stop=100,
+            color_by_like=True, fig=1)
+        pl.close('all')
+
+        ref, _, _ = np.histogram2d(chain[100:-100,0], chain[100:-100,1],
+            bins=b)
+
+        entries = [anl.densities[key] for key in anl.densities \
+            if len(key) == 3]
+        assert len(entries) == 2
+        assert any([np.array_equal(entry['hist'], ref) for entry in entries])
+        assert sum([len(entry['levels']) for entry in entries]) == 1
+
+        # Triangle plot bins all pairs up front, in one pass
+        _ms = importlib.import_module('ares.analysis.ModelSet')
+        calls = []
+        def counter(*args, **kwargs):
+            calls.append(kwargs['pairs'])
+            return bin_all_pairs(*args, **kwargs)
+
+        hashed = []
+        def sample_id(x):
+            hashed.append(x)
+            return _ms.ModelSet._sample_id(anl, x)
+
+        _ms.bin_all_pairs = counter
+        anl._sample_id = sample_id
+        try:
+            anl.TrianglePlot(pars, bins=30, fig=2)
+            pl.close('all')
+            assert len(calls) == 1
+            assert len(calls[0]) == Nd * (Nd - 1) // 2
+            N = len(anl.densities)
+
+            # Samples are hashed once per quantity, not once per panel
+            assert len(hashed) == Nd
+
+            # Re-making the plot with different style needn't bin anything
+            anl.TrianglePlot(pars, bins=30, fig=3, fill=False,
+                color_by_like=True, colors=['r', 'b'])
+            pl.close('all')
+        finally:
+            _ms.bin_all_pairs = bin_all_pairs
+            del anl._sample_id
+
+        assert len(calls) == 1
+        assert len(hashed) == 2 * Nd
+        assert len(anl.densities) == N
+
+        # Smoothed PDFs are cached separately
+        anl.TrianglePlot(pars, bins=60, fig=4, smooth=2)
+        pl.close('all')
+        assert len(anl.densities) > N
+
+        # The cache is bounded...
+        max_bytes = _ms.densities_max_bytes
+        _ms.densities_max_bytes = 10 * 60**2 * 8
+        try:
+            anl.TrianglePlot(pars, bins=60, fig=5)
+            pl.close('all')
+        finally:
+            _ms.densities_max_bytes = max_bytes
+
+        assert anl._densities_bytes <= 10 * 60**2 * 8
+        assert sum([entry['hist'].nbytes \
+            for entry in anl.densities.values()]) == anl._densities_bytes
+
+        # ...and can be emptied by hand
+        anl.clear_densities()
+        assert len(anl.densities) == 0
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(path)
+
+if __name__ == '__main__':
+    test()
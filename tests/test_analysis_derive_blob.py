@@ -0,0 +1,133 @@
+"""
+
+test_analysis_derive_blob.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 23:58:20 PDT 2026
+
+Description: Make sure deriving new blobs in chunks, in parallel, and with
+restarts gives the same answer as doing it all at once.
+
+"""
+
+import os
+import ares
+import shutil
+import tempfile
+import numpy as np
+from ares.util.Pickling import write_pickle_file
+
+def test(Ns=200, Nd=3, prefix='test_db'):
+
+    cwd = os.getcwd()
+    path = tempfile.mkdtemp()
+    os.chdir(path)
+
+    try:
+        np.random.seed(12345)
+
+        # Fake chain and 1-D blob
+        chain = np.random.normal(size=(Ns, Nd))
+        logL = np.random.rand(Ns)
+        pars = ['par_{}'.format(i) for i in range(Nd)]
+
+        x = np.arange(10)
+        setup = {'blob_names': [['blob_1']], 'blob_ivars': [[('x', x)]],
+            'blob_funcs': None}
+
+        for suffix, val in [('chain', chain), ('logL', logL),
+            ('pinfo', (pars, [False] * Nd)), ('setup', setup)]:
+            write_pickle_file(val, '{0!s}.{1!s}.pkl'.format(prefix, suffix),
+                ndumps=1, open_mode='w', safe_mode=False, verbose=False)
+
+        write_pickle_file(np.random.normal(size=(Ns, x.size)),
+            '{!s}.blob_1d.blob_1.pkl'.format(prefix), ndumps=1,
+            open_mode='w', safe_mode=False, verbose=False)
+
+        anl = ares.analysis.ModelSet(prefix)
+
+        func = lambda data, ivars: data['blob_1'] * data['par_0'][:,None]
+
+        ref = anl.DeriveBlob(func=func, fields=['blob_1', 'par_0'],
+            name='prod', save=False)
+
+        # In chunks, with processes and threads
+        for worker_type in ['process', 'thread']:
+            new = anl.DeriveBlob(func=func, fields=['blob_1', 'par_0'],
+                name='prod_{}'.format(worker_type), num_workers=2,
+                chunk_size=17, worker_type=worker_type)
+
+            assert np.allclose(ref, new)
+            assert not os.path.exists('{!s}.blob.prod_{}.part.0'.format(prefix,
+                worker_type))
+
+        # Expressions too
+        new = anl.DeriveBlob(expr='2 * x', varmap={'x': 'blob_1'},
+            name='twice', chunk_size=50)
+        assert np.allclose(new, 2 * anl.ExtractData('blob_1')['blob_1'])
+
+        # Pretend we were interrupted partway through, including in the
+        # middle of writing out a chunk.
+        calls = []
+        state = {'fail': True}
+        def func_ct(data, ivars):
+            calls.append(len(data['blob_1']))
+            if state['fail'] and len(calls) == 2:
+                raise RuntimeError('Interrupted!')
+            return func(data, ivars)
+
+        for name in ['prod_restart', 'prod_changed', 'prod_clobber']:
+            state['fail'] = True
+            del calls[:]
+            try:
+                anl.DeriveBlob(func=func_ct, fields=['blob_1', 'par_0'],
+                    name=name, chunk_size=50)
+            except RuntimeError:
+                pass
+            else:
+                raise AssertionError('Should have been interrupted!')
+
+            tmp = '{!s}.blob.{!s}.part.0'.format(prefix, name)
+            assert os.path.exists(tmp)
+            with open(tmp, 'ab') as f:
+                f.write(b'\x80\x02junk')
+
+        state['fail'] = False
+        del calls[:]
+
+        new = anl.DeriveBlob(func=func_ct, fields=['blob_1', 'par_0'],
+            name='prod_restart', chunk_size=50)
+
+        # Should only have done the last three chunks
+        assert calls == [50] * 3
+        assert np.allclose(new, ref)
+        assert not os.path.exists(tmp.replace('clobber', 'restart'))
+
+        # Different function: can't re-use anything
+        del calls[:]
+        def func_2x(data, ivars):
+            calls.append(len(data['blob_1']))
+            return 2 * func(data, ivars)
+
+        new = anl.DeriveBlob(func=func_2x, fields=['blob_1', 'par_0'],
+            name='prod_changed', chunk_size=50)
+        assert calls == [50] * 4
+        assert np.allclose(new, 2 * ref)
+
+        # Same function, but clobber=True means start from scratch
+        del calls[:]
+        new = anl.DeriveBlob(func=func_ct, fields=['blob_1', 'par_0'],
+            name='prod_clobber', chunk_size=50, clobber=True)
+        assert calls == [50] * 4
+        assert np.allclose(new, ref)
+
+        # Saved result should be the assembled one
+        anl2 = ares.analysis.ModelSet(prefix)
+        assert np.allclose(anl2.ExtractData('prod_thread')['prod_thread'], ref)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(path)
+
+if __name__ == '__main__':
+    test()
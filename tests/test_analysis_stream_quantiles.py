@@ -0,0 +1,105 @@
+"""
+
+test_analysis_stream_quantiles.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Tue Oct 20 00:41:09 PDT 2026
+
+Description: Make sure percentiles of blobs computed a chunk at a time agree
+with those computed with all the data in memory.
+
+"""
+
+import os
+import ares
+import shutil
+import tempfile
+import numpy as np
+import matplotlib.pyplot as pl
+from ares.util.Stats import StreamingQuantiles
+from ares.util.Pickling import write_pickle_file
+
+def test(Ns=2000, Nd=2, prefix='test_sq'):
+
+    # First, the quantile engine itself
+    np.random.seed(31415)
+    x = np.random.lognormal(size=(50000, 20))
+
+    exact = StreamingQuantiles([16, 50, 84], buffer_size=10**5)
+    sketch = StreamingQuantiles([16, 50, 84], buffer_size=4000)
+    for i in range(0, x.shape[0], 1000):
+        exact.update(x[i:i+1000])
+        sketch.update(x[i:i+1000])
+
+    ref = np.percentile(x, [16, 50, 84], axis=0)
+    assert exact.exact and np.array_equal(exact.get(), ref)
+    assert (not sketch.exact) and np.allclose(sketch.get(), ref, rtol=0.02)
+
+    # Now, from a fake chain
+    cwd = os.getcwd()
+    path = tempfile.mkdtemp()
+    os.chdir(path)
+
+    try:
+        z = np.arange(5, 20)
+        M = np.arange(-25, -15)
+
+        chain = np.random.normal(size=(Ns, Nd))
+        blob_1 = np.random.lognormal(size=(Ns, z.size)) * z
+        blob_1[500,3] = np.nan
+        blob_2 = np.random.lognormal(size=(Ns, z.size, M.size))
+
+        setup = {'blob_names': [['blob_1'], ['blob_2']],
+            'blob_ivars': [[('z', z)], [('z', z), ('MUV', M)]],
+            'blob_funcs': None}
+
+        pars = ['par_{}'.format(i) for i in range(Nd)]
+        for suffix, val in [('chain', chain), ('logL', np.random.rand(Ns)),
+            ('pinfo', (pars, [False] * Nd)), ('setup', setup)]:
+            write_pickle_file(val, '{0!s}.{1!s}.pkl'.format(prefix, suffix),
+                ndumps=1, open_mode='w', safe_mode=False, verbose=False)
+
+        # Several checkpoints per file
+        for name, data in [('blob_1d.blob_1', blob_1),
+            ('blob_2d.blob_2', blob_2)]:
+            write_pickle_file([data[i:i+300] for i in range(0, Ns, 300)],
+                '{0!s}.{1!s}.pkl'.format(prefix, name),
+                ndumps=len(range(0, Ns, 300)), open_mode='w',
+                safe_mode=False, verbose=False)
+
+        anl = ares.analysis.ModelSet(prefix)
+
+        chunks = list(anl.iter_blob_chunks('blob_1'))
+        assert len(chunks) == 7
+        assert np.array_equal(np.concatenate(chunks), blob_1, equal_nan=True)
+
+        for name, ivar, kw in [('blob_1', None, {'skip': 100}),
+            ('blob_2', [10, None], {'stop': -200, 'take_log': True}),
+            ('blob_1', None, {'un_logy': True, 'multiplier': 1. / z}),
+            ('blob_2', [12, None], {}),
+            ('blob_2', [None, -20], {'take_log': True, 'un_logy': True,
+                'multiplier': np.linspace(1, 2, z.size)})]:
+
+            ax = None
+            for stream in [False, True, 500]:
+                _ax = anl.ReconstructedFunction(name, ivar=ivar, fill=False,
+                    stream=stream, fig=1, **kw)
+
+                lo = _ax.lines[-2].get_ydata()
+                hi = _ax.lines[-1].get_ydata()
+
+                if stream is False:
+                    ref = np.array([lo, hi])
+                elif stream is True:
+                    assert np.allclose([lo, hi], ref)
+                else:
+                    assert np.allclose([lo, hi], ref, rtol=0.1)
+
+                pl.close('all')
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(path)
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,51 @@
+"""
+
+test_import.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 17:02:37 PDT 2026
+
+Description: Make sure `import ares` stays cheap, and that plotting stuff
+is only imported when asked for.
+
+"""
+
+import sys
+import subprocess
+
+script = \
+"""
+import sys, time
+t1 = time.time()
+import ares
+t2 = time.time()
+{}
+print(t2 - t1, int('matplotlib' in sys.modules))
+"""
+
+def check(code=''):
+    out = subprocess.check_output([sys.executable, '-c', script.format(code)])
+    dt, mpl = out.decode().split()[-2:]
+    return float(dt), bool(int(mpl))
+
+def test(tmax=0.5):
+
+    # Nothing should be imported yet
+    dt, mpl = check()
+    assert dt < tmax, "`import ares` took {:.2f} seconds!".format(dt)
+    assert not mpl
+
+    # Physics shouldn't need matplotlib
+    for sub in ['physics', 'util', 'sources', 'populations', 'static']:
+        dt, mpl = check('ares.{}'.format(sub))
+        assert not mpl, "ares.{} imports matplotlib!".format(sub)
+
+    # But analysis stuff should still be available on request
+    import ares
+    assert isinstance(ares.analysis.ModelSet, type)
+    assert isinstance(ares.analysis.Global21cm, type)
+    assert ares.util.Stats.bin_c2e is not None
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,102 @@
+"""
+
+test_phenom_pq_grid.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 19:48:12 PDT 2026
+
+Description: Make sure evaluating PQs on (z, Mh) grids, with saved results
+and nested PQs, gives the same answers as evaluating point-by-point.
+
+"""
+
+import importlib
+import numpy as np
+from ares.util.ParameterFile import ParameterFile, get_pq_pars
+from ares.phenom.ParameterizedQuantity import ParameterizedQuantity
+
+def test():
+    z = np.linspace(5, 20, 31)
+    Mh = np.logspace(7, 13, 61)
+    Mg, zg = np.meshgrid(Mh, z)
+
+    # Double power-law with evolving normalization and peak mass
+    pars = {'pq_func': 'dpl_evolNP', 'pq_func_var': 'Mh',
+        'pq_func_var2': '1+z', 'pq_func_par0': 0.05, 'pq_func_par1': 3e11,
+        'pq_func_par2': 0.6, 'pq_func_par3': -0.6, 'pq_func_par4': 1e10,
+        'pq_func_par5': 7., 'pq_func_par6': 1., 'pq_func_par7': -0.5,
+        'pq_val_ceil': 0.1}
+
+    pq = ParameterizedQuantity(**pars)
+
+    ref = np.array([[pq(z=_z_, Mh=_M_)[0] for _M_ in Mh] for _z_ in z])
+
+    assert np.allclose(pq(z=zg, Mh=Mg), ref)
+
+    y = pq(z=z[:,None], Mh=Mh[None,:])
+    assert y.shape == ref.shape
+    assert np.allclose(y, ref)
+
+    # Second call should come from memory, and modifying the result
+    # shouldn't affect the next one.
+    y[:] = 0.0
+    assert np.allclose(pq(z=z[:,None], Mh=Mh[None,:]), ref)
+    assert len(pq._memo) == 2
+
+    # Something that only depends on redshift still returns the full grid
+    pars = {'pq_func': 'pl', 'pq_func_var': '1+z', 'pq_func_par0': 0.1,
+        'pq_func_par1': 7., 'pq_func_par2': -1., 'pq_func_var_lim': (0, 15),
+        'pq_func_var_fill': 15.}
+    pq = ParameterizedQuantity(**pars)
+    y = pq(z=z[:,None], Mh=Mh[None,:])
+    assert y.shape == ref.shape
+    assert np.allclose(y[:,0], 0.1 * (np.minimum(1. + z, 15.) / 7.)**-1.)
+
+    # Input isn't modified
+    Ms = Mh.copy()
+    pars = {'pq_func': 'pl', 'pq_func_var': 'Mh', 'pq_func_par0': 0.1,
+        'pq_func_par1': 1e10, 'pq_func_par2': 0.5,
+        'pq_func_var_lim': (1e8, 1e12), 'pq_func_var_fill': 1e12}
+    pq = ParameterizedQuantity(**pars)
+    pq(z=6., Mh=Ms)
+    assert np.array_equal(Ms, Mh)
+
+    # Nested PQs: power-law in Mh whose normalization is a power-law in 1+z
+    pf = ParameterFile(**{'pop_fesc': 'pq[0]', 'pq_func[0]': 'pl',
+        'pq_func_var[0]': 'Mh', 'pq_func_par0[0]': 'pq[1]',
+        'pq_func_par1[0]': 1e10, 'pq_func_par2[0]': -0.5,
+        'pq_func[1]': 'pl', 'pq_func_var[1]': '1+z',
+        'pq_func_par0[1]': 0.2, 'pq_func_par1[1]': 7.,
+        'pq_func_par2[1]': 1.})
+
+    pq = ParameterizedQuantity(**get_pq_pars(pf['pop_fesc'], pf))
+    assert pq.is_nested
+
+    ref = 0.2 * ((1. + zg) / 7.) * (Mg / 1e10)**-0.5
+    assert np.allclose(pq(z=z[:,None], Mh=Mh[None,:]), ref)
+    assert np.allclose(pq(z=zg, Mh=Mg), ref)
+    assert np.allclose(pq(z=8., Mh=Mh), ref[z == 8.][0])
+
+    # Saved results shouldn't exceed the memory budget
+    _pq = importlib.import_module('ares.phenom.ParameterizedQuantity')
+    max_bytes = _pq.memo_max_bytes
+    _pq.memo_max_bytes = 3 * ref.nbytes
+    try:
+        pq = ParameterizedQuantity(**pars)
+        for i in range(5):
+            y = pq(z=z[:,None] + i, Mh=Mh[None,:])
+            assert pq._memo_bytes <= _pq.memo_max_bytes
+        assert len(pq._memo) == 3
+        assert pq._memo_bytes == sum([v.nbytes for v in pq._memo.values()])
+
+        # Results that are too big on their own aren't saved at all
+        N = len(pq._memo)
+        Mbig = np.logspace(7, 13, 4 * Mh.size)
+        pq(z=z[:,None], Mh=Mbig[None,:])
+        assert len(pq._memo) == N
+    finally:
+        _pq.memo_max_bytes = max_bytes
+
+if __name__ == '__main__':
+    test()
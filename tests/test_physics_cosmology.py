@@ -11,8 +11,9 @@ Description:
 """
 
 import numpy as np
+from scipy.integrate import quad
 from ares.physics import Cosmology
-from ares.physics.Constants import s_per_gyr, m_H, m_He, cm_per_mpc
+from ares.physics.Constants import s_per_gyr, m_H, m_He, cm_per_mpc, c
 
 def test(rtol=1e-3):
     
@@ -42,7 +43,44 @@ def test(rtol=1e-3):
     
     assert abs(R_a - R_n) / R_a < rtol, \
         "Comoving radial distance @ high-z not accurate to < {:.3g}%.".format(rtol)
-        
+
+    # Check tabulated distances against direct integration, and make sure
+    # inversion works.
+    zarr = np.array([0.01, 0.5, 3., 8., 30., 1e3])
+    integrand = lambda z: cosm.hubble_0 / cosm.HubbleParameter(z)
+    R_q = np.array([quad(integrand, 0., z)[0] for z in zarr]) * c \
+        / cosm.hubble_0
+    R_t = cosm.ComovingRadialDistance(0., zarr)
+
+    assert np.allclose(R_t, R_q, rtol=1e-6, atol=0.)
+    assert np.allclose(cosm.ComovingRadialDistance(3., 8.), R_q[3] - R_q[2],
+        rtol=1e-6, atol=0.)
+    assert np.allclose(cosm.LuminosityDistance(zarr), R_q * (1. + zarr),
+        rtol=1e-6, atol=0.)
+
+    dz = cosm.DeltaZed(zarr, 10.)
+    R = cosm.ComovingRadialDistance(zarr, zarr + dz) / cm_per_mpc
+    assert np.allclose(R, 10., rtol=1e-6, atol=0.)
+
+    # High-z approximation should be used consistently
+    dz = cosm_appr.DeltaZed(zarr, 10.)
+    R = cosm_appr.ComovingRadialDistance(zarr, zarr + dz) / cm_per_mpc
+    assert np.allclose(R, 10., rtol=1e-6, atol=0.)
+    d_ratio = cosm_appr.ComovingRadialDistance(0., 20.) \
+        / cosm.ComovingRadialDistance(0., 20.)
+    assert np.allclose(cosm_appr.ProjectedVolume(20., 1.) \
+        / cosm.ProjectedVolume(20., 1.), d_ratio**2, rtol=1e-3)
+
+    # Table can be thrown out and re-built
+    tab = cosm._tab_dcom
+    assert cosm._tab_dcom is tab
+    del cosm._tab_dcom
+    assert cosm._tab_dcom is not tab
+    assert np.array_equal(cosm._tab_dcom[1], tab[1])
+
+    ang = cosm.ComovingLengthToAngle(6., 10.)
+    assert np.allclose(cosm.AngleToComovingLength(6., ang), 10.)
+
     # Test a user-supplied cosmology and one that grabs a row from Planck chain
     # Remember: test suite doesn't have CosmoRec, so don't use get_inits_rec.
     cosm = Cosmology(cosmology_name='user', cosmology_id='jordan')
@@ -123,6 +123,18 @@ def test(tol=0.1, redshifts=[5,10,20]):
     ax4.set_ylim(1e-35, 1e1)
     ax4.legend(loc='upper right', fontsize=12)
     
+    ##
+    # All redshifts at once should agree with one at a time
+    ##
+    Rarr = np.logspace(-6, 6, 1000)
+    R, M, dndm_all = xset.SizeDistribution(np.array(redshifts), Rarr)
+    
+    assert dndm_all.shape == (len(redshifts), Rarr.size - 2)
+    
+    for i, z in enumerate(redshifts):
+        R, M, dndm = xset.SizeDistribution(z, Rarr)
+        assert np.allclose(dndm, dndm_all[i], rtol=1e-8, atol=0)
+    
     
 if __name__ == '__main__':
     test()
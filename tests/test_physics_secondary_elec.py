@@ -14,6 +14,7 @@ import ares
 import numpy as np
 import matplotlib.pyplot as pl
 from ares.analysis import MultiPanel
+from scipy.interpolate import RectBivariateSpline
 
 # First, compare at fixed ionized fraction
 xe = [1e-4, 1e-3, 1e-2, 1e-1, 0.5, 0.9]
@@ -22,12 +23,117 @@ channels = ['heat', 'h_1', 'exc', 'lya']
 
 colors = ['k', 'b', 'r', 'g', 'm', 'c', 'y']
 
+# Reference values from the original (point-by-point) implementation, at
+# electron energies E_ref (rows) and ionized fractions x_ref (columns).
+# Method 3 uses the made-up tables of _fake_fs10.
+E_ref = np.array([15., 50., 1e3, 5e3])
+x_ref = np.array([1e-4, 1e-2, 0.3, 0.9])
+f_ref = \
+{
+ 1: {'heat': [0.15, 0.3657955945, 0.8154336808, 0.9882303857],
+     'h_1': [0.3750731685, 0.2924592239, 0.0742339749, 0.0014912698],
+     'he_1': [0.054089271, 0.0448194822, 0.0133808419, 0.0003452462],
+     'lya': [0.4194197959, 0.2867538417, 0.0688654706, 0.0021089359]},
+ 2: {'heat': [[0.15, 0.6846524964, 1.0411785056, 0.9949083533],
+              [0.15, 0.5036730704, 0.9139700699, 0.9927421537],
+              [0.15, 0.3836633148, 0.8296165408, 0.9913057193],
+              [0.15, 0.3723061339, 0.8216337041, 0.9911697816]],
+     'h_1': [[0., 0., 0., 0.],
+             [0.293026293, 0.1428740415, 0.0159176259, 0.0006611536],
+             [0.3503189028, 0.2473280555, 0.0566394183, 0.0012408164],
+             [0.362069615, 0.2687515701, 0.0649914565, 0.0013597052]],
+     'he_1': [[0., 0., 0., 0.],
+              [0.0424577877, 0.023613342, 0.0051135479, 0.0002275637],
+              [0.0505799499, 0.0384214028, 0.0108865264, 0.0003097404],
+              [0.0522458051, 0.0414585355, 0.0120705641, 0.0003265948]]},
+ 3: {'heat': [[0.1710959546, 0.3375067381, 0.7317935122, 0.9723993465],
+              [0.2508237304, 0.4012283649, 0.7575908368, 0.9750541034],
+              [0.6553321824, 0.7245276965, 0.8884766635, 0.9885233314],
+              [0.8998657553, 0.9199687071, 0.9675998033, 0.9966657533]],
+     'h_1': [[0.5855479773, 0.6687533691, 0.8658967561, 0.9861996732],
+             [0.6254118652, 0.7006141825, 0.8787954184, 0.9875270517],
+             [0.8276660912, 0.8622638482, 0.9442383317, 0.9942616657],
+             [0.9499328776, 0.9599843536, 0.9837999017, 0.9983328766]],
+     'lya': [[0.8618493258, 0.8895844564, 0.9552989187, 0.9953998911],
+             [0.8751372884, 0.9002047275, 0.9595984728, 0.9958423506],
+             [0.9425553637, 0.9540879494, 0.9814127772, 0.9980872219],
+             [0.9833109592, 0.9866614512, 0.9945999672, 0.9994442922]]},
+}
+
+# Heating fractions at E_ref (columns) once interpolated to x_e = igm_e_ref
+# (rows), as done by the original argmin-based lookup in HeatingRate.
+igm_e_ref = [5e-5, 1e-3, 0.03, 0.7]
+fheat_ref = \
+{
+ 2: [[0.15, 0.15, 0.15, 0.15],
+     [0.3690873362, 0.2748947316, 0.2124344193, 0.2065234577],
+     [0.8631118052, 0.6456699537, 0.5014815007, 0.4878361571],
+     [0.9953712976, 0.9729755033, 0.9581245676, 0.9567191422]],
+ 3: [[0.1710959546, 0.2508237304, 0.6553321824, 0.8998657553],
+     [0.2266539545, 0.3010379082, 0.6784338365, 0.9065773383],
+     [0.4239585295, 0.4793648283, 0.7604753438, 0.9304123585],
+     [0.9091283698, 0.9178688181, 0.962214533, 0.9890224181]],
+}
+
+def _fake_fs10(esec):
+    """
+    Attach smooth, made-up lookup tables in place of those from
+    Furlanetto & Stoever (2010), so method 3 can be checked without them.
+    """
+    esec.method = 3
+    esec.E = np.logspace(1, 4, 31)
+    esec._x = np.logspace(-4, 0, 41)
+    esec._logx = np.log10(esec._x)
+    EE, xx = np.meshgrid(esec.E, esec._x, indexing='ij')
+    base = (1. - xx**0.3) * np.exp(-np.sqrt(EE / 1e3))
+    for i, name in enumerate(['fh', 'fHI', 'fHeI', 'fHeII', 'fexc', 'flya']):
+        setattr(esec, name,
+            RectBivariateSpline(esec.E, esec._x, 1. - base / (i + 1.)))
+
 def test():
 
+    # Compare to the original implementation first
+    for method in [1, 2, 3]:
+        esec = ares.physics.SecondaryElectrons(method=min(method, 2))
+        if method == 3:
+            _fake_fs10(esec)
+
+        for channel in f_ref[method]:
+            ref = np.array(f_ref[method][channel]) * np.ones([E_ref.size, 1])
+            f = esec.DepositionFraction(x_ref[None,:], E=E_ref[:,None],
+                channel=channel)
+            assert np.allclose(f, ref, rtol=1e-8, atol=1e-10), \
+                "method={}, channel={}".format(method, channel)
+
+            for i, EE in enumerate(E_ref):
+                f = esec.DepositionFraction(x_ref, E=EE, channel=channel)
+                assert np.allclose(f, ref[i], rtol=1e-8, atol=1e-10)
+
+        if method == 1:
+            continue
+
+        tab = esec.DepositionFractionTable(E_ref, channel='heat')
+        for i, igm_e in enumerate(igm_e_ref):
+            f = esec.InterpolateTable(tab, igm_e)
+            assert np.allclose(f, fheat_ref[method][i], rtol=1e-8), \
+                "method={}, igm_e={}".format(method, igm_e)
+
     esec1 = ares.physics.SecondaryElectrons(method=1)
     esec2 = ares.physics.SecondaryElectrons(method=2)
     esec3 = ares.physics.SecondaryElectrons(method=3)
-    
+
+    # Tables for many energies at once should match point-by-point results
+    for esec in [esec1, esec2, esec3]:
+        x = np.minimum(esec.x, 1.)
+        for channel in ['heat', 'h_1', 'he_1']:
+            tab = esec.DepositionFractionTable(E, channel=channel)
+            ref = np.array([esec.DepositionFraction(x, E=EE, channel=channel) \
+                for EE in E])
+            assert np.allclose(tab, ref)
+
+            f = esec.InterpolateTable(tab, x[10])
+            assert np.allclose(f, ref[:,10])
+
     # Re-make Figure 1 from FJS10
     fig1, ax1 = pl.subplots(1, 1)    
     
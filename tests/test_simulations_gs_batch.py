@@ -0,0 +1,54 @@
+"""
+
+test_simulations_gs_batch.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 15:41:12 PDT 2026
+
+Description: Make sure batched global signal calculations agree with the
+usual, one-at-a-time approach.
+
+"""
+
+import ares
+import numpy as np
+
+def test():
+
+    base = {'progress_bar': False, 'verbose': False}
+    models = [{'pop_rad_yield{1}': 2.6e38, 'pop_fesc{2}': 0.1},
+              {'pop_rad_yield{1}': 2.6e39, 'pop_fesc{2}': 0.2},
+              {'pop_rad_yield{1}': 2.6e40, 'pop_fesc{2}': 0.05}]
+
+    batch = ares.simulations.Global21cmBatch(models, **base)
+    batch.run()
+
+    assert len(batch) == len(models)
+    assert batch.history['dTb'].shape == (batch.history['z'].size, 3)
+
+    for i, model in enumerate(models):
+        kw = base.copy()
+        kw.update(model)
+
+        sim = ares.simulations.Global21cm(**kw)
+        sim.run()
+
+        # Time-steps differ, so compare on batch redshift grid
+        z = batch[i].history['z'][-1::-1]
+        dTb = np.interp(z, sim.history['z'][-1::-1],
+            sim.history['dTb'][-1::-1])
+
+        assert np.allclose(dTb, batch[i].history['dTb'][-1::-1], atol=0.5)
+
+    # Can't batch models with different cosmologies
+    try:
+        batch = ares.simulations.Global21cmBatch([{'sigma_8': 0.8},
+            {'sigma_8': 0.9}], **base)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Should have raised ValueError!')
+
+if __name__ == '__main__':
+    test()
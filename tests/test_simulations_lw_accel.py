@@ -0,0 +1,65 @@
+"""
+
+test_simulations_lw_accel.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 13:02:17 PDT 2026
+
+Description: 
+
+"""
+
+import numpy as np
+from ares.simulations.MetaGalacticBackground import anderson_step, \
+    secant_step
+
+def _iterate(g, x0, step=None, depth=3, beta=1., maxiter=100, tol=1e-10):
+    x = [x0]
+    f = []
+    for i in range(maxiter):
+        f.append(g(x[-1]) - x[-1])
+        
+        if np.max(np.abs(f[-1])) < tol:
+            break
+        
+        if step is None:
+            x.append(x[-1] + f[-1])
+        else:
+            x.append(step(x[-depth-1:], f[-depth-1:], beta))
+    
+    return x[-1], i
+
+def test():
+    
+    # Coupled, weakly non-linear system with solution near x ~ 0.7
+    g = lambda x: np.cos(x) + 0.1 * np.roll(x, 1)
+    x0 = np.ones(10)
+    
+    x_fp, n_fp = _iterate(g, x0)
+    x_aa, n_aa = _iterate(g, x0, anderson_step)
+    x_sc, n_sc = _iterate(g, x0, secant_step)
+    
+    assert np.allclose(x_aa, x_fp, atol=1e-8)
+    assert np.allclose(x_sc, x_fp, atol=1e-8)
+    
+    # Both should beat plain fixed-point iteration
+    assert n_aa < n_fp
+    assert n_sc < n_fp
+    
+    # Damping alone should still converge
+    x_d, n_d = _iterate(g, x0, anderson_step, depth=0, beta=0.5)
+    assert np.allclose(x_d, x_fp, atol=1e-8)
+    
+    # Damping should apply to secant updates too
+    x = [x0, g(x0)]
+    f = [g(xx) - xx for xx in x]
+    full = secant_step(x, f, 1.) - x[-1]
+    half = secant_step(x, f, 0.5) - x[-1]
+    assert np.allclose(half, 0.5 * full)
+    
+    x_d, n_d = _iterate(g, x0, secant_step, beta=0.5)
+    assert np.allclose(x_d, x_fp, atol=1e-8)
+    
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,58 @@
+"""
+
+test_simulations_mgb_rc.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Tue Oct 20 14:41:09 PDT 2026
+
+Description: Make sure rate coefficients interpolated for all populations
+at once match the tabulated values for each population.
+
+"""
+
+import ares
+import numpy as np
+
+def _xray_pop(i, norm, alpha):
+    return {'pop_sfr_model{{{}}}'.format(i): 'sfrd-func',
+        'pop_sfrd{{{}}}'.format(i): lambda z: norm * (1. + z)**-6.,
+        'pop_sfrd_units{{{}}}'.format(i): 'msun/yr/mpc^3',
+        'pop_sed{{{}}}'.format(i): 'pl',
+        'pop_alpha{{{}}}'.format(i): alpha,
+        'pop_Emin{{{}}}'.format(i): 2e2,
+        'pop_Emax{{{}}}'.format(i): 3e4,
+        'pop_EminNorm{{{}}}'.format(i): 2e2,
+        'pop_EmaxNorm{{{}}}'.format(i): 3e4,
+        'pop_ion_src_cgm{{{}}}'.format(i): False,
+        'pop_solve_rte{{{}}}'.format(i): True}
+
+def test():
+    pars = {'tau_redshift_bins': 128, 'initial_redshift': 30.,
+        'final_redshift': 10., 'include_He': True}
+    pars.update(_xray_pop(0, 0.1, -1.5))
+    pars.update(_xray_pop(1, 0.05, -1.))
+
+    mgb = ares.simulations.MetaGalacticBackground(**pars)
+    mgb.run()
+
+    x = {'igm_h_1': 0.9, 'igm_he_1': 0.95, 'igm_he_2': 0.01}
+    xarr = np.array([x['igm_h_1'], x['igm_he_1'], x['igm_he_2']])
+
+    zarr = mgb.solver.redshifts[0]
+    for iz in [10, 50, 100]:
+        rc = mgb.update_rate_coefficients(zarr[iz], zone='igm', igm_e=0.1,
+            **x)
+
+        for i in range(2):
+            ref = mgb._rc_tabs[i]['rc'][iz].copy()
+            ref[:,0] /= xarr
+
+            assert np.allclose(rc.data[i], ref, rtol=1e-10, atol=0)
+
+        # Nothing affects the CGM
+        rc = mgb.update_rate_coefficients(zarr[iz], zone='cgm', cgm_h_1=0.3)
+        assert np.all(rc.data == 0)
+
+if __name__ == '__main__':
+    test()
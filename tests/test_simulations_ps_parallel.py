@@ -0,0 +1,48 @@
+"""
+
+test_simulations_ps_parallel.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Tue Oct 20 09:12:37 PDT 2026
+
+Description: Make sure computing the 21-cm power spectrum in parallel over
+redshift, with threads or processes, gives the same answer as in serial.
+
+"""
+
+import ares
+import numpy as np
+
+def test():
+    pars = {'problem_type': 101}
+    pars['ps_output_z'] = np.array([14., 12., 10., 8.])
+    pars['ps_include_temp'] = True
+    pars['ps_include_ion'] = True
+    pars['bubble_shell_rvol_zone_0'] = 1.
+    pars['bubble_shell_ktemp_zone_0'] = 1e3
+    pars['ps_output_lnkmin'] = -3.
+    pars['ps_output_lnkmax'] = 0.
+    pars['ps_output_dlnk'] = 0.5
+    pars['ps_output_dlnR'] = 0.1
+    pars['verbose'] = False
+    pars['progress_bar'] = False
+
+    sim = ares.simulations.PowerSpectrum21cm(**pars)
+    sim.run()
+
+    for kind in ['thread', 'process']:
+        sim_p = ares.simulations.PowerSpectrum21cm(ps_num_workers=2,
+            ps_worker_type=kind, **pars)
+        sim_p.run()
+
+        for key in ['ps_21', 'cf_21']:
+            assert np.array_equal(sim.history[key], sim_p.history[key]), \
+                "{} differs with {} pool".format(key, kind)
+
+        # Attributes should reflect the last redshift, as in serial
+        assert np.array_equal(sim.zeta, sim_p.zeta)
+        assert sim.Th == sim_p.Th
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,61 @@
+"""
+
+test_sources_sps_interp.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 22:41:26 PDT 2026
+
+Description: Make sure interpolating SEDs in metallicity works, for single
+metallicities and batches of them.
+
+"""
+
+import ares
+import numpy as np
+from scipy.interpolate import interp1d
+
+def test():
+    lit = ares.util.read_lit('eldridge2009')
+    Zall = np.sort(list(lit.metallicities.values()))
+
+    # Fake SEDs, so we don't need the real tables
+    waves = np.linspace(100, 3e4, 500)
+    np.random.seed(0)
+    seds = [np.random.rand(waves.size, lit.times.size) * (1. + i) \
+        for i in range(Zall.size)]
+
+    for kind in ['linear', 'cubic']:
+        pars = {'source_sed': 'eldridge2009', 'source_sed_by_Z': (waves, seds),
+            'source_Z': 0.0123, 'interp_Z': kind, 'source_ssp': False}
+
+        src = ares.sources.SynthesisModel(**pars)
+
+        # Compare to interpolating one time at a time
+        ref = np.zeros_like(seds[0])
+        for i in range(lit.times.size):
+            func = interp1d(np.log10(Zall), np.array(seds)[:,:,i], axis=0,
+                kind=kind)
+            ref[:,i] = func(np.log10(0.0123))
+
+        assert np.allclose(src.data, ref)
+
+        # Batches of metallicities, incl. some outside the table
+        batch = src.data_at_Z([1e-4, 0.0123, 0.1])
+        assert batch.shape == (3, waves.size, lit.times.size)
+        assert np.allclose(batch[0], seds[0])
+        assert np.allclose(batch[1], ref)
+        assert np.allclose(batch[2], seds[-1])
+
+        # Interpolating in Z rather than log10(Z)
+        lin = src.data_at_Z(0.0123, logZ=False)
+        func = interp1d(Zall, np.array(seds), axis=0, kind=kind)
+        assert np.allclose(lin, func(0.0123))
+
+        # Luminosity vs. time for many metallicities at once
+        L = src.L_per_sfr_of_t(1600., Z=Zall)
+        assert L.shape == (Zall.size, lit.times.size)
+        assert np.allclose(L[2], src.L_per_sfr_of_t(1600., Z=Zall[2]))
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,82 @@
+"""
+
+test_static_fluctuations.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 16:10:25 PDT 2026
+
+Description: Check bubble overlap volumes and caching.
+
+"""
+
+import ares
+import numpy as np
+
+def test():
+
+    fluct = ares.static.Fluctuations(ps_include_temp=True, ps_temp_model=1)
+
+    # Limiting cases: no overlap, and small sphere entirely within big one
+    assert fluct.IV(2., 0.5, 0.6) == 0
+    assert np.allclose(fluct.IV(0.01, 0.5, 0.6), 4. * np.pi * 0.5**3 / 3.)
+
+    R = np.logspace(-2, 2, 50)
+    R_i = np.logspace(-1, 1, 40)
+    R_s = 2 * R_i
+
+    # Tabulated (all separations at once) vs. one separation at a time
+    tab_Vo = fluct.tab_overlap_volumes(R, R_i, R_s)
+    tab_IV = fluct.tab_intersectional_volumes(R, R_i, R_s, 0.0)
+
+    assert tab_Vo.shape == tab_IV.shape == (R.size, 6, R_i.size)
+
+    for i, sep in enumerate(R):
+        assert np.allclose(tab_Vo[i], fluct.overlap_volumes(sep, R_i, R_s))
+        assert np.allclose(tab_IV[i],
+            fluct.intersectional_volumes(sep, R_i, R_s, 0.0))
+
+    # Should be memoized, and shared between instances
+    fluct2 = ares.static.Fluctuations(ps_include_temp=True, ps_temp_model=1)
+    assert fluct2.tab_overlap_volumes(R, R_i, R_s) is tab_Vo
+
+    # Caches should survive re-setting the same model, but not a new one
+    fluct.zeta = 40.
+    fluct._cache_cf(10., 'ii')
+    fluct._cache_cf_[10.][('ii', fluct._field_key())] = R, np.zeros_like(R)
+    fp = fluct._model_fingerprint
+
+    fluct.zeta = 40.
+    assert fluct._cache_cf(10., 'ii') is not None
+    assert fluct._model_fingerprint == fp
+
+    fluct.zeta = 20.
+    assert fluct._cache_cf(10., 'ii') is None
+    assert fluct._model_fingerprint != fp
+
+    # At fixed redshift, results must follow R_s, Ts, etc.
+    z = 10.
+    kw = {'Th': 500., 'Tk': 5., 'Ja': 1e-11}
+    R_i = fluct.BubbleSizeDistribution(z)[0]
+
+    b1 = fluct.get_basics(z, R, R_s=2 * R_i, Ts=10., **kw)
+    b2 = fluct.get_basics(z, R, R_s=3 * R_i, Ts=20., **kw)
+    assert not np.allclose(b1['hh'][0], b2['hh'][0])
+
+    fresh = ares.static.Fluctuations(ps_include_temp=True, ps_temp_model=1)
+    fresh.zeta = 20.
+    ref = fresh.get_basics(z, R, R_s=3 * R_i, Ts=20., **kw)
+    for term in ref:
+        assert np.allclose(b2[term][0], ref[term][0])
+
+    # ...and going back to the first model shouldn't require any work
+    b3 = fluct.get_basics(z, R, R_s=2 * R_i, Ts=10., **kw)
+    for term in b1:
+        assert np.allclose(b1[term][0], b3[term][0])
+
+    c1 = fluct.ExpectationValue1pt(z, term='c', R_s=2 * R_i, Ts=10., **kw)
+    c2 = fluct.ExpectationValue1pt(z, term='c', R_s=2 * R_i, Ts=20., **kw)
+    assert c1 != c2
+
+if __name__ == '__main__':
+    test()
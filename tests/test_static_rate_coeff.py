@@ -0,0 +1,44 @@
+"""
+
+test_static_rate_coeff.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 21:32:05 PDT 2026
+
+Description: Make sure RateCoefficientArray sums over populations correctly
+and can stand in for a dictionary of rate coefficients.
+
+"""
+
+import numpy as np
+from ares.static import RateCoefficientArray
+
+def test():
+    rc = RateCoefficientArray(2, 3)
+
+    assert rc.data.shape == (2, 3, 5)
+
+    np.random.seed(10)
+    rc.ion[:] = np.random.rand(2, 3)
+    rc.heat[:] = np.random.rand(2, 3)
+    rc.ion2[:] = np.random.rand(2, 3, 3)
+    rc.ion[1,0] /= 2.
+
+    assert np.allclose(rc['k_ion'], np.sum(rc.data[...,0], axis=0)[None,:])
+    assert np.allclose(rc['k_heat'], np.sum(rc.data[...,1], axis=0)[None,:])
+    assert rc['k_ion2'].shape == (1, 3, 3)
+    assert np.allclose(rc['k_ion2'][0,1,2], rc.data[0,1,4] + rc.data[1,1,4])
+
+    # Should unpack like a dictionary
+    kw = dict(**rc)
+    assert sorted(kw.keys()) == ['k_heat', 'k_ion', 'k_ion2']
+    assert np.array_equal(kw['k_ion'], rc['k_ion'])
+
+    # Copies are independent
+    rc2 = rc.copy()
+    rc2.heat[:] = 0.0
+    assert np.all(rc['k_heat'] > 0)
+
+if __name__ == '__main__':
+    test()
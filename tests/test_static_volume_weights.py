@@ -0,0 +1,132 @@
+"""
+
+test_static_volume_weights.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Tue Oct 20 10:03:52 PDT 2026
+
+Description: Make sure precomputed weights for heating and ionization rates
+reproduce direct integration over the sampled background flux.
+
+"""
+
+import ares
+import numpy as np
+from scipy.integrate import simps, romb
+from ares.static.VolumeGlobal import E_th
+from ares.physics.Constants import J21_num, ev_per_hz
+
+pars = \
+{
+ 'pop_sfr_model': 'sfrd-func',
+ 'pop_type': 'galaxy',
+ 'pop_sfrd': lambda z: 0.1 * (1. + z)**-6.,
+ 'pop_sfrd_units': 'msun/yr/mpc^3',
+ 'pop_sed': 'pl',
+ 'pop_alpha': -1.5,
+ 'pop_Emin': 2e2,
+ 'pop_Emax': 3e4,
+ 'pop_EminNorm': 2e2,
+ 'pop_EmaxNorm': 3e4,
+ 'pop_solve_rte': True,
+ 'tau_redshift_bins': 128,
+ 'initial_redshift': 30.,
+ 'final_redshift': 10.,
+ 'include_He': True,
+}
+
+def _integrate(y, vol, integrator, lo=None):
+    E = vol.E[0][0][lo:]
+    x = vol.logE[0][0][lo:]
+    if integrator == 'romb':
+        return romb(y * E, dx=vol.dlogE[0][0][0 if lo is None else lo]) \
+            * np.log(10.)
+    elif integrator == 'trapz':
+        return np.trapz(y * E, x=x) * np.log(10.)
+    else:
+        return simps(y * E, x=x) * np.log(10.)
+
+def test():
+    np.random.seed(42)
+
+    for method in [1, 3]:
+        for approx_He in [False, True]:
+            mgb = ares.simulations.MetaGalacticBackground(approx_He=approx_He,
+                secondary_ionization=method, **pars)
+            vol = mgb.solver.volume
+
+            E = vol.E[0][0]
+            flux = np.random.rand(E.size)
+            norm = J21_num * vol.sigma0
+            sigma = lambda sp: vol.sigma_E[sp][0][0]
+
+            K = sigma('h_1') * (E - E_th[0])
+            if vol.approx_He:
+                K += vol.cosm.y * sigma('he_1') * (E - E_th[1])
+
+            # Romberg's method needs 2^k + 1 samples
+            integrators = ['simps', 'trapz']
+            if np.log2(E.size - 1) % 1 == 0:
+                integrators.append('romb')
+
+            for integrator in integrators:
+                for lo in [None, 3]:
+                    if (lo is not None) and (integrator == 'romb'):
+                        continue
+
+                    # Heating
+                    w = vol._rate_weights('heat', 0, 0, 0, lo=lo,
+                        integrator=integrator)
+                    y = (K * flux / norm / ev_per_hz)[lo:]
+
+                    if method > 1:
+                        assert w.shape == (y.size, vol.esec.x.size)
+                        for j in [0, vol.esec.x.size // 2, -1]:
+                            ref = _integrate(y * vol.fheat[0][0][lo:,j],
+                                vol, integrator, lo)
+                            assert np.allclose(np.dot(flux[lo:], w[:,j]), ref)
+                    else:
+                        ref = _integrate(y, vol, integrator, lo)
+                        assert np.allclose(np.dot(flux[lo:], w), ref)
+
+                    # Ionization
+                    w = vol._rate_weights('ion', 0, 0, 0, lo=lo,
+                        integrator=integrator)
+                    y = (sigma('h_1') * flux / norm / ev_per_hz)[lo:]
+                    ref = _integrate(y, vol, integrator, lo)
+                    assert np.allclose(np.dot(flux[lo:], w), ref)
+
+                    # Secondary ionization of HI by HI photo-electrons
+                    w = vol._rate_weights('ion2', 0, 0, 0, donor=0, lo=lo,
+                        integrator=integrator)
+                    Kd = sigma('h_1') * (E - E_th[0])
+                    if vol.pf['approx_He']:
+                        KHe = vol.cosm.y * sigma('he_1') * (E - E_th[1])
+                    else:
+                        KHe = np.zeros_like(E)
+
+                    y = (flux / E_th[0] / norm / ev_per_hz)[lo:]
+
+                    if method > 1:
+                        f = vol.fion['h_1'][0][0][lo:]
+                        for j in [0, vol.esec.x.size // 2, -1]:
+                            ref = _integrate(y * (f[:,j] * Kd[lo:] + KHe[lo:]),
+                                vol, integrator, lo)
+                            assert np.allclose(np.dot(flux[lo:], w[:,j]), ref)
+                    else:
+                        ref = _integrate(y * (Kd + KHe)[lo:], vol, integrator,
+                            lo)
+                        assert np.allclose(np.dot(flux[lo:], w), ref)
+
+    # New energy grid, new weights
+    w1 = vol._quadrature_weights(0, 0)
+    E = vol.E[0][0]
+    mgb.solver.energies[0][0] = E * 1.1
+    vol._tabulate_atomic_data()
+    w2 = vol._quadrature_weights(0, 0)
+    assert np.allclose(w2, 1.1 * w1)
+    assert np.allclose(np.dot(flux, w2), _integrate(flux, vol, 'simps'))
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,127 @@
+"""
+
+test_util_caching.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 10:41:02 PDT 2026
+
+Description:
+
+"""
+
+import ares
+import threading
+import numpy as np
+from ares.util.Caching import cached_property, ParameterDependent
+
+class Toy(ParameterDependent):
+    def __init__(self, **kwargs):
+        self.pf = {'toy_a': 1., 'toy_b': 2., 'other_c': 3.}
+        self.pf.update(kwargs)
+        self.calls = {'a': 0, 'b': 0, 'ab': 0}
+
+    @cached_property('toy_a')
+    def a(self):
+        self.calls['a'] += 1
+        return self.pf['toy_a']
+
+    @cached_property('toy_b')
+    def _tab_b(self):
+        self.calls['b'] += 1
+        return np.ones(3) * self.pf['toy_b']
+
+    @cached_property('other_*')
+    def ab(self):
+        self.calls['ab'] += 1
+        return self.a * self._tab_b * self.pf['other_c']
+
+class SlowToy(Toy):
+    started = threading.Event()
+    proceed = threading.Event()
+
+    @cached_property('other_*')
+    def slow(self):
+        self.started.set()
+        self.proceed.wait(10)
+        return self.pf['other_c']
+
+def test():
+
+    toy = Toy()
+
+    assert np.allclose(toy.ab, 6.)
+    assert np.allclose(toy.ab, 6.)
+    assert toy.calls == {'a': 1, 'b': 1, 'ab': 1}
+
+    # Attribute naming conventions
+    assert hasattr(toy, '_a') and hasattr(toy, '_tab_b_')
+
+    # Nothing should happen if values don't change
+    assert toy.update(toy_a=1.) == []
+    assert toy.calls == {'a': 1, 'b': 1, 'ab': 1}
+
+    # Changing `toy_b` should leave `a` alone but re-compute `ab`
+    assert toy.update(toy_b=3.) == ['toy_b']
+    assert np.allclose(toy.ab, 9.)
+    assert toy.calls == {'a': 1, 'b': 2, 'ab': 2}
+
+    # Wildcards
+    toy.update(other_c=1.)
+    assert np.allclose(toy.ab, 3.)
+    assert toy.calls == {'a': 1, 'b': 2, 'ab': 3}
+
+    # Deleting a cached property clears its dependents too
+    del toy.a
+    assert not hasattr(toy, '_ab')
+    assert np.allclose(toy.ab, 3.)
+    assert toy.calls == {'a': 2, 'b': 2, 'ab': 4}
+
+    try:
+        toy.update(toy_d=1.)
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('Should have raised KeyError!')
+
+    toy.clear_cache()
+    assert not hasattr(toy, '_a')
+
+    # What one thread is computing shouldn't leak into another's dependencies
+    toy = SlowToy()
+    thread = threading.Thread(target=lambda: toy.slow)
+    thread.start()
+    toy.started.wait(10)
+    assert toy.a == 1.
+    toy.proceed.set()
+    thread.join()
+
+    assert toy.slow == 3.
+    del toy.a
+    assert hasattr(toy, '_slow')
+
+    # Real-world example: changing fesc shouldn't re-compute the SFRD
+    pars = ares.util.ParameterBundle('mirocha2017:base').pars_by_pop(0, 1)
+    pars['pop_sed'] = 'sps-toy'
+    pars['pop_lum_per_sfr'] = 1e28
+    pars['pop_calib_lum'] = None
+
+    pop = ares.populations.GalaxyPopulation(**pars)
+
+    sfrd1 = pop.SFRD(10.)
+    tab = pop._tab_sfrd_total
+
+    pop.update(pop_fesc=0.5)
+
+    assert pop._tab_sfrd_total is tab
+    assert pop.SFRD(10.) == sfrd1
+    assert pop.fesc(z=10., Mh=1e10) == 0.5
+
+    # ...but changing the SFE should
+    pop.update(**{'pq_func_par0[0]': 2 * pop.pf['pq_func_par0[0]']})
+
+    assert not hasattr(pop, '_tab_sfrd_total_')
+    assert pop.SFRD(10.) != sfrd1
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,81 @@
+"""
+
+test_util_history.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 15:02:44 PDT 2026
+
+Description: 
+
+"""
+
+import numpy as np
+from ares.util.History import HistoryRecorder
+from ares.util.ReadData import _sort_history
+
+def test():
+    
+    snapshots = []
+    for i in range(1000):
+        snapshots.append({'Tk': np.array([i * 1.]), 'h_2': 1e-4 * i,
+            'k_ion': np.ones((1, 3)) * i})
+    
+    # Should reproduce _sort_history exactly
+    rec = HistoryRecorder(prefix='igm_', size=8)
+    rec.extend(snapshots)
+    
+    hist = rec.to_dict()
+    hist_old = _sort_history(snapshots, prefix='igm_', squeeze=True)
+    
+    assert len(rec) == 1000
+    assert set(hist.keys()) == set(hist_old.keys())
+    for key in hist:
+        assert np.array_equal(hist[key], hist_old[key])
+        
+    # Views of data so far
+    assert np.array_equal(rec['igm_h_2'], hist['igm_h_2'])
+    
+    # Only save a subset of fields
+    rec = HistoryRecorder(prefix='igm_', fields=['igm_Tk'])
+    rec.extend(snapshots)
+    
+    assert list(rec.keys()) == ['igm_Tk']
+    
+    # Mixing scalars and 1-element arrays is OK
+    rec = HistoryRecorder()
+    rec.append({'Ja': 0.0})
+    rec.append({'Ja': np.array([1.])})
+    
+    assert np.array_equal(rec.to_dict()['Ja'], [0., 1.])
+
+    # Fields that show up late (or go missing) are NaN where not recorded,
+    # and keep their dtype
+    rec = HistoryRecorder(size=2)
+    for i in range(5):
+        snapshot = {'z': 10. - i}
+        if i >= 2:
+            snapshot['Ts'] = np.float32(i)
+        if i != 3:
+            snapshot['count'] = i
+        rec.append(snapshot)
+
+    hist = rec.to_dict()
+    assert hist['Ts'].dtype == np.float32
+    assert np.isnan(hist['Ts'][0:2]).all() and np.all(hist['Ts'][2:] == [2, 3, 4])
+
+    # Integers can't be NaN: masked instead
+    assert np.issubdtype(hist['count'].dtype, np.integer)
+    assert np.array_equal(np.ma.getmaskarray(hist['count']),
+        [False, False, False, True, False])
+    assert hist['count'].sum() == 0 + 1 + 2 + 4
+    assert np.ma.is_masked(rec['count'])
+
+    # ...unless a float comes along later, in which case they're upcast
+    rec.append({'z': 5., 'count': 5.5})
+    assert rec['count'].dtype == np.float64
+    assert np.isnan(rec['count'][3]) and rec['count'][-1] == 5.5
+    assert not np.ma.isMaskedArray(rec['count'])
+    
+if __name__ == '__main__':
+    test()
@@ -13,6 +13,7 @@ Description:
 import ares
 import numpy as np
 from ares.util.Stats import GaussND
+from scipy.integrate import cumtrapz
 from scipy.interpolate import interp1d
 
 def test():
@@ -41,5 +42,22 @@ def test():
     
     z0 = func3(np.array([0.5, 1.3]))
 
+    # Integrals with row-dependent limits
+    x = np.linspace(0, 10, 101)
+    y = np.array([np.sin(x) + 2, x**2, np.exp(-x)])
+    lo = np.array([-1., 2.33, 5.])
+    hi = np.array([3.41, 2.37, 20.])
+
+    x0 = np.array([-1., 3.41, 4.55])
+    y0 = ares.util.Math.interp_rows(x0, x, y)
+    assert np.allclose(y0, [np.interp(x0[i], x, y[i]) for i in range(3)])
+
+    integ = ares.util.Math.integrate_rows(y, x, lo, hi)
+
+    for i in range(3):
+        cumtot = cumtrapz(y[i], x=x, initial=0.0)
+        ans = np.interp(hi[i], x, cumtot) - np.interp(lo[i], x, cumtot)
+        assert np.allclose(integ[i], ans)
+
 if __name__ == '__main__':
     test()
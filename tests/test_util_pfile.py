@@ -0,0 +1,111 @@
+"""
+
+test_util_pfile.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 19:02:45 PDT 2026
+
+Description: Make sure parameter files built by patching up compiled ones
+are identical to those built from scratch.
+
+"""
+
+import pickle
+import numpy as np
+from ares.util.ParameterFile import ParameterFile, _compiled
+
+def _from_scratch(**kwargs):
+    del _compiled[:]
+    return ParameterFile(**kwargs)
+
+def _check(base, **overrides):
+    kw = base.copy()
+    kw.update(overrides)
+
+    pf_ref = _from_scratch(**kw)
+    pf_base = _from_scratch(**base)
+    pf = ParameterFile(**kw)
+
+    # Make sure we actually took the shortcut
+    assert pf._compiled is pf_base._compiled, overrides
+
+    assert pf == pf_ref, overrides
+    assert pf.pfs == pf_ref.pfs, overrides
+    assert pf.Npops == pf_ref.Npops
+
+    # And that copy_with does the same thing
+    pf2 = pf_base.copy_with(**overrides)
+    assert pf2 == pf_ref
+    assert pf2._compiled is pf_base._compiled
+
+    return pf
+
+def _check_fallback(base, **overrides):
+    kw = base.copy()
+    kw.update(overrides)
+
+    pf_ref = _from_scratch(**kw)
+    pf_base = _from_scratch(**base)
+    pf = pf_base.copy_with(**overrides)
+
+    assert pf._compiled is not pf_base._compiled, overrides
+    assert pf == pf_ref, overrides
+
+def test():
+
+    # Single population
+    single = {'problem_type': 100, 'pop_sfr_model': 'sfe-func',
+        'pop_Tmin': 1e4, 'pop_fesc': 0.1, 'pop_sfe': 'pq', 'pq_func': 'pl',
+        'pq_func_par0': 0.05}
+
+    _check(single, pop_fesc=0.2)
+    _check(single, pop_fesc=0.2, pq_func_par0=0.1, sigma_8=0.9)
+    _check(single, pop_Mmin=np.logspace(8, 9, 10))
+
+    # Adds a population
+    _check_fallback(single, **{'pop_fesc{1}': 0.2})
+
+    # Multiple populations, including linked parameters and PQs
+    multi = {'problem_type': 100, 'pop_Tmin{0}': 1e4,
+        'pop_Tmin{1}': 'pop_Tmin{0}', 'pop_Tmin{2}': 'pop_Tmin{0}',
+        'pop_sfr_model{0}': 'sfe-func', 'pop_sfe{0}': 'pq[0]',
+        'pq_func[0]{0}': 'pl', 'pq_func_par0[0]{0}': 0.05}
+
+    pf = _check(multi, **{'pop_Tmin{0}': 2e4})
+    assert pf['pop_Tmin{1}'] == pf['pop_Tmin{2}'] == 2e4
+
+    _check(multi, **{'pop_Tmin_0_': 3e4, 'pq_func_par0[0]{0}': 0.1})
+    _check(multi, **{'pop_rad_yield{0}': 1e4, 'sigma_8': 0.8,
+        'pop_fstar{2}': 0.2, 'tanh_model': False})
+
+    # Re-parsing an already-parsed parameter file
+    pf = _from_scratch(**multi)
+    _check(dict(pf), **{'pop_Tmin{0}': 2e4, 'pop_fesc{0}': 0.5})
+
+    # These require a proper parse
+    _check_fallback(multi, **{'pop_Tmin{1}': 1e5})
+    _check_fallback(multi, **{'pop_sfe{0}': 0.1})
+    _check_fallback(multi, **{'pop_Tmin{3}': 1e4})
+    _check_fallback(multi, fesc=0.3)
+    _check_fallback(multi, problem_type=102)
+
+    # Legacy parameters (or problem_type=101) mean `backward_compatibility`
+    # may overwrite population parameters, so can't patch those.
+    _check_fallback({'problem_type': 101, 'Tmin': 1e4}, **{'pop_Tmin{0}': 3e4})
+    _check_fallback({'problem_type': 101, 'fstar': 0.1},
+        **{'pop_fstar{0}': 0.2})
+    _check_fallback({'problem_type': 100, 'Tmin': 1e4}, pop_Tmin=3e4)
+    legacy = multi.copy()
+    legacy['problem_type'] = 101
+    _check_fallback(legacy, **{'pop_Tmin{0}': 2e4})
+    _check_fallback(legacy, **{'pop_rad_yield{0}': 1e4})
+    _check(legacy, **{'pq_func_par0[0]{0}': 0.1, 'sigma_8': 0.8})
+
+    # Don't pickle compiled parameter files
+    pf = pickle.loads(pickle.dumps(pf))
+    assert not hasattr(pf, '_compiled')
+    assert pf.copy_with(**{'pop_Tmin{0}': 2e4})['pop_Tmin{1}'] == 2e4
+
+if __name__ == '__main__':
+    test()
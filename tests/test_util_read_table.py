@@ -0,0 +1,89 @@
+"""
+
+test_util_read_table.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 22:10:51 PDT 2026
+
+Description: Make sure cached binary copies of text tables are used, that
+they're tied to the version of the file and how it was read, and that the
+cache doesn't grow without bound.
+
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+from ares.util import ReadData
+
+def test():
+    path = tempfile.mkdtemp()
+    cache_dir = ReadData._cache_dir
+    max_bytes = ReadData._cache_max_bytes
+    ReadData._cache_dir = os.path.join(path, 'cache')
+
+    try:
+        fn = os.path.join(path, 'sed.txt')
+        data = np.random.rand(100, 5)
+        np.savetxt(fn, data)
+
+        d1 = ReadData.read_table(fn)
+        assert np.allclose(d1, data)
+        assert len(os.listdir(ReadData._cache_dir)) == 1
+
+        # Second time comes from cache, read-only
+        d2 = ReadData.read_table(fn)
+        assert isinstance(d2, np.memmap)
+        assert not d2.flags.writeable
+        assert np.array_equal(d1, d2)
+
+        # Different options, different entry
+        d3 = ReadData.read_table(fn, unpack=True)
+        assert np.array_equal(d3, d1.T)
+        assert len(os.listdir(ReadData._cache_dir)) == 2
+
+        # Changing the file means re-reading it, and the old copy goes away
+        np.savetxt(fn, 2 * data)
+        t = time.time() + 10
+        os.utime(fn, (t, t))
+        d4 = ReadData.read_table(fn)
+        assert np.allclose(d4, 2 * data)
+        assert len(os.listdir(ReadData._cache_dir)) == 2
+        assert isinstance(ReadData.read_table(fn), np.memmap)
+
+        # Skip cache altogether
+        d5 = ReadData.read_table(fn, cache=False)
+        assert not isinstance(d5, np.memmap)
+        assert len(os.listdir(ReadData._cache_dir)) == 2
+
+        # Least recently used tables are deleted once the cache is too big
+        size = sum([os.path.getsize(os.path.join(ReadData._cache_dir, name)) \
+            for name in os.listdir(ReadData._cache_dir)])
+        ReadData._cache_max_bytes = size + 100
+
+        # Age both copies, then use one again: the `unpack` copy should go
+        for i, name in enumerate(sorted(os.listdir(ReadData._cache_dir))):
+            cfn = os.path.join(ReadData._cache_dir, name)
+            os.utime(cfn, (t - 100 * (i + 1), t - 100 * (i + 1)))
+        ReadData.read_table(fn)
+        
+        fn2 = os.path.join(path, 'sed2.txt')
+        np.savetxt(fn2, data)
+        ReadData.read_table(fn2)
+        
+        names = os.listdir(ReadData._cache_dir)
+        assert len(names) == 2
+        assert sum([os.path.getsize(os.path.join(ReadData._cache_dir, name)) \
+            for name in names]) <= ReadData._cache_max_bytes
+        assert isinstance(ReadData.read_table(fn), np.memmap)
+        assert isinstance(ReadData.read_table(fn2), np.memmap)
+    finally:
+        ReadData._cache_dir = cache_dir
+        ReadData._cache_max_bytes = max_bytes
+        shutil.rmtree(path)
+
+if __name__ == '__main__':
+    test()
@@ -0,0 +1,90 @@
+"""
+
+test_util_registry.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 23:05:12 PDT 2026
+
+Description: Make sure literature data and filter throughputs are only
+loaded once per process.
+
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import importlib
+import numpy as np
+from ares.util.Survey import Survey
+from ares.util.ReadData import read_lit
+
+def test():
+
+    # Literature modules
+    b14 = read_lit('bouwens2014')
+    assert read_lit('bouwens2014') is b14
+    assert read_lit('bouwens2014', reload=True) is not b14
+
+    # Modules are re-read if they change
+    path = tempfile.mkdtemp()
+    _survey = importlib.import_module('ares.util.Survey')
+    _path = _survey._path
+
+    try:
+        fn = os.path.join(path, 'junk2020.py')
+        with open(fn, 'w') as f:
+            f.write('x = 1\n')
+
+        # read_lit looks for `path` relative to the current directory
+        rel = os.path.relpath(path)
+        assert read_lit('junk2020', path=rel).x == 1
+
+        with open(fn, 'w') as f:
+            f.write('x = 2\n')
+        t = time.time() + 10
+        os.utime(fn, (t, t))
+
+        assert read_lit('junk2020', path=rel).x == 2
+
+        # Fake WFC filters
+        os.mkdir(os.path.join(path, 'wfc'))
+        x = np.linspace(4000., 8000., 401)
+        for filt, cent in [('F606W', 6060.), ('F775W', 7750.)]:
+            y = np.exp(-(x - cent)**2 / 2. / 300.**2)
+            np.savetxt(os.path.join(path, 'wfc', 'wfc_{}.dat'.format(filt)),
+                np.array([x, y]).T, header='wave throughput')
+
+        _survey._path = path
+
+        s1 = Survey(cam='wfc')
+        data = s1._read_throughputs(filter_set=None, filters=['F606W'])
+        assert list(data.keys()) == ['F606W']
+        assert np.allclose(data['F606W'][2], 0.606, atol=0.01)
+
+        # Different Survey object shouldn't need to read anything
+        s2 = Survey(cam='wfc')
+        assert s2.get_filter('F606W') is data['F606W']
+
+        # Shared arrays can't be modified by accident
+        try:
+            data['F606W'][1][0] = 0.5
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('Shared filter arrays should be read-only.')
+        assert all([not element.flags.writeable for element in data['F606W'] \
+            if isinstance(element, np.ndarray)])
+        assert len(s2._read_throughputs(filter_set='W')) == 2
+
+        # Different options, different filter properties
+        s3 = Survey(cam='wfc', force_perfect=True)
+        assert s3.get_filter('F606W') is not data['F606W']
+        assert s3.get_filter('F606W')[4] == 1
+    finally:
+        _survey._path = _path
+        shutil.rmtree(path)
+
+if __name__ == '__main__':
+    test()
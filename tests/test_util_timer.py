@@ -0,0 +1,64 @@
+"""
+
+test_util_timer.py
+
+Author: Jordan Mirocha
+Affiliation: UCLA
+Created on: Mon Oct 19 17:51:13 PDT 2026
+
+Description: 
+
+"""
+
+import time
+from ares.util.Timer import TimerRegistry, timers, timed, get_timing
+
+class Toy(object):
+    @timed('outer', save_as='timing')
+    def run(self):
+        self.inner()
+        self.inner()
+
+    @timed('inner')
+    def inner(self):
+        time.sleep(0.01)
+
+def test():
+
+    reg = TimerRegistry()
+
+    with reg('a'):
+        with reg('b'):
+            time.sleep(0.01)
+        with reg.record() as breakdown:
+            with reg('c'):
+                with reg('b'):
+                    time.sleep(0.01)
+
+    assert sorted(reg.totals.keys()) == ['a', 'a/b', 'a/c', 'a/c/b']
+    assert reg.counts['a/b'] == 1
+    assert reg.totals['a'] >= reg.totals['a/b'] + reg.totals['a/c']
+
+    # Paths within records are relative
+    assert sorted(breakdown.keys()) == ['c', 'c/b']
+
+    # Stages are found wherever they live in the hierarchy
+    assert get_timing(reg.totals, 'b') == \
+        reg.totals['a/b'] + reg.totals['a/c/b']
+    assert get_timing(reg.totals) == reg.totals['a']
+
+    # Decorators use the global registry, and can save breakdowns
+    toy = Toy()
+    toy.run()
+
+    assert sorted(toy.timing.keys()) == ['outer', 'outer/inner']
+    assert timers.counts['outer/inner'] >= 2
+    assert get_timing(toy.timing, 'inner') >= 0.02
+    assert get_timing(toy.timing) >= get_timing(toy.timing, 'inner')
+
+    reg.report()
+    reg.reset()
+    assert reg.totals == {}
+
+if __name__ == '__main__':
+    test()